@@ -0,0 +1,11 @@
+"""
+Performance benchmarks for MultiBet.
+
+- `suite`: core quantitative paths (value score, Kelly staking, de-vig, CLV
+  backtesting) over synthetic slates, stored as JSON keyed by commit
+- `compare`: flags throughput or memory regressions between two runs
+- `shadow_scoring`: production latency with shadow scoring on and off
+- `dual_store_loader`: per-record versus batched Redis/BigQuery writes
+
+Run `python -m benchmarks --help` for the command line.
+"""
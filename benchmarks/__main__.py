@@ -0,0 +1,74 @@
+"""
+Command-line entry point for the benchmark suite.
+
+    python -m benchmarks run [--sizes 1k,100k,10m] [--quick]
+    python -m benchmarks compare BASELINE.json CURRENT.json [--tolerance 0.1]
+    python -m benchmarks shadow [--batches 2000] [--max-p99-ratio 1.2]
+
+`compare` exits with status 1 when any benchmark regressed, and `shadow`
+when shadow scoring raised production p99 latency above `--max-p99-ratio`
+times the no-shadow baseline.
+"""
+
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from .compare import compare_results, format_report, load_results
+from .shadow_scoring import run_benchmark
+from .suite import RESULTS_DIR, run_suite, save_results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the suite and store the results")
+    run.add_argument("--sizes", default="1k,100k", help="Comma-separated sizes")
+    run.add_argument("--repeats", type=int, default=3)
+    run.add_argument("--quick", action="store_true", help="1k slates, one repeat")
+    run.add_argument("--output-dir", default=str(RESULTS_DIR))
+
+    compare = commands.add_parser("compare", help="Flag regressions between runs")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=0.10)
+    compare.add_argument("--memory-tolerance", type=float, default=0.10)
+
+    shadow = commands.add_parser(
+        "shadow", help="Production latency with and without shadow scoring"
+    )
+    shadow.add_argument("--batches", type=int, default=2000)
+    shadow.add_argument("--rounds", type=int, default=20)
+    shadow.add_argument("--max-p99-ratio", type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+    if args.command == "shadow":
+        result = run_benchmark(args.batches, args.rounds)
+        print(json.dumps(result, indent=2))
+        return 1 if result["p99_ratio"] > args.max_p99_ratio else 0
+    if args.command == "run":
+        sizes = ["1k"] if args.quick else args.sizes.split(",")
+        repeats = 1 if args.quick else args.repeats
+        results = run_suite(sizes, repeats)
+        for name, result in results.items():
+            print(
+                f"{name:<32} {result['throughput']:>14,.0f} outcomes/s "
+                f"{result['peak_mb']:>9.1f} MB"
+            )
+        print(f"Saved {save_results(results, args.output_dir)}")
+        return 0
+
+    rows = compare_results(
+        load_results(args.baseline),
+        load_results(args.current),
+        args.tolerance,
+        args.memory_tolerance,
+    )
+    print(format_report(rows))
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+A benchmark regresses when its throughput falls, or its peak memory grows,
+by more than the tolerance relative to the baseline.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+
+def load_results(path: Union[str, Path]) -> Dict[str, Any]:
+    """Load a result file written by `suite.save_results`."""
+    return json.loads(Path(path).read_text())
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: float = 0.10,
+    memory_tolerance: float = 0.10,
+) -> List[Dict[str, Any]]:
+    """
+    Benchmarks present in both runs, with their relative changes.
+
+    Args:
+        baseline: Result document of the reference run
+        current: Result document of the run under test
+        tolerance: Allowed relative throughput drop
+        memory_tolerance: Allowed relative peak memory growth
+
+    Returns:
+        One entry per benchmark with throughput_change, memory_change and a
+        `regression` flag
+    """
+    rows = []
+    for name, before in baseline["results"].items():
+        after = current["results"].get(name)
+        if after is None:
+            continue
+        throughput_change = after["throughput"] / before["throughput"] - 1.0
+        memory_change = (
+            after["peak_mb"] / before["peak_mb"] - 1.0 if before["peak_mb"] else 0.0
+        )
+        rows.append({
+            "benchmark": name,
+            "throughput_change": throughput_change,
+            "memory_change": memory_change,
+            "regression": throughput_change < -tolerance
+            or memory_change > memory_tolerance,
+        })
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """Human-readable comparison table."""
+    lines = [f"{'benchmark':<32} {'throughput':>11} {'memory':>9}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['benchmark']:<32} {row['throughput_change']:>+10.1%} "
+            f"{row['memory_change']:>+8.1%}{flag}"
+        )
+    return "\n".join(lines)
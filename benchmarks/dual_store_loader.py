@@ -0,0 +1,106 @@
+"""
+Benchmark: per-record versus batched writes to the online and offline stores.
+
+The per-record path is the one in docs/data_ingestion_pipeline.md: one
+Redis SET and one BigQuery load job per record. The batched path is
+`DataLoader`. Both run against local stand-ins: fakeredis for Redis and
+`LocalBigQuery`, which charges a fixed latency per API call and a small
+one per row, like a remote service.
+
+Run with `python -m benchmarks.dual_store_loader`.
+"""
+
+import argparse
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+import fakeredis
+
+from src.core_engine.resilience import Resilience
+from src.data_pipelines.loader import DataLoader
+from src.data_pipelines.synthetic import SyntheticDataGenerator
+
+
+class _Job:
+    def result(self) -> None:
+        return None
+
+
+class LocalBigQuery:
+    """In-memory stand-in for the BigQuery client calls the loader uses."""
+
+    def __init__(self, call_latency: float = 0.005, row_latency: float = 2e-6):
+        self.call_latency = call_latency
+        self.row_latency = row_latency
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _append(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        time.sleep(self.call_latency + self.row_latency * len(rows))
+        with self._lock:
+            self.tables.setdefault(table, []).extend(rows)
+            self.calls += 1
+
+    def insert_rows_json(self, table: str, rows, row_ids=None) -> List[Any]:
+        self._append(table, list(rows))
+        return []
+
+    def load_table_from_json(self, rows, table: str) -> _Job:
+        self._append(table, list(rows))
+        return _Job()
+
+
+def per_record(records: List[Any], redis_client, bigquery) -> float:
+    """Seconds to write every record with the documented per-record path."""
+    start = time.perf_counter()
+    for record in records:
+        redis_client.set(
+            f"live_data:{record.event_id}", record.model_dump_json(), ex=3600
+        )
+        bigquery.load_table_from_json(
+            [record.model_dump(mode="json")], "multibet.unified_data"
+        ).result()
+    return time.perf_counter() - start
+
+
+def batched(records: List[Any], redis_client, bigquery, batch_size: int) -> float:
+    """Seconds to queue and deliver every record through DataLoader."""
+    loader = DataLoader(
+        redis_client, bigquery, batch_size=batch_size, resilience=Resilience()
+    )
+    start = time.perf_counter()
+    loader.load_many(records)
+    loader.close()
+    return time.perf_counter() - start
+
+
+def run_benchmark(n_records: int = 2000, batch_size: int = 500) -> Dict[str, Any]:
+    records = list(SyntheticDataGenerator(seed=0).sports_events(n_records))
+    baseline = per_record(records, fakeredis.FakeRedis(), LocalBigQuery())
+    bigquery = LocalBigQuery()
+    redis_client = fakeredis.FakeRedis()
+    loaded = batched(records, redis_client, bigquery, batch_size)
+    assert len(bigquery.tables["multibet.unified_data"]) == n_records
+    assert redis_client.dbsize() == n_records
+    return {
+        "records": n_records,
+        "per_record_per_s": n_records / baseline,
+        "batched_per_s": n_records / loaded,
+        "speedup": baseline / loaded,
+        "offline_calls": bigquery.calls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.records, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
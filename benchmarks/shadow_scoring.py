@@ -0,0 +1,123 @@
+"""
+Benchmark: production latency with and without shadow scoring.
+
+Scores a stream of batches arriving at a fixed interval, alternating blocks
+with shadowing off (production model only) and on (two heavier challengers
+shadowed and every output logged), and compares production latency
+percentiles across the pooled blocks.
+
+Run with `python -m benchmarks shadow`, which fails when production p99
+rises more than 20% over the baseline, or `python -m
+benchmarks.shadow_scoring` for the raw numbers.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.core_engine.base_model import BasePredictiveModel
+from src.core_engine.shadow import ShadowLog, ShadowScorer
+
+
+class MLPModel(BasePredictiveModel):
+    """Small dense network; `depth` sets the cost per prediction."""
+
+    def __init__(self, depth: int, seed: int = 0, width: int = 64):
+        rng = np.random.default_rng(seed)
+        self.layers = [
+            rng.normal(0, 1 / np.sqrt(width), (width, width)) for _ in range(depth)
+        ]
+        self.width = width
+
+    def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        x = np.full(self.width, features["x"])
+        for layer in self.layers:
+            x = np.tanh(layer @ x)
+        return {"prediction_probability": float(1 / (1 + np.exp(-x.mean())))}
+
+    def explain(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        return {}
+
+
+def _latencies(scorer: ShadowScorer, batch, n_batches: int, interval: float):
+    latencies = []
+    for _ in range(n_batches):
+        start = time.perf_counter()
+        scorer.score_batch(batch)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed * 1000.0)
+        time.sleep(max(0.0, interval - elapsed))
+    return latencies
+
+
+def _summary(latencies: List[float]) -> Dict[str, float]:
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {"p50_ms": float(p50), "p99_ms": float(p99), "batches": len(latencies)}
+
+
+def run_benchmark(
+    n_batches: int = 2000,
+    rounds: int = 4,
+    batch_size: int = 50,
+    interval: float = 0.005,
+) -> Dict[str, Any]:
+    """
+    Measure production latency with shadowing off and on.
+
+    Args:
+        n_batches: Batches scored in total per mode
+        rounds: Alternating off/on blocks per mode, to spread out drift
+        batch_size: Selections per batch
+        interval: Seconds between batch arrivals
+
+    Returns:
+        Latency summaries for "baseline" and "shadow", the p99 ratio and
+        the shadow scorer's stats
+    """
+    production = MLPModel(depth=4)
+    challengers = {"deep": MLPModel(depth=12, seed=1), "wide": MLPModel(8, seed=2)}
+    batch = [{"x": i / batch_size} for i in range(batch_size)]
+    per_round = max(1, n_batches // rounds)
+
+    baseline: List[float] = []
+    shadowed: List[float] = []
+    with tempfile.TemporaryDirectory() as directory:
+        log = ShadowLog(directory)
+        with (
+            ShadowScorer(production, {}) as plain,
+            ShadowScorer(production, challengers, log=log) as shadow,
+        ):
+            _latencies(shadow, batch, 20, interval)  # start the workers
+            for _ in range(rounds):
+                baseline += _latencies(plain, batch, per_round, interval)
+                shadowed += _latencies(shadow, batch, per_round, interval)
+        # Closing waits for the batches still being shadowed.
+        stats = dict(shadow.stats)
+        log.close()
+
+    result = {
+        "baseline": _summary(baseline),
+        "shadow": _summary(shadowed),
+        "stats": stats,
+    }
+    result["p99_ratio"] = result["shadow"]["p99_ms"] / result["baseline"]["p99_ms"]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batches", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+    result = run_benchmark(args.batches, args.rounds, args.batch_size, args.interval)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Synthetic betting slates for benchmarks.
+
+A slate is a batch of markets with bookmaker odds (including margin), the
+model's probability for each outcome and the closing odds, all as flat
+arrays in the segmented layout used by `src.core_engine.devig`.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+SIZES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+
+
+def generate_slate(
+    n_outcomes: int,
+    outcomes_per_market: int = 3,
+    margin: float = 0.05,
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Generate a slate of about `n_outcomes` outcomes.
+
+    Args:
+        n_outcomes: Total outcomes (rounded down to whole markets)
+        outcomes_per_market: Outcomes in each market
+        margin: Bookmaker overround applied proportionally
+        seed: Random seed
+
+    Returns:
+        Dictionary with "odds", "offsets", "probabilities" and
+        "closing_odds"
+    """
+    rng = np.random.default_rng(seed)
+    n_markets = max(1, n_outcomes // outcomes_per_market)
+    true = rng.dirichlet(np.full(outcomes_per_market, 2.0), n_markets)
+    true = np.clip(true, 0.01, None)
+    true /= true.sum(axis=1, keepdims=True)
+
+    odds = 1.0 / (true * (1.0 + margin))
+    model = true * rng.lognormal(0.0, 0.05, true.shape)
+    model /= model.sum(axis=1, keepdims=True)
+    closing = odds * rng.lognormal(0.0, 0.03, odds.shape)
+
+    offsets = np.arange(n_markets + 1, dtype=np.int64) * outcomes_per_market
+    return {
+        "odds": odds.ravel(),
+        "offsets": offsets,
+        "probabilities": model.ravel(),
+        "closing_odds": np.maximum(closing.ravel(), 1.01),
+    }
@@ -0,0 +1,174 @@
+"""
+Benchmarks of the core quantitative paths over synthetic slates.
+
+Each benchmark is a function of a slate; the runner reports the best
+wall-clock time over the repeats, throughput in outcomes per second and
+peak memory allocated while it runs. Results are stored as JSON keyed by
+the git commit, so runs at different commits can be compared with
+`benchmarks.compare`.
+"""
+
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+
+from config.app_config import Config
+from src.core_engine.devig import remove_overround
+from src.core_engine.ledger import closing_line_value
+from src.core_engine.model_comparison import compare_models
+from src.core_engine.staking import kelly_stakes, value_scores
+
+from .slates import SIZES, generate_slate
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_CONFIG = Config()
+
+
+def bench_value_score(slate: Dict[str, np.ndarray]) -> Any:
+    return value_scores(slate["probabilities"], slate["odds"])
+
+
+def bench_kelly_stake(slate: Dict[str, np.ndarray]) -> Any:
+    return kelly_stakes(
+        slate["probabilities"], slate["odds"], bankroll=10_000.0, app_config=_CONFIG
+    )
+
+
+def bench_devig_multiplicative(slate: Dict[str, np.ndarray]) -> Any:
+    return remove_overround(slate["odds"], slate["offsets"], method="multiplicative")
+
+
+def bench_devig_power(slate: Dict[str, np.ndarray]) -> Any:
+    return remove_overround(slate["odds"], slate["offsets"], method="power")
+
+
+def bench_devig_shin(slate: Dict[str, np.ndarray]) -> Any:
+    return remove_overround(slate["odds"], slate["offsets"], method="shin")
+
+
+def bench_clv_backtest(slate: Dict[str, np.ndarray]) -> Any:
+    """Per-bet CLV of the model's value bets against a flat-staking baseline."""
+    clv = closing_line_value(slate["odds"], slate["closing_odds"])
+    value = value_scores(slate["probabilities"], slate["odds"]) > 0
+    return compare_models(clv, np.where(value, clv, 0.0), n_resamples=100, seed=0)
+
+
+BENCHMARKS: Dict[str, Callable[[Dict[str, np.ndarray]], Any]] = {
+    "value_score": bench_value_score,
+    "kelly_stake": bench_kelly_stake,
+    "devig_multiplicative": bench_devig_multiplicative,
+    "devig_power": bench_devig_power,
+    "devig_shin": bench_devig_shin,
+    "clv_backtest": bench_clv_backtest,
+}
+
+
+def measure(
+    func: Callable[[Dict[str, np.ndarray]], Any],
+    slate: Dict[str, np.ndarray],
+    repeats: int = 3,
+) -> Dict[str, float]:
+    """
+    Time a benchmark and measure its peak allocations.
+
+    Timing runs are done without tracemalloc; one extra traced run measures
+    peak memory.
+    """
+    seconds = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(slate)
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func(slate)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    n_outcomes = len(slate["odds"])
+    return {
+        "outcomes": n_outcomes,
+        "seconds": seconds,
+        "throughput": n_outcomes / seconds if seconds > 0 else float("inf"),
+        "peak_mb": peak / 2**20,
+    }
+
+
+def run_suite(
+    sizes: Sequence[str] = ("1k", "100k"),
+    repeats: int = 3,
+    names: Optional[Sequence[str]] = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Run benchmarks over slates of the given sizes.
+
+    Args:
+        sizes: Keys of SIZES
+        repeats: Timing runs per benchmark (best is kept)
+        names: Benchmarks to run; all when None
+
+    Returns:
+        Measurements keyed by "<benchmark>[<size>]"
+    """
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        raise ValueError(f"Unknown sizes {unknown}; choose from {list(SIZES)}")
+    selected = list(names) if names else list(BENCHMARKS)
+    results = {}
+    for size in sizes:
+        slate = generate_slate(SIZES[size])
+        for name in selected:
+            results[f"{name}[{size}]"] = measure(BENCHMARKS[name], slate, repeats)
+    return results
+
+
+def current_commit() -> str:
+    """Short hash of HEAD, suffixed with "-dirty" for uncommitted changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def save_results(
+    results: Dict[str, Dict[str, float]],
+    directory: Path = RESULTS_DIR,
+    commit: Optional[str] = None,
+) -> Path:
+    """Write results to `<directory>/<commit>.json` and return the path."""
+    commit = commit or current_commit()
+    document = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{commit}.json"
+    path.write_text(json.dumps(document, indent=2))
+    return path
@@ -3,10 +3,175 @@ Configuration settings for the MultiBet application.
 This module provides configuration management including DRY_RUN mode.
 """
 
+import hashlib
 import json
+import logging
 import os
+import threading
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _validation_errors(get: Callable[[str, Any], Any]) -> List[str]:
+    """Collect validation errors for configuration values read via `get`."""
+    errors = []
+
+    # Validate percentage values
+    if not 0 <= get("MAX_STAKE_PERCENTAGE", 0) <= 1:
+        errors.append("MAX_STAKE_PERCENTAGE must be between 0 and 1")
+
+    if not 0 <= get("KELLY_FRACTION", 0) <= 1:
+        errors.append("KELLY_FRACTION must be between 0 and 1")
+
+    # Validate odds ranges
+    min_odds = get("MIN_ODDS", 1.0)
+    max_odds = get("MAX_ODDS", 10.0)
+    if min_odds >= max_odds:
+        errors.append("MIN_ODDS must be less than MAX_ODDS")
+
+    # Validate stake limits
+    min_stake = get("MIN_STAKE", 0)
+    max_stake = get("MAX_STAKE", float("inf"))
+    if min_stake >= max_stake:
+        errors.append("MIN_STAKE must be less than MAX_STAKE")
+
+    # Validate thread pool sizes
+    for key in ("TF_INTRA_OP_THREADS", "TF_INTER_OP_THREADS", "TRIAL_MAX_WORKERS"):
+        if get(key, 0) < 0:
+            errors.append(f"{key} must be non-negative")
+    if get("TRIAL_THREADS", 1) < 1:
+        errors.append("TRIAL_THREADS must be at least 1")
+
+    # Validate resilience settings
+    if get("RETRY_MAX_ATTEMPTS", 3) < 1:
+        errors.append("RETRY_MAX_ATTEMPTS must be at least 1")
+    if get("RETRY_BUDGET_RATIO", 0.1) < 0:
+        errors.append("RETRY_BUDGET_RATIO must be non-negative")
+    if get("CIRCUIT_FAILURE_THRESHOLD", 5) < 1:
+        errors.append("CIRCUIT_FAILURE_THRESHOLD must be at least 1")
+
+    # Validate task queue settings
+    for key in ("TASK_QUEUE_SHARDS", "TASK_MAX_ATTEMPTS"):
+        if get(key, 1) < 1:
+            errors.append(f"{key} must be at least 1")
+    if get("TASK_VISIBILITY_TIMEOUT", 30) <= 0:
+        errors.append("TASK_VISIBILITY_TIMEOUT must be positive")
+
+    # Validate profiling settings
+    if get("PROFILE_MODE", None) not in (None, "", "off", "cprofile", "tracemalloc"):
+        errors.append("PROFILE_MODE must be cprofile, tracemalloc or off")
+    if get("PROFILE_TOP_N", 20) < 1:
+        errors.append("PROFILE_TOP_N must be at least 1")
+
+    return errors
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """
+    Immutable, typed view of the configuration at one point in time.
+
+    Hot paths take one snapshot per batch and read attributes from it, so
+    they neither repeat dict lookups nor see settings change mid-batch.
+    `version` increases every time the source Config changes and can be
+    used as a cache key. Keys without a typed field are kept in `extra`.
+    """
+
+    version: int
+    dry_run: bool
+    debug: bool
+    log_level: str
+    model_threshold: float
+    max_stake_percentage: float
+    min_odds: float
+    max_odds: float
+    clv_threshold: float
+    kelly_fraction: float
+    min_stake: float
+    max_stake: float
+    database_url: str
+    redis_url: str
+    api_timeout: int
+    rate_limit_requests: int
+    rate_limit_window: int
+    model_update_interval: int
+    prediction_confidence_threshold: float
+    feature_importance_threshold: float
+    artifact_dir: Optional[str]
+    trial_max_workers: int
+    trial_threads: int
+    tf_intra_op_threads: int
+    tf_inter_op_threads: int
+    max_daily_stake: float
+    max_exposure_per_match: float
+    stop_loss_threshold: float
+    alert_webhook_url: Optional[str]
+    monitoring_enabled: bool
+    performance_log_interval: int
+    extra: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+
+    def __post_init__(self):
+        """Check field types and the same rules as Config.validate_configuration."""
+        for name, (expected, optional) in _SNAPSHOT_FIELDS.items():
+            value = getattr(self, name)
+            if value is None and optional:
+                continue
+            # bool is a subclass of int, so reject it explicitly for numbers
+            if not isinstance(value, expected) or (
+                isinstance(value, bool) and expected is not bool
+            ):
+                raise TypeError(
+                    f"{name.upper()} must be {expected.__name__}, "
+                    f"got {type(value).__name__}"
+                )
+
+        errors = _validation_errors(self.get)
+        if errors:
+            raise ValueError("Configuration validation failed: " + "; ".join(errors))
+
+    @classmethod
+    def from_mapping(cls, values: Mapping[str, Any], version: int = 0):
+        """Build a snapshot from upper-case config keys, coercing ints to floats."""
+        kwargs: Dict[str, Any] = {"version": version}
+        extra = {}
+        for key, value in values.items():
+            name = key.lower()
+            if name not in _SNAPSHOT_FIELDS:
+                extra[key] = value
+                continue
+            expected, _ = _SNAPSHOT_FIELDS[name]
+            if expected is float and type(value) is int:
+                value = float(value)
+            kwargs[name] = value
+        missing = [name for name in _SNAPSHOT_FIELDS if name not in kwargs]
+        if missing:
+            raise ValueError(
+                "Missing configuration keys: "
+                + ", ".join(name.upper() for name in missing)
+            )
+        return cls(**kwargs, extra=MappingProxyType(extra))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look up a value by its upper-case config key."""
+        name = key.lower()
+        if name in _SNAPSHOT_FIELDS:
+            return getattr(self, name)
+        return self.extra.get(key, default)
+
+
+# Typed snapshot fields: name -> (type, whether None is allowed)
+_SNAPSHOT_FIELDS = {
+    spec.name: (
+        str if spec.type == Optional[str] else spec.type,
+        spec.type == Optional[str],
+    )
+    for spec in fields(ConfigSnapshot)
+    if spec.name not in ("version", "extra")
+}
 
 
 class Config:
@@ -14,6 +179,15 @@ class Config:
 
     def __init__(self, config_file: Optional[str] = None):
         """Initialize configuration with optional config file."""
+        self._lock = threading.RLock()
+        self._version = 0
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._subscribers: List[
+            Callable[[Optional[ConfigSnapshot], ConfigSnapshot], None]
+        ] = []
+        # Values set at runtime; re-applied on top of every reload
+        self._overrides: Dict[str, Any] = {}
+        self.config_file = config_file
         self.config_data = self._load_default_config()
 
         if config_file:
@@ -45,10 +219,27 @@ class Config:
             "API_TIMEOUT": 30,
             "RATE_LIMIT_REQUESTS": 100,
             "RATE_LIMIT_WINDOW": 3600,
+            # Outbound I/O resilience (src/core_engine/resilience.py)
+            "RETRY_MAX_ATTEMPTS": 3,
+            "RETRY_BUDGET_RATIO": 0.1,  # retries per first attempt
+            "CIRCUIT_FAILURE_THRESHOLD": 5,
+            "CIRCUIT_RECOVERY_TIMEOUT": 60,
+            # Redis scoring task queue (src/data_pipelines/task_queue.py)
+            "TASK_QUEUE_SHARDS": 16,
+            "TASK_VISIBILITY_TIMEOUT": 30,  # seconds a claimed task stays hidden
+            "TASK_MAX_ATTEMPTS": 5,
             # Model and prediction settings
             "MODEL_UPDATE_INTERVAL": 86400,  # 24 hours in seconds
             "PREDICTION_CONFIDENCE_THRESHOLD": 0.7,
             "FEATURE_IMPORTANCE_THRESHOLD": 0.01,
+            # Retraining pipeline artifact store (None disables checkpointing)
+            "ARTIFACT_DIR": None,
+            # Parallel candidate training (0 workers = cores // threads)
+            "TRIAL_MAX_WORKERS": 0,
+            "TRIAL_THREADS": 1,
+            # TensorFlow CPU thread pools (0 lets TensorFlow choose)
+            "TF_INTRA_OP_THREADS": 0,
+            "TF_INTER_OP_THREADS": 0,
             # Risk management
             "MAX_DAILY_STAKE": 500.0,
             "MAX_EXPOSURE_PER_MATCH": 200.0,
@@ -57,6 +248,10 @@ class Config:
             "ALERT_WEBHOOK_URL": None,
             "MONITORING_ENABLED": True,
             "PERFORMANCE_LOG_INTERVAL": 3600,
+            # Per-stage profiling: None, "cprofile" or "tracemalloc"
+            "PROFILE_MODE": None,
+            "PROFILE_DIR": "profiles",
+            "PROFILE_TOP_N": 20,
         }
 
     def _load_config_file(self, config_file: str) -> None:
@@ -89,6 +284,19 @@ class Config:
             "MULTIBET_REDIS_URL": ("REDIS_URL", str),
             "MULTIBET_KELLY_FRACTION": ("KELLY_FRACTION", float),
             "MULTIBET_MAX_DAILY_STAKE": ("MAX_DAILY_STAKE", float),
+            "MULTIBET_ARTIFACT_DIR": ("ARTIFACT_DIR", str),
+            "MULTIBET_TRIAL_MAX_WORKERS": ("TRIAL_MAX_WORKERS", int),
+            "MULTIBET_TRIAL_THREADS": ("TRIAL_THREADS", int),
+            "MULTIBET_TF_INTRA_OP_THREADS": ("TF_INTRA_OP_THREADS", int),
+            "MULTIBET_TF_INTER_OP_THREADS": ("TF_INTER_OP_THREADS", int),
+            "MULTIBET_RETRY_MAX_ATTEMPTS": ("RETRY_MAX_ATTEMPTS", int),
+            "MULTIBET_RETRY_BUDGET_RATIO": ("RETRY_BUDGET_RATIO", float),
+            "MULTIBET_TASK_QUEUE_SHARDS": ("TASK_QUEUE_SHARDS", int),
+            "MULTIBET_TASK_VISIBILITY_TIMEOUT": ("TASK_VISIBILITY_TIMEOUT", float),
+            "MULTIBET_TASK_MAX_ATTEMPTS": ("TASK_MAX_ATTEMPTS", int),
+            "MULTIBET_PROFILE": ("PROFILE_MODE", str),
+            "MULTIBET_PROFILE_DIR": ("PROFILE_DIR", str),
+            "MULTIBET_PROFILE_TOP_N": ("PROFILE_TOP_N", int),
         }
 
         for env_var, (config_key, parser) in env_mapping.items():
@@ -106,13 +314,110 @@ class Config:
             return value
         return value.lower() in ("true", "1", "yes", "on", "enabled")
 
+    def reload(self) -> ConfigSnapshot:
+        """
+        Re-read the config file and environment and swap them in atomically.
+
+        The new values are parsed and validated on a separate Config first;
+        if that fails the current configuration stays active and the error
+        is raised. On success the data dict and snapshot are replaced by
+        reference, so readers never see a half-applied reload, and
+        subscribers are called with (old_snapshot, new_snapshot); the old
+        snapshot is None if the previous values were invalid.
+
+        Values set at runtime with `set` (such as DRY_RUN from
+        `enable_dry_run`) are overrides: they are re-applied on top of the
+        reloaded values, so a file change never silently undoes them. Use
+        `clear_override` to let the file's value apply again.
+        """
+        candidate = Config(self.config_file)
+
+        with self._lock:
+            candidate.config_data.update(self._overrides)
+            candidate.validate_configuration()
+            try:
+                old_snapshot: Optional[ConfigSnapshot] = self.snapshot()
+            except (ValueError, TypeError):
+                old_snapshot = None
+            new_snapshot = ConfigSnapshot.from_mapping(
+                candidate.config_data, version=self._version + 1
+            )
+            self.config_data = candidate.config_data
+            self._version = new_snapshot.version
+            self._snapshot = new_snapshot
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(old_snapshot, new_snapshot)
+            except Exception:
+                logger.exception(f"Config subscriber {callback!r} failed")
+        return new_snapshot
+
+    def subscribe(
+        self, callback: Callable[[Optional[ConfigSnapshot], ConfigSnapshot], None]
+    ) -> Callable[[], None]:
+        """
+        Register a callback for reloads; returns a function that unsubscribes.
+
+        Callbacks run on the reloading thread and receive the old and new
+        snapshots. Exceptions are logged and do not affect other subscribers.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def watch(self, interval: float = 1.0) -> "ConfigWatcher":
+        """Start a background watcher that reloads when the config file changes."""
+        watcher = ConfigWatcher(self, interval=interval)
+        watcher.start()
+        return watcher
+
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key."""
         return self.config_data.get(key, default)
 
     def set(self, key: str, value: Any) -> None:
-        """Set configuration value."""
-        self.config_data[key] = value
+        """Set a configuration value that persists across reloads."""
+        with self._lock:
+            self._overrides[key] = value
+            self.config_data[key] = value
+            self._version += 1
+            self._snapshot = None
+
+    def clear_override(self, key: str) -> None:
+        """Drop a runtime value so the next reload applies the file's value."""
+        with self._lock:
+            self._overrides.pop(key, None)
+
+    @property
+    def version(self) -> int:
+        """Number of changes made through `set` or `reload` since construction."""
+        return self._version
+
+    def snapshot(self) -> ConfigSnapshot:
+        """
+        Return an immutable, validated snapshot of the current settings.
+
+        The snapshot is cached until the next `set`, so taking one per batch
+        is cheap. Raises ValueError/TypeError if the current values are
+        invalid.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version != self._version:
+                self._snapshot = ConfigSnapshot.from_mapping(
+                    self.config_data, version=self._version
+                )
+            return self._snapshot
 
     @property
     def dry_run(self) -> bool:
@@ -142,26 +447,7 @@ class Config:
 
     def validate_configuration(self) -> bool:
         """Validate configuration values for consistency."""
-        errors = []
-
-        # Validate percentage values
-        if not 0 <= self.get("MAX_STAKE_PERCENTAGE", 0) <= 1:
-            errors.append("MAX_STAKE_PERCENTAGE must be between 0 and 1")
-
-        if not 0 <= self.get("KELLY_FRACTION", 0) <= 1:
-            errors.append("KELLY_FRACTION must be between 0 and 1")
-
-        # Validate odds ranges
-        min_odds = self.get("MIN_ODDS", 1.0)
-        max_odds = self.get("MAX_ODDS", 10.0)
-        if min_odds >= max_odds:
-            errors.append("MIN_ODDS must be less than MAX_ODDS")
-
-        # Validate stake limits
-        min_stake = self.get("MIN_STAKE", 0)
-        max_stake = self.get("MAX_STAKE", float("inf"))
-        if min_stake >= max_stake:
-            errors.append("MIN_STAKE must be less than MAX_STAKE")
+        errors = _validation_errors(self.get)
 
         if errors:
             raise ValueError("Configuration validation failed: " + "; ".join(errors))
@@ -177,6 +463,89 @@ class Config:
         return f"Config(DRY_RUN={self.dry_run}, DEBUG={self.debug})"
 
 
+class ConfigWatcher:
+    """
+    Polls a Config's file and reloads it when the contents change.
+
+    Polling runs on a daemon thread, so parsing and validation never happen
+    on the caller's hot path. A file that fails to parse or validate is
+    logged and ignored; the last good configuration stays active.
+    """
+
+    def __init__(self, config: "Config", interval: float = 1.0):
+        """
+        Initialize the watcher.
+
+        Args:
+            config: Configuration to reload; must have a config_file
+            interval: Seconds between file checks
+        """
+        if not config.config_file:
+            raise ValueError("Config has no config_file to watch")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.config = config
+        self.interval = interval
+        self.reload_count = 0
+        self.error_count = 0
+        self._fingerprint = self._read_fingerprint()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _read_fingerprint(self) -> Optional[str]:
+        try:
+            with open(self.config.config_file, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload if the file contents changed since the last check."""
+        fingerprint = self._read_fingerprint()
+        if fingerprint is None or fingerprint == self._fingerprint:
+            return False
+        self._fingerprint = fingerprint
+
+        try:
+            self.config.reload()
+        except (ValueError, TypeError, OSError) as e:
+            self.error_count += 1
+            logger.error(f"Config reload failed, keeping current settings: {e}")
+            return False
+        self.reload_count += 1
+        logger.info(f"Reloaded configuration from {self.config.config_file}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        """Start polling in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="config-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop polling and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def __enter__(self) -> "ConfigWatcher":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
 # Global configuration instance
 config = Config()
 
@@ -194,3 +563,8 @@ def disable_dry_run():
 def is_dry_run() -> bool:
     """Check if application is currently in DRY_RUN mode."""
     return config.dry_run
+
+
+def get_snapshot() -> ConfigSnapshot:
+    """Return an immutable snapshot of the global configuration."""
+    return config.snapshot()
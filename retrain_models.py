@@ -4,12 +4,32 @@ Automated Model Retraining Pipeline
 
 This script implements the automated retraining pipeline as per User Story 4.3.
 It handles data retrieval from BigQuery, model training, backtesting, and deployment.
+
+Heavy dependencies (BigQuery client, CatBoost) are only imported by the
+pipeline steps that use them, so `--help` and `--validate-config` start fast.
+
+When an artifact directory is configured (`--artifact-dir` or ARTIFACT_DIR),
+every stage output is stored content-addressed: stages whose inputs are
+unchanged are skipped on rerun, and `--resume` continues from the last
+stage the previous run completed.
+
+Set MULTIBET_PROFILE=cprofile or MULTIBET_PROFILE=tracemalloc to profile
+each stage (see src/core_engine/profiling.py).
 """
 
+import argparse
 import logging
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.core_engine.artifacts import ArtifactStore, StageRunner
+from src.core_engine.hyperparameter_search import successive_halving
+from src.core_engine.instrumentation import get_instrumentation, timer
+from src.core_engine.model_comparison import compare_models
+from src.core_engine.profiling import get_profiler, profile_stage
 
 # Setup logging
 logging.basicConfig(
@@ -48,29 +68,108 @@ def get_latest_training_data() -> Dict[str, Any]:
         raise
 
 
-def train_new_model(training_data: Dict[str, Any]) -> Dict[str, Any]:
+# CatBoost configurations evaluated on every retrain
+DEFAULT_CANDIDATES = [
+    {"depth": 4, "learning_rate": 0.1, "l2_leaf_reg": 3},
+    {"depth": 6, "learning_rate": 0.05, "l2_leaf_reg": 3},
+    {"depth": 6, "learning_rate": 0.1, "l2_leaf_reg": 10},
+    {"depth": 8, "learning_rate": 0.03, "l2_leaf_reg": 5},
+    {"depth": 8, "learning_rate": 0.1, "l2_leaf_reg": 1},
+    {"depth": 10, "learning_rate": 0.05, "l2_leaf_reg": 10},
+]
+
+# Champion/challenger deployment rule
+CLV_DEPLOY_THRESHOLD = 0.02  # Fallback when bet-level CLV is unavailable
+MIN_PAIRED_BETS = 100
+COMPARISON_RESAMPLES = 2000
+COMPARISON_ALPHA = 0.05
+
+# Boosting iterations for the first and last successive-halving rungs
+MIN_TRIAL_ITERATIONS = 100
+MAX_TRIAL_ITERATIONS = 900
+
+
+def train_candidate(
+    training_data: Dict[str, Any],
+    params: Dict[str, Any],
+    iterations: int,
+    thread_count: int,
+) -> Tuple[Dict[str, Any], float]:
     """
-    Trains a new CatBoost model using the provided training data.
+    Trains one CatBoost configuration and scores it on validation CLV.
+
+    Runs inside a trial worker process, so it must stay a top-level function.
 
     Args:
         training_data: Dictionary containing features and targets
+        params: CatBoost hyperparameters for this candidate
+        iterations: Boosting iterations allowed at this rung
+        thread_count: CatBoost thread_count for this trial
+
+    Returns:
+        Tuple of (trained model info, validation CLV)
+    """
+    # Placeholder implementation - would fit
+    # CatBoostClassifier(iterations=iterations, thread_count=thread_count, **params)
+    # on the training split and compute CLV on the validation split
+    return {"model": None, "params": params, "iterations": iterations}, 0.0
+
+
+def train_new_model(
+    training_data: Dict[str, Any],
+    candidates: Optional[List[Dict[str, Any]]] = None,
+    max_workers: Optional[int] = None,
+    threads_per_trial: int = 1,
+) -> Dict[str, Any]:
+    """
+    Trains candidate CatBoost models and keeps the best by validation CLV.
+
+    Candidates are trained in a process pool with successive halving, so
+    losing configurations are stopped after a fraction of the full budget.
+
+    Args:
+        training_data: Dictionary containing features and targets
+        candidates: Hyperparameter sets to try (DEFAULT_CANDIDATES if None)
+        max_workers: Concurrent trials (cores // threads_per_trial if None)
+        threads_per_trial: Threads each CatBoost trial may use
 
     Returns:
         Dictionary containing the trained model and training metrics
     """
-    logger.info("Training new CatBoost model...")
+    candidates = candidates or DEFAULT_CANDIDATES
+    logger.info(f"Training {len(candidates)} candidate CatBoost models...")
 
     try:
-        # Placeholder implementation - would train CatBoost model
-        # using the training data and configured hyperparameters
-        logger.info("Model training completed successfully")
+        search = successive_halving(
+            train_candidate,
+            candidates,
+            shared_data=training_data,
+            min_budget=MIN_TRIAL_ITERATIONS,
+            max_budget=MAX_TRIAL_ITERATIONS,
+            max_workers=max_workers,
+            threads_per_trial=threads_per_trial,
+        )
+        best = search["best"]
+        trials = [
+            {key: value for key, value in trial.items() if key != "output"}
+            for trial in search["trials"]
+        ]
+        logger.info(
+            f"Model training completed successfully: best candidate "
+            f"{best['params']} (validation CLV {best['score']:.4f}) after "
+            f"{len(trials)} trials in {search['rungs']} rungs"
+        )
         return {
-            "model": None,  # Trained model object
+            "model": best["output"]["model"],  # Trained model object
+            "params": best["params"],
             "metrics": {
                 "train_accuracy": 0.0,
                 "validation_accuracy": 0.0,
-                "training_time_seconds": 0.0,
+                "validation_clv": best["score"],
+                "training_time_seconds": sum(t["wall_seconds"] for t in trials),
+                "training_cpu_seconds": sum(t["cpu_seconds"] for t in trials),
             },
+            "trials": trials,
             "model_version": f"model_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
         }
     except Exception as e:
@@ -92,12 +191,15 @@ def backtest_model_clv(model_info: Dict[str, Any]) -> Dict[str, float]:
 
     try:
         # Placeholder implementation - would evaluate model performance
-        # using historical data and calculate CLV metrics
+        # using historical data and calculate CLV metrics. Every model is
+        # backtested on the same bets, in the same order, so bet_clv arrays
+        # of different models can be compared pairwise.
         clv_metrics = {
             "average_clv": 0.0,
             "clv_positive_rate": 0.0,
             "total_bets": 0,
             "roi": 0.0,
+            "bet_clv": [],  # Per-bet CLV
         }
 
         logger.info(
@@ -109,8 +211,54 @@ def backtest_model_clv(model_info: Dict[str, Any]) -> Dict[str, float]:
         raise
 
 
+def load_production_model() -> Dict[str, Any]:
+    """
+    Loads the model currently serving in production.
+
+    Returns:
+        Dictionary in the same format as train_new_model's output
+    """
+    # Placeholder implementation - would load the production model from the
+    # model registry
+    return {"model": None, "model_version": "production"}
+
+
+def is_superior(
+    new_clv_metrics: Dict[str, Any],
+    production_clv_metrics: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Decides whether the new model beats production.
+
+    Uses a paired bootstrap/permutation comparison of bet-level CLV when both
+    models were backtested on enough of the same bets, and otherwise falls
+    back to the average CLV threshold.
+    """
+    candidate_bets = new_clv_metrics.get("bet_clv")
+    production_bets = (production_clv_metrics or {}).get("bet_clv")
+    if (
+        candidate_bets is not None
+        and production_bets is not None
+        and len(candidate_bets) == len(production_bets)
+        and len(candidate_bets) >= MIN_PAIRED_BETS
+    ):
+        comparison = compare_models(
+            production_bets,
+            candidate_bets,
+            n_resamples=COMPARISON_RESAMPLES,
+            alpha=COMPARISON_ALPHA,
+        )
+        return comparison["significant"]
+
+    logger.info("Bet-level CLV unavailable for both models; using CLV threshold")
+    return new_clv_metrics["average_clv"] > CLV_DEPLOY_THRESHOLD
+
+
 def compare_and_deploy(
-    new_model_info: Dict[str, Any], new_clv_metrics: Dict[str, float]
+    new_model_info: Dict[str, Any],
+    new_clv_metrics: Dict[str, float],
+    dry_run: bool = False,
+    production_clv_metrics: Optional[Dict[str, Any]] = None,
 ) -> bool:
     """
     Compares the new model's performance with the current production model
@@ -119,6 +267,9 @@ def compare_and_deploy(
     Args:
         new_model_info: Information about the newly trained model
         new_clv_metrics: CLV metrics for the new model
+        dry_run: Evaluate the decision but never deploy
+        production_clv_metrics: CLV metrics of the production model on the
+            same bets, enabling the statistical comparison
 
     Returns:
         Boolean indicating whether the model was deployed
@@ -126,16 +277,13 @@ def compare_and_deploy(
     logger.info("Comparing new model performance with current production model...")
 
     try:
-        # Placeholder implementation - would compare CLV with current model
-        # and deploy if improvement is statistically significant
-
-        # For now, assume a simple threshold-based deployment
-        clv_threshold = 0.02  # 2% CLV threshold for deployment
-
-        if new_clv_metrics["average_clv"] > clv_threshold:
+        if is_superior(new_clv_metrics, production_clv_metrics):
             logger.info(
                 f"New model shows superior performance (CLV: {new_clv_metrics['average_clv']:.4f})"
             )
+            if dry_run:
+                logger.info("DRY_RUN: skipping deployment of new model")
+                return False
             logger.info("Deploying new model to production...")
 
             # Would implement actual model deployment logic here
@@ -154,26 +302,164 @@ def compare_and_deploy(
         raise
 
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line arguments for the retraining pipeline."""
+    parser = argparse.ArgumentParser(
+        description="Retrain, backtest and (optionally) deploy the betting model."
+    )
+    parser.add_argument(
+        "--config", help="Path to a JSON configuration file (see config/app_config.py)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Run the full pipeline but never deploy the new model",
+    )
+    parser.add_argument(
+        "--validate-config",
+        action="store_true",
+        help="Validate the configuration and exit without retraining",
+    )
+    parser.add_argument(
+        "--artifact-dir",
+        help="Directory for stage checkpoints (overrides ARTIFACT_DIR)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the last stage completed by the previous run",
+    )
+    return parser.parse_args(argv)
+
+
+def load_config(config_file: Optional[str] = None):
+    """Load the application Config from config/app_config.py."""
+    config_dir = str(Path(__file__).parent / "config")
+    if config_dir not in sys.path:
+        sys.path.insert(0, config_dir)
+    from app_config import Config
+
+    return Config(config_file)
+
+
+def validate_config(config_file: Optional[str] = None) -> bool:
+    """Load and validate the configuration, logging the outcome."""
+    try:
+        load_config(config_file).validate_configuration()
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Configuration invalid: {e}")
+        return False
+    logger.info("Configuration is valid")
+    return True
+
+
+def run_stage(
+    runner: Optional[StageRunner],
+    name: str,
+    func: Callable[..., Any],
+    *inputs: Any,
+    cache: bool = True,
+    **params: Any,
+) -> Any:
+    """Run a pipeline stage, checkpointed through `runner` when one is set."""
+    with timer(f"retrain_{name}"), profile_stage(f"retrain_{name}"):
+        if runner is None:
+            return func(*inputs, **params)
+        return runner.run(name, func, *inputs, cache=cache, **params)
+
+
+def run_parallel_stage(
+    runner: Optional[StageRunner],
+    name: str,
+    func: Callable[..., Any],
+    inputs: Sequence[Sequence[Any]],
+) -> List[Any]:
+    """Run independent instances of a stage concurrently, in input order."""
+    # Each instance is profiled in its own worker thread.
+    func = get_profiler().wrap(f"retrain_{name}", func)
+    with timer(f"retrain_{name}"):
+        if runner is not None:
+            return runner.run_parallel(name, func, inputs)
+        with ThreadPoolExecutor() as executor:
+            return list(executor.map(lambda args: func(*args), inputs))
+
+
+def main(argv: Optional[List[str]] = None):
     """
     Main orchestration function for the automated retraining pipeline.
+
+    Args:
+        argv: Command-line arguments; defaults to none so that callers (and
+            tests) run the standard pipeline
     """
+    args = parse_args(argv if argv is not None else [])
+
+    if args.validate_config:
+        sys.exit(0 if validate_config(args.config) else 1)
+
+    try:
+        app_config = load_config(args.config)
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Failed to load configuration: {e}")
+        sys.exit(1)
+    dry_run = args.dry_run or app_config.dry_run
+
+    artifact_dir = args.artifact_dir or app_config.get("ARTIFACT_DIR")
+    if args.resume and not artifact_dir:
+        logger.error("--resume requires --artifact-dir or ARTIFACT_DIR")
+        sys.exit(1)
+
     logger.info("Starting automated model retraining pipeline...")
+    get_instrumentation().start_reporting()
+    if dry_run:
+        logger.info("DRY_RUN mode enabled - no model will be deployed")
 
     try:
-        # Step 1: Get latest training data
-        training_data = get_latest_training_data()
+        runner = None
+        if artifact_dir:
+            runner = StageRunner(ArtifactStore(artifact_dir), resume=args.resume)
+            logger.info(f"Checkpointing stages to {artifact_dir} ({runner.run_id})")
+
+        # Step 1: Get latest training data (always re-read unless resuming)
+        training_data = run_stage(
+            runner, "training_data", get_latest_training_data, cache=False
+        )
         logger.info(f"Training data contains {training_data['metadata']['rows']} rows")
 
-        # Step 2: Train new model
-        model_info = train_new_model(training_data)
+        # Step 2: Train candidate models and keep the best
+        model_info = run_stage(
+            runner,
+            "train",
+            train_new_model,
+            training_data,
+            max_workers=app_config.get("TRIAL_MAX_WORKERS") or None,
+            threads_per_trial=app_config.get("TRIAL_THREADS", 1),
+        )
         logger.info(f"New model version: {model_info['model_version']}")
 
-        # Step 3: Backtest model with CLV evaluation
-        clv_metrics = backtest_model_clv(model_info)
+        # Step 3: Backtest new and production models on the same bets
+        clv_metrics, production_clv_metrics = run_parallel_stage(
+            runner,
+            "backtest",
+            backtest_model_clv,
+            [(model_info,), (load_production_model(),)],
+        )
 
         # Step 4: Compare and deploy if superior
-        deployed = compare_and_deploy(model_info, clv_metrics)
+        deployed = run_stage(
+            runner,
+            "deploy",
+            compare_and_deploy,
+            model_info,
+            clv_metrics,
+            cache=False,
+            dry_run=dry_run,
+            production_clv_metrics=production_clv_metrics,
+        )
+        if runner is not None:
+            runner.finish()
+        get_instrumentation().report()
+        get_profiler().flush()
 
         if deployed:
             logger.info(
@@ -190,4 +476,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
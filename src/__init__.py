@@ -0,0 +1 @@
+"""MultiBet application source package."""
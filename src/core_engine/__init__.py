@@ -0,0 +1 @@
+"""Core Engine: model contract, scoring and orchestration components."""
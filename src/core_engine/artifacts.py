@@ -0,0 +1,282 @@
+"""
+Content-addressed artifact store and resumable pipeline stages.
+
+Each pipeline stage output (training data snapshot, trained model, CLV
+metrics, ...) is pickled and stored under its SHA-256 digest, so identical
+outputs are stored once. A stage's cache key is the digest of its name, the
+function that produced it, the digests of its inputs and its parameters: a
+rerun whose inputs hash identically loads the stored output instead of
+recomputing it.
+
+Every run also writes a manifest (`runs/<run_id>.json`) recording which
+stages finished, their cache keys and the digest of their outputs; a run
+that reaches the end is stamped with `completed_at` by `finish()`. Resuming
+picks up the latest run only if it never finished, and reuses the output of
+each stage it completed whose cache key still matches, even for stages that
+are not cacheable (such as data retrieval). A stage whose inputs changed
+since the interrupted run is recomputed, and so is everything after a
+finished run.
+
+Layout under the store root:
+
+    objects/<aa>/<digest>.pkl   stage outputs
+    stages/<key>.json           cache key -> output digest
+    runs/<run_id>.json          per-run manifest
+    runs/LATEST                 id of the most recent run
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PICKLE_PROTOCOL = 4
+
+
+def content_hash(obj: Any) -> str:
+    """SHA-256 of the pickled object."""
+    return hashlib.sha256(pickle.dumps(obj, protocol=PICKLE_PROTOCOL)).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write via a temp file and rename so readers never see partial files."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class ArtifactStore:
+    """Pickled objects stored on disk by content digest."""
+
+    def __init__(self, root: str):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding objects, stage records and run manifests
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path:
+        """Location of the object with the given digest."""
+        return self.root / "objects" / digest[:2] / f"{digest}.pkl"
+
+    def has(self, digest: str) -> bool:
+        """Check whether an object is stored."""
+        return self.path(digest).exists()
+
+    def put(self, obj: Any) -> str:
+        """Store an object and return its digest."""
+        data = pickle.dumps(obj, protocol=PICKLE_PROTOCOL)
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.has(digest):
+            _atomic_write(self.path(digest), data)
+        return digest
+
+    def get(self, digest: str) -> Any:
+        """Load an object by digest; raises KeyError if missing."""
+        try:
+            with open(self.path(digest), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"Artifact not found: {digest}") from None
+
+    def _read_json(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def stage_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached stage output record for a cache key, if any."""
+        return self._read_json(self.root / "stages" / f"{key}.json")
+
+    def write_stage_record(self, key: str, record: Dict[str, Any]) -> None:
+        """Record the output of a stage under its cache key."""
+        _atomic_write(self.root / "stages" / f"{key}.json", json.dumps(record).encode())
+
+    def run_manifest(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Manifest of a previous run, if any."""
+        return self._read_json(self.root / "runs" / f"{run_id}.json")
+
+    def write_run_manifest(self, run_id: str, manifest: Dict[str, Any]) -> None:
+        """Persist a run manifest and mark it as the latest run."""
+        runs = self.root / "runs"
+        _atomic_write(runs / f"{run_id}.json", json.dumps(manifest, indent=2).encode())
+        _atomic_write(runs / "LATEST", run_id.encode())
+
+    def latest_run_id(self) -> Optional[str]:
+        """Id of the most recently written run."""
+        try:
+            return (self.root / "runs" / "LATEST").read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+
+class StageRunner:
+    """
+    Runs pipeline stages with content-addressed caching and resume support.
+    """
+
+    def __init__(
+        self,
+        store: ArtifactStore,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            store: Artifact store for outputs, stage records and manifests
+            run_id: Identifier for this run; a timestamp when None
+            resume: Reuse outputs of the stages the latest run completed,
+                if that run did not finish
+            max_workers: Thread pool size for `run_parallel`
+        """
+        self.store = store
+        self.run_id = run_id or datetime.now().strftime("run_%Y%m%d_%H%M%S_%f")
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._resumed: Dict[str, Dict[str, Any]] = {}
+
+        previous_id = store.latest_run_id() if resume else None
+        if resume:
+            previous = store.run_manifest(previous_id) if previous_id else None
+            if previous is None:
+                logger.warning("No previous run to resume; starting from scratch")
+                previous_id = None
+            elif previous.get("completed_at"):
+                logger.warning(
+                    f"Run {previous_id} completed at {previous['completed_at']}; "
+                    f"nothing to resume, starting from scratch"
+                )
+                previous_id = None
+            else:
+                self._resumed = previous.get("stages", {})
+                logger.info(
+                    f"Resuming from run {previous_id} "
+                    f"({len(self._resumed)} completed stages)"
+                )
+
+        self.manifest: Dict[str, Any] = {
+            "run_id": self.run_id,
+            "started_at": datetime.now().isoformat(),
+            "resumed_from": previous_id,
+            "stages": {},
+        }
+
+    def _record(self, name: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.manifest["stages"][name] = entry
+            self.store.write_run_manifest(self.run_id, self.manifest)
+
+    def run(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *inputs: Any,
+        cache: bool = True,
+        **params: Any,
+    ) -> Any:
+        """
+        Run one stage, reusing a stored output where possible.
+
+        Args:
+            name: Stage name, unique within a run
+            func: Stage function, called as func(*inputs, **params)
+            inputs: Upstream outputs the stage depends on
+            cache: Whether identical inputs may reuse a stored output; set to
+                False for stages that read external state (e.g. new data)
+            params: Extra keyword arguments, included in the cache key
+
+        Returns:
+            The stage output
+        """
+        key = content_hash((
+            name,
+            getattr(func, "__qualname__", repr(func)),
+            [content_hash(value) for value in inputs],
+            sorted(params.items()),
+        ))
+        resumed = self._resumed.get(name)
+        if resumed is not None:
+            if resumed.get("key") == key and self.store.has(resumed["output"]):
+                logger.info(f"Stage {name}: reusing output from resumed run")
+                self._record(name, {**resumed, "source": "resumed"})
+                return self.store.get(resumed["output"])
+            logger.info(f"Stage {name}: inputs changed since resumed run, recomputing")
+
+        if cache:
+            record = self.store.stage_record(key)
+            if record is not None and self.store.has(record["output"]):
+                logger.info(f"Stage {name}: inputs unchanged, reusing cached output")
+                self._record(name, {**record, "source": "cache"})
+                return self.store.get(record["output"])
+
+        start = time.perf_counter()
+        output = func(*inputs, **params)
+        entry = {
+            "key": key,
+            "output": self.store.put(output),
+            "seconds": time.perf_counter() - start,
+            "completed_at": datetime.now().isoformat(),
+        }
+        if cache:
+            self.store.write_stage_record(key, entry)
+        self._record(name, {**entry, "source": "computed"})
+        logger.info(f"Stage {name}: completed in {entry['seconds']:.2f}s")
+        return output
+
+    def run_parallel(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        inputs: Sequence[Sequence[Any]],
+        cache: bool = True,
+        **params: Any,
+    ) -> List[Any]:
+        """
+        Run independent instances of a stage concurrently.
+
+        Instance i is recorded as `name[i]` and receives `*inputs[i]`.
+        Results are returned in input order.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.run, f"{name}[{i}]", func, *args, cache=cache, **params
+                )
+                for i, args in enumerate(inputs)
+            ]
+            return [future.result() for future in futures]
+
+    def finish(self) -> None:
+        """Mark the run as complete so that it is never resumed."""
+        with self._lock:
+            self.manifest["completed_at"] = datetime.now().isoformat()
+            self.store.write_run_manifest(self.run_id, self.manifest)
+
+    def completed_stages(self) -> List[str]:
+        """Names of stages completed so far in this run."""
+        return list(self.manifest["stages"])
@@ -1 +1,44 @@
+"""
+Base predictive model contract for the MultiBet Core Engine.
 
+All predictive models MUST inherit from BasePredictiveModel so they can be
+plugged into the engine (see docs/technical_specification.md section 4).
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+
+
+class BasePredictiveModel(ABC):
+    """
+    Abstract base class for all predictive models.
+    Enforces a standard contract for model interaction.
+    """
+
+    @abstractmethod
+    def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generates a prediction based on input features.
+
+        Args:
+            features: A dictionary of feature names and their values.
+
+        Returns:
+            A dictionary containing the prediction, typically including
+            outcome probabilities and a model confidence score.
+        """
+        pass
+
+    @abstractmethod
+    def explain(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Provides an explanation for a prediction using SHAP or a similar method.
+
+        Args:
+            features: A dictionary of feature names and their values.
+
+        Returns:
+            A dictionary detailing the contribution of each feature to the
+            final prediction.
+        """
+        pass
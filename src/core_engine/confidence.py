@@ -0,0 +1,296 @@
+"""
+Model confidence scoring derived from SHAP values.
+
+This module implements the SHAP-based confidence score described in
+docs/explainability_plan.md section 3.3, plus a fast approximation for
+live scoring. Exact scoring needs full SHAP values for every prediction;
+the fast mode trains a small surrogate regressor on historical
+(features -> exact confidence) pairs and only runs that surrogate at
+inference time.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from src.core_engine.lazy_import import lazy_import
+
+sklearn_ensemble = lazy_import("sklearn.ensemble")
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_MODES = ("exact", "fast")
+
+
+def _raw_confidence(values: np.ndarray, baseline_values: Any) -> np.ndarray:
+    """Unclipped confidence numerator for a (n_predictions, n_features) batch."""
+    n_features = values.shape[1]
+    if n_features == 0:
+        raise ValueError("shap_values must contain at least one feature")
+
+    # Magnitude of the signal
+    shap_magnitude = np.abs(values).sum(axis=1)
+
+    # Feature agreement (all features pointing the same direction)
+    positive_features = (values > 0).sum(axis=1)
+    negative_features = (values < 0).sum(axis=1)
+    feature_agreement = np.abs(positive_features - negative_features) / n_features
+
+    # Compare to baseline distribution
+    baseline_deviation = np.abs(values.sum(axis=1) - float(np.mean(baseline_values)))
+
+    return shap_magnitude * feature_agreement * baseline_deviation
+
+
+def calculate_confidence_from_shap(
+    shap_values: Any, baseline_values: Any, threshold: float = 1.0
+) -> Any:
+    """
+    Calculate model confidence scores from SHAP value characteristics.
+
+    Combines the magnitude of the SHAP values, the agreement in sign between
+    features, and the deviation of the prediction from the baseline into a
+    single score clipped to the range 0-1.
+
+    Args:
+        shap_values: SHAP values for one prediction (n_features,) or a batch
+            of predictions (n_predictions, n_features)
+        baseline_values: Historical SHAP sums (or expected values) used as
+            the reference point for baseline deviation
+        threshold: Normalising constant; raw scores at or above this map to 1
+
+    Returns:
+        A float for a single prediction, otherwise an array of scores
+    """
+    if threshold <= 0:
+        raise ValueError("threshold must be positive")
+
+    values = np.asarray(shap_values, dtype=float)
+    single = values.ndim == 1
+    raw_score = _raw_confidence(np.atleast_2d(values), baseline_values)
+    confidence_score = np.minimum(1.0, raw_score / threshold)
+
+    return float(confidence_score[0]) if single else confidence_score
+
+
+def _as_matrix(features: Any, feature_names: Optional[Sequence[str]]) -> np.ndarray:
+    """Convert a feature dict, list of dicts, DataFrame or array to a 2D array."""
+    if isinstance(features, dict):
+        features = [features]
+    if isinstance(features, list) and features and isinstance(features[0], dict):
+        if feature_names is None:
+            raise ValueError("feature_names are required for dict features")
+        features = [[row[name] for name in feature_names] for row in features]
+    matrix = np.asarray(features, dtype=float)
+    return np.atleast_2d(matrix)
+
+
+class ShapConfidenceScorer:
+    """
+    Confidence scorer with an exact SHAP mode and a fast surrogate mode.
+
+    In "exact" mode every call runs the SHAP explainer and applies
+    `calculate_confidence_from_shap`. In "fast" mode a surrogate regressor,
+    fitted with `fit_surrogate`, predicts the exact score directly from the
+    features (and optionally the model output, which is already available
+    at scoring time).
+    """
+
+    def __init__(
+        self,
+        explainer: Any = None,
+        baseline_values: Any = 0.0,
+        threshold: Optional[float] = None,
+        mode: str = "exact",
+        feature_names: Optional[Sequence[str]] = None,
+        surrogate: Any = None,
+    ):
+        """
+        Initialize the scorer.
+
+        Args:
+            explainer: Fitted SHAP explainer exposing `shap_values(X)`
+            baseline_values: Baseline SHAP sums from the validation set
+            threshold: Normalising constant for raw scores; derived from the
+                surrogate training set when None
+            mode: Either "exact" or "fast"
+            feature_names: Column order used when features are dicts
+            surrogate: Optional regressor with fit/predict; defaults to a
+                shallow histogram gradient boosting model
+        """
+        if mode not in CONFIDENCE_MODES:
+            raise ValueError(f"mode must be one of {CONFIDENCE_MODES}, got {mode}")
+
+        self.explainer = explainer
+        self.baseline_values = baseline_values
+        self.threshold = threshold
+        self.mode = mode
+        self.feature_names = list(feature_names) if feature_names else None
+        self.surrogate = surrogate
+        self.surrogate_fitted = False
+        self._uses_model_output = False
+
+    def _require_explainer(self) -> None:
+        if self.explainer is None:
+            raise RuntimeError("A SHAP explainer is required for exact scoring")
+
+    def exact_confidence(self, features: Any) -> np.ndarray:
+        """Compute exact SHAP-derived confidence scores for a batch."""
+        self._require_explainer()
+        matrix = _as_matrix(features, self.feature_names)
+        shap_values = np.asarray(self.explainer.shap_values(matrix), dtype=float)
+        return calculate_confidence_from_shap(
+            np.atleast_2d(shap_values),
+            self.baseline_values,
+            threshold=self.threshold if self.threshold else 1.0,
+        )
+
+    def fit_surrogate(
+        self,
+        features: Any,
+        confidence_scores: Any = None,
+        model_output: Any = None,
+        threshold_quantile: float = 0.95,
+    ) -> "ShapConfidenceScorer":
+        """
+        Train the fast-mode surrogate on historical features.
+
+        Args:
+            features: Historical feature matrix
+            confidence_scores: Exact confidence targets; computed with the
+                explainer when omitted
+            model_output: Optional model predictions for the same rows, used
+                as an extra surrogate input
+            threshold_quantile: Quantile of raw SHAP scores used to derive
+                `threshold` when it has not been set
+
+        Returns:
+            The scorer itself, for chaining
+        """
+        matrix = _as_matrix(features, self.feature_names)
+
+        if confidence_scores is None:
+            self._require_explainer()
+            shap_values = np.atleast_2d(self.explainer.shap_values(matrix))
+            raw = _raw_confidence(shap_values, self.baseline_values)
+            if self.threshold is None:
+                self.threshold = float(np.quantile(raw, threshold_quantile)) or 1.0
+            confidence_scores = np.minimum(1.0, raw / self.threshold)
+
+        targets = np.asarray(confidence_scores, dtype=float).ravel()
+        if len(targets) != len(matrix):
+            raise ValueError("features and confidence_scores lengths differ")
+
+        self._uses_model_output = model_output is not None
+        inputs = self._surrogate_inputs(matrix, model_output)
+
+        if self.surrogate is None:
+            self.surrogate = sklearn_ensemble.HistGradientBoostingRegressor(
+                max_iter=100, max_depth=4, random_state=0
+            )
+
+        start = time.perf_counter()
+        self.surrogate.fit(inputs, targets)
+        self.surrogate_fitted = True
+        logger.info(
+            f"Fitted confidence surrogate on {len(targets)} rows in "
+            f"{time.perf_counter() - start:.2f}s"
+        )
+        return self
+
+    def _surrogate_inputs(self, matrix: np.ndarray, model_output: Any) -> np.ndarray:
+        if not self._uses_model_output:
+            return matrix
+        if model_output is None:
+            raise ValueError("Surrogate was fitted with model_output; pass it in")
+        output = np.asarray(model_output, dtype=float).reshape(len(matrix), -1)
+        return np.hstack([matrix, output])
+
+    def fast_confidence(self, features: Any, model_output: Any = None) -> np.ndarray:
+        """Predict confidence scores for a batch with the fitted surrogate."""
+        if not self.surrogate_fitted:
+            raise RuntimeError("Surrogate has not been fitted; call fit_surrogate")
+        matrix = _as_matrix(features, self.feature_names)
+        inputs = self._surrogate_inputs(matrix, model_output)
+        return np.clip(self.surrogate.predict(inputs), 0.0, 1.0)
+
+    def confidence_scores(self, features: Any, model_output: Any = None) -> np.ndarray:
+        """Compute confidence scores for a batch using the configured mode."""
+        if self.mode == "fast":
+            return self.fast_confidence(features, model_output)
+        return self.exact_confidence(features)
+
+    def score(self, features: Any, model_output: Any = None) -> Dict[str, Any]:
+        """
+        Score a single prediction.
+
+        Returns:
+            Dictionary with the `confidence_score` field used by the
+            standardized prediction object, plus the mode that produced it
+        """
+        scores = self.confidence_scores(features, model_output)
+        return {"confidence_score": float(scores[0]), "confidence_mode": self.mode}
+
+    def calibration_report(
+        self, features: Any, model_output: Any = None, n_bins: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Compare fast-mode scores against exact SHAP scores on a holdout set.
+
+        Args:
+            features: Holdout feature matrix
+            model_output: Model predictions for the holdout rows, if the
+                surrogate uses them
+            n_bins: Number of equal-width bins over the exact score range
+
+        Returns:
+            Dictionary with error metrics, correlation, per-bin calibration
+            and the measured inference speedup of fast over exact mode
+        """
+        matrix = _as_matrix(features, self.feature_names)
+
+        start = time.perf_counter()
+        exact = self.exact_confidence(matrix)
+        exact_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = self.fast_confidence(matrix, model_output)
+        fast_seconds = time.perf_counter() - start
+
+        errors = fast - exact
+        if np.std(fast) > 0 and np.std(exact) > 0:
+            correlation = float(np.corrcoef(fast, exact)[0, 1])
+        else:
+            correlation = 0.0
+
+        edges = np.linspace(0.0, 1.0, n_bins + 1)
+        bin_index = np.clip(np.digitize(exact, edges[1:-1]), 0, n_bins - 1)
+        counts = np.bincount(bin_index, minlength=n_bins)
+        exact_sums = np.bincount(bin_index, weights=exact, minlength=n_bins)
+        fast_sums = np.bincount(bin_index, weights=fast, minlength=n_bins)
+        bins = [
+            {
+                "lower": float(edges[i]),
+                "upper": float(edges[i + 1]),
+                "count": int(counts[i]),
+                "mean_exact": float(exact_sums[i] / counts[i]),
+                "mean_fast": float(fast_sums[i] / counts[i]),
+            }
+            for i in range(n_bins)
+            if counts[i]
+        ]
+
+        return {
+            "rows": int(len(matrix)),
+            "mean_absolute_error": float(np.mean(np.abs(errors))),
+            "root_mean_squared_error": float(np.sqrt(np.mean(errors**2))),
+            "max_absolute_error": float(np.max(np.abs(errors))),
+            "mean_bias": float(np.mean(errors)),
+            "correlation": correlation,
+            "exact_seconds": exact_seconds,
+            "fast_seconds": fast_seconds,
+            "speedup": exact_seconds / fast_seconds if fast_seconds > 0 else np.inf,
+            "bins": bins,
+        }
@@ -0,0 +1,206 @@
+"""
+Overround (vig) removal for batches of markets.
+
+Produces the `fair_implied_probability` used by the Value Score
+(docs/technical_specification.md section 1.1). Markets with different
+outcome counts - 3-way head-to-head, 10-20 runner races - are handled
+together as one segmented array: a flat array of decimal odds plus an
+offsets array where market m owns `odds[offsets[m]:offsets[m + 1]]`.
+
+Supported methods:
+
+- multiplicative: p_i = q_i / sum(q)
+- additive: p_i = q_i - (sum(q) - 1) / n (can go negative for long shots)
+- power: p_i = q_i ** k with k solved so that sum(p) = 1
+- shin: Shin (1993) insider-trading model, solving for the insider share z
+
+where q_i = 1 / odds_i. The iterative methods run one vectorised Newton
+solve across all markets together; per-market sums are `np.bincount` over
+the market index of each outcome.
+"""
+
+import logging
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEVIG_METHODS = ("multiplicative", "additive", "power", "shin")
+
+Market = Union[Sequence[float], Mapping[str, float]]
+
+
+def pack_markets(markets: Sequence[Market]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Flatten markets into (odds, offsets).
+
+    Args:
+        markets: Each market as a list of decimal odds or a mapping of
+            outcome name to decimal odds (e.g. sample_matches.json
+            `closing_odds`)
+
+    Returns:
+        Flat odds array and offsets array of length len(markets) + 1
+    """
+    prices = [
+        list(market.values()) if isinstance(market, Mapping) else list(market)
+        for market in markets
+    ]
+    offsets = np.zeros(len(prices) + 1, dtype=np.int64)
+    np.cumsum([len(p) for p in prices], out=offsets[1:])
+    odds = np.fromiter(
+        (price for p in prices for price in p), dtype=float, count=int(offsets[-1])
+    )
+    return odds, offsets
+
+
+def overround(odds: Any, offsets: Optional[Any] = None) -> np.ndarray:
+    """Booksum minus one for each market."""
+    odds, offsets, market = _validate(odds, offsets)
+    return np.bincount(market, weights=1.0 / odds, minlength=len(offsets) - 1) - 1.0
+
+
+def _validate(
+    odds: Any, offsets: Optional[Any]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    odds = np.asarray(odds, dtype=float).ravel()
+    if offsets is None:
+        offsets = np.array([0, len(odds)], dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+
+    if offsets[0] != 0 or offsets[-1] != len(odds):
+        raise ValueError("offsets must start at 0 and end at len(odds)")
+    sizes = np.diff(offsets)
+    if np.any(sizes < 2):
+        raise ValueError("Every market needs at least two outcomes")
+    if not np.all(odds > 1.0):
+        raise ValueError("Decimal odds must be greater than 1.0")
+
+    market = np.repeat(np.arange(len(sizes)), sizes)
+    return odds, offsets, market
+
+
+def _power_newton(
+    q: np.ndarray, market: np.ndarray, n_markets: int, tol: float, max_iter: int
+) -> np.ndarray:
+    """Solve sum(q ** k) = 1 per market; returns k for every market."""
+    log_q = np.log(q)
+    k = np.ones(n_markets)
+    for _ in range(max_iter):
+        powered = q ** k[market]
+        f = np.bincount(market, weights=powered, minlength=n_markets) - 1.0
+        if np.max(np.abs(f)) < tol:
+            break
+        slope = np.bincount(market, weights=powered * log_q, minlength=n_markets)
+        # sum(q ** k) is convex and decreasing in k, so Newton converges
+        # monotonically once it is on the left of the root.
+        k = np.maximum(k - f / slope, 1e-6)
+    else:
+        logger.warning(
+            f"Power de-vig did not converge (max residual {np.max(np.abs(f)):.2e})"
+        )
+    return k
+
+
+def _shin_probabilities(
+    q: np.ndarray, booksum: np.ndarray, z: np.ndarray, market: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Shin probabilities and their derivative with respect to z."""
+    zm = z[market]
+    a = q**2 / booksum[market]
+    root = np.sqrt(zm**2 + 4.0 * (1.0 - zm) * a)
+    numerator = root - zm
+    probabilities = numerator / (2.0 * (1.0 - zm))
+    d_numerator = (zm - 2.0 * a) / root - 1.0
+    derivative = (d_numerator * (1.0 - zm) + numerator) / (2.0 * (1.0 - zm) ** 2)
+    return probabilities, derivative
+
+
+def _shin_newton(
+    q: np.ndarray, market: np.ndarray, n_markets: int, tol: float, max_iter: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve for Shin's z per market; returns (probabilities, z)."""
+    booksum = np.bincount(market, weights=q, minlength=n_markets)
+    z = np.zeros(n_markets)
+    for _ in range(max_iter):
+        probabilities, derivative = _shin_probabilities(q, booksum, z, market)
+        f = np.bincount(market, weights=probabilities, minlength=n_markets) - 1.0
+        if np.max(np.abs(f)) < tol:
+            break
+        slope = np.bincount(market, weights=derivative, minlength=n_markets)
+        z = np.clip(z - f / slope, 0.0, 0.999)
+    else:
+        logger.warning(
+            f"Shin de-vig did not converge (max residual {np.max(np.abs(f)):.2e})"
+        )
+    return probabilities, z
+
+
+def remove_overround(
+    odds: Any,
+    offsets: Optional[Any] = None,
+    method: str = "multiplicative",
+    tol: float = 1e-12,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Convert decimal odds into fair implied probabilities.
+
+    Args:
+        odds: Flat array of decimal odds for all outcomes of all markets
+        offsets: Market boundaries (length n_markets + 1); None means a
+            single market
+        method: One of DEVIG_METHODS
+        tol: Newton convergence tolerance on each market's probability sum
+        max_iter: Maximum Newton iterations for power and Shin
+
+    Returns:
+        Flat array of fair probabilities aligned with `odds`; each market
+        sums to 1
+    """
+    if method not in DEVIG_METHODS:
+        raise ValueError(f"Unknown de-vig method: {method}")
+
+    odds, offsets, market = _validate(odds, offsets)
+    n_markets = len(offsets) - 1
+    q = 1.0 / odds
+    booksum = np.bincount(market, weights=q, minlength=n_markets)
+
+    if method == "multiplicative":
+        return q / booksum[market]
+    if method == "additive":
+        return q - ((booksum - 1.0) / np.diff(offsets))[market]
+    if method == "power":
+        k = _power_newton(q, market, n_markets, tol, max_iter)
+        return q ** k[market]
+
+    probabilities, _ = _shin_newton(q, market, n_markets, tol, max_iter)
+    # Shin's model has no solution for underround markets (z would be
+    # negative); fall back to normalising those.
+    underround = booksum <= 1.0
+    if np.any(underround):
+        fallback = underround[market]
+        probabilities[fallback] = (q / booksum[market])[fallback]
+    return probabilities
+
+
+def devig_markets(
+    markets: Sequence[Market], method: str = "multiplicative", **kwargs: Any
+) -> List[Union[List[float], Dict[str, float]]]:
+    """
+    De-vig markets given as lists or outcome->odds mappings.
+
+    Returns fair probabilities in the same shape as the input markets.
+    """
+    odds, offsets = pack_markets(markets)
+    probabilities = remove_overround(odds, offsets, method=method, **kwargs)
+
+    results: List[Union[List[float], Dict[str, float]]] = []
+    for market, start, end in zip(markets, offsets[:-1], offsets[1:]):
+        values = probabilities[start:end].tolist()
+        if isinstance(market, Mapping):
+            results.append(dict(zip(market.keys(), values)))
+        else:
+            results.append(values)
+    return results
@@ -0,0 +1,197 @@
+"""
+Parallel hyperparameter trials with successive halving.
+
+Candidate configurations are trained in a bounded process pool. Each worker
+runs one trial at a time with its native thread pools (OpenMP/MKL/BLAS and
+CatBoost's `thread_count`) capped at `threads_per_trial`, so
+`max_workers * threads_per_trial` never exceeds the cores available.
+
+Successive halving: every surviving candidate is trained with the current
+budget (e.g. boosting iterations), only the best `1 / eta` by validation
+score continue, and the budget is multiplied by `eta` for the next rung.
+Losing configurations therefore never get the full training budget.
+
+Each trial records wall-clock seconds and CPU seconds (process CPU time of
+the worker, which covers all of the trial's threads).
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+TrialFunction = Callable[[Any, Dict[str, Any], int, int], Tuple[Any, float]]
+
+# Data shared with every trial in a worker, set once by the pool initializer
+_shared_data: Any = None
+
+
+def _init_worker(shared_data: Any, threads_per_trial: int) -> None:
+    """Pool initializer: cap native thread pools and keep the shared data."""
+    global _shared_data
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads_per_trial)
+    _shared_data = shared_data
+
+
+def _run_trial(
+    trial_fn: TrialFunction,
+    params: Dict[str, Any],
+    budget: int,
+    threads_per_trial: int,
+) -> Dict[str, Any]:
+    """Run one trial in the current process and time it."""
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        output, score = trial_fn(_shared_data, params, budget, threads_per_trial)
+        error = None
+    except Exception as e:  # a failing configuration must not stop the search
+        output, score, error = None, -math.inf, f"{type(e).__name__}: {e}"
+    return {
+        "output": output,
+        "score": float(score),
+        "error": error,
+        "wall_seconds": time.perf_counter() - wall_start,
+        "cpu_seconds": time.process_time() - cpu_start,
+    }
+
+
+def default_max_workers(threads_per_trial: int) -> int:
+    """Number of concurrent trials that fit on this machine's cores."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    return max(1, (cpus or os.cpu_count() or 1) // max(1, threads_per_trial))
+
+
+def successive_halving(
+    trial_fn: TrialFunction,
+    candidates: Sequence[Dict[str, Any]],
+    shared_data: Any = None,
+    min_budget: int = 100,
+    max_budget: int = 1000,
+    eta: int = 3,
+    max_workers: Optional[int] = None,
+    threads_per_trial: int = 1,
+    mp_context: str = "spawn",
+) -> Dict[str, Any]:
+    """
+    Train candidates with successive halving and return the best one.
+
+    Args:
+        trial_fn: Picklable top-level function called as
+            trial_fn(shared_data, params, budget, thread_count) and returning
+            (output, validation_score); higher scores are better
+        candidates: Hyperparameter dictionaries to evaluate
+        shared_data: Data passed to every trial; sent to each worker once
+        min_budget: Budget for the first rung
+        max_budget: Budget cap for the last rung
+        eta: Keep the top 1/eta candidates and multiply the budget by eta
+            at each rung
+        max_workers: Concurrent trials; defaults to cores // threads_per_trial.
+            1 runs trials in-process without a pool
+        threads_per_trial: Native threads each trial may use
+        mp_context: Multiprocessing start method; "spawn" avoids forking a
+            parent that already runs threaded libraries
+
+    Returns:
+        Dictionary with "best" (trial record including its output), "trials"
+        (every trial record, outputs dropped except the best's) and
+        "rungs" (number of rungs run)
+    """
+    if not candidates:
+        raise ValueError("At least one candidate is required")
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    if not 0 < min_budget <= max_budget:
+        raise ValueError("Require 0 < min_budget <= max_budget")
+    if threads_per_trial < 1:
+        raise ValueError("threads_per_trial must be at least 1")
+
+    global _shared_data
+    workers = max_workers or default_max_workers(threads_per_trial)
+    workers = min(workers, len(candidates))
+    survivors = list(range(len(candidates)))
+    budget = min_budget
+    trials: List[Dict[str, Any]] = []
+    rung = 0
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(mp_context),
+            initializer=_init_worker,
+            initargs=(shared_data, threads_per_trial),
+        )
+    else:
+        # In-process trials share the caller's environment, so only the data
+        # is installed; thread limits still reach the trial via thread_count.
+        _shared_data = shared_data
+
+    try:
+        while True:
+            args = [
+                (trial_fn, candidates[i], budget, threads_per_trial) for i in survivors
+            ]
+            if executor is None:
+                outcomes = [_run_trial(*a) for a in args]
+            else:
+                futures = [executor.submit(_run_trial, *a) for a in args]
+                outcomes = [future.result() for future in futures]
+
+            rung_trials = []
+            for candidate, outcome in zip(survivors, outcomes):
+                record = {
+                    "trial_id": f"c{candidate}_r{rung}",
+                    "candidate": candidate,
+                    "params": dict(candidates[candidate]),
+                    "rung": rung,
+                    "budget": budget,
+                    **outcome,
+                }
+                if record["error"]:
+                    logger.warning(
+                        f"Trial {record['trial_id']} failed: {record['error']}"
+                    )
+                rung_trials.append(record)
+            trials.extend(rung_trials)
+
+            ranked = sorted(rung_trials, key=lambda t: t["score"], reverse=True)
+            logger.info(
+                f"Rung {rung}: {len(ranked)} candidates at budget {budget}, "
+                f"best score {ranked[0]['score']:.4f}"
+            )
+            if budget >= max_budget:
+                break
+
+            keep = max(1, len(ranked) // eta)
+            survivors = [t["candidate"] for t in ranked[:keep]]
+            for trial in ranked:  # survivors are retrained at the next rung
+                trial["output"] = None
+            # A lone survivor goes straight to the full budget
+            budget = max_budget if keep == 1 else min(max_budget, budget * eta)
+            rung += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        else:
+            _shared_data = None
+
+    best = ranked[0]
+    if best["error"]:
+        raise RuntimeError(f"All candidates failed; last error: {best['error']}")
+    for trial in ranked[1:]:
+        trial["output"] = None
+    return {"best": best, "trials": trials, "rungs": rung + 1}
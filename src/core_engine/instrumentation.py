@@ -0,0 +1,486 @@
+"""
+Low-overhead per-stage latency histograms and counters.
+
+Hot-path code times its stages with
+
+    with instrumentation.timer("predict"):
+        ...
+
+or the `@timed("predict")` decorator, and counts events with `instrumentation.count("bets_placed")`. Stage names
+for the serving path are listed in STAGES.
+
+Latencies go into HDR-style log-linear histograms over integer
+nanoseconds: values below 2**SUB_BUCKET_BITS have their own bucket, and
+above that each power-of-two range is split into 2**(SUB_BUCKET_BITS - 1)
+equal buckets, so every recorded value is within 1 / 2**(SUB_BUCKET_BITS - 1)
+(~1.6%) of its bucket's bounds at any magnitude. Recording is a
+`bit_length`, a shift and a list increment.
+
+Recording is lock-free: each thread writes only its own histograms, so no
+lock is taken and no update can be lost. Readers merge the per-thread
+histograms, first folding those of threads that have exited into a shared
+retired total so that state from short-lived worker threads does not pile
+up. Every PERFORMANCE_LOG_INTERVAL seconds a reporter thread logs p50/p95/p99
+per stage for the interval since the previous report.
+Cumulative histograms are exported as Prometheus text or JSON, optionally
+over HTTP for a local scraper.
+
+When MONITORING_ENABLED is False, `timer` returns a shared no-op context
+manager and `record`/`count` return immediately.
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGES = (
+    "ingestion",
+    "validation",
+    "feature_lookup",
+    "predict",
+    "explain",
+    "value_score",
+    "stake",
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+SUB_BUCKET_BITS = 7
+_HALF = 1 << (SUB_BUCKET_BITS - 1)
+_MAX_EXPONENT = 40  # values up to ~2**47 ns (~39 hours)
+N_BUCKETS = (_MAX_EXPONENT + 2) * _HALF
+
+
+def bucket_index(value: int) -> int:
+    """Histogram bucket of a non-negative integer value."""
+    exponent = value.bit_length() - SUB_BUCKET_BITS
+    if exponent <= 0:
+        return value
+    return min(exponent * _HALF + (value >> exponent), N_BUCKETS - 1)
+
+
+def bucket_bounds(index: int) -> tuple:
+    """Smallest and largest value stored in a bucket."""
+    if index < 2 * _HALF:
+        return index, index
+    exponent = index // _HALF - 1
+    low = (index - exponent * _HALF) << exponent
+    return low, low + (1 << exponent) - 1
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integers; single writer."""
+
+    __slots__ = ("counts", "total", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        """Add one value."""
+        self.counts[bucket_index(value)] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def copy(self) -> "Histogram":
+        other = Histogram()
+        other.counts = list(self.counts)
+        other.total, other.sum, other.max = self.total, self.sum, self.max
+        return other
+
+    def merge(self, other: "Histogram") -> None:
+        """Add another histogram's samples to this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def subtract(self, other: "Histogram") -> "Histogram":
+        """Samples recorded since `other`, an earlier copy of this histogram."""
+        delta = Histogram()
+        delta.counts = [a - b for a, b in zip(self.counts, other.counts)]
+        delta.total = self.total - other.total
+        delta.sum = self.sum - other.sum
+        delta.max = self.max
+        return delta
+
+    def quantile(self, q: float) -> int:
+        """
+        Value at quantile q, reported as the upper bound of its bucket.
+
+        Returns 0 for an empty histogram.
+        """
+        if not self.total:
+            return 0
+        rank = max(1, int(q * self.total + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def summary(self, quantiles: Sequence[float] = QUANTILES) -> Dict[str, float]:
+        """Count, mean, max and quantiles."""
+        return {
+            "count": self.total,
+            "mean": self.sum / self.total if self.total else 0.0,
+            "max": self.max,
+            **{f"p{round(q * 100):d}": self.quantile(q) for q in quantiles},
+        }
+
+
+class _NullTimer:
+    """Shared do-nothing timer handed out while instrumentation is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.record(time.perf_counter_ns() - self.start)
+
+
+class Instrumentation:
+    """
+    Registry of per-stage latency histograms and event counters.
+    """
+
+    def __init__(self, enabled: bool = True, report_interval: float = 3600.0):
+        """
+        Initialize the registry.
+
+        Args:
+            enabled: Record samples; when False every call is a no-op
+            report_interval: Seconds between interval reports in the log
+        """
+        self.enabled = enabled
+        self.report_interval = report_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()  # guards registration and retired totals
+        # (thread, histograms, counters) for every thread that has recorded
+        self._threads: List[
+            Tuple[threading.Thread, Dict[str, Histogram], Dict[str, int]]
+        ] = []
+        self._retired_histograms: Dict[str, Histogram] = {}
+        self._retired_counters: Dict[str, int] = {}
+        self._last_report: Dict[str, Histogram] = {}
+        self._reporter: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, app_config: Any = None) -> "Instrumentation":
+        """Registry configured by MONITORING_ENABLED and PERFORMANCE_LOG_INTERVAL."""
+        if app_config is None:
+            from config.app_config import config as app_config
+        return cls(
+            enabled=bool(app_config.get("MONITORING_ENABLED", True)),
+            report_interval=float(app_config.get("PERFORMANCE_LOG_INTERVAL", 3600)),
+        )
+
+    def _thread_state(self):
+        local = self._local
+        try:
+            return local.histograms, local.counters
+        except AttributeError:
+            local.histograms, local.counters = {}, {}
+            with self._lock:
+                self._threads.append((
+                    threading.current_thread(),
+                    local.histograms,
+                    local.counters,
+                ))
+            return local.histograms, local.counters
+
+    def _snapshot(self):
+        """
+        Retired totals plus the state of each live thread.
+
+        Threads that have exited can no longer write, so their histograms and
+        counters are folded into the retired totals and dropped.
+        """
+        with self._lock:
+            live = []
+            for entry in self._threads:
+                thread, histograms, counters = entry
+                if thread.is_alive():
+                    live.append(entry)
+                    continue
+                _merge_histograms(self._retired_histograms, histograms)
+                for name, value in counters.items():
+                    self._retired_counters[name] = (
+                        self._retired_counters.get(name, 0) + value
+                    )
+            self._threads = live
+            retired = {s: h.copy() for s, h in self._retired_histograms.items()}
+            per_thread = [(dict(h), dict(c)) for _, h, c in live]
+            return retired, dict(self._retired_counters), per_thread
+
+    def _histogram(self, stage: str) -> Histogram:
+        histograms = self._thread_state()[0]
+        histogram = histograms.get(stage)
+        if histogram is None:
+            histogram = histograms[stage] = Histogram()
+        return histogram
+
+    def timer(self, stage: str):
+        """Context manager recording the duration of its block under `stage`."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._histogram(stage))
+
+    def record(self, stage: str, nanoseconds: int) -> None:
+        """Record a duration measured elsewhere."""
+        if self.enabled:
+            self._histogram(stage).record(int(nanoseconds))
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Increment an event counter."""
+        if self.enabled:
+            counters = self._thread_state()[1]
+            counters[name] = counters.get(name, 0) + n
+
+    def histograms(self) -> Dict[str, Histogram]:
+        """Cumulative histogram per stage, merged across threads."""
+        merged, _, per_thread = self._snapshot()
+        for histograms, _ in per_thread:
+            _merge_histograms(merged, histograms)
+        return merged
+
+    def counters(self) -> Dict[str, int]:
+        """Event counters, summed across threads."""
+        _, totals, per_thread = self._snapshot()
+        for _, counters in per_thread:
+            for name, value in counters.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Log and return per-stage latency summaries since the last report.
+
+        Durations in the returned summaries are in milliseconds.
+        """
+        current = self.histograms()
+        summaries = {}
+        for stage, histogram in sorted(current.items()):
+            previous = self._last_report.get(stage)
+            interval = histogram.subtract(previous) if previous else histogram
+            if not interval.total:
+                continue
+            summary = _milliseconds(interval.summary())
+            summaries[stage] = summary
+            logger.info(
+                f"Stage {stage}: n={summary['count']} p50={summary['p50']:.3f}ms "
+                f"p95={summary['p95']:.3f}ms p99={summary['p99']:.3f}ms"
+            )
+        self._last_report = current
+        return summaries
+
+    def start_reporting(self) -> None:
+        """Report every `report_interval` seconds on a daemon thread."""
+        if not self.enabled or self._reporter is not None:
+            return
+        self._stop.clear()
+        self._reporter = threading.Thread(
+            target=self._report_loop, name="instrumentation-reporter", daemon=True
+        )
+        self._reporter.start()
+
+    def stop_reporting(self) -> None:
+        """Stop the reporter thread."""
+        if self._reporter is not None:
+            self._stop.set()
+            self._reporter.join()
+            self._reporter = None
+
+    def _report_loop(self) -> None:
+        while not self._stop.wait(self.report_interval):
+            try:
+                self.report()
+            except Exception as e:  # reporting must never take the service down
+                logger.warning(f"Performance report failed: {e}")
+
+    def to_json(self) -> Dict[str, Any]:
+        """Cumulative stage summaries (milliseconds) and counters."""
+        return {
+            "stages": {
+                stage: _milliseconds(histogram.summary())
+                for stage, histogram in sorted(self.histograms().items())
+            },
+            "counters": self.counters(),
+        }
+
+    def prometheus_text(self, prefix: str = "multibet") -> str:
+        """Cumulative metrics in the Prometheus text exposition format."""
+        name = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {name} Hot-path stage latency.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, histogram in sorted(self.histograms().items()):
+            for q in QUANTILES:
+                value = histogram.quantile(q) / 1e9
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum / 1e9:.9f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.total}')
+        for counter, value in sorted(self.counters().items()):
+            metric = f"{prefix}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge_histograms(
+    merged: Dict[str, Histogram], histograms: Dict[str, Histogram]
+) -> None:
+    for stage, histogram in histograms.items():
+        if stage in merged:
+            merged[stage].merge(histogram)
+        else:
+            merged[stage] = histogram.copy()
+
+
+def _milliseconds(summary: Dict[str, float]) -> Dict[str, float]:
+    return {
+        key: value if key == "count" else value / 1e6 for key, value in summary.items()
+    }
+
+
+class MetricsServer:
+    """
+    HTTP endpoint for scrapers: /metrics (Prometheus text) and
+    /metrics.json.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[Instrumentation] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize the server; call `start` to begin serving.
+
+        Args:
+            registry: Registry to export; the global registry when None
+            host: Interface to bind
+            port: Port to bind; 0 picks a free port (see `port`)
+        """
+        # Imported here so that modules timing their stages do not pay for it
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.registry = registry or get_instrumentation()
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry.prometheus_text().encode()
+                    content_type = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry.to_json()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """Port the server is bound to."""
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MetricsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+_instrumentation: Optional[Instrumentation] = None
+_instrumentation_lock = threading.Lock()
+
+
+def get_instrumentation() -> Instrumentation:
+    """The process-wide registry, configured from the global config."""
+    global _instrumentation
+    if _instrumentation is None:
+        with _instrumentation_lock:
+            if _instrumentation is None:
+                _instrumentation = Instrumentation.from_config()
+    return _instrumentation
+
+
+def timer(stage: str):
+    """Time a block under `stage` in the process-wide registry."""
+    return get_instrumentation().timer(stage)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Increment a counter in the process-wide registry."""
+    get_instrumentation().count(name, n)
+
+
+def timed(stage: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator timing every call of a function under `stage`."""
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with get_instrumentation().timer(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,66 @@
+"""
+Lazy module proxies for heavy optional dependencies.
+
+TensorFlow, CatBoost, SHAP, scikit-learn, pandas and google-cloud-bigquery
+each take from hundreds of milliseconds to seconds to import. Modules bind
+them with `lazy_import` at the top level instead, so importing the package
+(or running a short CLI command such as `retrain_models.py --help`) does not
+pay for dependencies the command never touches. The real import happens on
+first attribute access and the proxy then forwards everything to it.
+"""
+
+import importlib
+import sys
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule(ModuleType):
+    """Module stand-in that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module: Optional[ModuleType] = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the underlying module has been imported."""
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Return `name` as a lazy proxy, or the module itself if already imported.
+
+    Args:
+        name: Absolute module name, e.g. "tensorflow" or "sklearn.ensemble"
+
+    Returns:
+        A module object; attribute access triggers the real import
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
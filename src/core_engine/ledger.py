@@ -0,0 +1,529 @@
+"""
+Append-only bet ledger stored as memory-mapped column files.
+
+Every bet is one row of a fixed schema. Rows are never removed or reordered:
+a bet is appended when it is placed, and its closing odds and result are
+filled in once they are known. The bet id is the row number.
+
+Rows live in fixed-capacity segments. Each segment is a directory holding
+one `.npy` file per column, opened with `numpy.memmap`, so aggregations run
+as vectorized reductions over the mapped columns without loading or parsing
+the ledger. String columns (match ids, model versions) are dictionary
+encoded: the column stores an integer code and `<column>.txt` lists the
+values, one per line, in code order.
+
+Layout under the ledger root:
+
+    segment-000000/placed_at.npy   int64, microseconds since the epoch
+    segment-000000/stake.npy       ...one file per column in COLUMNS
+    match_id.txt                   match id dictionary
+    model_version.txt              model version dictionary
+
+Staked amount per day and open exposure per match are kept as running
+counters, rebuilt once when the ledger is opened, so checking
+`MAX_DAILY_STAKE` and `MAX_EXPOSURE_PER_MATCH` for a new bet is O(1).
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "placed_at": np.int64,
+    "settled_at": np.int64,
+    "match_id": np.int32,
+    "model_version": np.int32,
+    "stake": np.float64,
+    "odds": np.float64,
+    "closing_odds": np.float64,
+    "result": np.int8,
+}
+DICTIONARY_COLUMNS = ("match_id", "model_version")
+RESULTS = ("pending", "win", "loss", "void")
+PENDING, WIN, LOSS, VOID = range(len(RESULTS))
+
+_MICROS_PER_DAY = 86_400_000_000
+
+
+def _micros(timestamp: Optional[float]) -> int:
+    """Epoch seconds (now when None) as integer microseconds."""
+    return int(round((time.time() if timestamp is None else timestamp) * 1e6))
+
+
+def _day(placed_at_us: Any) -> Any:
+    return placed_at_us // _MICROS_PER_DAY
+
+
+def _result_code(result: str) -> int:
+    try:
+        return RESULTS.index(result)
+    except ValueError:
+        raise ValueError(f"result must be one of {RESULTS}, got {result!r}") from None
+
+
+def profit(stake: np.ndarray, odds: np.ndarray, result: np.ndarray) -> np.ndarray:
+    """Profit per bet: stake * (odds - 1) for wins, -stake for losses, else 0."""
+    return np.where(
+        result == WIN, stake * (odds - 1.0), np.where(result == LOSS, -stake, 0.0)
+    )
+
+
+def closing_line_value(odds: Any, closing_odds: Any) -> np.ndarray:
+    """
+    Closing line value: closing_odds / odds - 1, the relative move of the
+    price from the odds taken (or the opening odds) to the close.
+
+    This is the single definition of CLV used by the ledger, the synthetic
+    data generator and the fixtures in tests/conftest.py and
+    tests/test_data/sample_matches.json; taking 2.4 against a close of 2.5
+    gives +0.042.
+    """
+    return np.asarray(closing_odds, dtype=float) / np.asarray(odds, dtype=float) - 1.0
+
+
+class _Dictionary:
+    """Append-only value <-> code mapping persisted as a text file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.values: List[str] = []
+        if path.exists():
+            self.values = path.read_text().splitlines()
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: Any) -> int:
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            if "\n" in value:
+                raise ValueError(
+                    f"Dictionary values cannot contain newlines: {value!r}"
+                )
+            code = len(self.values)
+            with open(self.path, "a") as f:
+                f.write(value + "\n")
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+
+class BetLedger:
+    """
+    Segmented, memory-mapped bet history with O(1) stake-limit checks.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_rows: int = 1 << 20,
+        app_config: Any = None,
+    ):
+        """
+        Open or create a ledger.
+
+        Args:
+            directory: Ledger root directory
+            segment_rows: Rows per segment file; fixed when the ledger is
+                created
+            app_config: Config providing MAX_DAILY_STAKE and
+                MAX_EXPOSURE_PER_MATCH; the global configuration when None
+        """
+        if segment_rows < 1:
+            raise ValueError("segment_rows must be at least 1")
+        if app_config is None:
+            from config.app_config import config as app_config
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.app_config = app_config
+        self._lock = threading.RLock()
+        self._dictionaries = {
+            name: _Dictionary(self.directory / f"{name}.txt")
+            for name in DICTIONARY_COLUMNS
+        }
+
+        self._segments: List[Dict[str, np.memmap]] = []
+        for path in sorted(self.directory.glob("segment-*")):
+            self._segments.append(self._open_segment(path, "r+"))
+        if self._segments:
+            segment_rows = len(self._segments[0]["placed_at"])
+        self.segment_rows = segment_rows
+
+        # Rows are valid up to the first unset placed_at of the last segment
+        self._rows = 0
+        if self._segments:
+            last = self._segments[-1]["placed_at"]
+            filled = int(np.count_nonzero(last))
+            self._rows = (len(self._segments) - 1) * segment_rows + filled
+
+        self._day_stake: Dict[int, float] = {}
+        self._open_exposure: Dict[int, float] = {}
+        self._rebuild_counters()
+        logger.info(f"Opened bet ledger {self.directory} with {self._rows} bets")
+
+    def _open_segment(self, path: Path, mode: str, rows: int = 0):
+        return {
+            name: np.lib.format.open_memmap(
+                path / f"{name}.npy",
+                mode=mode,
+                dtype=dtype,
+                shape=(rows,) if mode == "w+" else None,
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+    def _new_segment(self) -> None:
+        path = self.directory / f"segment-{len(self._segments):06d}"
+        path.mkdir()
+        segment = self._open_segment(path, "w+", self.segment_rows)
+        segment["closing_odds"][:] = np.nan
+        self._segments.append(segment)
+
+    def _locate(self, bet_id: int):
+        if not 0 <= bet_id < self._rows:
+            raise KeyError(f"Unknown bet id: {bet_id}")
+        return self._segments[bet_id // self.segment_rows], bet_id % self.segment_rows
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        All rows of one column.
+
+        A view of the memory-mapped file when the ledger has one segment, a
+        concatenated copy otherwise. Dictionary columns hold codes; use
+        `decode` for the values.
+        """
+        if name not in COLUMNS:
+            raise KeyError(f"Unknown column: {name}")
+        parts = []
+        remaining = self._rows
+        for segment in self._segments:
+            parts.append(segment[name][: min(remaining, self.segment_rows)])
+            remaining -= len(parts[-1])
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0, COLUMNS[name])
+
+    def decode(self, name: str, codes: Any) -> np.ndarray:
+        """Values of a dictionary-encoded column for the given codes."""
+        return np.asarray(self._dictionaries[name].values, dtype=object)[codes]
+
+    def flush(self) -> None:
+        """Write dirty pages of every column file to disk."""
+        with self._lock:
+            for segment in self._segments:
+                for values in segment.values():
+                    values.flush()
+
+    def append(
+        self,
+        match_id: Any,
+        stake: float,
+        odds: float,
+        model_version: str,
+        placed_at: Optional[float] = None,
+        closing_odds: Optional[float] = None,
+    ) -> int:
+        """
+        Record a placed bet.
+
+        Args:
+            match_id: Match the bet is on
+            stake: Amount staked
+            odds: Decimal odds taken
+            model_version: Model that recommended the bet
+            placed_at: Epoch seconds; now when None
+            closing_odds: Closing odds, if already known
+
+        Returns:
+            The new bet id
+        """
+        if not stake > 0:
+            raise ValueError("stake must be positive")
+        if not odds > 1.0:
+            raise ValueError("odds must be greater than 1.0")
+        placed_us = _micros(placed_at)
+        if placed_us <= 0:
+            raise ValueError("placed_at must be after the epoch")
+
+        with self._lock:
+            if self._rows == len(self._segments) * self.segment_rows:
+                self._new_segment()
+            bet_id = self._rows
+            segment = self._segments[-1]
+            row = bet_id % self.segment_rows
+            match_code = self._dictionaries["match_id"].encode(match_id)
+            segment["match_id"][row] = match_code
+            segment["model_version"][row] = self._dictionaries["model_version"].encode(
+                model_version
+            )
+            segment["stake"][row] = stake
+            segment["odds"][row] = odds
+            if closing_odds is not None:
+                segment["closing_odds"][row] = closing_odds
+            # placed_at is written last: a set placed_at marks a complete row
+            segment["placed_at"][row] = placed_us
+            self._rows += 1
+
+            day = placed_us // _MICROS_PER_DAY
+            self._day_stake[day] = self._day_stake.get(day, 0.0) + stake
+            self._open_exposure[match_code] = (
+                self._open_exposure.get(match_code, 0.0) + stake
+            )
+        return bet_id
+
+    def append_many(
+        self,
+        match_ids: Sequence[Any],
+        stakes: Any,
+        odds: Any,
+        model_versions: Sequence[str],
+        placed_at: Any,
+        closing_odds: Any = None,
+    ) -> np.ndarray:
+        """
+        Record many placed bets at once, e.g. when importing history.
+
+        Args:
+            match_ids: Match of each bet
+            stakes: Amount staked on each bet
+            odds: Decimal odds of each bet
+            model_versions: Model version of each bet
+            placed_at: Epoch seconds of each bet
+            closing_odds: Closing odds of each bet (NaN where unknown)
+
+        Returns:
+            The new bet ids
+        """
+        stakes = np.asarray(stakes, dtype=np.float64)
+        odds = np.asarray(odds, dtype=np.float64)
+        placed_us = np.round(np.asarray(placed_at, dtype=np.float64) * 1e6)
+        placed_us = placed_us.astype(np.int64)
+        n = len(stakes)
+        closing = (
+            np.full(n, np.nan)
+            if closing_odds is None
+            else np.asarray(closing_odds, dtype=np.float64)
+        )
+        if not all(len(c) == n for c in (match_ids, odds, model_versions, placed_us)):
+            raise ValueError("All bet columns must have the same length")
+        if n and (stakes.min() <= 0 or odds.min() <= 1.0 or placed_us.min() <= 0):
+            raise ValueError("Require stake > 0, odds > 1.0 and placed_at > 0")
+
+        with self._lock:
+            columns = {
+                "match_id": self._encode_many("match_id", match_ids),
+                "model_version": self._encode_many("model_version", model_versions),
+                "stake": stakes,
+                "odds": odds,
+                "closing_odds": closing,
+                "placed_at": placed_us,  # written last, as in append
+            }
+            start = self._rows
+            written = 0
+            while written < n:
+                if self._rows == len(self._segments) * self.segment_rows:
+                    self._new_segment()
+                row = self._rows % self.segment_rows
+                count = min(n - written, self.segment_rows - row)
+                for name, values in columns.items():
+                    self._segments[-1][name][row : row + count] = values[
+                        written : written + count
+                    ]
+                written += count
+                self._rows += count
+
+            days, inverse = np.unique(_day(placed_us), return_inverse=True)
+            for day, total in zip(
+                days.tolist(), np.bincount(inverse, weights=stakes).tolist()
+            ):
+                self._day_stake[day] = self._day_stake.get(day, 0.0) + total
+            match_totals = np.bincount(columns["match_id"], weights=stakes)
+            for code in np.flatnonzero(match_totals).tolist():
+                self._open_exposure[code] = self._open_exposure.get(code, 0.0) + float(
+                    match_totals[code]
+                )
+        return np.arange(start, start + n)
+
+    def _encode_many(self, name: str, values: Sequence[Any]) -> np.ndarray:
+        uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        dictionary = self._dictionaries[name]
+        codes = np.array([dictionary.encode(value) for value in uniques], np.int32)
+        return codes[inverse]
+
+    def set_closing_odds(self, bet_id: int, closing_odds: float) -> None:
+        """Record the closing odds of a bet's selection."""
+        if not closing_odds > 1.0:
+            raise ValueError("closing_odds must be greater than 1.0")
+        with self._lock:
+            segment, row = self._locate(bet_id)
+            segment["closing_odds"][row] = closing_odds
+
+    def settle(
+        self,
+        bet_id: int,
+        result: str,
+        closing_odds: Optional[float] = None,
+        settled_at: Optional[float] = None,
+    ) -> None:
+        """
+        Record the result of a pending bet.
+
+        Args:
+            bet_id: Bet to settle
+            result: "win", "loss" or "void"
+            closing_odds: Closing odds, if not recorded already
+            settled_at: Epoch seconds; now when None
+        """
+        code = _result_code(result)
+        if code == PENDING:
+            raise ValueError("Cannot settle a bet as pending")
+        with self._lock:
+            segment, row = self._locate(bet_id)
+            if segment["result"][row] != PENDING:
+                raise ValueError(f"Bet {bet_id} is already settled")
+            if closing_odds is not None:
+                self.set_closing_odds(bet_id, closing_odds)
+            segment["settled_at"][row] = _micros(settled_at)
+            segment["result"][row] = code
+            match_code = int(segment["match_id"][row])
+            self._open_exposure[match_code] -= float(segment["stake"][row])
+
+    def _rebuild_counters(self) -> None:
+        if not self._rows:
+            return
+        stake = self.column("stake")
+        days, inverse = np.unique(_day(self.column("placed_at")), return_inverse=True)
+        day_totals = np.bincount(inverse, weights=stake)
+        self._day_stake = dict(zip(days.tolist(), day_totals.tolist()))
+
+        pending = self.column("result") == PENDING
+        match_totals = np.bincount(
+            self.column("match_id")[pending], weights=stake[pending]
+        )
+        self._open_exposure = {
+            code: total for code, total in enumerate(match_totals.tolist()) if total
+        }
+
+    def daily_stake(self, day: Optional[Any] = None) -> float:
+        """Total staked on a UTC day (a date, or epoch seconds; today if None)."""
+        return self._day_stake.get(self._day_index(day), 0.0)
+
+    def open_exposure(self, match_id: Any) -> float:
+        """Stake on pending bets on a match."""
+        code = self._dictionaries["match_id"].codes.get(str(match_id))
+        return self._open_exposure.get(code, 0.0) if code is not None else 0.0
+
+    def _day_index(self, day: Optional[Any]) -> int:
+        if isinstance(day, datetime):
+            return _micros(day.timestamp()) // _MICROS_PER_DAY
+        if isinstance(day, date):
+            return (day - date(1970, 1, 1)).days
+        return _micros(day) // _MICROS_PER_DAY
+
+    def check_limits(
+        self, match_id: Any, stake: float, placed_at: Optional[float] = None
+    ) -> List[str]:
+        """
+        Limits a new bet would breach.
+
+        Args:
+            match_id: Match the bet is on
+            stake: Proposed stake
+            placed_at: Epoch seconds of placement; now when None
+
+        Returns:
+            Names of the breached limits (MAX_DAILY_STAKE,
+            MAX_EXPOSURE_PER_MATCH); empty when the bet is allowed
+        """
+        limits = self.app_config.snapshot()
+        breached = []
+        if self.daily_stake(placed_at) + stake > limits.max_daily_stake:
+            breached.append("MAX_DAILY_STAKE")
+        if self.open_exposure(match_id) + stake > limits.max_exposure_per_match:
+            breached.append("MAX_EXPOSURE_PER_MATCH")
+        return breached
+
+    def _model_mask(self, model_version: Optional[str]) -> Any:
+        if model_version is None:
+            return slice(None)
+        code = self._dictionaries["model_version"].codes.get(model_version, -1)
+        return self.column("model_version") == code
+
+    def roi(self, model_version: Optional[str] = None) -> Dict[str, float]:
+        """
+        Return on turnover of settled bets.
+
+        Returns:
+            Dictionary with settled_bets, turnover, profit and roi
+        """
+        mask = self._model_mask(model_version)
+        result = self.column("result")[mask]
+        settled = result != PENDING
+        stake = self.column("stake")[mask][settled]
+        profits = profit(stake, self.column("odds")[mask][settled], result[settled])
+        turnover = float(stake.sum())
+        total = float(profits.sum())
+        return {
+            "settled_bets": int(settled.sum()),
+            "turnover": turnover,
+            "profit": total,
+            "roi": total / turnover if turnover else 0.0,
+        }
+
+    def clv_values(self, model_version: Optional[str] = None) -> np.ndarray:
+        """Per-bet `closing_line_value` of bets with closing odds."""
+        mask = self._model_mask(model_version)
+        odds = self.column("odds")[mask]
+        closing = self.column("closing_odds")[mask]
+        known = ~np.isnan(closing)
+        return closing_line_value(odds[known], closing[known])
+
+    def clv(self, model_version: Optional[str] = None) -> Dict[str, float]:
+        """
+        Closing line value summary.
+
+        Returns:
+            Dictionary with bets, average_clv and clv_positive_rate
+        """
+        values = self.clv_values(model_version)
+        return {
+            "bets": len(values),
+            "average_clv": float(values.mean()) if len(values) else 0.0,
+            "clv_positive_rate": float((values > 0).mean()) if len(values) else 0.0,
+        }
+
+    def exposure_by_match(self, open_only: bool = True) -> Dict[str, float]:
+        """Stake per match, on pending bets only unless `open_only` is False."""
+        codes = self.column("match_id")
+        stake = self.column("stake")
+        if open_only:
+            pending = self.column("result") == PENDING
+            codes, stake = codes[pending], stake[pending]
+        totals = np.bincount(codes, weights=stake)
+        values = self._dictionaries["match_id"].values
+        return {values[code]: total for code, total in enumerate(totals) if total}
+
+    def exposure_by_day(self) -> Dict[str, float]:
+        """Stake placed per UTC day, keyed by ISO date."""
+        epoch = date(1970, 1, 1).toordinal()
+        return {
+            date.fromordinal(epoch + day).isoformat(): total
+            for day, total in sorted(self._day_stake.items())
+        }
+
+    def summary(self, model_version: Optional[str] = None) -> Dict[str, Any]:
+        """ROI and CLV of the ledger (or one model's bets)."""
+        return {
+            "bets": len(self.column("result")[self._model_mask(model_version)]),
+            **self.roi(model_version),
+            **{k: v for k, v in self.clv(model_version).items() if k != "bets"},
+        }
@@ -0,0 +1,202 @@
+"""
+Statistical champion/challenger comparison on bet-level CLV.
+
+Both models are backtested on the same bets, so each bet gives a paired
+difference d_i = candidate_clv_i - production_clv_i. Two resampling tests
+run on those differences:
+
+- Paired bootstrap for a confidence interval on mean(d). Resampling uses
+  double-or-nothing weights (each bet weighted 0 or 2 with probability 1/2),
+  which have the same mean and variance as the classic multinomial weights
+  and give the same interval for a mean, but can be drawn as random bits.
+- Paired permutation (sign-flip) test of H0: mean(d) <= 0, where every
+  difference's sign is flipped at random under the null.
+
+Both reduce to multiplying a (resamples x bets) matrix of random bits by
+the difference vector, so they share one bit matrix: each block of
+resamples is a single float32 (block x bets) @ (bets x 2) product over
+packed random bits. A million bets with 2000 resamples takes a few seconds
+on one core.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def _resampled_products(
+    columns: np.ndarray,
+    n_resamples: int,
+    rng: np.random.Generator,
+    block_size: Optional[int] = None,
+):
+    """
+    Multiply random 0/1 resampling matrices by `columns`.
+
+    Draws an (n_resamples x n) matrix B of fair random bits, in blocks, and
+    returns (B @ columns, number of ones in each row of B). Bits are drawn
+    packed, so a block costs one uint8 draw, one unpack and one float32
+    matrix product.
+
+    Args:
+        columns: (n, k) float32 matrix
+        n_resamples: Rows of B
+        rng: Random generator
+        block_size: Rows per block; sized to keep each block ~64 MB if None
+    """
+    n = len(columns)
+    if block_size is None:
+        block_size = max(1, min(256, (16 * 1024 * 1024) // max(n, 1)))
+    n_bytes = (n + 7) // 8
+    # Mask for the padding bits of the last byte (unpackbits is big-endian)
+    last_mask = np.uint8((0xFF << (8 * n_bytes - n)) & 0xFF)
+
+    products = np.empty((n_resamples, columns.shape[1]))
+    counts = np.empty(n_resamples)
+    for start in range(0, n_resamples, block_size):
+        stop = min(start + block_size, n_resamples)
+        packed = rng.integers(0, 256, size=(stop - start, n_bytes), dtype=np.uint8)
+        packed[:, -1] &= last_mask
+        bits = np.unpackbits(packed, axis=1, count=n).astype(np.float32)
+        products[start:stop] = bits @ columns
+        counts[start:stop] = _POPCOUNT[packed].sum(axis=1)
+    return products, counts
+
+
+def _paired_differences(production_clv: Any, candidate_clv: Any) -> np.ndarray:
+    production = np.asarray(production_clv, dtype=float).ravel()
+    candidate = np.asarray(candidate_clv, dtype=float).ravel()
+    if production.shape != candidate.shape:
+        raise ValueError("production and candidate CLV must cover the same bets")
+    if len(production) < 2:
+        raise ValueError("At least two paired bets are required")
+    diff = candidate - production
+    if not np.all(np.isfinite(diff)):
+        raise ValueError("CLV arrays must be finite")
+    return diff
+
+
+def _bootstrap_and_permutation(
+    diff: np.ndarray, n_resamples: int, rng: np.random.Generator
+):
+    """Bootstrap means and sign-flipped sums from one pass over the bits."""
+    mean = diff.mean()
+    # Center the bootstrap column so float32 rounding stays well below the
+    # sampling noise; 0/2 weights then give mean + sum(b * c) / sum(b).
+    columns = np.column_stack([diff - mean, diff]).astype(np.float32)
+    products, counts = _resampled_products(columns, n_resamples, rng)
+    bootstrap = mean + products[:, 0] / np.maximum(counts, 1.0)
+    # sum(s_i * d_i) with signs s_i = 2 * b_i - 1
+    flipped = 2.0 * products[:, 1] - float(columns[:, 1].sum(dtype=np.float64))
+    return bootstrap, flipped
+
+
+def paired_bootstrap(
+    diff: Any, n_resamples: int = 2000, seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    Bootstrap distribution of the mean paired difference.
+
+    Args:
+        diff: Per-bet differences (candidate - production)
+        n_resamples: Number of bootstrap resamples
+        seed: Random seed
+
+    Returns:
+        Array of n_resamples resampled means
+    """
+    diff = np.asarray(diff, dtype=float).ravel()
+    bootstrap, _ = _bootstrap_and_permutation(
+        diff, n_resamples, np.random.default_rng(seed)
+    )
+    return bootstrap
+
+
+def _permutation_p_value(diff: np.ndarray, flipped: np.ndarray) -> float:
+    # Observed sum with the same float32 inputs as the flipped sums
+    observed = float(diff.astype(np.float32).sum(dtype=np.float64))
+    exceed = int(np.count_nonzero(flipped >= observed))
+    return (exceed + 1) / (len(flipped) + 1)
+
+
+def paired_permutation_test(
+    diff: Any, n_resamples: int = 2000, seed: Optional[int] = None
+) -> float:
+    """
+    One-sided sign-flip permutation test of H0: mean(diff) <= 0.
+
+    Returns:
+        p-value, with the usual +1 correction so it is never exactly zero
+    """
+    diff = np.asarray(diff, dtype=float).ravel()
+    _, flipped = _bootstrap_and_permutation(
+        diff, n_resamples, np.random.default_rng(seed)
+    )
+    return _permutation_p_value(diff, flipped)
+
+
+def compare_models(
+    production_clv: Any,
+    candidate_clv: Any,
+    n_resamples: int = 2000,
+    alpha: float = 0.05,
+    min_improvement: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Compare bet-level CLV of a candidate model against production.
+
+    The candidate is significantly better when the permutation p-value is
+    below `alpha` and the lower bound of the (1 - 2 * alpha) bootstrap
+    interval on the mean improvement exceeds `min_improvement`.
+
+    Args:
+        production_clv: Per-bet CLV of the production model
+        candidate_clv: Per-bet CLV of the candidate on the same bets
+        n_resamples: Resamples for each test
+        alpha: One-sided significance level
+        min_improvement: Smallest mean CLV gain worth deploying
+        seed: Random seed
+
+    Returns:
+        Dictionary of summary statistics, interval, p-values and the
+        `significant` decision
+    """
+    if not 0 < alpha < 0.5:
+        raise ValueError("alpha must be in (0, 0.5)")
+
+    start = time.perf_counter()
+    diff = _paired_differences(production_clv, candidate_clv)
+    bootstrap, flipped = _bootstrap_and_permutation(
+        diff, n_resamples, np.random.default_rng(seed)
+    )
+    p_value = _permutation_p_value(diff, flipped)
+    ci_low, ci_high = np.quantile(bootstrap, [alpha, 1 - alpha])
+    mean_difference = float(diff.mean())
+
+    result = {
+        "n_bets": len(diff),
+        "production_mean_clv": float(np.mean(production_clv)),
+        "candidate_mean_clv": float(np.mean(candidate_clv)),
+        "mean_difference": mean_difference,
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "bootstrap_prob_improvement": float(np.mean(bootstrap > 0)),
+        "permutation_p_value": p_value,
+        "n_resamples": n_resamples,
+        "alpha": alpha,
+        "significant": bool(p_value < alpha and ci_low > min_improvement),
+        "seconds": time.perf_counter() - start,
+    }
+    logger.info(
+        f"Champion/challenger on {result['n_bets']} bets: mean CLV gain "
+        f"{mean_difference:.5f} [{ci_low:.5f}, {ci_high:.5f}], "
+        f"p={p_value:.4f} -> {'significant' if result['significant'] else 'not significant'}"
+    )
+    return result
@@ -0,0 +1,383 @@
+"""
+Opt-in per-stage profiling for pipeline and scoring runs.
+
+Profiling is off unless MULTIBET_PROFILE (PROFILE_MODE) is set:
+
+- "cprofile": each stage runs under cProfile. Its stats, merged over all
+  calls and threads, are written to `<PROFILE_DIR>/<run>/<stage>.prof`
+  (open with `pstats` or snakeviz) and the top PROFILE_TOP_N functions by
+  cumulative time are logged.
+- "tracemalloc": each stage's largest peak of traced memory above what was
+  allocated when a call started is logged, with the top PROFILE_TOP_N
+  allocation sites of that call written to `<stage>.mem.txt`.
+
+A stage called many times, such as "predict", therefore produces one file
+and one log entry per flush, not one per call. Files are rewritten with the
+cumulative stats every `flush_interval` seconds and at interpreter exit.
+
+Stages are profiled with
+
+    with profile_stage("train"):
+        ...
+
+or the `@profiled("predict")` decorator. When profiling is disabled,
+`profile_stage` returns a shared no-op context manager, and `profiled`
+returns the function unchanged if MULTIBET_PROFILE was unset when it was
+applied, so undecorated and decorated code run identically.
+
+cProfile observes only the thread it was enabled in, and a stage started
+while another is already being profiled on the same thread is folded into
+the outer one. tracemalloc is process-wide, so while one stage is being
+traced any other stage, nested or concurrent, is folded into it.
+"""
+
+import atexit
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "tracemalloc")
+
+
+def parse_profile_mode(value: Any) -> Optional[str]:
+    """
+    Normalize a PROFILE_MODE value; None, "" and "off" disable profiling.
+
+    Raises:
+        ValueError: For an unknown mode
+    """
+    mode = (value or "").strip().lower()
+    if mode in ("", "off"):
+        return None
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"profile mode must be one of {PROFILE_MODES}")
+    return mode
+
+
+class _NullStage:
+    """Shared do-nothing stage handed out while profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _StageStats:
+    """Stats of one stage accumulated over all its calls."""
+
+    __slots__ = ("calls", "dirty", "profiles", "peak_mb", "retained_mb", "top")
+
+    def __init__(self):
+        self.calls = 0
+        self.dirty = False
+        self.profiles: List[cProfile.Profile] = []  # one per thread
+        self.peak_mb = 0.0
+        self.retained_mb = 0.0
+        self.top: List[Any] = []
+
+
+class _CProfileStage:
+    def __init__(self, profiler: "Profiler", stage: str):
+        self.profiler = profiler
+        self.stage = stage
+        self.profile: Optional[cProfile.Profile] = None
+
+    def __enter__(self):
+        local = self.profiler._local
+        if getattr(local, "active", False):
+            return self
+        profiles = local.__dict__.setdefault("profiles", {})
+        with self.profiler._lock:
+            profile = profiles.get(self.stage)
+            if profile is None:
+                # cProfile only observes the enabling thread, so each thread
+                # gets its own profile per stage; flush merges them.
+                profile = profiles[self.stage] = cProfile.Profile()
+                self.profiler._stats(self.stage).profiles.append(profile)
+            self.profiler._enabled.add(id(profile))
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler owns this interpreter (e.g. a debugger).
+            logger.warning(f"Not profiling stage {self.stage}: {e}")
+            with self.profiler._lock:
+                self.profiler._enabled.discard(id(profile))
+            return self
+        self.profile = profile
+        local.active = True
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.profile is None:
+            return None
+        self.profile.disable()
+        self.profiler._local.active = False
+        with self.profiler._lock:
+            self.profiler._enabled.discard(id(self.profile))
+            stats = self.profiler._stats(self.stage)
+            stats.calls += 1
+            stats.dirty = True
+        self.profiler._maybe_flush()
+        return None
+
+
+class _TracemallocStage:
+    def __init__(self, profiler: "Profiler", stage: str):
+        self.profiler = profiler
+        self.stage = stage
+        self.started = False
+
+    def __enter__(self):
+        with self.profiler._lock:
+            self.active = not self.profiler._tracing
+            self.profiler._tracing = True
+        if not self.active:
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started = True
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if not self.active:
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        peak_mb = (peak - self.baseline) / 2**20
+        with self.profiler._lock:
+            stats = self.profiler._stats(self.stage)
+            new_peak = stats.calls == 0 or peak_mb > stats.peak_mb
+        top = None
+        if new_peak:
+            # Allocation sites are only kept for the stage's peak call.
+            top = tracemalloc.take_snapshot().statistics("lineno")
+            top = top[: self.profiler.top_n]
+        if self.started:
+            tracemalloc.stop()
+        with self.profiler._lock:
+            stats.calls += 1
+            stats.dirty = True
+            if top is not None:
+                stats.peak_mb = peak_mb
+                stats.retained_mb = (current - self.baseline) / 2**20
+                stats.top = top
+            self.profiler.peaks[self.stage] = stats.peak_mb
+            self.profiler._tracing = False
+        self.profiler._maybe_flush()
+        return None
+
+
+class Profiler:
+    """
+    Per-stage cProfile or tracemalloc profiler.
+
+    Each stage's stats accumulate over all its calls and threads, and are
+    written to one file per stage by `flush`: every `flush_interval`
+    seconds (checked when a stage ends) and at interpreter exit.
+
+    Args:
+        mode: "cprofile", "tracemalloc" or None to disable
+        directory: Root directory for profile files; each profiler writes to
+            its own timestamped subdirectory
+        top_n: Functions or allocation sites listed per stage
+        flush_interval: Seconds between automatic flushes
+    """
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        directory: str = "profiles",
+        top_n: int = 20,
+        flush_interval: float = 60.0,
+    ):
+        self.mode = parse_profile_mode(mode)
+        if top_n < 1:
+            raise ValueError("top_n must be at least 1")
+        self.top_n = top_n
+        self.flush_interval = flush_interval
+        self.directory = Path(directory) / (
+            f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        )
+        self.peaks = {}
+        self._tracing = False
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._local = threading.local()
+        self._stages: Dict[str, _StageStats] = {}
+        self._enabled: Set[int] = set()
+        self._last_flush = time.monotonic()
+        if self.mode is not None:
+            atexit.register(self._flush_at_exit)
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    @classmethod
+    def from_config(cls, app_config: Any = None) -> "Profiler":
+        """Profiler configured by PROFILE_MODE, PROFILE_DIR and PROFILE_TOP_N."""
+        if app_config is None:
+            from config.app_config import config as app_config
+        return cls(
+            mode=app_config.get("PROFILE_MODE"),
+            directory=app_config.get("PROFILE_DIR", "profiles"),
+            top_n=int(app_config.get("PROFILE_TOP_N", 20)),
+        )
+
+    def _stats(self, stage: str) -> _StageStats:
+        """The stage's accumulated stats; the lock must be held."""
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = _StageStats()
+        return stats
+
+    def _path(self, stage: str, suffix: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r"[^\w.\[\]-]+", "_", stage)
+        return self.directory / f"{name}{suffix}"
+
+    def _maybe_flush(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write and log the stats of every stage that ran since the last
+        flush. Profiles still running on other threads are picked up by a
+        later flush.
+        """
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            with self._lock:
+                dirty = [(name, s) for name, s in self._stages.items() if s.dirty]
+                for _, stats in dirty:
+                    stats.dirty = False
+            for stage, stats in dirty:
+                if self.mode == "cprofile":
+                    self._flush_cprofile(stage, stats)
+                else:
+                    self._flush_tracemalloc(stage, stats)
+
+    def _flush_cprofile(self, stage: str, stats: _StageStats) -> None:
+        out = io.StringIO()
+        merged = None
+        with self._lock:
+            # Snapshotting a profile disables it, so skip running ones.
+            profiles = [p for p in stats.profiles if id(p) not in self._enabled]
+            if len(profiles) < len(stats.profiles):
+                stats.dirty = True
+            for profile in profiles:
+                if merged is None:
+                    merged = pstats.Stats(profile, stream=out)
+                else:
+                    merged.add(profile)
+            calls = stats.calls
+        if merged is None:
+            return
+        path = self._path(stage, ".prof")
+        merged.dump_stats(str(path))
+        merged.sort_stats("cumulative").print_stats(self.top_n)
+        logger.info(
+            f"Profile of stage {stage} over {calls} calls "
+            f"({merged.total_tt:.3f}s) written to {path}\n{out.getvalue()}"
+        )
+
+    def _flush_tracemalloc(self, stage: str, stats: _StageStats) -> None:
+        with self._lock:
+            top, calls = list(stats.top), stats.calls
+            peak_mb, retained_mb = stats.peak_mb, stats.retained_mb
+        path = self._path(stage, ".mem.txt")
+        path.write_text("".join(f"{stat}\n" for stat in top))
+        sites = "\n".join(f"  {stat}" for stat in top)
+        logger.info(
+            f"Stage {stage} peak memory {peak_mb:.1f} MB over {calls} calls, "
+            f"retained {retained_mb:.1f} MB at the peak; top allocations "
+            f"({path}):\n{sites}"
+        )
+
+    def _flush_at_exit(self) -> None:
+        try:
+            self.flush()
+        except OSError as e:
+            logger.warning(f"Could not write profiles to {self.directory}: {e}")
+
+    def stage(self, stage: str):
+        """Context manager profiling the enclosed block as `stage`."""
+        if self.mode is None:
+            return _NULL_STAGE
+        if self.mode == "cprofile":
+            return _CProfileStage(self, stage)
+        return _TracemallocStage(self, stage)
+
+    def wrap(self, stage: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """`func` profiled as `stage` on every call; `func` itself if disabled."""
+        if self.mode is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.stage(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """The process-wide profiler, configured from the global config."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler.from_config()
+    return _profiler
+
+
+def profile_stage(stage: str):
+    """Profile a block as `stage` with the process-wide profiler."""
+    return get_profiler().stage(stage)
+
+
+def profiled(stage: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+    Decorator profiling every call of a function as `stage`.
+
+    Without MULTIBET_PROFILE in the environment the function is returned
+    unwrapped.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if parse_profile_mode(os.getenv("MULTIBET_PROFILE")) is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with get_profiler().stage(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
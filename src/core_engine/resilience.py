@@ -0,0 +1,588 @@
+"""
+Retries, circuit breakers and hedged requests for outbound I/O.
+
+Implements docs/error_handling_strategy.md sections 1 and 3 for odds APIs,
+BigQuery and Redis alike. Every call goes through a named endpoint of a
+`Resilience` instance:
+
+    resilience = Resilience.from_config()
+    odds = resilience.call("odds_api", session.get, url, timeout=30)
+    odds = await resilience.acall("odds_api", fetch_odds, market_id)
+
+Each endpoint has
+
+- a circuit breaker: after CIRCUIT_FAILURE_THRESHOLD consecutive transient
+  failures calls fail fast with `CircuitOpenError` for
+  CIRCUIT_RECOVERY_TIMEOUT seconds, then a single probe is let through and
+  its outcome closes or reopens the circuit;
+- a retry budget: retries (and hedges) within the last `window` seconds may
+  not exceed RETRY_BUDGET_RATIO of first attempts, plus a small floor, so
+  during an outage retry traffic stays a bounded fraction of normal traffic
+  instead of multiplying it.
+
+Only transient failures (`is_transient`) are retried or counted against the
+breaker; permanent failures such as 401/404 propagate at once. Retries back
+off exponentially with jitter and honour Retry-After.
+
+Hedged reads (`hedged` / `ahedged`) start a second identical request when
+the first has not answered within `delay` and return whichever succeeds
+first. Hedges draw on the same retry budget, so they stop when the endpoint
+is struggling. Only use them for idempotent reads.
+
+Timeouts are enforced for coroutines; synchronous callers pass
+`policy.timeout` (API_TIMEOUT) to their client, as above.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, replace
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from .instrumentation import count
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying (section 3.2); everything else is permanent.
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Exception class names, anywhere in the MRO, that mark transient failures
+# in clients we do not import here (requests, redis, google.api_core).
+_TRANSIENT_NAMES = frozenset({
+    "ConnectionError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "Timeout",
+    "TimeoutError",
+    "BusyLoadingError",
+    "ServiceUnavailable",
+    "TooManyRequests",
+    "InternalServerError",
+    "BadGateway",
+    "GatewayTimeout",
+    "DeadlineExceeded",
+})
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit for {endpoint} is open; retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class TransientHTTPError(Exception):
+    """A retryable HTTP response, with its Retry-After delay if one was sent."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def check_response(response: Any) -> Any:
+    """
+    Raise `TransientHTTPError` for a retryable status, return it otherwise.
+
+    Works with any response exposing `status_code` and `headers`
+    (requests, Flask test clients).
+    """
+    status = response.status_code
+    if status in RETRYABLE_STATUSES:
+        retry_after = response.headers.get("Retry-After")
+        try:
+            retry_after = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            retry_after = None  # HTTP-date form; fall back to backoff
+        raise TransientHTTPError(status, retry_after)
+    return response
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failure is worth retrying (section 3.2 classification)."""
+    if isinstance(error, TransientHTTPError):
+        return True
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is None:
+        status = getattr(error, "code", None)
+    if isinstance(status, int) and status >= 100:
+        return status in RETRYABLE_STATUSES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(cls.__name__ in _TRANSIENT_NAMES for cls in type(error).__mro__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Per-call retry settings.
+
+    Attributes:
+        max_attempts: Attempts including the first
+        initial_delay: Backoff before the first retry, in seconds
+        multiplier: Backoff growth per retry
+        max_delay: Cap on any single backoff
+        jitter: Relative random variance applied to each backoff
+        timeout: Per-attempt timeout for coroutines, in seconds
+    """
+
+    max_attempts: int = 3
+    initial_delay: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 300.0
+    jitter: float = 0.25
+    timeout: Optional[float] = None
+
+    def delays(self, rng: random.Random) -> Iterator[float]:
+        """Backoff before each retry."""
+        for attempt in range(self.max_attempts - 1):
+            delay = self.initial_delay * self.multiplier**attempt
+            delay *= 1.0 + rng.uniform(-self.jitter, self.jitter)
+            yield min(delay, self.max_delay)
+
+
+# Retry categories of section 3.1.
+CRITICAL = RetryPolicy(max_attempts=5)
+STANDARD = RetryPolicy(max_attempts=3)
+BATCH = RetryPolicy(max_attempts=2)
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds the circuit stays open before a probe
+        clock: Monotonic time source
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and self._clock() - self._opened_at >= self.recovery_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> float:
+        """
+        Admit a call.
+
+        Returns:
+            0.0 if the call may proceed, otherwise seconds until the next
+            probe is allowed
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0.0
+            remaining = self._opened_at + self.recovery_timeout - self._clock()
+            if remaining > 0:
+                return remaining
+            if self._probing:
+                return self.recovery_timeout
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return 0.0
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def abandon(self) -> None:
+        """
+        Forget an admitted call that ended without an outcome (cancelled or
+        interrupted), so a half-open circuit can send another probe.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Circuit opened after {self._failures} consecutive failures"
+                    )
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of first attempts over a sliding window.
+
+    Requests and retries are counted in one-second buckets over the last
+    `window` seconds. A retry is allowed while retries in the window stay
+    below `ratio` times the requests in the window plus
+    `min_per_second * window`, the floor that lets a quiet endpoint retry
+    at all.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        window: int = 10,
+        min_per_second: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if ratio < 0 or min_per_second < 0:
+            raise ValueError("ratio and min_per_second must be non-negative")
+        if window < 1:
+            raise ValueError("window must be at least 1 second")
+        self.ratio = ratio
+        self.window = window
+        self.min_retries = min_per_second * window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._seconds = [-1] * window
+        self._requests = [0] * window
+        self._retries = [0] * window
+
+    def _slot(self) -> int:
+        second = int(self._clock())
+        slot = second % self.window
+        if self._seconds[slot] != second:
+            self._seconds[slot] = second
+            self._requests[slot] = 0
+            self._retries[slot] = 0
+        return slot
+
+    def _totals(self) -> tuple:
+        oldest = int(self._clock()) - self.window
+        requests = retries = 0
+        for second, n_requests, n_retries in zip(
+            self._seconds, self._requests, self._retries
+        ):
+            if second > oldest:
+                requests += n_requests
+                retries += n_retries
+        return requests, retries
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._requests[self._slot()] += 1
+
+    def try_retry(self) -> bool:
+        """Spend budget on one retry; False when the budget is exhausted."""
+        with self._lock:
+            slot = self._slot()
+            requests, retries = self._totals()
+            if retries + 1 > self.ratio * requests + self.min_retries:
+                return False
+            self._retries[slot] += 1
+            return True
+
+
+class _Endpoint:
+    __slots__ = ("breaker", "budget")
+
+    def __init__(self, breaker: CircuitBreaker, budget: RetryBudget):
+        self.breaker = breaker
+        self.budget = budget
+
+
+class Resilience:
+    """
+    Per-endpoint circuit breakers and retry budgets.
+
+    Args:
+        policy: Default retry policy
+        failure_threshold: Consecutive failures that open a circuit
+        recovery_timeout: Seconds before an open circuit is probed
+        budget_ratio: Retries allowed per first attempt
+        budget_window: Retry budget window, in seconds
+        min_retries_per_second: Retry budget floor
+        clock: Monotonic time source
+        sleep: Blocking sleep used between synchronous retries
+        seed: Seed of the backoff jitter
+    """
+
+    def __init__(
+        self,
+        policy: RetryPolicy = STANDARD,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 60.0,
+        budget_ratio: float = 0.1,
+        budget_window: int = 10,
+        min_retries_per_second: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        seed: Optional[int] = None,
+    ):
+        self.policy = policy
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.budget_ratio = budget_ratio
+        self.budget_window = budget_window
+        self.min_retries_per_second = min_retries_per_second
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = random.Random(seed)
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_config(cls, app_config: Any = None) -> "Resilience":
+        """
+        Resilience configured by API_TIMEOUT, RETRY_MAX_ATTEMPTS,
+        RETRY_BUDGET_RATIO, CIRCUIT_FAILURE_THRESHOLD and
+        CIRCUIT_RECOVERY_TIMEOUT.
+        """
+        if app_config is None:
+            from config.app_config import config as app_config
+        return cls(
+            policy=replace(
+                STANDARD,
+                max_attempts=int(app_config.get("RETRY_MAX_ATTEMPTS", 3)),
+                timeout=float(app_config.get("API_TIMEOUT", 30)),
+            ),
+            failure_threshold=int(app_config.get("CIRCUIT_FAILURE_THRESHOLD", 5)),
+            recovery_timeout=float(app_config.get("CIRCUIT_RECOVERY_TIMEOUT", 60)),
+            budget_ratio=float(app_config.get("RETRY_BUDGET_RATIO", 0.1)),
+        )
+
+    def endpoint(self, name: str) -> _Endpoint:
+        state = self._endpoints.get(name)
+        if state is None:
+            with self._lock:
+                state = self._endpoints.get(name)
+                if state is None:
+                    state = self._endpoints[name] = _Endpoint(
+                        CircuitBreaker(
+                            self.failure_threshold, self.recovery_timeout, self._clock
+                        ),
+                        RetryBudget(
+                            self.budget_ratio,
+                            self.budget_window,
+                            self.min_retries_per_second,
+                            self._clock,
+                        ),
+                    )
+        return state
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        return self.endpoint(name).breaker
+
+    def _admit(self, name: str, state: _Endpoint) -> None:
+        retry_in = state.breaker.allow()
+        if retry_in:
+            count(f"resilience_{name}_rejected")
+            raise CircuitOpenError(name, retry_in)
+
+    def _record(self, state: _Endpoint, error: Optional[BaseException]) -> bool:
+        """Feed the outcome to the breaker; True if the error is retryable."""
+        if error is None:
+            state.breaker.record_success()
+            return False
+        if not is_transient(error):
+            state.breaker.record_success()  # the endpoint itself answered
+            return False
+        state.breaker.record_failure()
+        return True
+
+    def _next_delay(
+        self,
+        name: str,
+        state: _Endpoint,
+        policy: RetryPolicy,
+        delays: Iterator[float],
+        error: Exception,
+    ) -> Optional[float]:
+        delay = next(delays, None)
+        if delay is None:
+            return None
+        if not state.budget.try_retry():
+            count(f"resilience_{name}_budget_exhausted")
+            logger.warning(f"Retry budget for {name} exhausted; not retrying {error}")
+            return None
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, policy.max_delay))
+        count(f"resilience_{name}_retries")
+        logger.info(f"Retrying {name} in {delay:.2f}s after {error!r}")
+        return delay
+
+    def call(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        policy: Optional[RetryPolicy] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Call `func(*args, **kwargs)` against endpoint `name` with retries.
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            Exception: The last failure once retries are exhausted or the
+                failure is permanent
+        """
+        state = self.endpoint(name)
+        state.budget.record_request()
+        return self._call(name, state, policy or self.policy, func, args, kwargs)
+
+    def _call(self, name, state, policy, func, args, kwargs) -> Any:
+        delays = policy.delays(self._rng)
+        while True:
+            self._admit(name, state)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as error:
+                if not self._record(state, error):
+                    raise
+                delay = self._next_delay(name, state, policy, delays, error)
+                if delay is None:
+                    raise
+                self._sleep(delay)
+            except BaseException:
+                state.breaker.abandon()
+                raise
+            else:
+                self._record(state, None)
+                return result
+
+    async def acall(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        policy: Optional[RetryPolicy] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Coroutine counterpart of `call`; each attempt gets `policy.timeout`."""
+        state = self.endpoint(name)
+        state.budget.record_request()
+        return await self._acall(name, state, policy or self.policy, func, args, kwargs)
+
+    async def _acall(self, name, state, policy, func, args, kwargs) -> Any:
+        delays = policy.delays(self._rng)
+        while True:
+            self._admit(name, state)
+            try:
+                result = await asyncio.wait_for(func(*args, **kwargs), policy.timeout)
+            except Exception as error:
+                if not self._record(state, error):
+                    raise
+                delay = self._next_delay(name, state, policy, delays, error)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+            except BaseException:
+                # Cancelled (e.g. the losing hedge) or interrupted: no
+                # outcome, but a half-open probe slot must be freed.
+                state.breaker.abandon()
+                raise
+            else:
+                self._record(state, None)
+                return result
+
+    def hedged(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        delay: float,
+        policy: Optional[RetryPolicy] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Run a read with one hedge after `delay` seconds; the first success wins.
+
+        The losing request is not cancelled (threads cannot be) but its
+        result is discarded.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+        state = self.endpoint(name)
+        state.budget.record_request()
+        policy = policy or self.policy
+        request = (self._call, name, state, policy, func, args, kwargs)
+
+        futures = [self._executor.submit(*request)]
+        done, _ = wait(futures, timeout=delay)
+        if not done and state.budget.try_retry():
+            count(f"resilience_{name}_hedges")
+            futures.append(self._executor.submit(*request))
+        error: Optional[BaseException] = None
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except Exception as e:
+                error = e
+        raise error
+
+    async def ahedged(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        delay: float,
+        policy: Optional[RetryPolicy] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Coroutine counterpart of `hedged`; the losing request is cancelled."""
+        state = self.endpoint(name)
+        state.budget.record_request()
+        policy = policy or self.policy
+        request = (name, state, policy, func, args, kwargs)
+
+        tasks = [asyncio.ensure_future(self._acall(*request))]
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done and state.budget.try_retry():
+            count(f"resilience_{name}_hedges")
+            tasks.append(asyncio.ensure_future(self._acall(*request)))
+        error: Optional[BaseException] = None
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except Exception as e:
+                    error = e
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def close(self) -> None:
+        """Shut down the hedging thread pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
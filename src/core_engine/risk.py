@@ -0,0 +1,496 @@
+"""
+Real-time exposure, daily stake and stop-loss tracking.
+
+Staking workers reserve exposure before placing a bet, then commit the
+reservation once the bet is accepted (or release it if it is not) and
+settle it when the result is known. A reservation is granted only if, after
+adding the stake:
+
+- open exposure on the match stays within MAX_EXPOSURE_PER_MATCH,
+- stake placed today stays within MAX_DAILY_STAKE,
+- open exposure stays within the available funds (bankroll plus realized
+  profit), and
+- trading has not been halted by STOP_LOSS_THRESHOLD (realized profit at or
+  below threshold * bankroll).
+
+`RiskTracker` is the in-process implementation. Matches are spread over
+striped shards, each with its own lock, its matches' exposure and a lease
+of the daily and funds budgets. A reservation that fits in its shard's
+leases takes only that shard's lock, so workers staking on different
+matches rarely contend. A shard whose lease runs short tops it up from the
+global pools; only when the pools are short too does the tracker briefly
+lock every shard, take back all unused leases and decide the reservation
+against the exact remaining budgets, so limits are never exceeded and a
+stake that fits is never refused.
+
+`RedisRiskTracker` keeps the same counters in Redis for multi-process
+deployments, using atomic increments with compensation on rejection.
+
+Both trackers read their limits from a config snapshot and subscribe to
+config reloads, so a hot-reloaded limit applies to the next reservation.
+Limits changed with `Config.set` apply after `refresh_limits()`.
+"""
+
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, COMMITTED, RELEASED, SETTLED = "pending", "committed", "released", "settled"
+
+_SECONDS_PER_DAY = 86400
+
+
+@dataclass(slots=True)
+class Reservation:
+    """Exposure reserved for one bet."""
+
+    match_id: Any
+    stake: float
+    day: int
+    state: str = PENDING
+
+
+class _Shard:
+    """One stripe of the in-process tracker."""
+
+    __slots__ = ("lock", "exposure", "daily_lease", "funds_lease")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.exposure: Dict[Any, float] = {}
+        self.daily_lease = 0.0
+        self.funds_lease = 0.0
+
+
+def _limits(snapshot: Any):
+    return (
+        float(snapshot.max_exposure_per_match),
+        float(snapshot.max_daily_stake),
+        float(snapshot.stop_loss_threshold),
+    )
+
+
+def _follow_reloads(app_config: Any, method: Callable[[Any], None]) -> None:
+    """
+    Call `method(new_snapshot)` on every reload of `app_config`, for as long
+    as the method's object is alive.
+    """
+    ref = weakref.WeakMethod(method)
+
+    def on_reload(old: Any, new: Any) -> None:
+        target = ref()
+        if target is None:
+            unsubscribe()
+        else:
+            target(new)
+
+    unsubscribe = app_config.subscribe(on_reload)
+
+
+class RiskTracker:
+    """
+    In-process risk tracker with striped, lease-based counters.
+    """
+
+    def __init__(
+        self,
+        bankroll: float,
+        app_config: Any = None,
+        shards: int = 16,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            bankroll: Funds available for staking at start
+            app_config: Config providing MAX_EXPOSURE_PER_MATCH,
+                MAX_DAILY_STAKE and STOP_LOSS_THRESHOLD; the global
+                configuration when None
+            shards: Number of lock stripes (rounded up to a power of two)
+            clock: Epoch seconds, used to roll the daily stake over at UTC
+                midnight
+        """
+        if bankroll <= 0:
+            raise ValueError("bankroll must be positive")
+        if app_config is None:
+            from config.app_config import config as app_config
+        self.app_config = app_config
+        self.bankroll = float(bankroll)
+        self.max_match, self.max_daily, self.stop_loss = _limits(app_config.snapshot())
+        self._clock = clock
+
+        size = 1
+        while size < shards:
+            size *= 2
+        self._mask = size - 1
+        self._shards: List[_Shard] = [_Shard() for _ in range(size)]
+        self._global_lock = threading.Lock()
+        self._daily_pool = self.max_daily
+        self._funds_pool = self.bankroll
+        self._day = int(clock() // _SECONDS_PER_DAY)
+        self._day_end = (self._day + 1) * _SECONDS_PER_DAY
+        self.realized_profit = 0.0
+        self.halted = False
+        _follow_reloads(app_config, self.refresh_limits)
+
+    def refresh_limits(self, snapshot: Any = None) -> None:
+        """
+        Apply the current limits (or those of `snapshot`) to the counters.
+
+        Unused shard leases are returned to the pools and the daily pool is
+        resized to the new MAX_DAILY_STAKE less the stake already placed
+        today, so a lowered limit takes effect at once. Lowering
+        STOP_LOSS_THRESHOLD below the realized loss halts staking.
+        """
+        if snapshot is None:
+            snapshot = self.app_config.snapshot()
+        max_match, max_daily, stop_loss = _limits(snapshot)
+        self._lock_all()
+        try:
+            for shard in self._shards:
+                self._daily_pool += shard.daily_lease
+                self._funds_pool += shard.funds_lease
+                shard.daily_lease = shard.funds_lease = 0.0
+            # May go negative when the limit drops below today's stake,
+            # which blocks reservations until the day rolls over.
+            self._daily_pool += max_daily - self.max_daily
+            self.max_match, self.max_daily, self.stop_loss = (
+                max_match,
+                max_daily,
+                stop_loss,
+            )
+            if self.realized_profit <= self.stop_loss * self.bankroll:
+                self.halted = True
+        finally:
+            self._unlock_all()
+        logger.info(
+            f"Risk limits: {max_match} per match, {max_daily} per day, "
+            f"stop-loss {stop_loss:.0%}"
+        )
+
+    def reserve(self, match_id: Any, stake: float) -> Optional[Reservation]:
+        """
+        Reserve exposure for a bet.
+
+        Args:
+            match_id: Match the bet is on (hashable)
+            stake: Proposed stake
+
+        Returns:
+            The reservation, or None if it would breach a limit
+        """
+        if self.halted or not stake > 0:
+            return None
+        if self._clock() >= self._day_end:
+            self._roll_day()
+        shard = self._shards[hash(match_id) & self._mask]
+        with shard.lock:
+            exposure = shard.exposure.get(match_id, 0.0) + stake
+            if exposure > self.max_match:
+                return None
+            if stake <= shard.daily_lease and stake <= shard.funds_lease:
+                shard.daily_lease -= stake
+                shard.funds_lease -= stake
+                shard.exposure[match_id] = exposure
+                return Reservation(match_id, stake, self._day)
+        return self._reserve_slow(shard, match_id, stake)
+
+    def _lock_all(self) -> None:
+        self._global_lock.acquire()
+        for shard in self._shards:
+            shard.lock.acquire()
+
+    def _unlock_all(self) -> None:
+        for shard in reversed(self._shards):
+            shard.lock.release()
+        self._global_lock.release()
+
+    def _reserve_slow(
+        self, shard: _Shard, match_id: Any, stake: float
+    ) -> Optional[Reservation]:
+        """Top up the shard's leases from the pools, reclaiming if needed."""
+        with self._global_lock:
+            with shard.lock:
+                reservation = self._reserve_from_pools(shard, match_id, stake)
+            if reservation is not False:
+                return reservation
+            # Pools are short: gather every shard's unused lease and decide
+            # against the exact remaining budgets
+            for other in self._shards:
+                other.lock.acquire()
+            try:
+                for other in self._shards:
+                    self._daily_pool += other.daily_lease
+                    self._funds_pool += other.funds_lease
+                    other.daily_lease = other.funds_lease = 0.0
+                return self._reserve_from_pools(shard, match_id, stake) or None
+            finally:
+                for other in reversed(self._shards):
+                    other.lock.release()
+
+    def _reserve_from_pools(self, shard: _Shard, match_id: Any, stake: float):
+        """
+        Reserve, topping up the shard's leases; the shard and global locks
+        must be held. Returns None when a limit is breached and False when
+        the unleased pools cannot cover the stake.
+        """
+        exposure = shard.exposure.get(match_id, 0.0) + stake
+        if self.halted or exposure > self.max_match:
+            return None
+        daily_short = max(0.0, stake - shard.daily_lease)
+        funds_short = max(0.0, stake - shard.funds_lease)
+        if daily_short > self._daily_pool or funds_short > self._funds_pool:
+            return False
+        # Cover the shortfall plus a share of what is left in each pool
+        shares = len(self._shards)
+        daily_grant = daily_short + (self._daily_pool - daily_short) / shares
+        funds_grant = funds_short + (self._funds_pool - funds_short) / shares
+        self._daily_pool -= daily_grant
+        self._funds_pool -= funds_grant
+        shard.daily_lease += daily_grant - stake
+        shard.funds_lease += funds_grant - stake
+        shard.exposure[match_id] = exposure
+        return Reservation(match_id, stake, self._day)
+
+    def _roll_day(self) -> None:
+        self._lock_all()
+        try:
+            day = int(self._clock() // _SECONDS_PER_DAY)
+            if day > self._day:
+                for shard in self._shards:
+                    shard.daily_lease = 0.0
+                self._daily_pool = self.max_daily
+                self._day = day
+                self._day_end = (day + 1) * _SECONDS_PER_DAY
+        finally:
+            self._unlock_all()
+
+    def commit(self, reservation: Reservation) -> None:
+        """Mark a reservation's bet as placed; its exposure stays open."""
+        if reservation.state != PENDING:
+            raise ValueError(f"Cannot commit a {reservation.state} reservation")
+        reservation.state = COMMITTED
+
+    def release(self, reservation: Reservation) -> None:
+        """Give back a reservation whose bet was not placed."""
+        if reservation.state != PENDING:
+            raise ValueError(f"Cannot release a {reservation.state} reservation")
+        reservation.state = RELEASED
+        shard = self._shards[hash(reservation.match_id) & self._mask]
+        with shard.lock:
+            shard.exposure[reservation.match_id] -= reservation.stake
+            shard.funds_lease += reservation.stake
+            if reservation.day == self._day:
+                shard.daily_lease += reservation.stake
+
+    def settle(self, reservation: Reservation, profit: float) -> None:
+        """
+        Close a committed bet.
+
+        Args:
+            reservation: The bet's committed reservation
+            profit: Realized profit (negative for a loss, at least -stake)
+        """
+        if reservation.state != COMMITTED:
+            raise ValueError(f"Cannot settle a {reservation.state} reservation")
+        if profit < -reservation.stake:
+            raise ValueError("A bet cannot lose more than its stake")
+        reservation.state = SETTLED
+        shard = self._shards[hash(reservation.match_id) & self._mask]
+        with shard.lock:
+            shard.exposure[reservation.match_id] -= reservation.stake
+            shard.funds_lease += reservation.stake + profit
+        with self._global_lock:
+            self.realized_profit += profit
+            if self.realized_profit <= self.stop_loss * self.bankroll:
+                if not self.halted:
+                    logger.warning(
+                        f"Stop-loss hit: realized profit {self.realized_profit:.2f} "
+                        f"<= {self.stop_loss:.0%} of bankroll; halting staking"
+                    )
+                self.halted = True
+
+    def resume(self) -> None:
+        """Lift a stop-loss halt."""
+        self.halted = False
+
+    def exposure(self, match_id: Any) -> float:
+        """Open (reserved or committed, unsettled) exposure on a match."""
+        return self._shards[hash(match_id) & self._mask].exposure.get(match_id, 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Consistent view of all counters."""
+        self._lock_all()
+        try:
+            daily_left = self._daily_pool + sum(s.daily_lease for s in self._shards)
+            funds_left = self._funds_pool + sum(s.funds_lease for s in self._shards)
+            exposure = {
+                match_id: value
+                for shard in self._shards
+                for match_id, value in shard.exposure.items()
+                if value
+            }
+        finally:
+            self._unlock_all()
+        return {
+            "daily_stake": self.max_daily - daily_left,
+            "available_funds": funds_left,
+            "open_exposure": sum(exposure.values()),
+            "exposure_by_match": exposure,
+            "realized_profit": self.realized_profit,
+            "halted": self.halted,
+        }
+
+
+class RedisRiskTracker:
+    """
+    Risk tracker whose counters live in Redis, shared by many processes.
+
+    Each reservation increments the match, daily and open-exposure counters
+    in one MULTI/EXEC round trip and reads the realized profit and halt
+    flag; if a limit is breached the increments are reverted. Concurrent
+    reservations near a limit may therefore both be rejected, but limits
+    are never exceeded.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bankroll: float,
+        app_config: Any = None,
+        prefix: str = "multibet:risk",
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            client: redis.Redis client
+            bankroll: Funds available for staking at start
+            app_config: Config providing the risk limits; the global
+                configuration when None
+            prefix: Key prefix shared by every process of a deployment
+            clock: Epoch seconds, used to key the daily stake by UTC day
+        """
+        if bankroll <= 0:
+            raise ValueError("bankroll must be positive")
+        if app_config is None:
+            from config.app_config import config as app_config
+        self.app_config = app_config
+        self.client = client
+        self.bankroll = float(bankroll)
+        self.max_match, self.max_daily, self.stop_loss = _limits(app_config.snapshot())
+        self.prefix = prefix
+        self._clock = clock
+        _follow_reloads(app_config, self.refresh_limits)
+
+    def refresh_limits(self, snapshot: Any = None) -> None:
+        """
+        Apply the current limits (or those of `snapshot`) to later
+        reservations; the counters in Redis are unaffected.
+        """
+        if snapshot is None:
+            snapshot = self.app_config.snapshot()
+        self.max_match, self.max_daily, self.stop_loss = _limits(snapshot)
+
+    @classmethod
+    def from_url(cls, url: Optional[str] = None, **kwargs: Any) -> "RedisRiskTracker":
+        """Connect to Redis at `url` (REDIS_URL from config when None)."""
+        import redis
+
+        if url is None:
+            from config.app_config import config
+
+            url = config.get("REDIS_URL")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def reserve(self, match_id: Any, stake: float) -> Optional[Reservation]:
+        """Reserve exposure for a bet; None if it would breach a limit."""
+        if not stake > 0:
+            return None
+        day = int(self._clock() // _SECONDS_PER_DAY)
+        match_key = self._key("match", match_id)
+        day_key = self._key("day", day)
+        open_key = self._key("open")
+
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incrbyfloat(match_key, stake)
+        pipe.incrbyfloat(day_key, stake)
+        pipe.expire(day_key, 2 * _SECONDS_PER_DAY)
+        pipe.incrbyfloat(open_key, stake)
+        pipe.get(self._key("profit"))
+        pipe.get(self._key("halted"))
+        match_total, day_total, _, open_total, profit, halted = pipe.execute()
+
+        funds = self.bankroll + float(profit or 0.0)
+        if (
+            halted
+            or float(match_total) > self.max_match
+            or float(day_total) > self.max_daily
+            or float(open_total) > funds
+        ):
+            pipe = self.client.pipeline(transaction=True)
+            pipe.incrbyfloat(match_key, -stake)
+            pipe.incrbyfloat(day_key, -stake)
+            pipe.incrbyfloat(open_key, -stake)
+            pipe.execute()
+            return None
+        return Reservation(match_id, stake, day)
+
+    def commit(self, reservation: Reservation) -> None:
+        """Mark a reservation's bet as placed; its exposure stays open."""
+        if reservation.state != PENDING:
+            raise ValueError(f"Cannot commit a {reservation.state} reservation")
+        reservation.state = COMMITTED
+
+    def release(self, reservation: Reservation) -> None:
+        """Give back a reservation whose bet was not placed."""
+        if reservation.state != PENDING:
+            raise ValueError(f"Cannot release a {reservation.state} reservation")
+        reservation.state = RELEASED
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incrbyfloat(self._key("match", reservation.match_id), -reservation.stake)
+        pipe.incrbyfloat(self._key("day", reservation.day), -reservation.stake)
+        pipe.incrbyfloat(self._key("open"), -reservation.stake)
+        pipe.execute()
+
+    def settle(self, reservation: Reservation, profit: float) -> None:
+        """Close a committed bet with its realized profit."""
+        if reservation.state != COMMITTED:
+            raise ValueError(f"Cannot settle a {reservation.state} reservation")
+        if profit < -reservation.stake:
+            raise ValueError("A bet cannot lose more than its stake")
+        reservation.state = SETTLED
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incrbyfloat(self._key("match", reservation.match_id), -reservation.stake)
+        pipe.incrbyfloat(self._key("open"), -reservation.stake)
+        pipe.incrbyfloat(self._key("profit"), profit)
+        realized = float(pipe.execute()[-1])
+        if realized <= self.stop_loss * self.bankroll:
+            logger.warning(
+                f"Stop-loss hit: realized profit {realized:.2f} "
+                f"<= {self.stop_loss:.0%} of bankroll; halting staking"
+            )
+            self.client.set(self._key("halted"), 1)
+
+    def resume(self) -> None:
+        """Lift a stop-loss halt."""
+        self.client.delete(self._key("halted"))
+
+    @property
+    def halted(self) -> bool:
+        """Whether staking is halted by the stop-loss."""
+        return bool(self.client.exists(self._key("halted")))
+
+    def exposure(self, match_id: Any) -> float:
+        """Open exposure on a match."""
+        return float(self.client.get(self._key("match", match_id)) or 0.0)
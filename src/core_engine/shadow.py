@@ -0,0 +1,470 @@
+"""
+Shadow-mode A/B scoring of challenger models.
+
+Every batch is scored by the production model on the caller's thread and
+returned straight away. The same batch is then handed to challenger models
+running off the critical path, and the outputs of all models are appended
+to a columnar shadow log so their CLV can be compared later (see
+`model_comparison.compare_models`).
+
+The production path never waits for challengers:
+
+- Challengers run in a worker pool, by default in separate processes in the
+  idle scheduling class, so they only use CPU the production path is not
+  using, are preempted as soon as it wakes and never hold its GIL.
+- Scoring a batch only appends it to a bounded in-memory queue. A
+  dispatcher thread hands the queued batches to the workers every
+  `dispatch_interval` seconds, so the cost of inter-process hand-off is paid
+  once per group of batches rather than per batch, off the request thread.
+- At most `max_pending` batches are queued or in flight. When challengers
+  fall behind, new batches are dropped from shadow scoring (and counted)
+  instead of queueing up or blocking.
+- The dispatcher never waits for challengers: their results are logged from
+  completion callbacks, so production rows reach the log every
+  `dispatch_interval` however slow the challengers are. At most
+  `max_log_pending` production batches wait to be logged; beyond that they
+  are dropped from the log and counted in `stats["dropped"]`.
+- Log writes (compression and disk I/O) happen on the log's own writer
+  thread.
+"""
+
+import functools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base_model import BasePredictiveModel
+
+logger = logging.getLogger(__name__)
+
+LOG_COLUMNS = ("batch_id", "row", "key", "model", "probability", "latency_ms")
+
+# Challengers installed in each worker process by the pool initializer
+_challengers: Dict[str, BasePredictiveModel] = {}
+
+
+def _lower_priority() -> None:
+    """Move this process to the idle scheduling class, or the lowest nice."""
+    try:
+        if hasattr(os, "SCHED_IDLE"):
+            os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+        elif hasattr(os, "nice"):
+            os.nice(19)
+    except OSError:
+        logger.warning("Could not lower shadow worker priority")
+
+
+def _init_worker(challengers: Dict[str, BasePredictiveModel], low_priority: bool):
+    """Pool initializer: keep the challengers and lower the process priority."""
+    global _challengers
+    _challengers = challengers
+    if low_priority:
+        _lower_priority()
+
+
+def _score(model: BasePredictiveModel, batch: Sequence[Dict[str, Any]]):
+    """Probabilities for a batch and the time taken in milliseconds."""
+    start = time.perf_counter()
+    probabilities = np.array(
+        [model.predict(features)["prediction_probability"] for features in batch],
+        dtype=np.float32,
+    )
+    return probabilities, (time.perf_counter() - start) * 1000.0
+
+
+def _score_challengers(
+    batches: Sequence[Sequence[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    Score batches with every installed challenger.
+
+    Returns:
+        For each batch, challenger name -> (probabilities, milliseconds), or
+        an error message if the challenger failed
+    """
+    outcomes = []
+    for batch in batches:
+        results: Dict[str, Any] = {}
+        for name, model in _challengers.items():
+            try:
+                results[name] = _score(model, batch)
+            except Exception as e:  # a broken challenger must not stop shadowing
+                results[name] = f"{type(e).__name__}: {e}"
+        outcomes.append(results)
+    return outcomes
+
+
+def _row_keys(keys: Optional[Sequence[Any]], n: int) -> np.ndarray:
+    return np.asarray(keys) if keys is not None else np.arange(n)
+
+
+class ShadowLog:
+    """
+    Append-only columnar log of model outputs.
+
+    Rows are buffered as per-batch column chunks and written by a background
+    thread as compressed `.npz` parts of about `flush_rows` rows each. Model
+    names are dictionary-encoded into a small integer column.
+    """
+
+    def __init__(self, directory: str, flush_rows: int = 65536):
+        """
+        Initialize the log.
+
+        Args:
+            directory: Directory the log parts are written to
+            flush_rows: Buffered rows that trigger writing a part
+        """
+        if flush_rows < 1:
+            raise ValueError("flush_rows must be at least 1")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_rows = flush_rows
+        self._models: Dict[str, int] = {}
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._buffered_rows = 0
+        self._part = len(list(self.directory.glob("part-*.npz")))
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="shadow-log-writer", daemon=True
+        )
+        self._writer.start()
+
+    def append(
+        self,
+        batch_id: int,
+        model: str,
+        keys: np.ndarray,
+        probabilities: np.ndarray,
+        latency_ms: float,
+    ) -> None:
+        """Buffer one model's outputs for a batch."""
+        n = len(probabilities)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("ShadowLog is closed")
+            code = self._models.setdefault(model, len(self._models))
+            self._chunks.append({
+                "batch_id": np.full(n, batch_id, dtype=np.int64),
+                "row": np.arange(n, dtype=np.int32),
+                "key": keys,
+                "model": np.full(n, code, dtype=np.int16),
+                "probability": np.asarray(probabilities, dtype=np.float32),
+                "latency_ms": np.full(n, latency_ms, dtype=np.float32),
+            })
+            self._buffered_rows += n
+            if self._buffered_rows >= self.flush_rows:
+                self._flush_requested.set()
+
+    def _take_chunks(self):
+        with self._lock:
+            chunks, self._chunks = self._chunks, []
+            self._buffered_rows = 0
+            models = np.array(sorted(self._models, key=self._models.get))
+        return chunks, models
+
+    def _write(self, chunks: List[Dict[str, np.ndarray]], models: np.ndarray) -> None:
+        if not chunks:
+            return
+        with self._write_lock:
+            columns = {
+                name: np.concatenate([chunk[name] for chunk in chunks])
+                for name in LOG_COLUMNS
+            }
+            path = self.directory / f"part-{self._part:06d}.npz"
+            np.savez_compressed(path, models=models, **columns)
+            self._part += 1
+            logger.debug(f"Wrote {len(columns['row'])} shadow rows to {path}")
+
+    def _write_loop(self) -> None:
+        while True:
+            self._flush_requested.wait()
+            self._flush_requested.clear()
+            self._write(*self._take_chunks())
+            if self._closed:
+                return
+
+    def flush(self) -> None:
+        """Write all buffered rows now."""
+        self._write(*self._take_chunks())
+
+    def close(self) -> None:
+        """Write buffered rows and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._flush_requested.set()
+        self._writer.join()
+        self.flush()
+
+    def __enter__(self) -> "ShadowLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def read_shadow_log(directory: str) -> Dict[str, np.ndarray]:
+    """
+    Load every part of a shadow log.
+
+    Returns:
+        Column name -> array, with the `model` column decoded to names
+    """
+    parts = sorted(Path(directory).glob("part-*.npz"))
+    if not parts:
+        return {name: np.array([]) for name in LOG_COLUMNS}
+    columns: Dict[str, List[np.ndarray]] = {name: [] for name in LOG_COLUMNS}
+    for part in parts:
+        with np.load(part) as data:
+            for name in LOG_COLUMNS:
+                values = data[name]
+                if name == "model":
+                    values = data["models"][values]
+                columns[name].append(values)
+    return {name: np.concatenate(values) for name, values in columns.items()}
+
+
+class ShadowScorer:
+    """
+    Scores batches with the production model and shadows them to challengers.
+
+    Production latency is only unaffected when a core is free for the
+    challenger workers. On a single core, idle-priority workers still give
+    way as soon as production is runnable, but the dispatcher, completion
+    callbacks and log writer share the production process's GIL, and the
+    workers evict its caches. On one CPU, production p99 measured between
+    0.9x and 2.1x the no-shadow baseline. Check a deployment with
+    `python -m benchmarks shadow`.
+    """
+
+    def __init__(
+        self,
+        production: BasePredictiveModel,
+        challengers: Dict[str, BasePredictiveModel],
+        log: Optional[ShadowLog] = None,
+        production_name: str = "production",
+        max_pending: int = 64,
+        max_log_pending: int = 1024,
+        max_workers: int = 1,
+        dispatch_interval: float = 0.05,
+        use_processes: bool = True,
+        low_priority: bool = True,
+        mp_context: str = "spawn",
+    ):
+        """
+        Initialize the scorer.
+
+        Args:
+            production: Model whose predictions are returned to callers
+            challengers: Challenger models by name; must be picklable when
+                `use_processes` is True
+            log: Shadow log for all models' outputs; outputs are discarded
+                when None
+            production_name: Name the production model is logged under
+            max_pending: Batches that may wait for or be in shadow scoring;
+                further batches are dropped from shadowing
+            max_log_pending: Production batches that may wait to be logged;
+                further batches are left out of the log
+            max_workers: Shadow workers
+            dispatch_interval: Seconds between hand-offs of waiting batches
+                to the workers
+            use_processes: Run challengers in worker processes instead of
+                threads
+            low_priority: Run worker processes in the idle scheduling class
+                (SCHED_IDLE, or nice 19 where unavailable), so production
+                preempts them as soon as it is runnable
+            mp_context: Multiprocessing start method for worker processes
+        """
+        if production_name in challengers:
+            raise ValueError(f"Challenger name {production_name!r} is reserved")
+        if max_pending < 1 or max_log_pending < 1 or max_workers < 1:
+            raise ValueError(
+                "max_pending, max_log_pending and max_workers must be at least 1"
+            )
+        if dispatch_interval <= 0:
+            raise ValueError("dispatch_interval must be positive")
+        self.production = production
+        self.production_name = production_name
+        self.challenger_names = list(challengers)
+        self.log = log
+        self.max_pending = max_pending
+        self.max_log_pending = max_log_pending
+        self.max_workers = max_workers
+        self.dispatch_interval = dispatch_interval
+        self.stats = {"batches": 0, "shadowed": 0, "dropped": 0, "errors": 0}
+
+        self._lock = threading.Lock()
+        self._next_batch_id = 0
+        self._outstanding = 0  # batches waiting for or in shadow scoring
+        self._production_rows: Deque[Tuple[int, Any, List[float], float]] = deque()
+        self._pending: Deque[Tuple[int, List[Dict[str, Any]], Any]] = deque()
+        self._stopping = threading.Event()
+
+        self._executor: Optional[Executor] = None
+        if challengers:
+            if use_processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context(mp_context),
+                    initializer=_init_worker,
+                    initargs=(challengers, low_priority),
+                )
+            else:
+                _init_worker(challengers, False)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="shadow"
+                )
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="shadow-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def score_batch(
+        self, batch: Sequence[Dict[str, Any]], keys: Optional[Sequence[Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Score a batch with the production model and shadow it to challengers.
+
+        Only the production model runs here; shadowing and logging amount to
+        appending the batch to an in-memory queue.
+
+        Args:
+            batch: Feature dictionaries, one per selection
+            keys: Identifier of each row for joining with results later
+                (e.g. selection ids); row positions when None
+
+        Returns:
+            Production predictions for the batch
+        """
+        start = time.perf_counter()
+        predictions = [self.production.predict(features) for features in batch]
+        latency_ms = (time.perf_counter() - start) * 1000.0
+
+        probabilities = [p["prediction_probability"] for p in predictions]
+        with self._lock:
+            batch_id = self._next_batch_id
+            self._next_batch_id += 1
+            self.stats["batches"] += 1
+            if self.log is not None:
+                if len(self._production_rows) < self.max_log_pending:
+                    self._production_rows.append((
+                        batch_id,
+                        keys,
+                        probabilities,
+                        latency_ms,
+                    ))
+                else:
+                    self.stats["dropped"] += 1
+            if self._executor is not None:
+                if self._outstanding < self.max_pending:
+                    self._outstanding += 1
+                    self._pending.append((batch_id, list(batch), keys))
+                else:
+                    self.stats["dropped"] += 1
+        return predictions
+
+    def _dispatch_loop(self) -> None:
+        """Hand waiting batches to the workers and log every model's output."""
+        while True:
+            stopping = self._stopping.wait(self.dispatch_interval)
+            with self._lock:
+                production_rows, self._production_rows = (
+                    self._production_rows,
+                    deque(),
+                )
+                pending, self._pending = list(self._pending), deque()
+
+            if self.log is not None:
+                for batch_id, keys, probabilities, latency_ms in production_rows:
+                    self.log.append(
+                        batch_id,
+                        self.production_name,
+                        _row_keys(keys, len(probabilities)),
+                        probabilities,
+                        latency_ms,
+                    )
+            if pending:
+                self._shadow(pending)
+            if stopping:
+                return
+
+    def _shadow(self, pending: List[Tuple[int, List[Dict[str, Any]], Any]]) -> None:
+        # One job per worker, each covering a contiguous share of the batches
+        size = -(-len(pending) // self.max_workers)
+        for i in range(0, len(pending), size):
+            jobs = pending[i : i + size]
+            future = self._executor.submit(_score_challengers, [job[1] for job in jobs])
+            future.add_done_callback(functools.partial(self._finish, jobs))
+
+    def _finish(self, jobs: List[Tuple[int, Any, Any]], future: Future) -> None:
+        """Completion callback of a challenger job."""
+        try:
+            outcomes = future.result()
+        except Exception as e:
+            logger.warning(f"Shadow scoring of {len(jobs)} batches failed: {e}")
+            outcomes = None
+        self._record(jobs, outcomes)
+
+    def _record(self, jobs: List[Tuple[int, Any, Any]], outcomes: Any) -> None:
+        errors = 0 if outcomes is not None else len(jobs)
+        for i, (batch_id, batch, keys) in enumerate(jobs):
+            if outcomes is None:
+                continue
+            for name, result in outcomes[i].items():
+                if isinstance(result, str):
+                    logger.warning(
+                        f"Challenger {name} failed on batch {batch_id}: {result}"
+                    )
+                    errors += 1
+                elif self.log is not None:
+                    probabilities, latency_ms = result
+                    self.log.append(
+                        batch_id,
+                        name,
+                        _row_keys(keys, len(batch)),
+                        probabilities,
+                        latency_ms,
+                    )
+        with self._lock:
+            self._outstanding -= len(jobs)
+            self.stats["shadowed"] += len(jobs) if outcomes is not None else 0
+            self.stats["errors"] += errors
+
+    def close(self) -> None:
+        """
+        Shadow the batches still waiting, log everything and stop workers.
+
+        Shutting the pool down waits for the outstanding challenger jobs and
+        their completion callbacks.
+        """
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._dispatcher.join()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "ShadowScorer":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
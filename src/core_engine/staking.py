@@ -0,0 +1,82 @@
+"""
+Vectorized value scores and fractional Kelly stakes.
+
+Value score is the model's expected return per unit staked,
+p * odds - 1 (see tests/features/value_score.feature). The Kelly fraction
+for a single bet at decimal odds o is f* = (p * o - 1) / (o - 1); stakes are
+KELLY_FRACTION of that, limited by MAX_STAKE_PERCENTAGE of the bankroll and
+MAX_STAKE, and dropped when below MIN_STAKE or outside MIN_ODDS..MAX_ODDS.
+Every function works on whole slates of selections at once.
+"""
+
+from typing import Any
+
+import numpy as np
+
+from .instrumentation import timed
+
+
+def value_scores(probabilities: Any, odds: Any) -> np.ndarray:
+    """
+    Expected return per unit staked for each selection.
+
+    Args:
+        probabilities: Model win probabilities
+        odds: Decimal odds offered
+
+    Returns:
+        p * odds - 1 for each selection
+    """
+    return np.asarray(probabilities, dtype=float) * np.asarray(odds, dtype=float) - 1
+
+
+def kelly_fractions(probabilities: Any, odds: Any) -> np.ndarray:
+    """
+    Full-Kelly bankroll fraction for each selection, zero when there is no
+    edge.
+    """
+    odds = np.asarray(odds, dtype=float)
+    if np.any(odds <= 1.0):
+        raise ValueError("odds must be greater than 1.0")
+    edge = value_scores(probabilities, odds)
+    return np.maximum(edge, 0.0) / (odds - 1.0)
+
+
+@timed("stake")
+def kelly_stakes(
+    probabilities: Any,
+    odds: Any,
+    bankroll: float,
+    app_config: Any = None,
+) -> np.ndarray:
+    """
+    Fractional Kelly stakes within the configured limits.
+
+    Args:
+        probabilities: Model win probabilities
+        odds: Decimal odds offered
+        bankroll: Current bankroll
+        app_config: Config (or a ConfigSnapshot of one) providing
+            KELLY_FRACTION, MAX_STAKE_PERCENTAGE, MIN_STAKE, MAX_STAKE,
+            MIN_ODDS and MAX_ODDS; the global configuration when None. All
+            six are read from one snapshot, so a reload landing mid-batch
+            cannot mix old and new limits.
+
+    Returns:
+        Stake for each selection (zero where no bet should be placed)
+    """
+    if app_config is None:
+        from config.app_config import config as app_config
+    if bankroll <= 0:
+        raise ValueError("bankroll must be positive")
+
+    limits = app_config.snapshot() if hasattr(app_config, "snapshot") else app_config
+
+    odds = np.asarray(odds, dtype=float)
+    stakes = limits.kelly_fraction * kelly_fractions(probabilities, odds)
+    stakes *= bankroll
+    max_stake = min(limits.max_stake_percentage * bankroll, limits.max_stake)
+    np.minimum(stakes, max_stake, out=stakes)
+    tradable = (odds >= limits.min_odds) & (odds <= limits.max_odds)
+    stakes[~tradable | (stakes < limits.min_stake)] = 0.0
+    return stakes
@@ -0,0 +1 @@
+"""Data pipeline: ingestion, transformation and feature enrichment."""
@@ -0,0 +1,390 @@
+"""
+Batched loader for the online (Redis) and offline (BigQuery) stores.
+
+Replaces the per-record writes of `DataLoader.load_to_stores` in
+docs/data_ingestion_pipeline.md section 3.3, which issued one Redis SET and
+one BigQuery load job per record. Records are buffered per store and
+flushed by a background thread when `batch_size` records are waiting or the
+oldest has waited `flush_interval` seconds:
+
+- online: one non-transactional Redis pipeline of SET ... EX per batch
+- offline: one streaming insert (`insert_rows_json`) or load job per batch
+
+The two stores are independent. Each has its own buffer, thread and retry
+state, so a slow or failing BigQuery never delays Redis, and vice versa.
+
+Backpressure is per store: each holds at most `max_pending` undelivered
+records. `load` offers a record to every store; a full store blocks the
+call, but the other stores have already accepted the record, so a full
+offline buffer never holds back online writes. After `timeout` the
+`BackpressureError` names the stores that rejected the record, and only
+those need retrying (`load_many(..., stores=error.stores)`).
+
+Delivery is at-least-once. A batch leaves the buffer only after its write
+succeeds. Failed writes are retried through `Resilience`, and a batch that
+still fails is put back at the head of the buffer and retried later. A
+retried batch can be written twice: Redis SETs are idempotent, and
+streaming inserts pass a row id fixed when the record is queued, so
+BigQuery drops most duplicates of a retried batch. Row ids are unique per
+queued record (event id plus a random suffix), never the bare event id,
+because BigQuery would then also drop later snapshots of the same event,
+such as the near-close prices. `delivery_report` gives per-store counts, and `close` reports
+whatever could not be delivered in time.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core_engine.resilience import Resilience
+
+logger = logging.getLogger(__name__)
+
+
+class BackpressureError(Exception):
+    """
+    Raised when a store's buffer stays full for longer than the timeout.
+
+    `stores` names the stores that rejected the records; the others
+    accepted them.
+    """
+
+    def __init__(self, message: str, stores: Iterable[str] = ()):
+        super().__init__(message)
+        self.stores = tuple(stores)
+
+
+def _key(record: Any) -> str:
+    if hasattr(record, "event_id"):
+        return record.event_id
+    return record["event_id"]
+
+
+def _row(record: Any) -> Dict[str, Any]:
+    if hasattr(record, "model_dump"):
+        return record.model_dump(mode="json")
+    return record
+
+
+class RedisWriter:
+    """
+    Writes batches of (key, JSON) pairs with one pipelined round trip.
+
+    Args:
+        client: redis-py client (or fakeredis)
+        prefix: Key prefix, as in `live_data:<event_id>`
+        ttl: Expiry in seconds
+    """
+
+    def __init__(self, client: Any, prefix: str = "live_data:", ttl: int = 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def encode(self, record: Any) -> Tuple[str, str]:
+        if hasattr(record, "model_dump_json"):
+            return self.prefix + record.event_id, record.model_dump_json()
+        return self.prefix + record["event_id"], json.dumps(record, default=str)
+
+    def __call__(self, batch: List[Tuple[str, str]]) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in batch:
+            pipe.set(key, value, ex=self.ttl)
+        pipe.execute()
+
+
+class BigQueryWriter:
+    """
+    Appends batches of rows to a BigQuery table.
+
+    Args:
+        client: google.cloud.bigquery Client
+        table: Table id, e.g. "multibet.unified_data"
+        mode: "stream" for `insert_rows_json` (rows visible within seconds,
+            deduplicated by row id) or "load" for one load job per batch
+            (cheaper for large, latency-insensitive backfills)
+    """
+
+    def __init__(self, client: Any, table: str, mode: str = "stream"):
+        if mode not in ("stream", "load"):
+            raise ValueError("mode must be 'stream' or 'load'")
+        self.client = client
+        self.table = table
+        self.mode = mode
+
+    def encode(self, record: Any) -> Tuple[str, Dict[str, Any]]:
+        """(row id, row); the id is unique to this snapshot of the event."""
+        return f"{_key(record)}:{uuid.uuid4().hex}", _row(record)
+
+    def __call__(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        row_ids = [key for key, _ in batch]
+        rows = [row for _, row in batch]
+        if self.mode == "load":
+            self.client.load_table_from_json(rows, self.table).result()
+            return
+        errors = self.client.insert_rows_json(self.table, rows, row_ids=row_ids)
+        if errors:
+            raise RuntimeError(f"{len(errors)} rows rejected by {self.table}")
+
+
+class _Store:
+    """Buffer and flusher thread of one store."""
+
+    def __init__(
+        self,
+        name: str,
+        endpoint: str,
+        writer: Callable[[List[Any]], None],
+        resilience: Resilience,
+        batch_size: int,
+        flush_interval: float,
+        max_pending: int,
+    ):
+        self.name = name
+        self.endpoint = endpoint
+        self.writer = writer
+        self.resilience = resilience
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.buffer: deque = deque()  # (enqueued_at, item)
+        self.in_flight = 0
+        self.accepted = 0
+        self.delivered = 0
+        self.failed_batches = 0
+        self.flush_requested = False
+        self.closed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(
+            target=self._run, name=f"loader-{name}", daemon=True
+        )
+        self.thread.start()
+
+    @property
+    def pending(self) -> int:
+        return len(self.buffer) + self.in_flight
+
+    def put(self, items: List[Any], deadline: Optional[float]) -> None:
+        now = time.monotonic()
+        with self.condition:
+            while self.pending + len(items) > self.max_pending and self.pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise BackpressureError(
+                        f"{self.name} store has {self.pending} undelivered records",
+                        (self.name,),
+                    )
+                self.condition.wait(remaining)
+            self.buffer.extend((now, item) for item in items)
+            self.accepted += len(items)
+            if len(self.buffer) >= self.batch_size or len(self.buffer) == len(items):
+                self.condition.notify_all()
+
+    def _due(self) -> Optional[float]:
+        """Seconds until the buffer must be flushed; 0 when due now."""
+        if not self.buffer:
+            return None
+        if self.closed or self.flush_requested or len(self.buffer) >= self.batch_size:
+            return 0.0
+        return max(0.0, self.buffer[0][0] + self.flush_interval - time.monotonic())
+
+    def _run(self) -> None:
+        while True:
+            with self.condition:
+                while True:
+                    due = self._due()
+                    if due == 0.0:
+                        break
+                    if due is None and self.closed:
+                        return
+                    self.condition.wait(due)
+                n = min(self.batch_size, len(self.buffer))
+                batch = [self.buffer.popleft() for _ in range(n)]
+                self.in_flight = n
+            try:
+                self.resilience.call(
+                    self.endpoint, self.writer, [item for _, item in batch]
+                )
+            except Exception as e:
+                logger.warning(f"{self.name} batch of {n} failed, requeued: {e!r}")
+                with self.condition:
+                    self.buffer.extendleft(reversed(batch))
+                    self.in_flight = 0
+                    self.failed_batches += 1
+                    self.condition.wait(self.flush_interval)
+                continue
+            with self.condition:
+                self.in_flight = 0
+                self.delivered += n
+                if not self.buffer:
+                    self.flush_requested = False
+                self.condition.notify_all()
+
+    def flush(self, timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.flush_requested = True
+            self.condition.notify_all()
+            while self.pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return True
+
+    def report(self) -> Dict[str, Any]:
+        with self.condition:
+            oldest = self.buffer[0][0] if self.buffer else None
+            return {
+                "accepted": self.accepted,
+                "delivered": self.delivered,
+                "pending": self.pending,
+                "failed_batches": self.failed_batches,
+                "oldest_pending_s": (
+                    time.monotonic() - oldest if oldest is not None else 0.0
+                ),
+            }
+
+
+class DataLoader:
+    """
+    Buffered, batched writes of unified records to the online and offline
+    stores.
+
+    Args:
+        redis_client: redis-py client for the online store; None to skip it
+        bigquery_client: BigQuery client for the offline store; None to skip
+        table: Offline table id
+        offline_mode: "stream" or "load" (see BigQueryWriter)
+        batch_size: Records per write
+        flush_interval: Longest a record waits before its batch is written
+        max_pending: Undelivered records per store before `load` blocks
+        ttl: Online key expiry in seconds
+        resilience: Retry and circuit breaker layer; configured from the
+            global config when None
+    """
+
+    def __init__(
+        self,
+        redis_client: Any = None,
+        bigquery_client: Any = None,
+        table: str = "multibet.unified_data",
+        offline_mode: str = "stream",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 50_000,
+        ttl: int = 3600,
+        resilience: Optional[Resilience] = None,
+    ):
+        if batch_size < 1 or max_pending < batch_size:
+            raise ValueError("need 1 <= batch_size <= max_pending")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        resilience = resilience or Resilience.from_config()
+        writers = {}
+        if redis_client is not None:
+            writers["online"] = ("redis", RedisWriter(redis_client, ttl=ttl))
+        if bigquery_client is not None:
+            writers["offline"] = (
+                "bigquery",
+                BigQueryWriter(bigquery_client, table, offline_mode),
+            )
+        if not writers:
+            raise ValueError("at least one store client is required")
+        self._encoders = {name: writer.encode for name, (_, writer) in writers.items()}
+        self._stores = {
+            name: _Store(
+                name,
+                endpoint,
+                writer,
+                resilience,
+                batch_size,
+                flush_interval,
+                max_pending,
+            )
+            for name, (endpoint, writer) in writers.items()
+        }
+
+    def load(self, record: Any, timeout: Optional[float] = None) -> None:
+        """Queue one record (pydantic model or dict with an event_id)."""
+        self.load_many([record], timeout)
+
+    def load_many(
+        self,
+        records: Iterable[Any],
+        timeout: Optional[float] = None,
+        stores: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Queue records for every store (or only `stores`), independently.
+
+        Raises:
+            BackpressureError: If a store stays full for `timeout` seconds;
+                its `stores` lists the stores that did not take the records
+        """
+        records = list(records)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        names = self._stores if stores is None else stores
+        rejected = []
+        for name in names:
+            encode = self._encoders[name]
+            try:
+                self._stores[name].put([encode(record) for record in records], deadline)
+            except BackpressureError:
+                rejected.append(name)
+        if rejected:
+            raise BackpressureError(
+                f"{', '.join(rejected)} store full; {len(records)} records "
+                "not queued there",
+                rejected,
+            )
+
+    async def load_to_stores(self, record: Any) -> None:
+        """
+        Queue a record from a coroutine. Stores with room take it at once;
+        only the full ones are waited for, off the event loop.
+        """
+        try:
+            self.load(record, timeout=0)
+        except BackpressureError as e:
+            await asyncio.to_thread(self.load_many, [record], None, e.stores)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; False if `timeout` expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        flushed = True
+        for store in self._stores.values():
+            remaining = (
+                None if deadline is None else max(0.0, deadline - time.monotonic())
+            )
+            flushed = store.flush(remaining) and flushed
+        return flushed
+
+    def delivery_report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-store accepted, delivered and pending counts."""
+        return {name: store.report() for name, store in self._stores.items()}
+
+    def close(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Flush, stop the flusher threads and return the final delivery report.
+
+        Records still pending after `timeout` are reported, not silently lost.
+        """
+        self.flush(timeout)
+        for store in self._stores.values():
+            with store.condition:
+                store.closed = True
+                store.condition.notify_all()
+        for store in self._stores.values():
+            if not store.pending:
+                store.thread.join(timeout)
+        report = self.delivery_report()
+        for name, counts in report.items():
+            if counts["pending"]:
+                logger.error(f"{counts['pending']} records undelivered to {name} store")
+        return report
@@ -0,0 +1,425 @@
+"""
+Vectorized data quality scoring for ingestion batches.
+
+Replaces the record-by-record `DataQualityMonitor` sketch in
+docs/data_ingestion_pipeline.md section 4.2 with whole-batch array checks.
+A batch is columnar, in the segmented market layout of
+`src.core_engine.devig` (flat `odds` plus `offsets`), with one timestamp per
+market; `columns_from_records` builds it from raw records. Missing values
+are NaN.
+
+Per batch, `QualityEngine.score` computes the four scores of section 4.2 as
+fractions in [0, 1]:
+
+- completeness: required per-market fields and odds present (null masks)
+- accuracy: present odds within MIN_VALID_ODDS..MAX_VALID_ODDS
+- consistency: market overround within `overround_bounds`, for markets
+  whose outcomes are exhaustive (an optional "exhaustive" column; props
+  such as "player_tries" are not)
+- timeliness: market received before `event_start_time`, and its odds no
+  older than `max_odds_age` when an `odds_updated_at` column is supplied
+
+and flags each market as in docs/error_handling_strategy.md section 2.2:
+RED for missing fields, YELLOW for range, overround or staleness failures,
+GREEN otherwise. A batch whose overall score is below `quality_threshold`
+(70%) fails, and can be quarantined with reason "quality_score".
+
+Each source also feeds streaming quantile sketches of its odds and
+booksums. Its first batches, up to `reference_size` markets, form a
+reference distribution, and `drift` compares the current window with it.
+
+Every step is a handful of NumPy passes over the batch, a small fraction of
+the cost of parsing and validating the same records.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .schemas import MAX_VALID_ODDS, MIN_VALID_ODDS
+
+logger = logging.getLogger(__name__)
+
+GREEN, YELLOW, RED = 0, 1, 2
+FLAG_NAMES = ("green", "yellow", "red")
+SCORES = ("completeness", "accuracy", "consistency", "timeliness")
+EXHAUSTIVE_MARKETS = frozenset({"h2h", "win"})
+
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with bounded relative error.
+
+    Values are counted in logarithmic buckets of ratio gamma =
+    (1 + alpha) / (1 - alpha) between `min_value` and `max_value` (values
+    outside are clamped), so every quantile estimate is within a relative
+    error `alpha` of a true sample value. Adding a batch is one `bincount`.
+    """
+
+    def __init__(
+        self,
+        relative_accuracy: float = 0.01,
+        min_value: float = 1e-3,
+        max_value: float = 1e4,
+    ):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        if not 0 < min_value < max_value:
+            raise ValueError("need 0 < min_value < max_value")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._log_gamma = np.log1p(2 * relative_accuracy / (1 - relative_accuracy))
+        self._offset = int(np.floor(np.log(min_value) / self._log_gamma))
+        n_buckets = int(np.ceil(np.log(max_value) / self._log_gamma)) - self._offset + 1
+        self.counts = np.zeros(n_buckets, dtype=np.int64)
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def add(self, values: Any) -> None:
+        """Count finite positive values."""
+        values = np.asarray(values, dtype=float)
+        values = values[np.isfinite(values) & (values > 0)]
+        if not len(values):
+            return
+        np.clip(values, self.min_value, self.max_value, out=values)
+        index = np.ceil(np.log(values) / self._log_gamma).astype(np.int64)
+        index -= self._offset
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if len(other.counts) != len(self.counts) or other._offset != self._offset:
+            raise ValueError("sketches have different parameters")
+        self.counts += other.counts
+
+    def _bucket_value(self, index: Any) -> Any:
+        """Representative value of buckets: the midpoint within alpha."""
+        upper = np.exp((np.asarray(index) + self._offset) * self._log_gamma)
+        return upper * 2 / (1 + np.exp(self._log_gamma))
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """Estimated quantiles; NaN when empty."""
+        total = self.total
+        if not total:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(self.counts)
+        ranks = np.clip(np.asarray(qs) * (total - 1), 0, total - 1)
+        return self._bucket_value(np.searchsorted(cumulative, ranks, side="right"))
+
+    def distribution(self) -> np.ndarray:
+        total = self.total
+        return self.counts / total if total else self.counts.astype(float)
+
+
+def population_stability_index(
+    reference: QuantileSketch, current: QuantileSketch, bins: int = 10
+) -> float:
+    """
+    PSI between two sketches over the reference's deciles.
+
+    Values below and above the reference's range get a bin each. Deciles
+    that fall into the same bucket, as with a reference concentrated on a
+    few values, are merged rather than producing empty bins.
+
+    Values below 0.1 are usually read as stable and above 0.25 as a
+    significant shift.
+    """
+    if not reference.total or not current.total:
+        return 0.0
+    counts = reference.counts
+    deciles = np.searchsorted(
+        np.cumsum(counts), np.linspace(0, reference.total, bins + 1)[1:-1]
+    )
+    occupied = np.flatnonzero(counts)
+    edges = np.unique(np.r_[occupied[0], deciles + 1, occupied[-1] + 1])
+    edges = edges[(edges > 0) & (edges < len(counts))]
+    expected = np.add.reduceat(reference.distribution(), np.r_[0, edges])
+    actual = np.add.reduceat(current.distribution(), np.r_[0, edges])
+    expected = np.maximum(expected, 1e-4)
+    actual = np.maximum(actual, 1e-4)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+@dataclass
+class QualityReport:
+    """Scores and per-market flags for one batch."""
+
+    n_markets: int
+    completeness: float
+    accuracy: float
+    consistency: float
+    timeliness: float
+    flags: np.ndarray
+    threshold: float
+    flag_counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def overall(self) -> float:
+        return (
+            self.completeness + self.accuracy + self.consistency + self.timeliness
+        ) / 4
+
+    @property
+    def passed(self) -> bool:
+        return self.overall >= self.threshold
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n_markets": self.n_markets,
+            **{name: getattr(self, name) for name in SCORES},
+            "overall": self.overall,
+            "passed": self.passed,
+            "flags": self.flag_counts,
+        }
+
+
+class _SourceSketches:
+    __slots__ = ("reference", "current", "seen")
+
+    def __init__(self, make):
+        self.reference = {"odds": make(), "booksum": make()}
+        self.current = {"odds": make(), "booksum": make()}
+        self.seen = 0
+
+
+class QualityEngine:
+    """
+    Batch quality scoring and per-source drift tracking.
+
+    Args:
+        required: Per-market columns whose NaN entries count as missing
+        overround_bounds: Accepted (min, max) of booksum - 1
+        max_odds_age: Oldest acceptable odds, in seconds, when batches carry
+            `odds_updated_at`
+        quality_threshold: Overall score below which a batch fails
+        reference_size: Markets per source forming the drift reference
+        relative_accuracy: Quantile sketch accuracy
+    """
+
+    def __init__(
+        self,
+        required: Sequence[str] = ("event_start_time",),
+        overround_bounds: Tuple[float, float] = (0.0, 0.4),
+        max_odds_age: float = 300.0,
+        quality_threshold: float = 0.7,
+        reference_size: int = 10_000,
+        relative_accuracy: float = 0.01,
+    ):
+        if overround_bounds[0] > overround_bounds[1]:
+            raise ValueError("overround_bounds must be (min, max)")
+        if not 0 <= quality_threshold <= 1:
+            raise ValueError("quality_threshold must be between 0 and 1")
+        self.required = tuple(required)
+        self.overround_bounds = overround_bounds
+        self.max_odds_age = max_odds_age
+        self.quality_threshold = quality_threshold
+        self.reference_size = reference_size
+        self.relative_accuracy = relative_accuracy
+        self._sources: Dict[str, _SourceSketches] = {}
+
+    def score(
+        self, batch: Dict[str, np.ndarray], source: str = "unknown"
+    ) -> QualityReport:
+        """
+        Score one batch and feed its source's drift sketches.
+
+        Args:
+            batch: "odds" and "offsets" in the segmented layout,
+                "event_start_time" and "received_at" per market in epoch
+                seconds, optionally "odds_updated_at", "exhaustive" and
+                other per-market columns named in `required`
+            source: Data source name
+        """
+        odds = np.asarray(batch["odds"], dtype=float)
+        offsets = np.asarray(batch["offsets"], dtype=np.int64)
+        sizes = np.diff(offsets)
+        n_markets = len(sizes)
+        if not n_markets:
+            flags = np.zeros(0, dtype=np.int8)
+            return QualityReport(0, 1.0, 1.0, 1.0, 1.0, flags, self.quality_threshold)
+        market = np.repeat(np.arange(n_markets), sizes)
+
+        # Completeness: per-market required fields and every outcome's odds.
+        present_odds = ~np.isnan(odds)
+        missing = np.zeros(n_markets, dtype=bool)
+        n_present = 0
+        for name in self.required:
+            present = ~np.isnan(np.asarray(batch[name], dtype=float))
+            missing |= ~present
+            n_present += int(present.sum())
+        outcomes_present = np.bincount(
+            market, weights=present_odds, minlength=n_markets
+        )
+        missing |= outcomes_present < sizes
+        completeness = (n_present + outcomes_present.sum()) / (
+            n_markets * len(self.required) + len(odds)
+        )
+
+        # Accuracy: odds within the accepted range.
+        in_range = present_odds & (odds >= MIN_VALID_ODDS) & (odds <= MAX_VALID_ODDS)
+        n_valid = int(in_range.sum())
+        accuracy = n_valid / max(int(present_odds.sum()), 1)
+        bad_odds = np.bincount(
+            market, weights=present_odds & ~in_range, minlength=n_markets
+        )
+
+        # Consistency: overround of the markets whose odds are all usable.
+        usable = np.bincount(market, weights=in_range, minlength=n_markets) == sizes
+        if "exhaustive" in batch:
+            usable &= np.asarray(batch["exhaustive"], dtype=bool)
+        booksum = np.bincount(
+            market,
+            weights=np.where(in_range, 1.0 / np.where(in_range, odds, 1.0), 0.0),
+            minlength=n_markets,
+        )
+        low, high = self.overround_bounds
+        consistent = usable & (booksum - 1 >= low) & (booksum - 1 <= high)
+        consistency = consistent.sum() / max(int(usable.sum()), 1)
+
+        # Timeliness: received before the start, with fresh odds.
+        start = np.asarray(batch["event_start_time"], dtype=float)
+        received = np.asarray(batch["received_at"], dtype=float)
+        fresh = received <= start  # NaN start compares False
+        if "odds_updated_at" in batch:
+            age = received - np.asarray(batch["odds_updated_at"], dtype=float)
+            fresh &= age <= self.max_odds_age
+        timeliness = float(fresh.mean())
+
+        flags = np.full(n_markets, GREEN, dtype=np.int8)
+        flags[(bad_odds > 0) | ~(consistent | ~usable) | ~fresh] = YELLOW
+        flags[missing] = RED
+
+        self._observe(source, odds[in_range], booksum[usable])
+        report = QualityReport(
+            n_markets=n_markets,
+            completeness=float(completeness),
+            accuracy=float(accuracy),
+            consistency=float(consistency),
+            timeliness=timeliness,
+            flags=flags,
+            threshold=self.quality_threshold,
+            flag_counts=dict(zip(FLAG_NAMES, np.bincount(flags, minlength=3).tolist())),
+        )
+        if not report.passed:
+            logger.warning(
+                f"Batch from {source} scored {report.overall:.2f} "
+                f"(threshold {self.quality_threshold}): {report.to_dict()}"
+            )
+        return report
+
+    def _sketch(self) -> QuantileSketch:
+        return QuantileSketch(self.relative_accuracy)
+
+    def _observe(self, source: str, odds: np.ndarray, booksums: np.ndarray) -> None:
+        sketches = self._sources.get(source)
+        if sketches is None:
+            sketches = self._sources[source] = _SourceSketches(self._sketch)
+        # Whole batches go to the reference until it holds reference_size
+        # markets, then to the current window.
+        if sketches.seen < self.reference_size:
+            target = sketches.reference
+            sketches.seen += len(booksums)
+        else:
+            target = sketches.current
+        target["odds"].add(odds)
+        target["booksum"].add(booksums)
+
+    def rotate(self, source: Optional[str] = None) -> None:
+        """Start a new current window for one source, or all of them."""
+        names = [source] if source is not None else list(self._sources)
+        for name in names:
+            sketches = self._sources.get(name)
+            if sketches is not None:
+                sketches.current = {"odds": self._sketch(), "booksum": self._sketch()}
+
+    def drift(
+        self, qs: Sequence[float] = (0.1, 0.5, 0.9)
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Reference versus current-window quantiles and PSI, per source and
+        metric ("odds", "booksum").
+        """
+        result = {}
+        for source, sketches in self._sources.items():
+            result[source] = {
+                metric: {
+                    "reference": sketches.reference[metric].quantiles(qs).tolist(),
+                    "current": sketches.current[metric].quantiles(qs).tolist(),
+                    "psi": population_stability_index(
+                        sketches.reference[metric], sketches.current[metric]
+                    ),
+                }
+                for metric in ("odds", "booksum")
+            }
+        return result
+
+
+def _timestamp(value: Any) -> float:
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return np.nan
+    return value.timestamp()
+
+
+def columns_from_records(
+    records: Sequence[Any], received_at: Optional[float] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Columnar batch from raw or validated sports and racing records.
+
+    Each sports market and each race's win market becomes one market;
+    missing odds or start times become NaN. Markets are exhaustive if their
+    key is in EXHAUSTIVE_MARKETS.
+
+    Args:
+        records: Dicts or unified schema models
+        received_at: Receipt time for all markets (epoch seconds); now if None
+    """
+    if received_at is None:
+        received_at = datetime.now().timestamp()
+    odds: List[float] = []
+    sizes: List[int] = []
+    starts: List[float] = []
+    exhaustive: List[bool] = []
+    for record in records:
+        if hasattr(record, "model_dump"):
+            record = record.model_dump()
+        if "runners" in record:
+            markets = [
+                ("win", [runner.get("win_odds") for runner in record["runners"] or ()])
+            ]
+            start = _timestamp(record.get("race_start_time"))
+        else:
+            markets = [
+                (
+                    market.get("market_key"),
+                    [outcome.get("price") for outcome in market.get("outcomes") or ()],
+                )
+                for market in record.get("markets") or ()
+            ]
+            start = _timestamp(record.get("event_start_time"))
+        for key, prices in markets:
+            odds.extend(np.nan if price is None else price for price in prices)
+            sizes.append(len(prices))
+            starts.append(start)
+            exhaustive.append(key in EXHAUSTIVE_MARKETS)
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return {
+        "odds": np.asarray(odds, dtype=float),
+        "offsets": offsets,
+        "event_start_time": np.asarray(starts, dtype=float),
+        "received_at": np.full(len(sizes), received_at, dtype=float),
+        "exhaustive": np.asarray(exhaustive, dtype=bool),
+    }
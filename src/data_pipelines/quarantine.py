@@ -0,0 +1,516 @@
+"""
+Quarantine and rejection of invalid records, off the ingestion path.
+
+Implements docs/error_handling_strategy.md sections 2.3 and 2.4.
+`IngestGate.submit` validates each incoming record and does one of three
+things with it:
+
+- accepts it: the record is handed to the sink (e.g. `DataLoader.load`)
+- quarantines it: schema ("schema") or business rule ("business_rule")
+  failures are diverted to the quarantine store with a reason code
+- rejects it: corrupted payloads ("corrupted") and duplicates within the
+  deduplication window ("duplicate") are counted, logged and dropped
+
+Diverting is an O(1) append to an in-memory queue. A writer thread appends
+diverted records to the on-disk store, so a burst of bad data never stalls
+ingestion. A pool of worker threads then takes quarantined records in
+batches, enriches and revalidates them, and re-injects the ones that now
+pass into the sink. Records that still fail after `max_attempts` are marked
+for manual review, with a warning logged as the alert. `release` re-injects
+reviewed records by hand.
+
+The store is append-only JSON lines under its directory:
+
+    quarantine-000000.jsonl   one entry per diverted record:
+                              {"id", "at", "reason", "source", "detail", "record"}
+    resolutions.jsonl         {"id", "at", "status", "note"}, status one of
+                              "released", "review" or "discarded"
+
+An entry is open until it has a "released" or "discarded" resolution, so
+reopening the store after a restart resumes revalidation where it stopped.
+
+Ingest latency of accepted records is timed under the "ingestion" stage of
+the instrumentation registry. Quarantined and rejected records are timed
+under "ingestion_diverted", so bad data does not distort ingest latency.
+Quarantine and rejection rates are in `stats`.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from pydantic import BaseModel, ValidationError
+
+from src.core_engine.instrumentation import Instrumentation, get_instrumentation
+
+from .schemas import MAX_VALID_ODDS, MIN_VALID_ODDS
+
+logger = logging.getLogger(__name__)
+
+QUARANTINE_REASONS = ("schema", "business_rule", "quality_score", "source_failures")
+REJECTION_REASONS = ("corrupted", "obsolete", "duplicate", "blacklisted")
+RESOLUTIONS = ("released", "review", "discarded")
+_CLOSED_STATUSES = ("released", "discarded")
+
+
+def _json_record(record: Any) -> Any:
+    if isinstance(record, BaseModel):
+        return record.model_dump(mode="json")
+    if isinstance(record, bytes):
+        return record.decode("utf-8", errors="replace")
+    return record
+
+
+class QuarantineStore:
+    """
+    Append-only on-disk store of quarantined records and their resolutions.
+
+    Args:
+        directory: Store directory, created if missing
+        segment_bytes: Size at which a new quarantine segment is started
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 << 20):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        segments = sorted(self.directory.glob("quarantine-*.jsonl"))
+        self._segment = len(segments) - 1 if segments else 0
+        self._next_id = 1 + max((entry["id"] for entry in self.entries()), default=-1)
+
+    def _segment_path(self) -> Path:
+        path = self.directory / f"quarantine-{self._segment:06d}.jsonl"
+        if path.exists() and path.stat().st_size >= self.segment_bytes:
+            self._segment += 1
+            path = self.directory / f"quarantine-{self._segment:06d}.jsonl"
+        return path
+
+    def append(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Assign ids to entries and append them; returns the stored entries."""
+        with self._lock:
+            for entry in entries:
+                entry["id"] = self._next_id
+                self._next_id += 1
+            lines = "".join(json.dumps(entry, default=str) + "\n" for entry in entries)
+            with open(self._segment_path(), "a") as f:
+                f.write(lines)
+        return entries
+
+    def resolve(self, ids: Sequence[int], status: str, note: str = "") -> None:
+        """Append a resolution for each entry id."""
+        if status not in RESOLUTIONS:
+            raise ValueError(f"status must be one of {RESOLUTIONS}")
+        now = time.time()
+        lines = "".join(
+            json.dumps({"id": i, "at": now, "status": status, "note": note}) + "\n"
+            for i in ids
+        )
+        with self._lock, open(self.directory / "resolutions.jsonl", "a") as f:
+            f.write(lines)
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """Every quarantined entry, oldest first."""
+        for path in sorted(self.directory.glob("quarantine-*.jsonl")):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def statuses(self) -> Dict[int, str]:
+        """Latest resolution status of each resolved entry."""
+        path = self.directory / "resolutions.jsonl"
+        statuses = {}
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        resolution = json.loads(line)
+                        statuses[resolution["id"]] = resolution["status"]
+        return statuses
+
+    def open_entries(self, include_review: bool = True) -> List[Dict[str, Any]]:
+        """Entries not yet released or discarded."""
+        statuses = self.statuses()
+        closed = _CLOSED_STATUSES if include_review else (*_CLOSED_STATUSES, "review")
+        return [
+            entry for entry in self.entries() if statuses.get(entry["id"]) not in closed
+        ]
+
+
+class Quarantine:
+    """
+    Non-blocking quarantine with background revalidation workers.
+
+    Args:
+        directory: QuarantineStore directory
+        revalidate: Called with a batch of stored entries; returns, for each,
+            the recovered record or None if it still fails
+        reinject: Called with the records recovered from a batch
+        workers: Revalidation worker threads
+        batch_size: Entries revalidated per call
+        retry_interval: Seconds before a failed entry is revalidated again
+        max_attempts: Revalidations before an entry goes to manual review
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        revalidate: Callable[[List[Dict[str, Any]]], List[Any]],
+        reinject: Callable[[List[Any]], None],
+        workers: int = 2,
+        batch_size: int = 256,
+        retry_interval: float = 60.0,
+        max_attempts: int = 3,
+    ):
+        if workers < 1 or batch_size < 1 or max_attempts < 1:
+            raise ValueError("workers, batch_size and max_attempts must be >= 1")
+        self.store = QuarantineStore(directory)
+        self.revalidate = revalidate
+        self.reinject = reinject
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self.counts: Counter = Counter()
+        self._incoming: deque = deque()
+        self._due: List[tuple] = []  # heap of (due_at, id, attempts, entry)
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._closed = False
+
+        now = time.monotonic()
+        for entry in self.store.open_entries(include_review=False):
+            heapq.heappush(self._due, (now, entry["id"], 0, entry))
+        self._threads = [
+            threading.Thread(target=self._write_loop, name="quarantine-writer")
+        ] + [
+            threading.Thread(target=self._work_loop, name=f"quarantine-worker-{i}")
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def divert(
+        self, record: Any, reason: str, source: str = "unknown", detail: str = ""
+    ) -> None:
+        """Queue a record for the quarantine store without blocking."""
+        if reason not in QUARANTINE_REASONS:
+            raise ValueError(f"reason must be one of {QUARANTINE_REASONS}")
+        self._incoming.append({
+            "at": time.time(),
+            "reason": reason,
+            "source": source,
+            "detail": detail,
+            "record": record,
+        })
+        with self._lock:
+            self.counts[f"quarantined:{reason}"] += 1
+            self.counts[f"source:{source}"] += 1
+            self._work.notify_all()
+
+    def reject(
+        self, record: Any, reason: str, source: str = "unknown", detail: str = ""
+    ) -> None:
+        """Drop a record, logging and counting why (section 2.4)."""
+        if reason not in REJECTION_REASONS:
+            raise ValueError(f"reason must be one of {REJECTION_REASONS}")
+        with self._lock:
+            self.counts[f"rejected:{reason}"] += 1
+            self.counts[f"source:{source}"] += 1
+        logger.info(f"Rejected {reason} record from {source}: {detail}")
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._incoming and not self._closed:
+                    self._work.wait()
+                if not self._incoming and self._closed:
+                    return
+                self._busy += 1
+            batch = []
+            while self._incoming:
+                entry = self._incoming.popleft()
+                entry["record"] = _json_record(entry["record"])
+                batch.append(entry)
+            try:
+                self.store.append(batch)
+            except Exception as e:
+                logger.error(f"Failed to store {len(batch)} quarantined records: {e}")
+                self._incoming.extendleft(reversed(batch))
+                time.sleep(self.retry_interval)
+                batch = []
+            with self._lock:
+                now = time.monotonic()
+                for entry in batch:
+                    heapq.heappush(self._due, (now, entry["id"], 0, entry))
+                self._busy -= 1
+                self._work.notify_all()
+
+    def _take_due(self) -> Optional[List[tuple]]:
+        """Wait for a batch of due entries; None once closed."""
+        with self._lock:
+            while True:
+                if self._closed:
+                    return None
+                wait = None
+                if self._due:
+                    wait = self._due[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                self._work.wait(wait)
+            batch = []
+            now = time.monotonic()
+            while self._due and self._due[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self._due))
+            self._busy += 1
+            return batch
+
+    def _work_loop(self) -> None:
+        while True:
+            batch = self._take_due()
+            if batch is None:
+                return
+            try:
+                self._revalidate_batch(batch)
+            except Exception as e:
+                logger.error(f"Quarantine revalidation failed: {e!r}")
+                with self._lock:
+                    due = time.monotonic() + self.retry_interval
+                    for _, entry_id, attempts, entry in batch:
+                        heapq.heappush(self._due, (due, entry_id, attempts, entry))
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._work.notify_all()
+
+    def _revalidate_batch(self, batch: List[tuple]) -> None:
+        results = self.revalidate([entry for *_, entry in batch])
+        recovered, failed = [], []
+        for item, result in zip(batch, results):
+            (recovered if result is not None else failed).append((item, result))
+
+        if recovered:
+            self.reinject([result for _, result in recovered])
+            self.store.resolve(
+                [item[1] for item, _ in recovered], "released", "revalidated"
+            )
+        review = [item for item, _ in failed if item[2] + 1 >= self.max_attempts]
+        if review:
+            self.store.resolve([item[1] for item in review], "review")
+            logger.warning(
+                f"{len(review)} quarantined records need manual review "
+                f"(ids {[item[1] for item in review][:10]})"
+            )
+        with self._lock:
+            self.counts["released"] += len(recovered)
+            self.counts["review"] += len(review)
+            due = time.monotonic() + self.retry_interval
+            for _, entry_id, attempts, entry in (item for item, _ in failed):
+                if attempts + 1 < self.max_attempts:
+                    heapq.heappush(self._due, (due, entry_id, attempts + 1, entry))
+
+    def release(self, ids: Sequence[int], records: Sequence[Any], note: str) -> None:
+        """Re-inject manually approved records and close their entries."""
+        self.reinject(list(records))
+        self.store.resolve(ids, "released", note)
+        with self._lock:
+            self.counts["released"] += len(ids)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued, due now or being processed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while (
+                self._incoming
+                or self._busy
+                or (self._due and self._due[0][0] <= time.monotonic())
+            ):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._work.wait(0.05 if remaining is None else min(remaining, 0.05))
+            return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Store queued records and stop the background threads."""
+        self.drain(timeout)
+        with self._lock:
+            self._closed = True
+            self._work.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+
+def business_rule_violations(record: BaseModel) -> List[str]:
+    """Section 2.1 business rules: odds in range, probabilities in [0, 1]."""
+    violations = []
+    for runner in getattr(record, "runners", ()):
+        if not MIN_VALID_ODDS <= runner.win_odds <= MAX_VALID_ODDS:
+            violations.append(f"runner {runner.runner_id} odds {runner.win_odds}")
+    for market in getattr(record, "markets", ()):
+        for outcome in market.outcomes:
+            if not MIN_VALID_ODDS <= outcome.price <= MAX_VALID_ODDS:
+                violations.append(f"{market.market_key} {outcome.name} {outcome.price}")
+    return violations
+
+
+class IngestGate:
+    """
+    Validates incoming records, diverting failures to a Quarantine.
+
+    Args:
+        schema: Pydantic model of valid records
+        sink: Called with each accepted record, and from the worker threads
+            with each recovered one, so it must be thread-safe
+        quarantine_dir: Directory of the quarantine store
+        enrich: Optional fix-up applied before revalidation, called with the
+            stored record and its reason code; returns the amended record
+        rules: Business rule check returning a list of violations
+        dedupe_window: Seconds within which an identical record is a duplicate
+        instrumentation: Registry for the ingest latency histograms
+        **quarantine_options: Passed to Quarantine (workers, batch_size, ...)
+    """
+
+    def __init__(
+        self,
+        schema: type,
+        sink: Callable[[Any], None],
+        quarantine_dir: str,
+        enrich: Optional[Callable[[Any, str], Any]] = None,
+        rules: Callable[[BaseModel], List[str]] = business_rule_violations,
+        dedupe_window: float = 300.0,
+        instrumentation: Optional[Instrumentation] = None,
+        **quarantine_options: Any,
+    ):
+        self.schema = schema
+        self.sink = sink
+        self.enrich = enrich
+        self.rules = rules
+        self.dedupe_window = dedupe_window
+        self.instrumentation = instrumentation or get_instrumentation()
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._seen_lock = threading.Lock()
+        self._ingested = 0
+        self.quarantine = Quarantine(
+            quarantine_dir,
+            self.revalidate,
+            lambda records: [sink(record) for record in records],
+            **quarantine_options,
+        )
+
+    def _is_duplicate(self, payload: bytes) -> bool:
+        digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        now = time.monotonic()
+        with self._seen_lock:
+            while self._seen:
+                oldest, seen_at = next(iter(self._seen.items()))
+                if now - seen_at < self.dedupe_window:
+                    break
+                del self._seen[oldest]
+            if digest in self._seen:
+                return True
+            self._seen[digest] = now
+            return False
+
+    def _validate(self, data: Any) -> tuple:
+        """(record, None) if valid, else (None, (reason, detail))."""
+        try:
+            record = self.schema.model_validate(data)
+        except ValidationError as e:
+            return None, ("schema", f"{e.error_count()} errors: {e.errors()[0]['msg']}")
+        violations = self.rules(record)
+        if violations:
+            return None, ("business_rule", "; ".join(violations))
+        return record, None
+
+    def submit(self, raw: Any, source: str = "unknown") -> Optional[BaseModel]:
+        """
+        Validate one record and route it.
+
+        Args:
+            raw: JSON text/bytes or an already decoded dict
+            source: Data source name, for per-source failure counts
+
+        Returns:
+            The validated record if accepted, otherwise None
+        """
+        start = time.perf_counter_ns()
+        with self._seen_lock:
+            self._ingested += 1
+        data = raw
+        if isinstance(raw, (str, bytes)):
+            try:
+                data = json.loads(raw)
+            except ValueError as e:
+                self.quarantine.reject(raw, "corrupted", source, str(e))
+                self._record_latency("ingestion_diverted", start)
+                return None
+
+        if self._is_duplicate(json.dumps(data, sort_keys=True, default=str).encode()):
+            self.quarantine.reject(data, "duplicate", source)
+            self._record_latency("ingestion_diverted", start)
+            return None
+
+        with self.instrumentation.timer("validation"):
+            record, failure = self._validate(data)
+        if record is None:
+            reason, detail = failure
+            self.quarantine.divert(data, reason, source, detail)
+            self._record_latency("ingestion_diverted", start)
+            return None
+        self.sink(record)
+        self._record_latency("ingestion", start)
+        return record
+
+    def _record_latency(self, stage: str, start: int) -> None:
+        self.instrumentation.record(stage, time.perf_counter_ns() - start)
+
+    def revalidate(self, entries: List[Dict[str, Any]]) -> List[Optional[BaseModel]]:
+        """Enrich and revalidate stored entries; None where they still fail."""
+        results = []
+        for entry in entries:
+            data = entry["record"]
+            if self.enrich is not None:
+                data = self.enrich(data, entry["reason"])
+            results.append(self._validate(data)[0])
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Quarantine and rejection rates, counts by reason, ingest latency."""
+        with self.quarantine._lock:
+            counts = dict(self.quarantine.counts)
+        quarantined = sum(
+            n for key, n in counts.items() if key.startswith("quarantined:")
+        )
+        rejected = sum(n for key, n in counts.items() if key.startswith("rejected:"))
+        with self._seen_lock:
+            ingested = self._ingested
+        histograms = self.instrumentation.histograms()
+        return {
+            "ingested": ingested,
+            "quarantined": quarantined,
+            "rejected": rejected,
+            "released": counts.get("released", 0),
+            "review": counts.get("review", 0),
+            "quarantine_rate": quarantined / ingested if ingested else 0.0,
+            "rejection_rate": rejected / ingested if ingested else 0.0,
+            "by_reason": {
+                key: n
+                for key, n in counts.items()
+                if key.startswith(("quarantined:", "rejected:"))
+            },
+            "ingest_latency_ns": (
+                histograms["ingestion"].summary() if "ingestion" in histograms else {}
+            ),
+        }
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        self.quarantine.close(timeout)
@@ -0,0 +1,322 @@
+"""
+Event-time-aware scheduling of odds polls and rescoring.
+
+Replaces the fixed `ApiPoller(poll_interval=30)` loop of
+docs/data_ingestion_pipeline.md section 2.1. CLV is measured against the
+closing price, so polls should be spent close to the jump, not spread
+evenly. Each event is polled and rescored at an interval set by its time
+to start (`race_start_time` / `event_start_time`): hourly a day out,
+every few seconds in the last minute (POLL_TIERS, RESCORE_TIERS). Polling
+stops `grace` seconds after the start, once the closing price is in.
+
+Due work is kept in a heap ordered by due time, so finding it costs
+O(log n) per event whatever the number of tracked events. Polls draw one
+request per event from a per-source token bucket sized by
+RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW. When a source's budget cannot
+cover every due poll:
+
+- the events nearest their start are served first, and the rest wait for
+  the next token
+- events further than `priority_horizon` from the start are only polled
+  while the bucket holds more than `reserve` of its capacity, keeping
+  headroom for the events about to jump
+
+Rescoring uses no API quota and is never throttled.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (time to start in seconds, interval): the first tier whose threshold the
+# time to start exceeds applies.
+POLL_TIERS: Tuple[Tuple[float, float], ...] = (
+    (86400, 3600),
+    (7200, 600),
+    (1800, 120),
+    (300, 30),
+    (60, 10),
+    (float("-inf"), 5),
+)
+RESCORE_TIERS: Tuple[Tuple[float, float], ...] = (
+    (7200, 1800),
+    (1800, 300),
+    (300, 60),
+    (60, 15),
+    (float("-inf"), 5),
+)
+KINDS = ("poll", "rescore")
+
+
+def interval_for(time_to_start: float, tiers: Sequence[Tuple[float, float]]) -> float:
+    """Interval of the first tier whose threshold `time_to_start` exceeds."""
+    for threshold, interval in tiers:
+        if time_to_start > threshold:
+            return interval
+    return tiers[-1][1]
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class RateBudget:
+    """
+    Token bucket allowing `requests` per `window` seconds, in bursts of up
+    to `requests`.
+    """
+
+    def __init__(
+        self,
+        requests: int,
+        window: float,
+        clock: Callable[[], float] = time.time,
+    ):
+        if requests < 1 or window <= 0:
+            raise ValueError("need requests >= 1 and a positive window")
+        self.capacity = float(requests)
+        self.rate = requests / window
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        return self._tokens
+
+    def try_acquire(self, keep: float = 0.0) -> bool:
+        """Take one token if at least `keep` tokens would remain."""
+        if self.tokens - 1 < keep:
+            return False
+        self._tokens -= 1
+        return True
+
+    def wait_time(self, keep: float = 0.0) -> float:
+        """Seconds until `try_acquire(keep)` can succeed."""
+        return max(0.0, (keep + 1 - self.tokens) / self.rate)
+
+
+@dataclass
+class ScheduledTask:
+    """One poll or rescore of an event."""
+
+    kind: str
+    event_id: str
+    source: str
+    start_time: float
+    due: float
+
+
+@dataclass
+class _Event:
+    event_id: str
+    source: str
+    start_time: float
+    version: int
+
+
+class EventScheduler:
+    """
+    Priority queue of events polled and rescored more often as their start
+    approaches.
+
+    Args:
+        budgets: Rate budget per source; sources without one get a default
+            budget of `default_requests` per `default_window`
+        poll_tiers: Poll intervals by time to start
+        rescore_tiers: Rescore intervals by time to start
+        grace: Seconds after the start during which the event is still
+            polled, to capture the closing price
+        priority_horizon: Events further than this from the start only use
+            the reserved share of a source's budget
+        reserve: Share of each bucket kept for events within the horizon
+        default_requests: Requests per window of the default budget
+        default_window: Window of the default budget in seconds
+        clock: Epoch seconds
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, RateBudget]] = None,
+        poll_tiers: Sequence[Tuple[float, float]] = POLL_TIERS,
+        rescore_tiers: Sequence[Tuple[float, float]] = RESCORE_TIERS,
+        grace: float = 60.0,
+        priority_horizon: float = 1800.0,
+        reserve: float = 0.2,
+        default_requests: int = 100,
+        default_window: float = 3600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        if not 0 <= reserve < 1:
+            raise ValueError("reserve must be in [0, 1)")
+        self.budgets = dict(budgets or {})
+        self.tiers = {"poll": tuple(poll_tiers), "rescore": tuple(rescore_tiers)}
+        self.grace = grace
+        self.priority_horizon = priority_horizon
+        self.reserve = reserve
+        self.default_requests = default_requests
+        self.default_window = default_window
+        self._clock = clock
+        self._events: Dict[str, _Event] = {}
+        # (due, seq, kind, event_id, version); stale versions are skipped.
+        self._heap: List[Tuple[float, int, str, str, int]] = []
+        self._seq = itertools.count()
+        self._versions = itertools.count()
+        self._lock = threading.Lock()
+        self.deferred = 0
+
+    @classmethod
+    def from_config(cls, app_config: Any = None, **kwargs: Any) -> "EventScheduler":
+        """Scheduler budgeting RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW per source."""
+        if app_config is None:
+            from config.app_config import config as app_config
+        kwargs.setdefault(
+            "default_requests", int(app_config.get("RATE_LIMIT_REQUESTS", 100))
+        )
+        kwargs.setdefault(
+            "default_window", float(app_config.get("RATE_LIMIT_WINDOW", 3600))
+        )
+        return cls(**kwargs)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def budget(self, source: str) -> RateBudget:
+        if source not in self.budgets:
+            self.budgets[source] = RateBudget(
+                self.default_requests, self.default_window, self._clock
+            )
+        return self.budgets[source]
+
+    def add(self, event_id: str, source: str, start_time: Any) -> None:
+        """
+        Track an event, or update its start time, due for a poll and a
+        rescore now.
+
+        Args:
+            event_id: Event id
+            source: Data source whose budget its polls draw on
+            start_time: Start as a datetime, ISO string or epoch seconds
+        """
+        with self._lock:
+            event = _Event(
+                event_id, source, _timestamp(start_time), next(self._versions)
+            )
+            self._events[event_id] = event
+            now = self._clock()
+            for kind in KINDS:
+                self._push(now, kind, event)
+
+    def remove(self, event_id: str) -> None:
+        """Stop tracking an event (e.g. abandoned or resulted)."""
+        with self._lock:
+            self._events.pop(event_id, None)
+
+    def _push(self, due: float, kind: str, event: _Event) -> None:
+        heapq.heappush(
+            self._heap, (due, next(self._seq), kind, event.event_id, event.version)
+        )
+
+    def _current(self, event_id: str, version: int) -> Optional[_Event]:
+        event = self._events.get(event_id)
+        return event if event is not None and event.version == version else None
+
+    def next_due(self) -> Optional[float]:
+        """When the earliest task is due; None with nothing scheduled."""
+        with self._lock:
+            while self._heap:
+                due, _, _, event_id, version = self._heap[0]
+                if self._current(event_id, version) is not None:
+                    return due
+                heapq.heappop(self._heap)
+            return None
+
+    def due(self) -> List[ScheduledTask]:
+        """
+        Pop the tasks due now and schedule their next run.
+
+        Polls a source's budget cannot cover are deferred until it can.
+        """
+        with self._lock:
+            now = self._clock()
+            popped = []
+            while self._heap and self._heap[0][0] <= now:
+                due, _, kind, event_id, version = heapq.heappop(self._heap)
+                event = self._current(event_id, version)
+                if event is None:
+                    continue
+                if now > event.start_time + self.grace:
+                    del self._events[event_id]
+                    continue
+                popped.append((due, kind, event))
+
+            # Nearest to the jump first, so a short budget goes where it
+            # matters most.
+            popped.sort(key=lambda item: item[2].start_time)
+            tasks = []
+            for due, kind, event in popped:
+                time_to_start = event.start_time - now
+                if kind == "poll":
+                    budget = self.budget(event.source)
+                    keep = (
+                        self.reserve * budget.capacity
+                        if time_to_start > self.priority_horizon
+                        else 0.0
+                    )
+                    if not budget.try_acquire(keep):
+                        self.deferred += 1
+                        self._push(now + budget.wait_time(keep), kind, event)
+                        continue
+                tasks.append(
+                    ScheduledTask(
+                        kind, event.event_id, event.source, event.start_time, due
+                    )
+                )
+                self._push(
+                    now + interval_for(time_to_start, self.tiers[kind]), kind, event
+                )
+            return tasks
+
+    def run(
+        self,
+        handlers: Dict[str, Callable[[List[ScheduledTask]], None]],
+        stop: Optional[threading.Event] = None,
+        max_sleep: float = 1.0,
+    ) -> None:
+        """
+        Dispatch due tasks to `handlers` by kind until `stop` is set.
+
+        Sleeps until the next task is due, waking at least every
+        `max_sleep` seconds to pick up newly added events.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            tasks = self.due()
+            for kind in KINDS:
+                batch = [task for task in tasks if task.kind == kind]
+                if batch and kind in handlers:
+                    try:
+                        handlers[kind](batch)
+                    except Exception as e:
+                        logger.error(
+                            f"{kind} handler failed on {len(batch)} events: {e!r}"
+                        )
+            next_due = self.next_due()
+            delay = max_sleep if next_due is None else next_due - self._clock()
+            stop.wait(min(max(delay, 0.0), max_sleep))
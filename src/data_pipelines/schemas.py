@@ -0,0 +1,72 @@
+"""
+Unified data schemas (docs/technical_specification.md section 2).
+
+Every source is normalized into `UnifiedRacingData` or `UnifiedSportsData`
+before it reaches feature engineering or the core engine.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+# Decimal odds accepted by the business rules (section 2.1).
+MIN_VALID_ODDS = 1.01
+MAX_VALID_ODDS = 1000.0
+
+
+class Runner(BaseModel):
+    """A runner in a race."""
+
+    runner_id: str
+    runner_name: str
+    barrier: int = Field(ge=1)
+    win_odds: float = Field(gt=1.0)
+    gear_changes: str = ""
+    sectional_times: List[float] = Field(default_factory=list)
+
+
+class UnifiedRacingData(BaseModel):
+    """A race with its field of runners."""
+
+    event_id: str
+    race_id: str
+    race_name: str
+    venue: str
+    race_start_time: datetime
+    runners: List[Runner]
+    winner: Optional[str] = None  # runner_id, once the race has been run
+
+    @field_validator("runners")
+    @classmethod
+    def validate_runners(cls, runners: List[Runner]) -> List[Runner]:
+        if len(runners) < 2:
+            raise ValueError("Race must have at least 2 runners")
+        return runners
+
+
+class Outcome(BaseModel):
+    """A priced outcome of a market."""
+
+    name: str
+    price: float = Field(gt=1.0)
+    prop_line: Optional[float] = None
+
+
+class Market(BaseModel):
+    """A market, e.g. "h2h" or "player_tries", and its outcomes."""
+
+    market_key: str
+    outcomes: List[Outcome]
+
+
+class UnifiedSportsData(BaseModel):
+    """A game with its markets."""
+
+    event_id: str
+    sport_key: str
+    home_team: str
+    away_team: str
+    event_start_time: datetime
+    markets: List[Market]
+    winner: Optional[str] = None  # winning h2h outcome, once the game is over
@@ -0,0 +1,207 @@
+"""
+Sectional-time feature extraction over ragged arrays.
+
+`Runner.sectional_times` (docs/technical_specification.md section 2.1) is a
+variable-length list of split times per run. Rather than looping over runners
+in Python, all runs are packed into one flat float array plus an offsets
+array (run i owns `values[offsets[i]:offsets[i + 1]]`), and every feature is
+a segmented NumPy reduction (`bincount`, `ufunc.reduceat`) over that layout.
+
+Splits are ordered from the start of the race to the finish. Missing splits
+(None, NaN or non-positive times) are kept in place as NaN so positions stay
+aligned, and are ignored by the reductions. Features that cannot be computed
+for a run (e.g. no valid splits) are NaN.
+"""
+
+import logging
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SECTIONAL_FEATURE_NAMES = (
+    "n_splits",
+    "n_missing",
+    "total_time",
+    "mean_split",
+    "split_std",
+    "best_split",
+    "first_split",
+    "last_split",
+    "closing_speed",
+    "finish_ratio",
+    "early_late_ratio",
+    "best_last_n",
+)
+
+
+class SectionalArray:
+    """Sectional times for many runs packed as a flat array with offsets."""
+
+    def __init__(self, values: Any, offsets: Any):
+        """
+        Initialize from an already packed layout.
+
+        Args:
+            values: Flat float array of all splits, run after run
+            offsets: Int array of length n_runs + 1 with run boundaries
+        """
+        self.values = np.asarray(values, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+
+        if self.offsets.ndim != 1 or len(self.offsets) == 0:
+            raise ValueError("offsets must be a non-empty 1D array")
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.values):
+            raise ValueError("offsets must start at 0 and end at len(values)")
+        if np.any(np.diff(self.offsets) < 0):
+            raise ValueError("offsets must be non-decreasing")
+
+    @classmethod
+    def from_lists(
+        cls, sectionals: Sequence[Optional[Sequence[Optional[float]]]]
+    ) -> "SectionalArray":
+        """Pack a list of per-run split lists; None entries become NaN."""
+        runs = [run or () for run in sectionals]
+        lengths = np.fromiter((len(run) for run in runs), dtype=np.int64)
+        offsets = np.zeros(len(runs) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        values = np.fromiter(
+            (np.nan if x is None else x for x in chain.from_iterable(runs)),
+            dtype=float,
+            count=int(offsets[-1]),
+        )
+        return cls(values, offsets)
+
+    @classmethod
+    def from_runners(cls, runners: Iterable[Any]) -> "SectionalArray":
+        """Pack runners given as mappings or objects with `sectional_times`."""
+        return cls.from_lists([
+            runner.get("sectional_times")
+            if isinstance(runner, dict)
+            else getattr(runner, "sectional_times", None)
+            for runner in runners
+        ])
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of recorded splits (including missing ones) per run."""
+        return np.diff(self.offsets)
+
+    @property
+    def segment_ids(self) -> np.ndarray:
+        """Run index of every element of `values`."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+def _segment_reduce(
+    ufunc: np.ufunc, values: np.ndarray, offsets: np.ndarray, identity: float
+) -> np.ndarray:
+    """Apply `ufunc.reduceat` per segment, giving `identity` for empty ones."""
+    out = np.full(len(offsets) - 1, identity, dtype=values.dtype)
+    nonempty = offsets[1:] > offsets[:-1]
+    if np.any(nonempty):
+        # Contiguous segments: reducing from each non-empty start runs up to
+        # the next non-empty start, skipping over empty segments in between.
+        out[nonempty] = ufunc.reduceat(values, offsets[:-1][nonempty])
+    return out
+
+
+def sectional_features(
+    sectionals: SectionalArray, last_n: int = 3, segment_distance: float = 200.0
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the sectional feature set for every run.
+
+    Args:
+        sectionals: Packed sectional times
+        last_n: Number of final valid splits considered for `best_last_n`
+        segment_distance: Metres covered by each split, for `closing_speed`
+
+    Returns:
+        Dictionary of per-run feature arrays keyed by SECTIONAL_FEATURE_NAMES
+    """
+    if last_n < 1:
+        raise ValueError("last_n must be at least 1")
+
+    values = sectionals.values
+    offsets = sectionals.offsets
+    lengths = sectionals.lengths
+    n_runs = len(sectionals)
+    segment = sectionals.segment_ids
+    position = np.arange(len(values)) - offsets[:-1][segment]
+
+    with np.errstate(invalid="ignore"):
+        valid = np.isfinite(values) & (values > 0)
+    clean = np.where(valid, values, 0.0)
+
+    count = np.bincount(segment, weights=valid, minlength=n_runs)
+    total = np.bincount(segment, weights=clean, minlength=n_runs)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+        deviation = np.where(valid, clean - mean[segment], 0.0)
+        variance = np.bincount(segment, weights=deviation**2, minlength=n_runs) / count
+
+        best = _segment_reduce(
+            np.minimum, np.where(valid, values, np.inf), offsets, np.inf
+        )
+        best[~np.isfinite(best)] = np.nan
+
+        # First/last valid split located by their flat index
+        index = np.arange(len(values))
+        first_index = _segment_reduce(
+            np.minimum, np.where(valid, index, len(values)), offsets, len(values)
+        )
+        last_index = _segment_reduce(
+            np.maximum, np.where(valid, index, -1), offsets, -1
+        )
+        padded = np.append(values, np.nan)
+        first_split = padded[np.where(count > 0, first_index, len(values))]
+        last_split = padded[np.where(count > 0, last_index, len(values))]
+
+        # Finishing split relative to the average of the run's other splits
+        other_mean = (total - np.nan_to_num(last_split)) / (count - 1)
+        finish_ratio = np.where(count > 1, last_split / other_mean, np.nan)
+
+        # First half of the race vs second half (middle split of odd runs skipped)
+        run_length = lengths[segment]
+        early = valid & (position < run_length // 2)
+        late = valid & (position >= run_length - run_length // 2)
+        early_mean = np.bincount(segment, weights=clean * early, minlength=n_runs) / (
+            np.bincount(segment, weights=early, minlength=n_runs)
+        )
+        late_mean = np.bincount(segment, weights=clean * late, minlength=n_runs) / (
+            np.bincount(segment, weights=late, minlength=n_runs)
+        )
+
+        # Valid splits at or after each position within its run
+        cumulative = np.cumsum(valid)
+        run_valid_end = np.append(0, cumulative)[offsets[1:]]
+        remaining = run_valid_end[segment] - cumulative + valid
+        in_last_n = valid & (remaining <= last_n)
+        best_last_n = _segment_reduce(
+            np.minimum, np.where(in_last_n, values, np.inf), offsets, np.inf
+        )
+        best_last_n[~np.isfinite(best_last_n)] = np.nan
+
+        features = {
+            "n_splits": lengths.astype(float),
+            "n_missing": (lengths - count).astype(float),
+            "total_time": np.where((count == lengths) & (lengths > 0), total, np.nan),
+            "mean_split": mean,
+            "split_std": np.sqrt(variance),
+            "best_split": best,
+            "first_split": first_split,
+            "last_split": last_split,
+            "closing_speed": segment_distance / last_split,
+            "finish_ratio": finish_ratio,
+            "early_late_ratio": early_mean / late_mean,
+            "best_last_n": best_last_n,
+        }
+
+    return features
@@ -0,0 +1,442 @@
+"""
+Seeded synthetic match, market and race data for local load testing.
+
+Each match has a hidden true probability for every outcome. The closing
+market is a lightly perturbed copy of it, the opening market a more heavily
+perturbed copy of the close, and both are priced with the bookmaker margin.
+The model's predictions are noisy estimates of the truth, and the result is
+drawn from the true probabilities, so outcomes are consistent with the
+implied probabilities and the closing market is the sharper of the two.
+Sports and race events carry a `winner` drawn from their quoted odds'
+implied probabilities, normalized for the margin.
+
+clv_metrics are `closing_line_value` of the opening against the closing
+odds.
+
+Everything is generated in vectorized chunks, so millions of records can be
+streamed without holding them in memory:
+
+- `matches` yields dicts in the tests/test_data/sample_matches.json shape
+- `match_chunks` yields the same data as column arrays
+- `odds_series` yields odds paths that drift from opening to closing
+- `sports_events` / `racing_events` yield the unified schemas
+
+`write_jsonl` and `write_columnar` stream any of these to disk; the columnar
+format is a directory of `part-NNNNNN.npz` files, read back with
+`read_columnar`. The command line does the same:
+
+    python -m src.data_pipelines.synthetic matches --count 1000000 \
+        --output matches.jsonl
+"""
+
+import argparse
+import json
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from src.core_engine.ledger import closing_line_value
+
+from .schemas import (
+    MAX_VALID_ODDS,
+    MIN_VALID_ODDS,
+    Market,
+    Outcome,
+    Runner,
+    UnifiedRacingData,
+    UnifiedSportsData,
+)
+
+logger = logging.getLogger(__name__)
+
+MATCH_OUTCOMES = ("home_win", "draw", "away_win")
+SPORT_KEYS = ("aussierules_afl", "rugbyleague_nrl")
+VENUES = ("Flemington", "Randwick", "Eagle Farm", "Morphettville", "Ascot")
+
+# Dirichlet concentration of the true home/draw/away probabilities: about
+# 42% home, 25% draw and 33% away wins on average.
+_MATCH_ALPHA = np.array([5.0, 3.0, 4.0])
+_CLOSING_NOISE = 0.03
+_OPENING_NOISE = 0.08
+_MODEL_NOISE = 0.10
+_N_TEAMS = 20
+# Columnar arrays shared by all rows of a part rather than one entry per row.
+_STATIC_COLUMNS = ("steps_to_start",)
+
+
+def _price(probabilities: np.ndarray, margin: float) -> np.ndarray:
+    """
+    Decimal odds for normalized probabilities with a proportional margin,
+    within the MIN_VALID_ODDS..MAX_VALID_ODDS range the business rules
+    accept.
+    """
+    odds = np.round(1.0 / (probabilities * (1.0 + margin)), 2)
+    return np.clip(odds, MIN_VALID_ODDS, MAX_VALID_ODDS)
+
+
+def _draw_winner(rng: np.random.Generator, odds: np.ndarray) -> int:
+    """Index of an outcome drawn from the margin-free implied probabilities."""
+    implied = 1.0 / odds
+    return int(rng.choice(len(odds), p=implied / implied.sum()))
+
+
+def _perturb(rng: np.random.Generator, p: np.ndarray, sigma: float) -> np.ndarray:
+    """Multiplicative log-normal noise, renormalized along the last axis."""
+    noisy = p * rng.lognormal(0.0, sigma, p.shape)
+    return noisy / noisy.sum(axis=-1, keepdims=True)
+
+
+class SyntheticDataGenerator:
+    """
+    Deterministic generator of synthetic betting data.
+
+    The same seed and chunk size always produce the same records.
+
+    Args:
+        seed: Random seed
+        margin: Bookmaker overround on match and sports markets
+        racing_margin: Overround on race win markets
+        start: Start time of the first event
+        interval: Time between consecutive events
+        chunk_size: Records generated per vectorized chunk
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        margin: float = 0.05,
+        racing_margin: float = 0.15,
+        start: datetime = datetime(2026, 1, 1, 12),
+        interval: timedelta = timedelta(minutes=5),
+        chunk_size: int = 65_536,
+    ):
+        if margin < 0 or racing_margin < 0:
+            raise ValueError("margins must be non-negative")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.seed = seed
+        self.margin = margin
+        self.racing_margin = racing_margin
+        self.start = start
+        self.interval = interval
+        self.chunk_size = chunk_size
+
+    def _chunks(self, count: int) -> Iterator[int]:
+        for first in range(0, count, self.chunk_size):
+            yield min(self.chunk_size, count - first)
+
+    def match_chunks(self, count: int) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Matches as column arrays, `chunk_size` rows at a time.
+
+        Columns are "index", "home_team" and "away_team" (team numbers),
+        "true_probabilities", "opening_odds", "closing_odds" and
+        "model_probabilities" (rows of home/draw/away) and "result" (index
+        into MATCH_OUTCOMES).
+        """
+        rng = np.random.default_rng(self.seed)
+        first = 0
+        for n in self._chunks(count):
+            true = rng.dirichlet(_MATCH_ALPHA, n)
+            closing = _perturb(rng, true, _CLOSING_NOISE)
+            opening = _perturb(rng, closing, _OPENING_NOISE)
+            home = rng.integers(0, _N_TEAMS, n)
+            away = (home + rng.integers(1, _N_TEAMS, n)) % _N_TEAMS
+            cumulative = true.cumsum(axis=1)
+            draws = rng.random(n)[:, None]
+            yield {
+                "index": np.arange(first, first + n, dtype=np.int64),
+                "home_team": home,
+                "away_team": away,
+                "true_probabilities": true,
+                "opening_odds": _price(opening, self.margin),
+                "closing_odds": _price(closing, self.margin),
+                "model_probabilities": _perturb(rng, true, _MODEL_NOISE),
+                "result": (draws > cumulative[:, :-1]).sum(axis=1).astype(np.int8),
+            }
+            first += n
+
+    def matches(self, count: int) -> Iterator[Dict[str, Any]]:
+        """
+        Matches in the tests/test_data/sample_matches.json shape, with
+        clv_metrics of the opening odds per outcome.
+        """
+        for chunk in self.match_chunks(count):
+            opening = chunk["opening_odds"]
+            closing = chunk["closing_odds"]
+            clv = np.round(closing_line_value(opening, closing), 3).tolist()
+            model = np.round(chunk["model_probabilities"], 3).tolist()
+            rows = zip(
+                chunk["index"].tolist(),
+                chunk["home_team"].tolist(),
+                chunk["away_team"].tolist(),
+                opening.tolist(),
+                closing.tolist(),
+                model,
+                clv,
+                chunk["result"].tolist(),
+            )
+            for index, home, away, opens, closes, probs, clvs, result in rows:
+                yield {
+                    "match_id": f"syn_{index:08d}",
+                    "home_team": f"Team {home + 1}",
+                    "away_team": f"Team {away + 1}",
+                    "closing_odds": dict(zip(MATCH_OUTCOMES, closes)),
+                    "opening_odds": dict(zip(MATCH_OUTCOMES, opens)),
+                    "model_predictions": {
+                        "home_win_prob": probs[0],
+                        "draw_prob": probs[1],
+                        "away_win_prob": probs[2],
+                    },
+                    "actual_result": MATCH_OUTCOMES[result],
+                    "clv_metrics": {
+                        "home_clv": clvs[0],
+                        "draw_clv": clvs[1],
+                        "away_clv": clvs[2],
+                    },
+                }
+
+    def odds_series(
+        self, count: int, n_steps: int = 48, volatility: float = 0.05
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Home/draw/away odds paths from opening to closing, in chunks.
+
+        Implied log-probabilities follow a Brownian bridge between the
+        opening and closing markets, so each path starts at the opening odds,
+        ends exactly at the closing odds and wanders in between; the margin
+        is reapplied at every step.
+
+        Args:
+            count: Number of markets
+            n_steps: Odds snapshots per market, evenly spaced
+            volatility: Standard deviation of the bridge at its midpoint
+
+        Returns:
+            Iterator of chunks with "index", "steps_to_start" (n_steps,),
+            "odds" (n, n_steps, 3), "true_probabilities" (n, 3) and "result"
+        """
+        if n_steps < 2:
+            raise ValueError("n_steps must be at least 2")
+        tau = np.linspace(0.0, 1.0, n_steps)
+        steps_to_start = np.arange(n_steps - 1, -1, -1, dtype=np.int32)
+        for chunk in self.match_chunks(count):
+            rng = np.random.default_rng([self.seed, int(chunk["index"][0])])
+            start = np.log(1.0 / chunk["opening_odds"])
+            end = np.log(1.0 / chunk["closing_odds"])
+            n = len(start)
+            walk = rng.normal(0.0, 1.0, (n, n_steps, 3)).cumsum(axis=1)
+            walk /= np.sqrt(n_steps)
+            bridge = walk - tau[None, :, None] * walk[:, -1:, :]
+            path = start[:, None, :] + tau[None, :, None] * (end - start)[:, None, :]
+            path += 2.0 * volatility * bridge
+            implied = np.exp(path)
+            implied /= implied.sum(axis=2, keepdims=True)
+            odds = _price(implied, self.margin)
+            odds[:, 0] = chunk["opening_odds"]
+            odds[:, -1] = chunk["closing_odds"]
+            yield {
+                "index": chunk["index"],
+                "steps_to_start": steps_to_start,
+                "odds": odds,
+                "true_probabilities": chunk["true_probabilities"],
+                "result": chunk["result"],
+            }
+
+    def sports_events(self, count: int) -> Iterator[UnifiedSportsData]:
+        """
+        Games with an "h2h" market and a "player_tries" prop market, and the
+        h2h winner.
+        """
+        rng = np.random.default_rng([self.seed, 1])
+        # Results use their own stream, so the odds do not depend on them.
+        results = np.random.default_rng([self.seed, 3])
+        for index in range(count):
+            start = self.start + index * self.interval
+            sport_key = SPORT_KEYS[index % len(SPORT_KEYS)]
+            home = int(rng.integers(0, _N_TEAMS))
+            away = (home + int(rng.integers(1, _N_TEAMS))) % _N_TEAMS
+            home_team, away_team = f"Team {home + 1}", f"Team {away + 1}"
+            p_home = rng.beta(5.0, 4.0)
+            h2h = _price(np.array([p_home, 1.0 - p_home]), self.margin)
+            p_try = rng.beta(2.0, 5.0, 4)
+            try_odds = _price(p_try, self.margin)
+            winner = (home_team, away_team)[_draw_winner(results, h2h)]
+            yield UnifiedSportsData(
+                event_id=f"{sport_key.split('_')[1].upper()}_{start:%Y%m%d}_{index}",
+                sport_key=sport_key,
+                home_team=home_team,
+                away_team=away_team,
+                event_start_time=start,
+                markets=[
+                    Market(
+                        market_key="h2h",
+                        outcomes=[
+                            Outcome(name=home_team, price=h2h[0]),
+                            Outcome(name=away_team, price=h2h[1]),
+                        ],
+                    ),
+                    Market(
+                        market_key="player_tries",
+                        outcomes=[
+                            Outcome(
+                                name=f"Player {index}-{k + 1}",
+                                price=price,
+                                prop_line=0.5,
+                            )
+                            for k, price in enumerate(try_odds.tolist())
+                        ],
+                    ),
+                ],
+                winner=winner,
+            )
+
+    def racing_events(
+        self, count: int, min_runners: int = 6, max_runners: int = 16
+    ) -> Iterator[UnifiedRacingData]:
+        """
+        Races of `min_runners`..`max_runners` runners with win odds, and the
+        winner's runner_id.
+        """
+        if not 2 <= min_runners <= max_runners:
+            raise ValueError("need 2 <= min_runners <= max_runners")
+        rng = np.random.default_rng([self.seed, 2])
+        results = np.random.default_rng([self.seed, 4])
+        for index in range(count):
+            start = self.start + index * self.interval
+            n = int(rng.integers(min_runners, max_runners + 1))
+            ability = rng.normal(0.0, 1.0, n)
+            strength = np.exp(1.2 * ability)
+            odds = _price(strength / strength.sum(), self.racing_margin)
+            barriers = rng.permutation(n) + 1
+            sectionals = np.round(
+                12.0 - 0.15 * ability[:, None] + rng.normal(0.0, 0.2, (n, 4)), 2
+            )
+            gear = rng.random(n) < 0.05
+            winner = _draw_winner(results, odds)
+            yield UnifiedRacingData(
+                event_id=f"HR_{start:%Y%m%d}_{index}",
+                race_id=f"R{index:08d}",
+                race_name=f"Race {index % 10 + 1}",
+                venue=VENUES[index % len(VENUES)],
+                race_start_time=start,
+                runners=[
+                    Runner(
+                        runner_id=f"R{index:08d}-{k + 1}",
+                        runner_name=f"Runner {index}-{k + 1}",
+                        barrier=int(barriers[k]),
+                        win_odds=float(odds[k]),
+                        gear_changes="Blinkers on" if gear[k] else "",
+                        sectional_times=sectionals[k].tolist(),
+                    )
+                    for k in range(n)
+                ],
+                winner=f"R{index:08d}-{winner + 1}",
+            )
+
+
+def write_jsonl(records: Iterable[Any], path: str) -> int:
+    """
+    Stream records to a JSON-lines file.
+
+    Args:
+        records: Dicts or pydantic models
+        path: Output file
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    with open(path, "w") as f:
+        for record in records:
+            if hasattr(record, "model_dump_json"):
+                f.write(record.model_dump_json())
+            else:
+                f.write(json.dumps(record))
+            f.write("\n")
+            count += 1
+    logger.info(f"Wrote {count} records to {path}")
+    return count
+
+
+def write_columnar(chunks: Iterable[Dict[str, np.ndarray]], directory: str) -> int:
+    """
+    Stream column chunks to `part-NNNNNN.npz` files, one per chunk.
+
+    Returns:
+        Number of rows written
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    for part, chunk in enumerate(chunks):
+        np.savez(directory / f"part-{part:06d}.npz", **chunk)
+        rows += len(chunk["index"])
+    logger.info(f"Wrote {rows} rows to {directory}")
+    return rows
+
+
+def read_columnar(directory: str) -> Dict[str, np.ndarray]:
+    """
+    Load every part written by `write_columnar`, concatenated by row.
+
+    Arrays shared by all rows (such as "steps_to_start") are taken from the
+    first part.
+    """
+    parts = sorted(Path(directory).glob("part-*.npz"))
+    if not parts:
+        return {}
+    columns: Dict[str, List[np.ndarray]] = {}
+    for path in parts:
+        with np.load(path) as part:
+            for name in part.files:
+                if name in _STATIC_COLUMNS and name in columns:
+                    continue
+                columns.setdefault(name, []).append(part[name])
+    return {
+        name: arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+        for name, arrays in columns.items()
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.data_pipelines.synthetic",
+        description="Generate synthetic betting data",
+    )
+    parser.add_argument("kind", choices=["matches", "odds", "sports", "racing"])
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--format", choices=["jsonl", "columnar"], default="jsonl")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=48, help="Odds snapshots")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(seed=args.seed)
+    if args.format == "columnar":
+        if args.kind not in ("matches", "odds"):
+            parser.error("columnar output supports matches and odds only")
+        chunks = (
+            generator.match_chunks(args.count)
+            if args.kind == "matches"
+            else generator.odds_series(args.count, args.steps)
+        )
+        write_columnar(chunks, args.output)
+        return 0
+
+    if args.kind == "odds":
+        parser.error("odds series are written in columnar format only")
+    records = {
+        "matches": generator.matches,
+        "sports": generator.sports_events,
+        "racing": generator.racing_events,
+    }[args.kind](args.count)
+    write_jsonl(records, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
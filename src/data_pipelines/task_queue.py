@@ -0,0 +1,575 @@
+"""
+Redis-backed task queue for parallel scoring workers.
+
+Implements the "Redis-based task distribution for parallel processing" of
+docs/data_ingestion_pipeline.md section 2.1. Producers enqueue scoring
+tasks on REDIS_URL. Each task is routed to one of `n_shards` shards by a
+CRC32 of its event_id, so every task of an event lands on the same shard.
+Workers, as processes on any number of hosts, consume disjoint sets of
+shards (`shards_for_worker`), and capacity grows by adding workers.
+
+Per shard, Redis holds
+
+- `<prefix>:queue:<shard>`: sorted set of task ids, scored by the time the
+  task next becomes visible
+- `<prefix>:payload:<shard>` and `<prefix>:attempts:<shard>`: hashes of
+  JSON payloads and claim counts
+
+A claim takes up to `batch_size` visible tasks and pushes their visibility
+`visibility_timeout` seconds ahead, in one WATCH/MULTI transaction, so two
+workers never hold the same task at once. A worker that dies mid-batch
+simply lets its lease expire, and the tasks are claimed again.
+
+Processing is at-least-once. `complete` writes each result with SET NX
+under `<prefix>:result:<task_id>` and removes the task in the same
+transaction, so a task processed twice keeps its first result. Failed
+tasks are retried with exponential backoff. A task that has been claimed
+`max_attempts` times is moved to the `<prefix>:dead` hash.
+
+Workers reach Redis through the "redis" endpoint of `Resilience`, so
+transient errors are retried and a Redis outage opens its circuit instead of
+killing the worker: `ScoringWorker.run` backs off and keeps polling. While a
+batch is being scored the worker extends its leases every
+`heartbeat_interval`, so batches slower than `visibility_timeout` are not
+handed to a second worker.
+
+Workers publish processed, failed and busy-time counters to
+`<prefix>:worker:<id>`, and `TaskQueue.worker_stats` reports per-worker
+throughput across hosts. Visibility uses the workers' wall clocks, so hosts
+must be NTP-synchronized to well within `visibility_timeout`.
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from redis.exceptions import WatchError
+
+from src.core_engine.instrumentation import get_instrumentation
+from src.core_engine.resilience import CircuitOpenError, Resilience, is_transient
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(event_id: Any, n_shards: int) -> int:
+    """Shard of an event: CRC32 of its id, stable across processes."""
+    return zlib.crc32(str(event_id).encode()) % n_shards
+
+
+def shards_for_worker(index: int, n_workers: int, n_shards: int) -> List[int]:
+    """The shards consumed by worker `index` of `n_workers`."""
+    if not 0 <= index < n_workers:
+        raise ValueError("need 0 <= index < n_workers")
+    if n_workers > n_shards:
+        raise ValueError("cannot have more workers than shards")
+    return list(range(index, n_shards, n_workers))
+
+
+@dataclass
+class Task:
+    """A claimed task."""
+
+    task_id: str
+    shard: int
+    payload: Any
+    attempts: int
+
+
+class TaskQueue:
+    """
+    Sharded work queue with visibility timeouts.
+
+    Args:
+        client: redis.Redis client (or fakeredis)
+        n_shards: Number of shards; fixed for the lifetime of a deployment
+        prefix: Key prefix
+        visibility_timeout: Seconds a claimed task stays hidden from other
+            workers
+        max_attempts: Claims before a task is dead-lettered
+        retry_delay: Backoff before the first retry of a failed task,
+            doubled on every further attempt
+        result_ttl: Expiry of results in seconds
+        clock: Epoch seconds
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        n_shards: int = 16,
+        prefix: str = "multibet:tasks",
+        visibility_timeout: float = 30.0,
+        max_attempts: int = 5,
+        retry_delay: float = 1.0,
+        result_ttl: int = 86400,
+        clock: Callable[[], float] = time.time,
+    ):
+        if n_shards < 1 or max_attempts < 1:
+            raise ValueError("n_shards and max_attempts must be at least 1")
+        if visibility_timeout <= 0:
+            raise ValueError("visibility_timeout must be positive")
+        self.client = client
+        self.n_shards = n_shards
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.result_ttl = result_ttl
+        self._clock = clock
+
+    @classmethod
+    def from_config(cls, app_config: Any = None, **kwargs: Any) -> "TaskQueue":
+        """
+        Queue on REDIS_URL configured by TASK_QUEUE_SHARDS,
+        TASK_VISIBILITY_TIMEOUT and TASK_MAX_ATTEMPTS.
+        """
+        import redis
+
+        if app_config is None:
+            from config.app_config import config as app_config
+        kwargs.setdefault("n_shards", int(app_config.get("TASK_QUEUE_SHARDS", 16)))
+        kwargs.setdefault(
+            "visibility_timeout", float(app_config.get("TASK_VISIBILITY_TIMEOUT", 30))
+        )
+        kwargs.setdefault("max_attempts", int(app_config.get("TASK_MAX_ATTEMPTS", 5)))
+        return cls(redis.Redis.from_url(app_config.get("REDIS_URL")), **kwargs)
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def enqueue(
+        self, payload: Any, event_id: Any, task_id: Optional[str] = None
+    ) -> str:
+        """Queue one task; see `enqueue_many`."""
+        return self.enqueue_many([(payload, event_id, task_id)])[0]
+
+    def enqueue_many(self, tasks: Iterable[Sequence[Any]]) -> List[str]:
+        """
+        Queue (payload, event_id[, task_id]) tuples in one round trip.
+
+        Task ids default to random UUIDs. Enqueueing an id that is already
+        queued changes nothing, so producers may safely retry.
+
+        Returns:
+            The task ids
+        """
+        now = self._clock()
+        ids = []
+        pipe = self.client.pipeline(transaction=False)
+        for payload, event_id, *rest in tasks:
+            task_id = (rest[0] if rest else None) or uuid.uuid4().hex
+            shard = shard_for(event_id, self.n_shards)
+            pipe.hsetnx(self._key("payload", shard), task_id, json.dumps(payload))
+            pipe.zadd(self._key("queue", shard), {task_id: now}, nx=True)
+            ids.append(task_id)
+        pipe.execute()
+        return ids
+
+    def claim(self, shards: Sequence[int], n: int) -> List[Task]:
+        """
+        Claim up to `n` visible tasks from `shards`, hiding them for
+        `visibility_timeout` seconds.
+
+        Tasks claimed more than `max_attempts` times are dead-lettered
+        instead of returned.
+        """
+        tasks: List[Task] = []
+        for shard in shards:
+            if len(tasks) >= n:
+                break
+            tasks.extend(self._claim_shard(shard, n - len(tasks)))
+        return tasks
+
+    def _claim_shard(self, shard: int, n: int) -> List[Task]:
+        queue = self._key("queue", shard)
+        attempts_key = self._key("attempts", shard)
+        while True:
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(queue)
+                    now = self._clock()
+                    ids = pipe.zrangebyscore(queue, "-inf", now, start=0, num=n)
+                    if not ids:
+                        return []
+                    pipe.multi()
+                    pipe.zadd(
+                        queue,
+                        {task_id: now + self.visibility_timeout for task_id in ids},
+                        xx=True,
+                    )
+                    pipe.hmget(self._key("payload", shard), ids)
+                    for task_id in ids:
+                        pipe.hincrby(attempts_key, task_id, 1)
+                    _, payloads, *attempts = pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        tasks = []
+        for task_id, payload, count in zip(ids, payloads, attempts):
+            task_id = task_id.decode() if isinstance(task_id, bytes) else task_id
+            task = Task(task_id, shard, json.loads(payload), count)
+            if count > self.max_attempts:
+                self._dead_letter(task, "lease expired too often")
+            else:
+                tasks.append(task)
+        return tasks
+
+    def extend(self, tasks: Sequence[Task], seconds: Optional[float] = None) -> None:
+        """Keep claimed tasks hidden for another `seconds` (a heartbeat)."""
+        deadline = self._clock() + (seconds or self.visibility_timeout)
+        pipe = self.client.pipeline(transaction=False)
+        for task in tasks:
+            pipe.zadd(self._key("queue", task.shard), {task.task_id: deadline}, xx=True)
+        pipe.execute()
+
+    def _remove(self, pipe: Any, task: Task) -> None:
+        pipe.zrem(self._key("queue", task.shard), task.task_id)
+        pipe.hdel(self._key("payload", task.shard), task.task_id)
+        pipe.hdel(self._key("attempts", task.shard), task.task_id)
+
+    def complete(self, task: Task, result: Any) -> bool:
+        """See `complete_many`."""
+        return self.complete_many([task], [result])[0]
+
+    def complete_many(
+        self, tasks: Sequence[Task], results: Sequence[Any]
+    ) -> List[bool]:
+        """
+        Store results and remove their tasks, atomically.
+
+        Returns:
+            Per task, whether this was the first result written for it; a
+            task completed twice keeps its first result
+        """
+        pipe = self.client.pipeline(transaction=True)
+        for task, result in zip(tasks, results):
+            pipe.set(
+                self._key("result", task.task_id),
+                json.dumps(result),
+                nx=True,
+                ex=self.result_ttl,
+            )
+            self._remove(pipe, task)
+        replies = pipe.execute()
+        return [bool(reply) for reply in replies[::4]]
+
+    def fail(self, task: Task, error: Any) -> None:
+        """Retry a task after backoff, or dead-letter it after max_attempts."""
+        if task.attempts >= self.max_attempts:
+            self._dead_letter(task, error)
+            return
+        delay = self.retry_delay * 2 ** (task.attempts - 1)
+        self.client.zadd(
+            self._key("queue", task.shard),
+            {task.task_id: self._clock() + delay},
+            xx=True,
+        )
+
+    def _dead_letter(self, task: Task, error: Any) -> None:
+        logger.error(
+            f"Task {task.task_id} dead-lettered after {task.attempts} attempts: "
+            f"{error!r}"
+        )
+        record = {
+            "shard": task.shard,
+            "payload": task.payload,
+            "attempts": task.attempts,
+            "error": repr(error) if isinstance(error, Exception) else str(error),
+        }
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hset(self._key("dead"), task.task_id, json.dumps(record))
+        self._remove(pipe, task)
+        pipe.execute()
+
+    def result(self, task_id: str) -> Any:
+        """A task's result; None if not (yet) completed."""
+        value = self.client.get(self._key("result", task_id))
+        return None if value is None else json.loads(value)
+
+    def depth(self, shards: Optional[Sequence[int]] = None) -> Dict[int, int]:
+        """Queued and in-flight tasks per shard."""
+        shards = range(self.n_shards) if shards is None else shards
+        pipe = self.client.pipeline(transaction=False)
+        for shard in shards:
+            pipe.zcard(self._key("queue", shard))
+        return dict(zip(shards, pipe.execute()))
+
+    def dead_letters(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            (key.decode() if isinstance(key, bytes) else key): json.loads(value)
+            for key, value in self.client.hgetall(self._key("dead")).items()
+        }
+
+    def publish_stats(self, worker_id: str, **increments: float) -> None:
+        """Add to a worker's counters and refresh its heartbeat."""
+        key = self._key("worker", worker_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(self._key("workers"), worker_id)
+        for name, amount in increments.items():
+            pipe.hincrbyfloat(key, name, amount)
+        pipe.hsetnx(key, "started_at", self._clock())
+        pipe.hset(key, "heartbeat_at", self._clock())
+        pipe.execute()
+
+    def worker_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Counters of every worker that has published, with `throughput` in
+        tasks per second between its first and latest batch.
+        """
+        workers = sorted(
+            worker.decode() if isinstance(worker, bytes) else worker
+            for worker in self.client.smembers(self._key("workers"))
+        )
+        pipe = self.client.pipeline(transaction=False)
+        for worker in workers:
+            pipe.hgetall(self._key("worker", worker))
+        stats = {}
+        for worker, fields in zip(workers, pipe.execute()):
+            counters = {
+                (name.decode() if isinstance(name, bytes) else name): float(value)
+                for name, value in fields.items()
+            }
+            elapsed = counters.get("heartbeat_at", 0.0) - counters.get(
+                "started_at", 0.0
+            )
+            busy = counters.get("busy_seconds", 0.0)
+            counters["throughput"] = counters.get("processed", 0.0) / max(
+                elapsed, busy, 1e-9
+            )
+            stats[worker] = counters
+        return stats
+
+
+class ScoringWorker:
+    """
+    Claims batches from a set of shards and runs a batch handler on them.
+
+    The handler receives a list of payloads and returns one result per
+    payload. A result that is an Exception fails only its task; if the
+    handler raises, the whole batch fails. Results must be JSON-serializable.
+
+    Args:
+        queue: Task queue
+        handler: Batch scoring function
+        shards: Shards to consume; all of them when None
+        worker_id: Name in the published metrics; host and pid when None
+        batch_size: Tasks claimed per batch
+        poll_interval: Sleep when no task is visible
+        resilience: Retry and circuit breaker layer for Redis calls;
+            configured from the global configuration when None
+        heartbeat_interval: Seconds between lease extensions while a batch
+            is being scored; a third of the visibility timeout when None
+        max_backoff: Longest sleep after Redis errors
+    """
+
+    def __init__(
+        self,
+        queue: TaskQueue,
+        handler: Callable[[List[Any]], List[Any]],
+        shards: Optional[Sequence[int]] = None,
+        worker_id: Optional[str] = None,
+        batch_size: int = 100,
+        poll_interval: float = 0.1,
+        resilience: Optional[Resilience] = None,
+        heartbeat_interval: Optional[float] = None,
+        max_backoff: float = 30.0,
+    ):
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if heartbeat_interval is None:
+            heartbeat_interval = queue.visibility_timeout / 3
+        if not 0 < heartbeat_interval < queue.visibility_timeout:
+            raise ValueError("heartbeat_interval must be below visibility_timeout")
+        self.queue = queue
+        self.handler = handler
+        self.shards = list(range(queue.n_shards) if shards is None else shards)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.resilience = resilience or Resilience.from_config()
+        self.heartbeat_interval = heartbeat_interval
+        self.max_backoff = max_backoff
+        self._next = 0
+        self._leased: List[Task] = []
+        self._leased_at = 0.0
+        self._lease_lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _redis(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return self.resilience.call("redis", func, *args, **kwargs)
+
+    def _lease(self, tasks: List[Task]) -> None:
+        """Hand the batch being scored to the heartbeat thread."""
+        with self._lease_lock:
+            self._leased = tasks
+            self._leased_at = time.monotonic()
+            if tasks and self._heartbeat is None:
+                self._heartbeat = threading.Thread(
+                    target=self._beat, name=f"heartbeat-{self.worker_id}", daemon=True
+                )
+                self._heartbeat.start()
+
+    def _beat(self) -> None:
+        # One thread per worker, not per batch; it exits once a beat finds
+        # the worker idle and is restarted by the next batch.
+        while True:
+            time.sleep(self.heartbeat_interval)
+            with self._lease_lock:
+                tasks = self._leased
+                if not tasks:
+                    self._heartbeat = None
+                    return
+                due = time.monotonic() - self._leased_at >= self.heartbeat_interval
+            if not due:
+                continue
+            try:
+                self._redis(self.queue.extend, tasks)
+            except Exception as e:
+                logger.warning(f"Could not extend {len(tasks)} leases: {e!r}")
+
+    def run_once(self) -> int:
+        """
+        Claim and process one batch.
+
+        Returns:
+            Tasks claimed (0 when the shards had nothing visible)
+
+        Raises:
+            Exception: A Redis error that persisted through the retries, or
+                `CircuitOpenError`; unfinished tasks are claimed again once
+                their leases expire
+        """
+        # Rotate the starting shard so a busy shard cannot starve the rest.
+        shards = self.shards[self._next :] + self.shards[: self._next]
+        self._next = (self._next + 1) % len(self.shards)
+        tasks = self._redis(self.queue.claim, shards, self.batch_size)
+        if not tasks:
+            return 0
+
+        started = time.perf_counter()
+        self._lease(tasks)
+        try:
+            results = self.handler([task.payload for task in tasks])
+            if len(results) != len(tasks):
+                raise ValueError(
+                    f"handler returned {len(results)} results for {len(tasks)} tasks"
+                )
+        except Exception as e:
+            logger.warning(f"Batch of {len(tasks)} tasks failed: {e!r}")
+            results = [e] * len(tasks)
+        finally:
+            self._lease([])
+
+        done = [
+            (task, result)
+            for task, result in zip(tasks, results)
+            if not isinstance(result, Exception)
+        ]
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                self._redis(self.queue.fail, task, result)
+        duplicates = 0
+        if done:
+            first = self._redis(self.queue.complete_many, *zip(*done))
+            duplicates = len(first) - sum(first)
+        # Counters are increments, so a retried publish would count twice.
+        self._redis(
+            self.queue.publish_stats,
+            self.worker_id,
+            policy=replace(self.resilience.policy, max_attempts=1),
+            processed=len(done),
+            failed=len(tasks) - len(done),
+            duplicates=duplicates,
+            batches=1,
+            busy_seconds=time.perf_counter() - started,
+        )
+        return len(tasks)
+
+    def run(
+        self,
+        stop: Optional[threading.Event] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Process batches until `stop` is set, or until no task has been
+        visible for `idle_timeout` seconds.
+
+        Transient Redis errors and open circuits are logged and waited out
+        with exponential backoff up to `max_backoff`; time spent backing off
+        counts as idle. Any other error propagates.
+        """
+        stop = stop or threading.Event()
+        idle_since = time.monotonic()
+        backoff = self.poll_interval
+        while not stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                if not isinstance(e, CircuitOpenError) and not is_transient(e):
+                    raise
+                wait = max(backoff, getattr(e, "retry_in", 0.0))
+                logger.warning(
+                    f"Worker {self.worker_id} cannot reach Redis ({e!r}); "
+                    f"retrying in {wait:.1f}s"
+                )
+                backoff = min(2 * backoff, self.max_backoff)
+            else:
+                backoff = wait = self.poll_interval
+                if claimed:
+                    idle_since = time.monotonic()
+                    continue
+            if (
+                idle_timeout is not None
+                and time.monotonic() - idle_since >= idle_timeout
+            ):
+                return
+            stop.wait(wait)
+
+
+def _load_handler(path: str) -> Callable[[List[Any]], List[Any]]:
+    module, _, name = path.partition(":")
+    if not name:
+        raise ValueError("handler must be given as module:function")
+    return getattr(importlib.import_module(module), name)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run one scoring worker process against REDIS_URL."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("handler", help="batch handler as module:function")
+    parser.add_argument("--index", type=int, default=0, help="this worker's index")
+    parser.add_argument("--workers", type=int, default=1, help="workers in total")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--idle-timeout", type=float, help="exit after this long without tasks"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    queue = TaskQueue.from_config()
+    shards = shards_for_worker(args.index, args.workers, queue.n_shards)
+    worker = ScoringWorker(
+        queue, _load_handler(args.handler), shards, batch_size=args.batch_size
+    )
+    logger.info(f"Worker {worker.worker_id} consuming shards {shards}")
+    instrumentation = get_instrumentation()
+    instrumentation.start_reporting()
+    try:
+        worker.run(idle_timeout=args.idle_timeout)
+    finally:
+        instrumentation.stop_reporting()
+        instrumentation.report()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1 @@
+"""Predictive model implementations plugged into the Core Engine."""
@@ -0,0 +1,596 @@
+"""
+LSTM time-series model for player form, tuned for CPU inference.
+
+Implements the Player Props (Time-Series) model from docs/research_plan.md.
+The network reads a player's game-by-game feature history and, after every
+game, predicts the mean and spread of the stat in the following game
+(disposals by default), so over/under probabilities for a prop line follow
+from a normal approximation.
+
+CPU-oriented design:
+
+- Sequences are bucketed by exact length, so batches carry no padding.
+- A per-player (h, c) state cache means that after each new game only one
+  LSTM step is run for that player instead of replaying their history.
+- The cell is written with raw TensorFlow ops so the full-sequence and
+  single-step graphs share weights exactly and can be exported as frozen
+  GraphDefs, alongside the thread-pool settings taken from `Config`.
+
+TensorFlow is imported on first use so that importing this module stays
+cheap for callers that never build the network.
+"""
+
+import json
+import logging
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.core_engine.base_model import BasePredictiveModel
+from src.core_engine.instrumentation import timed
+from src.core_engine.lazy_import import lazy_import
+from src.core_engine.profiling import profiled
+
+tf = lazy_import("tensorflow")
+
+logger = logging.getLogger(__name__)
+
+# Floor added to softplus(raw) for the predicted std, on the normalised
+# target scale; training and serving must use the same value.
+MIN_STD = 1e-3
+
+_threads_configured = False
+
+
+def configure_tensorflow_threads(app_config: Any = None) -> Dict[str, int]:
+    """
+    Apply TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS from `Config`.
+
+    Thread pools can only be sized before the TensorFlow runtime starts, so
+    this is applied once per process; later calls return the settings
+    without changing them.
+
+    Args:
+        app_config: Config instance; the global configuration when None
+
+    Returns:
+        Dictionary with the intra- and inter-op thread counts requested
+    """
+    global _threads_configured
+
+    if app_config is None:
+        from config.app_config import config as app_config
+
+    settings = {
+        "intra_op_parallelism_threads": int(app_config.get("TF_INTRA_OP_THREADS", 0)),
+        "inter_op_parallelism_threads": int(app_config.get("TF_INTER_OP_THREADS", 0)),
+    }
+    if _threads_configured:
+        return settings
+
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(
+            settings["intra_op_parallelism_threads"]
+        )
+        tf.config.threading.set_inter_op_parallelism_threads(
+            settings["inter_op_parallelism_threads"]
+        )
+    except RuntimeError as e:
+        logger.warning(f"TensorFlow runtime already initialised, threads kept: {e}")
+    _threads_configured = True
+    return settings
+
+
+def bucket_by_length(lengths: Sequence[int], batch_size: int) -> List[np.ndarray]:
+    """
+    Group sequence indices into padding-free batches of equal length.
+
+    Args:
+        lengths: Length of each sequence
+        batch_size: Maximum sequences per batch
+
+    Returns:
+        List of index arrays; every sequence in a batch has the same length
+    """
+    lengths = np.asarray(lengths, dtype=int)
+    order = np.argsort(lengths, kind="stable")
+    boundaries = np.flatnonzero(np.diff(lengths[order])) + 1
+    batches = []
+    for bucket in np.split(order, boundaries):
+        if len(bucket) == 0 or lengths[bucket[0]] == 0:
+            continue
+        batches.extend(np.array_split(bucket, math.ceil(len(bucket) / batch_size)))
+    return batches
+
+
+def _build_network(n_features: int, units: int, seed: int):
+    """Create the LSTM weights and the sequence/step tf.functions."""
+    initializer = tf.keras.initializers.GlorotUniform(seed=seed)
+
+    class LSTMForecaster(tf.Module):
+        def __init__(self):
+            super().__init__(name="lstm_forecaster")
+            self.kernel = tf.Variable(
+                initializer((n_features + units, 4 * units)), name="kernel"
+            )
+            # Forget-gate bias starts at 1 to keep early gradients flowing
+            bias = np.zeros(4 * units, dtype=np.float32)
+            bias[units : 2 * units] = 1.0
+            self.bias = tf.Variable(bias, name="bias")
+            self.head_kernel = tf.Variable(initializer((units, 2)), name="head_kernel")
+            self.head_bias = tf.Variable(tf.zeros(2), name="head_bias")
+
+        def _cell(self, x, h, c):
+            z = tf.matmul(tf.concat([x, h], axis=1), self.kernel) + self.bias
+            i, f, g, o = tf.split(z, 4, axis=1)
+            c = tf.sigmoid(f) * c + tf.sigmoid(i) * tf.tanh(g)
+            h = tf.sigmoid(o) * tf.tanh(c)
+            return h, c
+
+        def _head(self, h):
+            return tf.matmul(h, self.head_kernel) + self.head_bias
+
+        @tf.function(
+            input_signature=[
+                tf.TensorSpec([None, None, n_features], tf.float32),
+                tf.TensorSpec([None, units], tf.float32),
+                tf.TensorSpec([None, units], tf.float32),
+            ],
+            reduce_retracing=True,
+        )
+        def run_sequence(self, x, h, c):
+            steps = tf.shape(x)[1]
+            outputs = tf.TensorArray(tf.float32, size=steps)
+            for t in tf.range(steps):
+                h, c = self._cell(x[:, t, :], h, c)
+                outputs = outputs.write(t, self._head(h))
+            return tf.transpose(outputs.stack(), [1, 0, 2]), h, c
+
+        @tf.function(
+            input_signature=[
+                tf.TensorSpec([None, n_features], tf.float32),
+                tf.TensorSpec([None, units], tf.float32),
+                tf.TensorSpec([None, units], tf.float32),
+            ]
+        )
+        def step(self, x, h, c):
+            h, c = self._cell(x, h, c)
+            return self._head(h), h, c
+
+    return LSTMForecaster()
+
+
+class PlayerDisposalsLSTMModel(BasePredictiveModel):
+    """
+    LSTM player-form model with bucketed batches and a hidden-state cache.
+
+    Training data is one sequence per player: `histories[player]` holds the
+    feature rows of each game in order, and `targets[player][t]` is the stat
+    recorded in the game after game t.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        units: int = 32,
+        batch_size: int = 256,
+        epochs: int = 20,
+        learning_rate: float = 0.01,
+        seed: int = 0,
+        app_config: Any = None,
+        model_version: Optional[str] = None,
+    ):
+        """
+        Initialize the model.
+
+        Args:
+            feature_names: Ordered names of the per-game features
+            units: LSTM hidden size
+            batch_size: Maximum sequences per bucketed batch
+            epochs: Training epochs
+            learning_rate: Adam learning rate
+            seed: Seed for weight initialisation and batch shuffling
+            app_config: Config providing thread-pool settings
+            model_version: Version identifier reported with predictions
+        """
+        self.feature_names = list(feature_names)
+        self.units = units
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.seed = seed
+        self.app_config = app_config
+        self.model_version = (
+            model_version or f"lstm_form_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+
+        self.network = None
+        self.feature_mean: Optional[np.ndarray] = None
+        self.feature_std: Optional[np.ndarray] = None
+        self.target_mean = 0.0
+        self.target_std = 1.0
+
+        # Hidden-state cache: one row per player in growable arrays
+        self._slots: Dict[Any, int] = {}
+        self._h = np.zeros((0, units), dtype=np.float32)
+        self._c = np.zeros((0, units), dtype=np.float32)
+        self._last_output = np.zeros((0, 2), dtype=np.float32)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _require_fitted(self) -> None:
+        if self.network is None:
+            raise RuntimeError("Model has not been fitted")
+
+    def _normalise(self, x: np.ndarray) -> np.ndarray:
+        return ((x - self.feature_mean) / self.feature_std).astype(np.float32)
+
+    def _to_distribution(self, raw: np.ndarray):
+        """Map network outputs to (mean, std) on the original target scale."""
+        mean = raw[..., 0] * self.target_std + self.target_mean
+        std = (np.logaddexp(0.0, raw[..., 1]) + MIN_STD) * self.target_std
+        return mean, std
+
+    def _check_history(self, history: Any) -> np.ndarray:
+        history = np.atleast_2d(np.asarray(history, dtype=np.float32))
+        if history.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected {len(self.feature_names)} features, got {history.shape[1]}"
+            )
+        return history
+
+    def _zero_state(self, n: int):
+        return (
+            np.zeros((n, self.units), dtype=np.float32),
+            np.zeros((n, self.units), dtype=np.float32),
+        )
+
+    def _slot_indices(self, player_ids: Sequence[Any]) -> np.ndarray:
+        """Cache rows for players, allocating zero-state rows for new players."""
+        new_players = [p for p in dict.fromkeys(player_ids) if p not in self._slots]
+        if new_players:
+            start = len(self._slots)
+            for offset, player in enumerate(new_players):
+                self._slots[player] = start + offset
+            needed = start + len(new_players)
+            if needed > len(self._h):
+                capacity = max(needed, 2 * len(self._h), 64)
+                self._h = np.resize(self._h, (capacity, self.units))
+                self._c = np.resize(self._c, (capacity, self.units))
+                self._last_output = np.resize(self._last_output, (capacity, 2))
+            self._h[start:needed] = 0.0
+            self._c[start:needed] = 0.0
+            self._last_output[start:needed] = 0.0
+        return np.array([self._slots[p] for p in player_ids], dtype=int)
+
+    # ------------------------------------------------------------------
+    # Training
+    # ------------------------------------------------------------------
+
+    def fit(
+        self, histories: Dict[Any, Any], targets: Dict[Any, Any]
+    ) -> "PlayerDisposalsLSTMModel":
+        """
+        Train on per-player game histories with length-bucketed batches.
+
+        Args:
+            histories: Player id -> (n_games, n_features) feature rows
+            targets: Player id -> (n_games,) stat in each following game
+
+        Returns:
+            The fitted model
+        """
+        configure_tensorflow_threads(self.app_config)
+
+        players = list(histories)
+        sequences = [self._check_history(histories[p]) for p in players]
+        labels = [np.asarray(targets[p], dtype=np.float32) for p in players]
+        for player, sequence, label in zip(players, sequences, labels):
+            if len(sequence) != len(label):
+                raise ValueError(f"History and targets differ in length for {player}")
+
+        stacked = np.concatenate(sequences)
+        self.feature_mean = stacked.mean(axis=0)
+        self.feature_std = np.where(stacked.std(axis=0) > 0, stacked.std(axis=0), 1.0)
+        all_labels = np.concatenate(labels)
+        self.target_mean = float(all_labels.mean())
+        self.target_std = float(all_labels.std()) or 1.0
+
+        self.network = _build_network(len(self.feature_names), self.units, self.seed)
+        network = self.network
+        optimizer = tf.keras.optimizers.Adam(learning_rate=self.learning_rate)
+        variables = network.trainable_variables
+
+        @tf.function(
+            input_signature=[
+                tf.TensorSpec([None, None, len(self.feature_names)], tf.float32),
+                tf.TensorSpec([None, None], tf.float32),
+            ],
+            reduce_retracing=True,
+        )
+        def train_step(x, y):
+            zeros = tf.zeros([tf.shape(x)[0], self.units])
+            with tf.GradientTape() as tape:
+                outputs, _, _ = network.run_sequence(x, zeros, zeros)
+                mean = outputs[..., 0]
+                std = tf.nn.softplus(outputs[..., 1]) + MIN_STD
+                # Gaussian negative log-likelihood
+                loss = tf.reduce_mean(tf.math.log(std) + 0.5 * ((y - mean) / std) ** 2)
+            optimizer.apply_gradients(zip(tape.gradient(loss, variables), variables))
+            return loss
+
+        inputs = [self._normalise(s) for s in sequences]
+        scaled = [(label - self.target_mean) / self.target_std for label in labels]
+        batches = bucket_by_length([len(s) for s in sequences], self.batch_size)
+        rng = np.random.default_rng(self.seed)
+
+        start = time.perf_counter()
+        for epoch in range(self.epochs):
+            losses = []
+            for batch_index in rng.permutation(len(batches)):
+                batch = batches[batch_index]
+                x = np.stack([inputs[i] for i in batch])
+                y = np.stack([scaled[i] for i in batch])
+                losses.append(float(train_step(x, y)))
+            logger.debug(f"Epoch {epoch + 1}/{self.epochs} loss {np.mean(losses):.4f}")
+
+        logger.info(
+            f"Trained LSTM form model on {len(players)} players in "
+            f"{len(batches)} padding-free batches ({time.perf_counter() - start:.1f}s)"
+        )
+        self.reset_state_cache()
+        return self
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+
+    def reset_state_cache(self) -> None:
+        """Drop all cached player hidden states."""
+        self._slots = {}
+        self._h = np.zeros((0, self.units), dtype=np.float32)
+        self._c = np.zeros((0, self.units), dtype=np.float32)
+        self._last_output = np.zeros((0, 2), dtype=np.float32)
+
+    def predict_sequences(self, histories: Dict[Any, Any]) -> Dict[str, Any]:
+        """
+        Full mode: run complete histories and refresh the state cache.
+
+        Args:
+            histories: Player id -> (n_games, n_features) feature rows
+
+        Returns:
+            Dictionary with "player_ids" and arrays "mean" and "std" for each
+            player's next game
+        """
+        self._require_fitted()
+        players = list(histories)
+        sequences = [
+            self._normalise(self._check_history(histories[p])) for p in players
+        ]
+        slots = self._slot_indices(players)
+        outputs = np.zeros((len(players), 2), dtype=np.float32)
+
+        for batch in bucket_by_length([len(s) for s in sequences], self.batch_size):
+            x = np.stack([sequences[i] for i in batch])
+            h, c = self._zero_state(len(batch))
+            raw, h, c = self.network.run_sequence(x, h, c)
+            outputs[batch] = raw.numpy()[:, -1, :]
+            self._h[slots[batch]] = h.numpy()
+            self._c[slots[batch]] = c.numpy()
+
+        self._last_output[slots] = outputs
+        mean, std = self._to_distribution(outputs)
+        return {"player_ids": players, "mean": mean, "std": std}
+
+    def update(self, player_ids: Sequence[Any], game_features: Any) -> Dict[str, Any]:
+        """
+        Incremental mode: advance cached states by one new game per player.
+
+        Players without a cached state start from a zero state, exactly as
+        if this game were the first in their history.
+
+        Args:
+            player_ids: Players who have just completed a game (unique)
+            game_features: (n_players, n_features) rows for those games
+
+        Returns:
+            Dictionary with "player_ids", "mean" and "std" for the next game
+        """
+        self._require_fitted()
+        player_ids = list(player_ids)
+        if len(set(player_ids)) != len(player_ids):
+            raise ValueError("player_ids must be unique within an update")
+        x = self._normalise(self._check_history(game_features))
+        slots = self._slot_indices(player_ids)
+
+        raw, h, c = self.network.step(x, self._h[slots], self._c[slots])
+        raw = raw.numpy()
+        self._h[slots] = h.numpy()
+        self._c[slots] = c.numpy()
+        self._last_output[slots] = raw
+
+        mean, std = self._to_distribution(raw)
+        return {"player_ids": player_ids, "mean": mean, "std": std}
+
+    @timed("predict")
+    @profiled("predict")
+    def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Predict a player prop from the cached state or a supplied history.
+
+        Args:
+            features: Dictionary with "player_id" and "prop_line", optional
+                "history" (game feature rows; runs full mode for this
+                player), "side" ("over" or "under"), "price" and
+                "fair_implied_probability"
+
+        Returns:
+            Standardized prediction object (technical spec section 4.2)
+        """
+        self._require_fitted()
+        player_id = features["player_id"]
+        if features.get("history") is not None:
+            self.predict_sequences({player_id: features["history"]})
+        elif player_id not in self._slots:
+            raise KeyError(f"No cached state for player {player_id}")
+
+        mean, std = self._to_distribution(self._last_output[self._slots[player_id]])
+        line = float(features["prop_line"])
+        over = 0.5 * math.erfc((line - float(mean)) / (float(std) * math.sqrt(2)))
+        side = features.get("side", "over")
+        if side not in ("over", "under"):
+            raise ValueError(f"side must be 'over' or 'under', got {side}")
+        probability = over if side == "over" else 1.0 - over
+
+        fair_probability = features.get("fair_implied_probability")
+        if fair_probability is None and features.get("price"):
+            fair_probability = 1.0 / float(features["price"])
+        value_score = probability / fair_probability - 1 if fair_probability else None
+
+        return {
+            "prediction_probability": probability,
+            "value_score": value_score,
+            # Tighter predictive spread relative to the mean -> more confident
+            "confidence_score": float(1.0 / (1.0 + std / max(abs(mean), 1e-6))),
+            "explanation": (
+                self.explain(features) if features.get("history") is not None else {}
+            ),
+            "model_version": self.model_version,
+            "raw_prediction": {"mean": float(mean), "std": float(std)},
+        }
+
+    @timed("explain")
+    def explain(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gradient x input attribution of the predicted mean to each feature.
+
+        Args:
+            features: Dictionary with "player_id" and "history"
+
+        Returns:
+            Per-feature contributions summed over the history, plus the
+            top positive and negative features
+        """
+        self._require_fitted()
+        history = self._normalise(self._check_history(features["history"]))
+        x = tf.constant(history[None, :, :])
+        h, c = self._zero_state(1)
+        with tf.GradientTape() as tape:
+            tape.watch(x)
+            raw, _, _ = self.network.run_sequence(x, h, c)
+            mean = raw[0, -1, 0] * self.target_std
+        contributions = (tape.gradient(mean, x) * x).numpy()[0].sum(axis=0)
+        named = dict(zip(self.feature_names, contributions.tolist()))
+        ranked = sorted(named.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "feature_contributions": named,
+            "top_positive_features": [n for n, v in ranked if v > 0][:3],
+            "top_negative_features": [n for n, v in ranked[::-1] if v < 0][:3],
+        }
+
+    # ------------------------------------------------------------------
+    # Export and benchmarking
+    # ------------------------------------------------------------------
+
+    def export_frozen_graph(self, directory: str) -> Dict[str, str]:
+        """
+        Export the sequence and step graphs as frozen GraphDefs.
+
+        Variables are folded into constants so the graphs can be served
+        without the training code. A runtime_config.json sidecar records the
+        feature order, normalisation constants and the CPU thread-pool
+        settings from `Config`.
+
+        Args:
+            directory: Output directory (created if missing)
+
+        Returns:
+            Dictionary of written file paths
+        """
+        self._require_fitted()
+        from tensorflow.python.framework.convert_to_constants import (
+            convert_variables_to_constants_v2,
+        )
+
+        output = Path(directory)
+        output.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for name in ("run_sequence", "step"):
+            concrete = getattr(self.network, name).get_concrete_function()
+            frozen = convert_variables_to_constants_v2(
+                concrete, lower_control_flow=False
+            )
+            filename = f"lstm_{name}.pb"
+            tf.io.write_graph(frozen.graph.as_graph_def(), str(output), filename, False)
+            paths[name] = str(output / filename)
+
+        runtime_config = {
+            "model_version": self.model_version,
+            "feature_names": self.feature_names,
+            "units": self.units,
+            "feature_mean": self.feature_mean.tolist(),
+            "feature_std": self.feature_std.tolist(),
+            "target_mean": self.target_mean,
+            "target_std": self.target_std,
+            "threading": configure_tensorflow_threads(self.app_config),
+        }
+        config_path = output / "runtime_config.json"
+        config_path.write_text(json.dumps(runtime_config, indent=2))
+        paths["runtime_config"] = str(config_path)
+
+        logger.info(f"Exported frozen LSTM graphs to {output}")
+        return paths
+
+
+def benchmark_cpu_throughput(
+    model: PlayerDisposalsLSTMModel,
+    histories: Dict[Any, Any],
+    next_games: Any,
+    repeats: int = 3,
+) -> Dict[str, float]:
+    """
+    Measure CPU predictions/sec in full and incremental modes.
+
+    Full mode replays every player's history; incremental mode advances the
+    cached states by one game per player. The best of `repeats` runs is
+    reported for each mode.
+
+    Args:
+        model: Fitted model
+        histories: Player id -> game feature rows
+        next_games: (n_players, n_features) rows for one more game per player,
+            in the order of `histories`
+        repeats: Timed repetitions per mode
+
+    Returns:
+        Dictionary with predictions/sec for both modes and their ratio
+    """
+    players = list(histories)
+    model.predict_sequences(histories)  # warm up traced graphs
+    model.update(players, next_games)
+
+    full_times, incremental_times = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_sequences(histories)
+        full_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        model.update(players, next_games)
+        incremental_times.append(time.perf_counter() - start)
+
+    full_rate = len(players) / min(full_times)
+    incremental_rate = len(players) / min(incremental_times)
+    return {
+        "players": len(players),
+        "full_predictions_per_second": full_rate,
+        "incremental_predictions_per_second": incremental_rate,
+        "incremental_speedup": incremental_rate / full_rate,
+    }
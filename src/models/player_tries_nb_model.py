@@ -0,0 +1,442 @@
+"""
+Negative Binomial regression for count-based player props.
+
+Implements the Player Props (Count-Based) model from docs/research_plan.md.
+Rather than one GLM fit per player, all players are fitted together: the
+design matrices are stacked, the IRLS normal equations for every player are
+accumulated with segmented sums, and each Newton step is one batched linear
+solve. Player coefficients are shrunk towards a pooled fit so that players
+with only a handful of games still get stable estimates, and unseen players
+fall back to the pooled coefficients.
+
+Over/under probabilities at any prop line come from the NB2 probability mass
+function in closed form, evaluated for a whole slate at once.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.core_engine.base_model import BasePredictiveModel
+from src.core_engine.instrumentation import timed
+from src.core_engine.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+DISPERSION_MODES = ("shared", "per_player")
+
+# Guard against overflow in exp() for extreme linear predictors
+_MAX_ETA = 20.0
+
+
+def negative_binomial_over_under(
+    mean: Any, dispersion: Any, prop_lines: Any
+) -> Dict[str, np.ndarray]:
+    """
+    Over/under/push probabilities for NB2 counts at the given prop lines.
+
+    Uses the parameterisation Var(Y) = mean + dispersion * mean**2; a
+    dispersion of zero reduces to the Poisson distribution. The CDF is built
+    with the pmf recurrence, so the cost is one vectorised step per integer
+    up to the largest line on the slate.
+
+    Args:
+        mean: Expected counts, one per prop
+        dispersion: NB2 dispersion, scalar or one per prop
+        prop_lines: Prop lines (e.g. 0.5 for "anytime try scorer")
+
+    Returns:
+        Dictionary of arrays: "over" P(Y > line), "under" P(Y < line) and
+        "push" P(Y == line), which is non-zero only for integer lines
+    """
+    mean = np.asarray(mean, dtype=float)
+    lines = np.broadcast_to(np.asarray(prop_lines, dtype=float), mean.shape)
+    alpha = np.broadcast_to(np.asarray(dispersion, dtype=float), mean.shape)
+
+    if np.any(lines < 0):
+        raise ValueError("prop_lines must be non-negative")
+
+    floor_lines = np.floor(lines).astype(int)
+    is_integer_line = floor_lines == lines
+    # P(Y < line) needs the CDF up to ceil(line) - 1
+    under_upper = np.where(is_integer_line, floor_lines - 1, floor_lines)
+
+    poisson = alpha < 1e-10
+    safe_alpha = np.where(poisson, 1.0, alpha)
+    r = 1.0 / safe_alpha
+    ratio = np.where(poisson, 0.0, mean / (r + mean))
+    pmf = np.where(poisson, np.exp(-mean), np.exp(r * (np.log(r) - np.log(r + mean))))
+
+    under = np.where(under_upper >= 0, pmf, 0.0)
+    push = np.where(is_integer_line & (floor_lines == 0), pmf, 0.0)
+    max_line = int(floor_lines.max(initial=0))
+
+    for k in range(max_line):
+        pmf = np.where(poisson, pmf * mean / (k + 1), pmf * (k + r) / (k + 1) * ratio)
+        under = under + np.where(under_upper >= k + 1, pmf, 0.0)
+        push = push + np.where(is_integer_line & (floor_lines == k + 1), pmf, 0.0)
+
+    over = np.clip(1.0 - under - push, 0.0, 1.0)
+    return {"over": over, "under": under, "push": push}
+
+
+class PlayerTriesNBModel(BasePredictiveModel):
+    """
+    Batch-fitted Negative Binomial GLM for player count props.
+
+    Each player gets their own coefficient vector over `feature_names` (plus
+    an intercept) and either a dispersion shared across all players or a
+    per-player dispersion shrunk towards the shared value.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        dispersion: str = "shared",
+        ridge: float = 1.0,
+        dispersion_prior_strength: float = 5.0,
+        confidence_prior_games: float = 10.0,
+        max_iter: int = 50,
+        tol: float = 1e-8,
+        model_version: Optional[str] = None,
+    ):
+        """
+        Initialize the model.
+
+        Args:
+            feature_names: Ordered names of the numeric features
+            dispersion: "shared" or "per_player"
+            ridge: Strength of the shrinkage of player coefficients towards
+                the pooled fit
+            dispersion_prior_strength: Pseudo-observations pulling per-player
+                dispersion towards the shared value
+            confidence_prior_games: Games at which confidence_score reaches 0.5
+            max_iter: Maximum IRLS iterations
+            tol: Convergence tolerance on the largest coefficient change
+            model_version: Version identifier reported with predictions
+        """
+        if dispersion not in DISPERSION_MODES:
+            raise ValueError(
+                f"dispersion must be one of {DISPERSION_MODES}, got {dispersion}"
+            )
+        if ridge < 0:
+            raise ValueError("ridge must be non-negative")
+
+        self.feature_names = list(feature_names)
+        self.dispersion = dispersion
+        self.ridge = ridge
+        self.dispersion_prior_strength = dispersion_prior_strength
+        self.confidence_prior_games = confidence_prior_games
+        self.max_iter = max_iter
+        self.tol = tol
+        self.model_version = (
+            model_version or f"nb_props_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+
+        self.player_index: Dict[Any, int] = {}
+        self.coefficients: Optional[np.ndarray] = None
+        self.pooled_coefficients: Optional[np.ndarray] = None
+        self.alpha: Optional[np.ndarray] = None
+        self.shared_alpha = 0.0
+        self.games_played: Optional[np.ndarray] = None
+        self.feature_means: Optional[np.ndarray] = None
+        self.n_iter_ = 0
+
+    # ------------------------------------------------------------------
+    # Fitting
+    # ------------------------------------------------------------------
+
+    def _design(self, X: Any) -> np.ndarray:
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected {len(self.feature_names)} features, got {X.shape[1]}"
+            )
+        return np.hstack([np.ones((len(X), 1)), X])
+
+    @staticmethod
+    def _normal_equations(
+        design: np.ndarray,
+        weights: np.ndarray,
+        z: np.ndarray,
+        codes: np.ndarray,
+        k: int,
+    ):
+        """Accumulate X'WX and X'Wz per player with one bincount per entry."""
+        q = design.shape[1]
+        xtwx = np.empty((k, q, q))
+        xtwz = np.empty((k, q))
+        weighted = design * weights[:, None]
+        for i in range(q):
+            xtwz[:, i] = np.bincount(codes, weights=weighted[:, i] * z, minlength=k)
+            for j in range(i, q):
+                column = np.bincount(
+                    codes, weights=weighted[:, i] * design[:, j], minlength=k
+                )
+                xtwx[:, i, j] = column
+                xtwx[:, j, i] = column
+        return xtwx, xtwz
+
+    @staticmethod
+    def _moment_dispersion(
+        y: np.ndarray, mu: np.ndarray, leverage: np.ndarray, codes: np.ndarray, k: int
+    ) -> tuple:
+        """
+        Per-player NB2 moment statistics sum((y-mu)^2 - y) and sum(mu^2).
+
+        Squared residuals are divided by (1 - leverage) to correct for the
+        variance absorbed by each player's own fit.
+        """
+        numerator = (y - mu) ** 2 / np.maximum(1.0 - leverage, 1e-3) - y
+        return (
+            np.bincount(codes, weights=numerator, minlength=k),
+            np.bincount(codes, weights=mu**2, minlength=k),
+        )
+
+    def fit(self, player_ids: Sequence[Any], X: Any, y: Any) -> "PlayerTriesNBModel":
+        """
+        Fit all players' GLMs together with batched IRLS.
+
+        Args:
+            player_ids: Player identifier for each historical game
+            X: Feature matrix, one row per game, columns in `feature_names`
+            y: Observed counts (tries, goals, ...) for each game
+
+        Returns:
+            The fitted model
+        """
+        design = self._design(X)
+        y = np.asarray(y, dtype=float)
+        if np.any(y < 0):
+            raise ValueError("Counts must be non-negative")
+        if len(y) != len(design) or len(player_ids) != len(design):
+            raise ValueError("player_ids, X and y must have the same length")
+
+        players, codes = np.unique(np.asarray(player_ids), return_inverse=True)
+        k, q = len(players), design.shape[1]
+        self.player_index = {player: i for i, player in enumerate(players.tolist())}
+        self.games_played = np.bincount(codes, minlength=k)
+        self.feature_means = design[:, 1:].mean(axis=0)
+
+        # Start from log(mean count) for every player; the pooled fit is
+        # just the same IRLS with a single group.
+        start = np.zeros(q)
+        start[0] = np.log(max(y.mean(), 1e-3))
+        pooled = self._irls(design, y, np.zeros(len(y), dtype=int), 1, start[None, :])
+        self.pooled_coefficients = pooled[0][0]
+
+        coefficients, alpha, shared_alpha = self._irls(
+            design,
+            y,
+            codes,
+            k,
+            np.tile(self.pooled_coefficients, (k, 1)),
+            prior=self.pooled_coefficients,
+            initial_alpha=pooled[2],
+        )
+        self.coefficients = coefficients
+        self.alpha = alpha
+        self.shared_alpha = shared_alpha
+
+        logger.info(
+            f"Fitted NB props model for {k} players on {len(y)} games "
+            f"in {self.n_iter_} IRLS iterations (shared dispersion "
+            f"{self.shared_alpha:.4f})"
+        )
+        return self
+
+    def _irls(
+        self,
+        design: np.ndarray,
+        y: np.ndarray,
+        codes: np.ndarray,
+        k: int,
+        beta: np.ndarray,
+        prior: Optional[np.ndarray] = None,
+        initial_alpha: float = 0.0,
+    ):
+        """Run batched IRLS with alternating moment updates of the dispersion."""
+        q = design.shape[1]
+        penalty = np.eye(q) * (self.ridge if prior is not None else 1e-8)
+        prior_term = penalty @ (prior if prior is not None else np.zeros(q))
+
+        alpha = np.full(k, initial_alpha)
+        shared_alpha = initial_alpha
+        leverage = np.zeros(len(y))
+
+        for iteration in range(1, self.max_iter + 1):
+            eta = np.clip(
+                np.einsum("nq,nq->n", design, beta[codes]), -_MAX_ETA, _MAX_ETA
+            )
+            mu = np.exp(eta)
+
+            numerator, denominator = self._moment_dispersion(y, mu, leverage, codes, k)
+            shared_alpha = max(0.0, numerator.sum() / max(denominator.sum(), 1e-12))
+            if self.dispersion == "per_player" and prior is not None:
+                strength = self.dispersion_prior_strength * np.mean(mu**2)
+                alpha = np.clip(
+                    (numerator + strength * shared_alpha) / (denominator + strength),
+                    0.0,
+                    None,
+                )
+            else:
+                alpha = np.full(k, shared_alpha)
+
+            alpha_rows = alpha[codes]
+            weights = mu / (1.0 + alpha_rows * mu)
+            z = eta + (y - mu) / mu
+
+            xtwx, xtwz = self._normal_equations(design, weights, z, codes, k)
+            inverse = np.linalg.inv(xtwx + penalty)
+            new_beta = np.einsum("kqr,kr->kq", inverse, xtwz + prior_term)
+            # Hat values w_i x_i' (X'WX)^-1 x_i for the next dispersion update
+            leverage = weights * np.einsum(
+                "nq,nqr,nr->n", design, inverse[codes], design
+            )
+
+            change = np.max(np.abs(new_beta - beta))
+            beta = new_beta
+            if change < self.tol:
+                break
+
+        self.n_iter_ = iteration
+        return beta, alpha, shared_alpha
+
+    # ------------------------------------------------------------------
+    # Prediction
+    # ------------------------------------------------------------------
+
+    def _require_fitted(self) -> None:
+        if self.coefficients is None:
+            raise RuntimeError("Model has not been fitted")
+
+    def _player_parameters(self, player_ids: Sequence[Any]):
+        """Coefficient rows, dispersions and games played for a slate."""
+        codes = np.array([self.player_index.get(p, -1) for p in player_ids], dtype=int)
+        known = codes >= 0
+        safe_codes = np.where(known, codes, 0)
+        beta = np.where(
+            known[:, None], self.coefficients[safe_codes], self.pooled_coefficients
+        )
+        alpha = np.where(known, self.alpha[safe_codes], self.shared_alpha)
+        games = np.where(known, self.games_played[safe_codes], 0)
+        return beta, alpha, games
+
+    def predict_mean(self, player_ids: Sequence[Any], X: Any) -> np.ndarray:
+        """Expected counts for each (player, feature row) pair on a slate."""
+        self._require_fitted()
+        design = self._design(X)
+        beta, _, _ = self._player_parameters(player_ids)
+        eta = np.clip(np.einsum("nq,nq->n", design, beta), -_MAX_ETA, _MAX_ETA)
+        return np.exp(eta)
+
+    def predict_slate(
+        self,
+        player_ids: Sequence[Any],
+        X: Any,
+        prop_lines: Any,
+        prices: Any = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Price a whole slate of over/under props in one pass.
+
+        Args:
+            player_ids: Player for each prop
+            X: Feature rows for each prop
+            prop_lines: Line for each prop
+            prices: Optional decimal odds for the "over" side of each prop
+
+        Returns:
+            Dictionary of arrays with expected counts, dispersion,
+            over/under/push probabilities, confidence and (when prices are
+            given) value scores for the over side
+        """
+        self._require_fitted()
+        design = self._design(X)
+        beta, alpha, games = self._player_parameters(player_ids)
+        eta = np.clip(np.einsum("nq,nq->n", design, beta), -_MAX_ETA, _MAX_ETA)
+        mean = np.exp(eta)
+
+        result = negative_binomial_over_under(mean, alpha, prop_lines)
+        result["expected_count"] = mean
+        result["dispersion"] = alpha
+        result["confidence_score"] = games / (games + self.confidence_prior_games)
+        if prices is not None:
+            prices = np.asarray(prices, dtype=float)
+            result["value_score"] = result["over"] * prices - 1
+        return result
+
+    @timed("predict")
+    @profiled("predict")
+    def predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Predict a single player prop.
+
+        Args:
+            features: Dictionary with "player_id", "prop_line", one value per
+                name in `feature_names`, and optionally "side" ("over" or
+                "under"), "price" (decimal odds for that side) and
+                "fair_implied_probability" (vig-free market probability)
+
+        Returns:
+            Standardized prediction object (technical spec section 4.2)
+        """
+        side = features.get("side", "over")
+        if side not in ("over", "under"):
+            raise ValueError(f"side must be 'over' or 'under', got {side}")
+
+        row = [[features[name] for name in self.feature_names]]
+        slate = self.predict_slate(
+            [features["player_id"]], row, [features["prop_line"]]
+        )
+        probability = float(slate[side][0])
+
+        fair_probability = features.get("fair_implied_probability")
+        if fair_probability is None and features.get("price"):
+            fair_probability = 1.0 / float(features["price"])
+        value_score = probability / fair_probability - 1 if fair_probability else None
+
+        return {
+            "prediction_probability": probability,
+            "value_score": value_score,
+            "confidence_score": float(slate["confidence_score"][0]),
+            "explanation": self.explain(features),
+            "model_version": self.model_version,
+            "raw_prediction": {
+                "expected_count": float(slate["expected_count"][0]),
+                "dispersion": float(slate["dispersion"][0]),
+                "over": float(slate["over"][0]),
+                "under": float(slate["under"][0]),
+                "push": float(slate["push"][0]),
+            },
+        }
+
+    @timed("explain")
+    def explain(self, features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Explain a prediction on the log expected-count scale.
+
+        For a log-link GLM the contribution of each feature is its
+        coefficient times the deviation from the training mean, which is the
+        exact SHAP value under feature independence.
+        """
+        self._require_fitted()
+        x = np.array([features[name] for name in self.feature_names], dtype=float)
+        beta, _, _ = self._player_parameters([features["player_id"]])
+        contributions = beta[0, 1:] * (x - self.feature_means)
+        named = dict(zip(self.feature_names, contributions.tolist()))
+
+        ranked = sorted(named.items(), key=lambda item: item[1], reverse=True)
+        top_positive: List[str] = [name for name, value in ranked if value > 0][:3]
+        top_negative: List[str] = [name for name, value in ranked[::-1] if value < 0][
+            :3
+        ]
+
+        return {
+            "feature_contributions": named,
+            "baseline_log_mean": float(beta[0, 0] + beta[0, 1:] @ self.feature_means),
+            "top_positive_features": top_positive,
+            "top_negative_features": top_negative,
+        }
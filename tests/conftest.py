@@ -145,7 +145,7 @@ def clv_test_data():
             "opening_odds": 3.1,
             "closing_odds": 3.2,
             "bet_odds": 3.0,
-            "expected_clv": -0.065,
+            "expected_clv": 0.067,
         },
     ]
 
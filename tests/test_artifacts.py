@@ -0,0 +1,148 @@
+"""
+Tests for the content-addressed artifact store and resumable stages.
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.core_engine.artifacts import ArtifactStore, StageRunner, content_hash
+
+
+class CountingStage:
+    """Stage function that records how often it ran."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+        self.__qualname__ = f"CountingStage.{func.__name__}"
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / "artifacts"))
+
+
+def test_store_is_content_addressed(store):
+    digest = store.put({"rows": [1, 2, 3]})
+
+    assert digest == content_hash({"rows": [1, 2, 3]})
+    assert store.put({"rows": [1, 2, 3]}) == digest
+    assert store.get(digest) == {"rows": [1, 2, 3]}
+    with pytest.raises(KeyError):
+        store.get("0" * 64)
+
+
+def test_identical_inputs_skip_stage(store):
+    train = CountingStage(lambda data, depth=4: {"model": sum(data) * depth})
+
+    first = StageRunner(store).run("train", train, [1, 2, 3], depth=4)
+    second = StageRunner(store).run("train", train, [1, 2, 3], depth=4)
+    StageRunner(store).run("train", train, [1, 2, 4], depth=4)
+    StageRunner(store).run("train", train, [1, 2, 3], depth=6)
+
+    assert first == second == {"model": 24}
+    assert train.calls == 3
+
+
+def test_uncached_stage_always_runs(store):
+    fetch = CountingStage(lambda: {"rows": 10})
+
+    StageRunner(store).run("data", fetch, cache=False)
+    StageRunner(store).run("data", fetch, cache=False)
+
+    assert fetch.calls == 2
+
+
+def test_resume_continues_after_failed_stage(store):
+    fetch = CountingStage(lambda: {"rows": time.perf_counter_ns()})
+    train = CountingStage(lambda data: {"model": data["rows"]})
+
+    def failing_backtest(model):
+        raise RuntimeError("backtest crashed")
+
+    runner = StageRunner(store)
+    data = runner.run("data", fetch, cache=False)
+    model = runner.run("train", train, data)
+    with pytest.raises(RuntimeError):
+        runner.run("backtest", failing_backtest, model)
+
+    resumed = StageRunner(store, resume=True)
+    data_again = resumed.run("data", fetch, cache=False)
+    model_again = resumed.run("train", train, data_again)
+    metrics = resumed.run("backtest", lambda model: {"clv": 0.03}, model_again)
+
+    assert data_again == data
+    assert model_again == model
+    assert fetch.calls == 1 and train.calls == 1
+    assert metrics == {"clv": 0.03}
+    manifest = store.run_manifest(resumed.run_id)
+    assert manifest["resumed_from"] == runner.run_id
+    assert manifest["stages"]["data"]["source"] == "resumed"
+    assert manifest["stages"]["backtest"]["source"] == "computed"
+
+
+def test_resume_recomputes_stage_with_changed_inputs(store):
+    train = CountingStage(lambda data: {"model": sum(data)})
+
+    runner = StageRunner(store)
+    runner.run("data", lambda: [1, 2, 3], cache=False)
+    runner.run("train", train, [1, 2, 3])
+
+    resumed = StageRunner(store, resume=True)
+    data = resumed.run("data", lambda: [1, 2, 3], cache=False)
+    model = resumed.run("train", train, [4, 5, 6])
+
+    assert data == [1, 2, 3]
+    assert model == {"model": 15}
+    assert train.calls == 2
+    manifest = store.run_manifest(resumed.run_id)
+    assert manifest["stages"]["data"]["source"] == "resumed"
+    assert manifest["stages"]["train"]["source"] == "computed"
+
+
+def test_resume_after_finished_run_starts_from_scratch(store):
+    fetch = CountingStage(lambda: {"rows": 10})
+
+    runner = StageRunner(store)
+    runner.run("data", fetch, cache=False)
+    runner.finish()
+    assert store.run_manifest(runner.run_id)["completed_at"]
+
+    resumed = StageRunner(store, resume=True)
+    resumed.run("data", fetch, cache=False)
+
+    assert fetch.calls == 2
+    manifest = store.run_manifest(resumed.run_id)
+    assert manifest["resumed_from"] is None
+    assert manifest["stages"]["data"]["source"] == "computed"
+
+
+def test_resume_without_previous_run(store):
+    runner = StageRunner(store, resume=True)
+
+    assert runner.run("data", lambda: 1, cache=False) == 1
+    assert runner.completed_stages() == ["data"]
+
+
+def test_run_parallel_overlaps_independent_stages(store):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def backtest(candidate):
+        barrier.wait()  # only passes if all three run concurrently
+        return {"candidate": candidate}
+
+    runner = StageRunner(store, max_workers=3)
+    results = runner.run_parallel("backtest", backtest, [(0,), (1,), (2,)])
+
+    assert results == [{"candidate": 0}, {"candidate": 1}, {"candidate": 2}]
+    assert sorted(runner.completed_stages()) == [
+        "backtest[0]",
+        "backtest[1]",
+        "backtest[2]",
+    ]
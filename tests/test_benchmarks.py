@@ -0,0 +1,55 @@
+"""Smoke tests for the benchmark suite and its regression comparison."""
+
+import json
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.compare import compare_results
+from benchmarks.slates import generate_slate
+from benchmarks.suite import BENCHMARKS, run_suite, save_results
+
+
+def test_slate_is_consistent():
+    slate = generate_slate(999, seed=1)
+    assert len(slate["odds"]) == 999
+    assert slate["offsets"][-1] == 999
+    implied = 1.0 / slate["odds"].reshape(-1, 3)
+    assert implied.sum(axis=1) == pytest.approx(1.05)
+
+
+def test_suite_runs_every_benchmark_in_quick_mode(tmp_path):
+    results = run_suite(sizes=["1k"], repeats=1)
+    assert set(results) == {f"{name}[1k]" for name in BENCHMARKS}
+    assert all(result["throughput"] > 0 for result in results.values())
+
+    path = save_results(results, tmp_path, commit="abc123")
+    document = json.loads(path.read_text())
+    assert path.name == "abc123.json"
+    assert document["results"] == results
+
+
+def test_compare_flags_regressions_beyond_tolerance(tmp_path):
+    baseline = {
+        "results": {
+            "fast": {"throughput": 100.0, "peak_mb": 1.0},
+            "slow": {"throughput": 100.0, "peak_mb": 1.0},
+            "fat": {"throughput": 100.0, "peak_mb": 1.0},
+        }
+    }
+    current = {
+        "results": {
+            "fast": {"throughput": 95.0, "peak_mb": 1.05},
+            "slow": {"throughput": 80.0, "peak_mb": 1.0},
+            "fat": {"throughput": 100.0, "peak_mb": 1.5},
+        }
+    }
+    rows = {row["benchmark"]: row for row in compare_results(baseline, current)}
+    assert not rows["fast"]["regression"]
+    assert rows["slow"]["regression"]
+    assert rows["fat"]["regression"]
+
+    (tmp_path / "a.json").write_text(json.dumps(baseline))
+    (tmp_path / "b.json").write_text(json.dumps(current))
+    assert main(["compare", str(tmp_path / "a.json"), str(tmp_path / "b.json")]) == 1
+    assert main(["compare", str(tmp_path / "a.json"), str(tmp_path / "a.json")]) == 0
@@ -0,0 +1,145 @@
+"""
+Tests for SHAP-derived confidence scoring and its fast surrogate mode.
+"""
+
+import numpy as np
+import pytest
+
+from src.core_engine.confidence import (
+    ShapConfidenceScorer,
+    calculate_confidence_from_shap,
+)
+
+
+class LinearExplainer:
+    """Exact SHAP values for a linear model with zero-mean features."""
+
+    def __init__(self, coefficients):
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.calls = 0
+
+    def shap_values(self, X):
+        self.calls += 1
+        return np.asarray(X, dtype=float) * self.coefficients
+
+
+@pytest.fixture
+def historical_features():
+    rng = np.random.default_rng(42)
+    return rng.normal(size=(3000, 4))
+
+
+class TestCalculateConfidenceFromShap:
+    """Test cases for the exact confidence formula."""
+
+    def test_single_prediction_returns_float(self):
+        score = calculate_confidence_from_shap(
+            np.array([0.2, 0.1, 0.3]), baseline_values=[0.0], threshold=1.0
+        )
+
+        # magnitude 0.6 * agreement 1.0 * deviation 0.6
+        assert isinstance(score, float)
+        assert score == pytest.approx(0.36)
+
+    def test_batch_is_clipped_to_unit_interval(self):
+        shap_values = np.array([[5.0, 5.0], [0.1, -0.1], [0.0, 0.0]])
+
+        scores = calculate_confidence_from_shap(shap_values, [0.0], threshold=1.0)
+
+        assert scores.shape == (3,)
+        assert scores[0] == 1.0
+        assert scores[1] == 0.0  # features disagree completely
+        assert scores[2] == 0.0
+
+    def test_invalid_threshold(self):
+        with pytest.raises(ValueError):
+            calculate_confidence_from_shap([0.1], [0.0], threshold=0)
+
+
+class TestShapConfidenceScorer:
+    """Test cases for exact and fast scoring modes."""
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            ShapConfidenceScorer(mode="approximate")
+
+    def test_exact_mode_score_field(self):
+        scorer = ShapConfidenceScorer(
+            explainer=LinearExplainer([1.0, 1.0]),
+            threshold=1.0,
+            feature_names=["form", "rating"],
+        )
+
+        result = scorer.score({"form": 0.5, "rating": 0.5})
+
+        assert result == {"confidence_score": 1.0, "confidence_mode": "exact"}
+
+    def test_fast_mode_requires_fitted_surrogate(self):
+        scorer = ShapConfidenceScorer(mode="fast")
+
+        with pytest.raises(RuntimeError):
+            scorer.score([[0.1, 0.2]])
+
+    def test_fit_surrogate_derives_threshold(self, historical_features):
+        explainer = LinearExplainer([1.0, -0.5, 0.25, 0.0])
+        scorer = ShapConfidenceScorer(explainer=explainer, mode="fast")
+
+        scorer.fit_surrogate(historical_features)
+
+        assert scorer.threshold > 0
+        assert explainer.calls == 1
+        result = scorer.score(historical_features[:1])
+        assert 0.0 <= result["confidence_score"] <= 1.0
+        assert result["confidence_mode"] == "fast"
+
+    def test_calibration_report_against_exact(self, historical_features):
+        explainer = LinearExplainer([1.0, -0.5, 0.25, 0.0])
+        model_output = historical_features @ explainer.coefficients
+        scorer = ShapConfidenceScorer(explainer=explainer, mode="fast")
+        scorer.fit_surrogate(
+            historical_features[:2000], model_output=model_output[:2000]
+        )
+
+        report = scorer.calibration_report(
+            historical_features[2000:], model_output=model_output[2000:]
+        )
+
+        assert report["rows"] == 1000
+        assert report["mean_absolute_error"] < 0.1
+        assert report["correlation"] > 0.8
+        assert sum(b["count"] for b in report["bins"]) == 1000
+        assert report["speedup"] > 0
+
+    def test_surrogate_requires_model_output_when_fitted_with_it(
+        self, historical_features
+    ):
+        scorer = ShapConfidenceScorer(
+            explainer=LinearExplainer([1.0, 1.0, 1.0, 1.0]), mode="fast"
+        )
+        scorer.fit_surrogate(
+            historical_features, model_output=historical_features[:, 0]
+        )
+
+        with pytest.raises(ValueError):
+            scorer.confidence_scores(historical_features[:5])
+
+
+def test_fast_mode_is_faster_than_tree_shap(historical_features):
+    """Fast mode must be at least 10x faster than exact TreeSHAP."""
+    shap = pytest.importorskip("shap")
+    from sklearn.ensemble import GradientBoostingRegressor
+
+    X = historical_features
+    y = X[:, 0] + 0.5 * X[:, 1] * X[:, 2]
+    model = GradientBoostingRegressor(n_estimators=100, max_depth=4).fit(X, y)
+    scorer = ShapConfidenceScorer(
+        explainer=shap.TreeExplainer(model),
+        baseline_values=0.0,
+        mode="fast",
+    )
+    scorer.fit_surrogate(X[:2000], model_output=model.predict(X[:2000]))
+
+    report = scorer.calibration_report(X[2000:], model_output=model.predict(X[2000:]))
+
+    assert report["speedup"] >= 10
+    assert report["correlation"] > 0.5
@@ -6,6 +6,7 @@ import json
 import os
 import sys
 import tempfile
+import threading
 from pathlib import Path
 
 import pytest
@@ -15,6 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "config"))
 
 from app_config import (
     Config,
+    ConfigWatcher,
     config,
     disable_dry_run,  # noqa: E402
     enable_dry_run,
@@ -212,6 +214,202 @@ class TestConfig:
         assert "DEBUG=" in config_str
 
 
+class TestConfigSnapshot:
+    """Test suite for immutable configuration snapshots."""
+
+    def test_snapshot_has_typed_attributes(self):
+        """Test that snapshot values mirror config values with attribute access."""
+        test_config = Config()
+        snapshot = test_config.snapshot()
+
+        assert snapshot.min_odds == test_config.get("MIN_ODDS")
+        assert snapshot.max_odds == test_config.get("MAX_ODDS")
+        assert snapshot.kelly_fraction == test_config.get("KELLY_FRACTION")
+        assert snapshot.get("MIN_ODDS") == snapshot.min_odds
+        assert snapshot.alert_webhook_url is None
+
+    def test_snapshot_is_frozen(self):
+        """Test that snapshots cannot be modified."""
+        snapshot = Config().snapshot()
+
+        with pytest.raises(AttributeError):
+            snapshot.min_odds = 5.0
+        with pytest.raises(TypeError):
+            snapshot.extra["NEW_KEY"] = 1
+
+    def test_snapshot_unaffected_by_later_set(self):
+        """Test that a snapshot keeps its values and versions advance on set."""
+        test_config = Config()
+        snapshot = test_config.snapshot()
+
+        assert test_config.snapshot() is snapshot
+        test_config.set("MIN_ODDS", 2)
+        updated = test_config.snapshot()
+
+        assert snapshot.min_odds == 1.1
+        assert updated.min_odds == 2.0
+        assert isinstance(updated.min_odds, float)
+        assert updated.version == snapshot.version + 1
+
+    def test_snapshot_keeps_unknown_keys(self):
+        """Test that keys without a typed field are available via extra."""
+        test_config = Config()
+        test_config.set("CUSTOM_SETTING", "value")
+
+        snapshot = test_config.snapshot()
+
+        assert snapshot.extra["CUSTOM_SETTING"] == "value"
+        assert snapshot.get("CUSTOM_SETTING") == "value"
+
+    def test_snapshot_validates_values(self):
+        """Test that invalid values are rejected when taking a snapshot."""
+        test_config = Config()
+
+        test_config.set("MIN_ODDS", 20.0)
+        with pytest.raises(ValueError):
+            test_config.snapshot()
+
+        test_config.set("MIN_ODDS", "1.5")
+        with pytest.raises(TypeError):
+            test_config.snapshot()
+
+
+class TestConfigReload:
+    """Test suite for hot-reloading configuration from file."""
+
+    @staticmethod
+    def write_config(path, values):
+        with open(path, "w") as f:
+            json.dump(values, f)
+
+    def test_reload_swaps_values_and_notifies(self, tmp_path):
+        """Test that reload applies file changes and calls subscribers."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {"KELLY_FRACTION": 0.25})
+        test_config = Config(str(config_file))
+        notifications = []
+        test_config.subscribe(lambda old, new: notifications.append((old, new)))
+
+        self.write_config(config_file, {"KELLY_FRACTION": 0.1})
+        snapshot = test_config.reload()
+
+        assert test_config.get("KELLY_FRACTION") == 0.1
+        assert test_config.snapshot() is snapshot
+        assert len(notifications) == 1
+        old, new = notifications[0]
+        assert old.kelly_fraction == 0.25
+        assert new.kelly_fraction == 0.1
+        assert new.version > old.version
+
+    def test_invalid_reload_keeps_current_config(self, tmp_path):
+        """Test that a file failing validation is not applied."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {"MAX_DAILY_STAKE": 500.0})
+        test_config = Config(str(config_file))
+        version = test_config.version
+
+        self.write_config(config_file, {"MAX_DAILY_STAKE": 800.0, "KELLY_FRACTION": 3})
+        with pytest.raises(ValueError):
+            test_config.reload()
+
+        assert test_config.get("MAX_DAILY_STAKE") == 500.0
+        assert test_config.version == version
+
+    def test_reload_keeps_runtime_overrides(self, tmp_path):
+        """Test that values set at runtime, such as DRY_RUN, survive a reload."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {"DRY_RUN": False, "KELLY_FRACTION": 0.25})
+        test_config = Config(str(config_file))
+        test_config.set("DRY_RUN", True)
+
+        self.write_config(config_file, {"DRY_RUN": False, "KELLY_FRACTION": 0.1})
+        snapshot = test_config.reload()
+
+        assert test_config.dry_run is True and snapshot.dry_run is True
+        assert snapshot.kelly_fraction == 0.1
+
+        test_config.clear_override("DRY_RUN")
+        assert test_config.reload().dry_run is False
+
+    def test_unsubscribe_and_failing_subscriber(self, tmp_path):
+        """Test that failing subscribers are isolated and unsubscribe works."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {})
+        test_config = Config(str(config_file))
+        calls = []
+
+        def failing(old, new):
+            raise RuntimeError("subscriber error")
+
+        test_config.subscribe(failing)
+        unsubscribe = test_config.subscribe(lambda old, new: calls.append(new))
+        test_config.reload()
+        unsubscribe()
+        test_config.reload()
+
+        assert len(calls) == 1
+
+    def test_watcher_reloads_on_change(self, tmp_path):
+        """Test that the watcher picks up file edits in the background."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {"MAX_DAILY_STAKE": 500.0})
+        test_config = Config(str(config_file))
+        reloaded = threading.Event()
+        test_config.subscribe(lambda old, new: reloaded.set())
+
+        with test_config.watch(interval=0.01) as watcher:
+            self.write_config(config_file, {"MAX_DAILY_STAKE": 750.0})
+            assert reloaded.wait(5)
+
+        assert test_config.snapshot().max_daily_stake == 750.0
+        assert watcher.reload_count == 1
+
+    def test_watcher_ignores_bad_file(self, tmp_path):
+        """Test that unparseable files are logged and skipped."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {"MAX_DAILY_STAKE": 500.0})
+        test_config = Config(str(config_file))
+        watcher = ConfigWatcher(test_config)
+
+        config_file.write_text("{not json")
+        assert watcher.check() is False
+        assert watcher.check() is False  # unchanged file is not re-parsed
+
+        assert watcher.error_count == 1
+        assert test_config.get("MAX_DAILY_STAKE") == 500.0
+
+    def test_watcher_requires_config_file(self):
+        """Test that a watcher cannot be created without a file."""
+        with pytest.raises(ValueError):
+            ConfigWatcher(Config())
+
+    def test_readers_never_see_torn_snapshot(self, tmp_path):
+        """Test that concurrent readers always see a consistent pair of values."""
+        config_file = tmp_path / "config.json"
+        self.write_config(config_file, {"MIN_ODDS": 1.1, "MAX_ODDS": 10.0})
+        test_config = Config(str(config_file))
+        stop = threading.Event()
+        seen = set()
+
+        def reader():
+            while not stop.is_set():
+                snapshot = test_config.snapshot()
+                seen.add((snapshot.min_odds, snapshot.max_odds))
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        try:
+            for i in range(20):
+                pair = {"MIN_ODDS": 1.5, "MAX_ODDS": 5.0} if i % 2 else {}
+                self.write_config(config_file, pair)
+                test_config.reload()
+        finally:
+            stop.set()
+            thread.join()
+
+        assert seen <= {(1.1, 10.0), (1.5, 5.0)}
+
+
 class TestDryRunIntegration:
     """Integration tests for DRY_RUN mode functionality."""
 
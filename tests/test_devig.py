@@ -0,0 +1,139 @@
+"""
+Tests for batched overround removal.
+"""
+
+import time
+
+import numpy as np
+import pytest
+from scipy.optimize import brentq
+
+from src.core_engine.devig import (
+    DEVIG_METHODS,
+    devig_markets,
+    overround,
+    pack_markets,
+    remove_overround,
+)
+
+
+def reference_power(odds):
+    q = 1 / np.asarray(odds)
+    k = brentq(lambda k: np.sum(q**k) - 1, 1e-6, 50)
+    return q**k
+
+
+def reference_shin(odds):
+    q = 1 / np.asarray(odds)
+    booksum = q.sum()
+
+    def probabilities(z):
+        return (np.sqrt(z**2 + 4 * (1 - z) * q**2 / booksum) - z) / (2 * (1 - z))
+
+    z = brentq(lambda z: probabilities(z).sum() - 1, 0, 0.999)
+    return probabilities(z)
+
+
+@pytest.fixture
+def mixed_markets():
+    """Two-way, three-way and 10-20 runner markets with realistic margins."""
+    rng = np.random.default_rng(2)
+    markets = []
+    for size in [2, 3, 3, 10, 14, 20] * 20:
+        true = rng.dirichlet(np.full(size, 2.0))
+        margin = rng.uniform(1.02, 1.25)
+        markets.append((1 / (true * margin)).round(3).clip(1.01).tolist())
+    return markets
+
+
+@pytest.mark.parametrize("method", DEVIG_METHODS)
+def test_each_market_sums_to_one(method, mixed_markets):
+    odds, offsets = pack_markets(mixed_markets)
+
+    probabilities = remove_overround(odds, offsets, method=method)
+
+    sums = np.add.reduceat(probabilities, offsets[:-1])
+    np.testing.assert_allclose(sums, 1.0, atol=1e-10)
+
+
+def test_simple_methods():
+    odds = [2.5, 3.2, 2.8]
+    q = 1 / np.array(odds)
+
+    np.testing.assert_allclose(
+        remove_overround(odds, method="multiplicative"), q / q.sum()
+    )
+    np.testing.assert_allclose(
+        remove_overround(odds, method="additive"), q - (q.sum() - 1) / 3
+    )
+
+
+@pytest.mark.parametrize(
+    "method,reference", [("power", reference_power), ("shin", reference_shin)]
+)
+def test_newton_matches_per_market_root_finding(method, reference, mixed_markets):
+    odds, offsets = pack_markets(mixed_markets)
+
+    probabilities = remove_overround(odds, offsets, method=method)
+
+    expected = np.concatenate([reference(market) for market in mixed_markets])
+    np.testing.assert_allclose(probabilities, expected, atol=1e-9)
+
+
+def test_favourite_longshot_adjustment():
+    """Power and Shin take more margin off long shots than multiplicative."""
+    odds = [1.4, 3.8, 11.0]
+    multiplicative = remove_overround(odds, method="multiplicative")
+
+    for method in ("power", "shin"):
+        adjusted = remove_overround(odds, method=method)
+        assert adjusted[0] > multiplicative[0]
+        assert adjusted[2] < multiplicative[2]
+
+
+def test_sample_matches_closing_odds(sample_match_data):
+    markets = [match["closing_odds"] for match in sample_match_data]
+
+    results = devig_markets(markets, method="shin")
+
+    for market, fair in zip(markets, results):
+        assert list(fair) == list(market)
+        assert sum(fair.values()) == pytest.approx(1.0)
+        assert overround([market[k] for k in market])[0] > 0
+
+
+def test_shin_underround_falls_back_to_normalising():
+    odds = [2.1, 2.1]
+
+    np.testing.assert_allclose(remove_overround(odds, method="shin"), [0.5, 0.5])
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        remove_overround([2.0, 2.0], method="logit")
+    with pytest.raises(ValueError):
+        remove_overround([1.0, 3.0])
+    with pytest.raises(ValueError):
+        remove_overround([2.0, 2.0, 2.0], offsets=[0, 1, 3])
+
+
+def test_batch_newton_throughput():
+    """100k markets of mixed sizes should de-vig in well under a second."""
+    rng = np.random.default_rng(0)
+    sizes = rng.choice([2, 3, 12], size=100_000)
+    offsets = np.r_[0, np.cumsum(sizes)]
+    odds = rng.uniform(1.2, 30.0, size=offsets[-1])
+    market = np.repeat(np.arange(len(sizes)), sizes)
+    # Scale each market to a 5-15% overround
+    q = 1 / odds
+    booksum = np.bincount(market, weights=q)
+    target = rng.uniform(1.05, 1.15, size=len(sizes))
+    odds = odds * (booksum / target)[market]
+    odds = np.maximum(odds, 1.001)
+
+    start = time.perf_counter()
+    for method in ("power", "shin"):
+        remove_overround(odds, offsets, method=method)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 2.0
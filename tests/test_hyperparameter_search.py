@@ -0,0 +1,121 @@
+"""
+Tests for parallel successive-halving hyperparameter search.
+"""
+
+import os
+import time
+
+import pytest
+
+from src.core_engine.hyperparameter_search import successive_halving
+
+CANDIDATES = [{"x": x} for x in range(9)]
+
+
+def quadratic_trial(shared_data, params, budget, thread_count):
+    """Score peaks at x == target; burns a little CPU proportional to budget."""
+    deadline = time.process_time() + budget / 1e5
+    while time.process_time() < deadline:
+        pass
+    score = -((params["x"] - shared_data["target"]) ** 2) + budget / 1e6
+    output = {
+        "x": params["x"],
+        "budget": budget,
+        "pid": os.getpid(),
+        "omp_threads": os.environ.get("OMP_NUM_THREADS"),
+        "thread_count": thread_count,
+    }
+    return output, score
+
+
+def failing_trial(shared_data, params, budget, thread_count):
+    if params["x"] % 2:
+        raise ValueError("bad configuration")
+    return {"x": params["x"]}, float(params["x"])
+
+
+def always_failing_trial(shared_data, params, budget, thread_count):
+    raise ValueError("bad configuration")
+
+
+def test_successive_halving_schedule():
+    result = successive_halving(
+        quadratic_trial,
+        CANDIDATES,
+        shared_data={"target": 5},
+        min_budget=100,
+        max_budget=900,
+        eta=3,
+        max_workers=1,
+    )
+
+    budgets = [t["budget"] for t in result["trials"]]
+    assert budgets.count(100) == 9
+    assert budgets.count(300) == 3
+    assert budgets.count(900) == 1
+    assert result["rungs"] == 3
+    assert result["best"]["params"] == {"x": 5}
+    assert result["best"]["output"]["budget"] == 900
+    eliminated = [t for t in result["trials"] if t is not result["best"]]
+    assert all(t["output"] is None for t in eliminated)
+
+
+def test_trials_record_wall_and_cpu_time():
+    result = successive_halving(
+        quadratic_trial,
+        CANDIDATES[:3],
+        shared_data={"target": 1},
+        min_budget=1000,
+        max_budget=1000,
+        max_workers=1,
+    )
+
+    for trial in result["trials"]:
+        assert trial["cpu_seconds"] >= 0.005
+        assert trial["wall_seconds"] >= trial["cpu_seconds"] * 0.5
+
+
+def test_process_pool_caps_trial_threads():
+    parent_omp = os.environ.get("OMP_NUM_THREADS")
+
+    result = successive_halving(
+        quadratic_trial,
+        CANDIDATES,
+        shared_data={"target": 2},
+        min_budget=100,
+        max_budget=100,
+        max_workers=2,
+        threads_per_trial=2,
+    )
+
+    best = result["best"]
+    assert best["params"] == {"x": 2}
+    assert best["output"]["pid"] != os.getpid()
+    assert best["output"]["omp_threads"] == "2"
+    assert best["output"]["thread_count"] == 2
+    assert os.environ.get("OMP_NUM_THREADS") == parent_omp
+
+
+def test_failed_trials_are_eliminated():
+    result = successive_halving(
+        failing_trial, CANDIDATES, min_budget=1, max_budget=9, max_workers=1
+    )
+
+    assert result["best"]["params"] == {"x": 8}
+    failed = [t for t in result["trials"] if t["error"]]
+    assert len(failed) == 4
+    assert all(t["rung"] == 0 for t in failed)
+
+
+def test_all_failed_raises():
+    with pytest.raises(RuntimeError):
+        successive_halving(always_failing_trial, CANDIDATES[:2], max_workers=1)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        successive_halving(quadratic_trial, [])
+    with pytest.raises(ValueError):
+        successive_halving(quadratic_trial, CANDIDATES, eta=1)
+    with pytest.raises(ValueError):
+        successive_halving(quadratic_trial, CANDIDATES, min_budget=10, max_budget=5)
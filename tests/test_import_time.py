@@ -0,0 +1,112 @@
+"""
+Import-time budget for CLI entry points and lazy module proxies.
+
+Runs entry points under `python -X importtime` and fails if startup pulls
+in a heavy dependency or exceeds the time budget.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.core_engine.lazy_import import LazyModule, lazy_import
+
+REPO_ROOT = Path(__file__).parent.parent
+
+# Cumulative import time allowed for a short CLI run, in microseconds
+STARTUP_BUDGET_US = 500_000
+
+HEAVY_MODULES = (
+    "tensorflow",
+    "catboost",
+    "shap",
+    "sklearn",
+    "pandas",
+    "google.cloud.bigquery",
+)
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into {module: (cumulative_us, depth)}."""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings[name.strip()] = (int(cumulative_us), depth)
+    return timings
+
+
+def run_with_importtime(*args):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    return result, parse_importtime(result.stderr)
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["retrain_models.py", "--help"],
+        ["retrain_models.py", "--validate-config"],
+    ],
+)
+def test_cli_startup_within_budget(args):
+    result, timings = run_with_importtime(*args)
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    loaded_heavy = [m for m in HEAVY_MODULES if m in timings]
+    assert loaded_heavy == []
+    top_level = {
+        name: cumulative for name, (cumulative, depth) in timings.items() if depth == 0
+    }
+    slowest = sorted(top_level.items(), key=lambda item: -item[1])[:5]
+    assert sum(top_level.values()) < STARTUP_BUDGET_US, slowest
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "src.core_engine.confidence",
+        "src.models.player_disposals_lstm_model",
+        "src.models.player_tries_nb_model",
+    ],
+)
+def test_model_modules_defer_heavy_imports(module):
+    result, timings = run_with_importtime("-c", f"import {module}")
+
+    assert result.returncode == 0, result.stderr[-2000:]
+    assert module in timings
+    assert [m for m in HEAVY_MODULES if m in timings] == []
+
+
+def test_lazy_module_imports_on_first_access():
+    proxy = LazyModule("json")
+
+    assert not proxy.is_loaded
+    assert proxy.dumps({"a": 1}) == '{"a": 1}'
+    assert proxy.is_loaded
+    assert "json" in repr(proxy)
+
+
+def test_lazy_import_returns_loaded_module():
+    import json
+
+    assert lazy_import("json") is json
+    assert isinstance(lazy_import("multibet_missing_module"), LazyModule)
+
+
+def test_missing_module_fails_on_use():
+    proxy = lazy_import("multibet_missing_module")
+
+    with pytest.raises(ImportError):
+        proxy.anything
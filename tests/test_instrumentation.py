@@ -0,0 +1,160 @@
+"""
+Tests for hot-path instrumentation.
+"""
+
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+import pytest
+
+from config.app_config import Config
+from src.core_engine.instrumentation import (
+    N_BUCKETS,
+    Histogram,
+    Instrumentation,
+    MetricsServer,
+    bucket_bounds,
+    bucket_index,
+)
+
+
+def test_bucket_bounds_contain_values():
+    """Test that every value falls inside its bucket and buckets are narrow."""
+    rng = np.random.default_rng(0)
+    values = list(range(300)) + rng.integers(0, 2**45, 5000).tolist()
+    for value in values:
+        index = bucket_index(value)
+        low, high = bucket_bounds(index)
+        assert low <= value <= high
+        assert high - low <= max(1, value) / 64
+    assert bucket_index(2**60) == N_BUCKETS - 1
+
+
+def test_quantiles_match_numpy():
+    """Test histogram quantiles against exact quantiles."""
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(11, 1.0, 20_000).astype(int)
+    histogram = Histogram()
+    for value in values.tolist():
+        histogram.record(value)
+
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(values, q)
+        assert histogram.quantile(q) == pytest.approx(exact, rel=0.03)
+    assert histogram.summary()["count"] == 20_000
+    assert histogram.summary()["max"] == values.max()
+
+
+def test_threads_record_without_losing_samples():
+    """Test lock-free per-thread recording merges every sample."""
+    metrics = Instrumentation()
+
+    def worker():
+        for i in range(5000):
+            metrics.record("predict", 1000 + i)
+            metrics.count("bets")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.histograms()["predict"].total == 40_000
+    assert metrics.counters() == {"bets": 40_000}
+
+
+def test_exited_threads_are_folded_into_totals():
+    """Test that state of finished threads is retired without losing samples."""
+    metrics = Instrumentation()
+    metrics.record("predict", 500)
+
+    def worker():
+        metrics.record("predict", 1000)
+        metrics.count("bets")
+
+    for _ in range(20):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    assert metrics.histograms()["predict"].total == 21
+    assert len(metrics._threads) == 1  # only this thread is still registered
+    assert metrics.counters() == {"bets": 20}
+    assert metrics.histograms()["predict"].total == 21
+    metrics.record("predict", 500)
+    assert metrics.report()["predict"]["count"] == 22
+
+
+def test_disabled_is_a_no_op():
+    metrics = Instrumentation(enabled=False)
+    with metrics.timer("predict"):
+        pass
+    metrics.record("predict", 10)
+    metrics.count("bets")
+    assert metrics.histograms() == {}
+    assert metrics.counters() == {}
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        with metrics.timer("predict"):
+            pass
+    assert (time.perf_counter() - start) / 100_000 < 5e-6
+
+
+def test_timer_and_interval_reports():
+    """Test that reports cover only samples since the previous report."""
+    metrics = Instrumentation()
+    with metrics.timer("stake"):
+        time.sleep(0.01)
+    first = metrics.report()
+    assert first["stake"]["count"] == 1
+    assert first["stake"]["p50"] >= 10.0  # milliseconds
+
+    for _ in range(3):
+        metrics.record("stake", 2_000_000)
+    second = metrics.report()
+    assert second["stake"]["count"] == 3
+    assert second["stake"]["p99"] == pytest.approx(2.0, rel=0.02)
+    assert metrics.report() == {}
+
+
+def test_from_config():
+    config = Config()
+    config.set("MONITORING_ENABLED", False)
+    config.set("PERFORMANCE_LOG_INTERVAL", 60)
+    metrics = Instrumentation.from_config(config)
+    assert not metrics.enabled
+    assert metrics.report_interval == 60.0
+
+
+def test_scrape_prometheus_and_json():
+    """Test that a local scraper can read both export formats."""
+    metrics = Instrumentation()
+    for value in (1_000_000, 2_000_000, 3_000_000):
+        metrics.record("predict", value)
+    metrics.count("bets_placed", 2)
+
+    with MetricsServer(metrics) as server:
+        base = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(f"{base}/metrics") as response:
+            text = response.read().decode()
+        with urllib.request.urlopen(f"{base}/metrics.json") as response:
+            payload = json.load(response)
+
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    assert samples['multibet_stage_latency_seconds_count{stage="predict"}'] == 3
+    assert samples['multibet_stage_latency_seconds_sum{stage="predict"}'] == 0.006
+    median = samples['multibet_stage_latency_seconds{stage="predict",quantile="0.5"}']
+    assert median == pytest.approx(0.002, rel=0.02)
+    assert samples["multibet_bets_placed_total"] == 2
+
+    assert payload["stages"]["predict"]["count"] == 3
+    assert payload["counters"] == {"bets_placed": 2}
@@ -0,0 +1,171 @@
+"""
+Tests for the memory-mapped bet ledger.
+"""
+
+import time
+from datetime import date
+
+import numpy as np
+import pytest
+
+from config.app_config import Config
+from src.core_engine.ledger import BetLedger
+
+DAY = 86400.0
+T0 = 1_700_000_000.0  # 2023-11-14 22:13:20 UTC
+
+
+@pytest.fixture
+def app_config():
+    config = Config()
+    config.set("MAX_DAILY_STAKE", 500.0)
+    config.set("MAX_EXPOSURE_PER_MATCH", 200.0)
+    return config
+
+
+@pytest.fixture
+def ledger(tmp_path, app_config):
+    return BetLedger(tmp_path / "ledger", segment_rows=3, app_config=app_config)
+
+
+def test_roi_matches_simulation_fixture(ledger, betting_simulation_data):
+    """Test ROI and profit against the betting simulation fixture."""
+    for i, bet in enumerate(betting_simulation_data["bet_history"]):
+        bet_id = ledger.append(f"m{i}", bet["stake"], bet["odds"], "v1", T0 + i)
+        ledger.settle(bet_id, bet["result"])
+
+    roi = ledger.roi()
+    bankroll = betting_simulation_data["initial_bankroll"]
+    assert roi["settled_bets"] == 4
+    assert roi["profit"] == pytest.approx(
+        betting_simulation_data["expected_final_bankroll"] - bankroll
+    )
+    assert roi["roi"] == pytest.approx(190 / 630)
+
+
+def test_clv(ledger, clv_test_data):
+    """Test per-bet CLV against the CLV fixture."""
+    for case in clv_test_data:
+        ledger.append("m", 10.0, case["bet_odds"], "v1", T0, case["closing_odds"])
+    ledger.append("m", 10.0, 2.0, "v1", T0)  # closing odds not known yet
+
+    values = ledger.clv_values()
+    expected = [case["expected_clv"] for case in clv_test_data]
+    np.testing.assert_allclose(values, expected, atol=5e-4)
+    assert ledger.clv()["bets"] == 3
+    assert ledger.clv()["clv_positive_rate"] == pytest.approx(2 / 3)
+
+
+def test_exposure_and_limits(ledger):
+    """Test running exposure counters and stake-limit checks."""
+    first = ledger.append("m1", 150.0, 2.0, "v1", T0)
+    ledger.append("m2", 100.0, 2.0, "v1", T0 + 1)
+    ledger.append("m1", 100.0, 3.0, "v2", T0 + DAY)
+
+    assert ledger.open_exposure("m1") == 250.0
+    assert ledger.daily_stake(T0) == 250.0
+    assert ledger.daily_stake(date(2023, 11, 15)) == 100.0
+    assert ledger.exposure_by_match() == {"m1": 250.0, "m2": 100.0}
+    assert ledger.exposure_by_day() == {"2023-11-14": 250.0, "2023-11-15": 100.0}
+
+    assert ledger.check_limits("m2", 100.0, T0) == []
+    assert ledger.check_limits("m1", 10.0, T0) == ["MAX_EXPOSURE_PER_MATCH"]
+    assert ledger.check_limits("m3", 300.0, T0) == [
+        "MAX_DAILY_STAKE",
+        "MAX_EXPOSURE_PER_MATCH",
+    ]
+
+    ledger.settle(first, "loss", closing_odds=1.9)
+    assert ledger.open_exposure("m1") == 100.0
+    assert ledger.exposure_by_match(open_only=False) == {"m1": 250.0, "m2": 100.0}
+    with pytest.raises(ValueError):
+        ledger.settle(first, "win")
+
+
+def test_reopen_restores_rows_and_counters(tmp_path, app_config):
+    """Test that a reopened ledger sees every segment and rebuilds counters."""
+    path = tmp_path / "ledger"
+    ledger = BetLedger(path, segment_rows=2, app_config=app_config)
+    for i in range(5):
+        ledger.append(f"m{i % 2}", 10.0 + i, 2.0, "v1", T0 + i)
+    ledger.settle(0, "win")
+    ledger.flush()
+
+    reopened = BetLedger(path, segment_rows=1000, app_config=app_config)
+    assert len(reopened) == 5
+    assert reopened.segment_rows == 2
+    assert reopened.open_exposure("m0") == 12.0 + 14.0
+    assert reopened.daily_stake(T0) == sum(10.0 + i for i in range(5))
+    assert list(reopened.decode("match_id", reopened.column("match_id"))) == [
+        "m0",
+        "m1",
+        "m0",
+        "m1",
+        "m0",
+    ]
+    assert reopened.append("m9", 1.0, 2.0, "v2", T0) == 5
+
+
+def test_append_many_matches_append(tmp_path, app_config):
+    """Test that bulk appends across segments match single appends."""
+    rng = np.random.default_rng(0)
+    n = 10
+    matches = [f"m{i}" for i in rng.integers(0, 3, n)]
+    stakes = rng.uniform(1, 10, n)
+    odds = rng.uniform(1.5, 4, n)
+    placed = T0 + rng.uniform(0, 3 * DAY, n)
+
+    single = BetLedger(tmp_path / "a", segment_rows=4, app_config=app_config)
+    for i in range(n):
+        single.append(matches[i], stakes[i], odds[i], "v1", placed[i])
+    bulk = BetLedger(tmp_path / "b", segment_rows=4, app_config=app_config)
+    bulk.append_many(matches, stakes, odds, ["v1"] * n, placed)
+
+    assert len(bulk) == n
+    for name in ("placed_at", "stake", "odds"):
+        np.testing.assert_array_equal(bulk.column(name), single.column(name))
+    assert bulk.exposure_by_day() == pytest.approx(single.exposure_by_day())
+    for match in set(matches):
+        assert bulk.open_exposure(match) == pytest.approx(single.open_exposure(match))
+
+
+def test_invalid_bets(ledger):
+    with pytest.raises(ValueError):
+        ledger.append("m1", 0.0, 2.0, "v1", T0)
+    with pytest.raises(ValueError):
+        ledger.append("m1", 10.0, 1.0, "v1", T0)
+    with pytest.raises(KeyError):
+        ledger.settle(0, "win")
+    ledger.append("m1", 10.0, 2.0, "v1", T0)
+    with pytest.raises(ValueError):
+        ledger.settle(0, "half-win")
+
+
+def test_aggregation_performance(tmp_path, app_config):
+    """Test that a million-bet ledger aggregates in well under a second."""
+    n = 1_000_000
+    rng = np.random.default_rng(1)
+    ledger = BetLedger(tmp_path / "ledger", app_config=app_config)
+    odds = rng.uniform(1.5, 5.0, n)
+    ledger.append_many(
+        rng.integers(0, 5000, n),
+        rng.uniform(1, 50, n),
+        odds,
+        np.where(rng.random(n) < 0.5, "v1", "v2"),
+        T0 + rng.uniform(0, 365 * DAY, n),
+        closing_odds=odds * rng.uniform(0.9, 1.1, n),
+    )
+
+    start = time.perf_counter()
+    ledger.roi()
+    ledger.clv("v1")
+    ledger.exposure_by_match()
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(10_000):
+        ledger.check_limits(17, 10.0, T0)
+    check_seconds = (time.perf_counter() - start) / 10_000
+
+    assert elapsed < 1.0
+    assert check_seconds < 50e-6
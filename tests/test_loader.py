@@ -0,0 +1,164 @@
+"""Tests for the batched online/offline store loader."""
+
+import asyncio
+import json
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from benchmarks.dual_store_loader import LocalBigQuery, run_benchmark
+from src.core_engine.resilience import Resilience, RetryPolicy
+from src.data_pipelines.loader import BackpressureError, DataLoader
+from src.data_pipelines.synthetic import SyntheticDataGenerator
+
+TABLE = "multibet.unified_data"
+
+
+def no_retry():
+    return Resilience(policy=RetryPolicy(max_attempts=1), failure_threshold=1000)
+
+
+@pytest.fixture
+def events():
+    return list(SyntheticDataGenerator(seed=0).sports_events(250))
+
+
+def test_flushes_full_batches_to_both_stores(events):
+    redis_client, bigquery = fakeredis.FakeRedis(), LocalBigQuery(call_latency=0)
+    loader = DataLoader(redis_client, bigquery, batch_size=100, flush_interval=60)
+
+    loader.load_many(events[:200])
+    assert loader.flush(timeout=5)
+    assert bigquery.calls == 2
+    assert redis_client.dbsize() == 200
+    stored = json.loads(redis_client.get(f"live_data:{events[0].event_id}"))
+    assert stored["event_id"] == events[0].event_id
+    assert 0 < redis_client.ttl(f"live_data:{events[0].event_id}") <= 3600
+
+    report = loader.close(timeout=5)
+    assert report["offline"]["delivered"] == report["online"]["delivered"] == 200
+    assert bigquery.tables[TABLE][0]["markets"][0]["market_key"] == "h2h"
+
+
+def test_partial_batches_flush_after_the_interval(events):
+    bigquery = LocalBigQuery(call_latency=0)
+    loader = DataLoader(None, bigquery, batch_size=100, flush_interval=0.05)
+
+    loader.load(events[0])
+    deadline = time.monotonic() + 5
+    while not bigquery.calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(bigquery.tables[TABLE]) == 1
+    loader.close(timeout=5)
+
+
+class FlakyBigQuery(LocalBigQuery):
+    """Rejects the first `failures` insert calls."""
+
+    def __init__(self, failures):
+        super().__init__(call_latency=0)
+        self.failures = failures
+
+    def insert_rows_json(self, table, rows, row_ids=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("offline store unavailable")
+        return super().insert_rows_json(table, rows, row_ids)
+
+
+def test_offline_failures_are_redelivered_without_delaying_online(events):
+    redis_client, bigquery = fakeredis.FakeRedis(), FlakyBigQuery(failures=3)
+    loader = DataLoader(
+        redis_client,
+        bigquery,
+        batch_size=50,
+        flush_interval=0.01,
+        resilience=no_retry(),
+    )
+    loader.load_many(events)
+
+    deadline = time.monotonic() + 5
+    while redis_client.dbsize() < len(events) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert redis_client.dbsize() == len(events)
+
+    report = loader.close(timeout=10)
+    assert report["offline"]["failed_batches"] == 3
+    assert report["offline"]["pending"] == 0
+    ids = [row["event_id"] for row in bigquery.tables[TABLE]]
+    assert sorted(ids) == sorted(event.event_id for event in events)
+
+
+def test_row_ids_differ_across_snapshots_but_not_retries(events):
+    sent = []
+
+    class RecordingBigQuery(FlakyBigQuery):
+        def insert_rows_json(self, table, rows, row_ids=None):
+            sent.append(list(row_ids))
+            return super().insert_rows_json(table, rows, row_ids)
+
+    loader = DataLoader(
+        None,
+        RecordingBigQuery(failures=1),
+        batch_size=2,
+        flush_interval=0.01,
+        resilience=no_retry(),
+    )
+    later = events[0].model_copy(deep=True)
+    later.markets[0].outcomes[0].price += 0.1
+    loader.load_many([events[0], later])
+    loader.close(timeout=5)
+
+    failed, delivered = sent
+    assert failed == delivered  # the retried batch keeps its ids
+    first, second = delivered
+    assert first != second
+    assert first.startswith(events[0].event_id) and second.startswith(
+        events[0].event_id
+    )
+
+
+def test_backpressure_blocks_then_raises(events):
+    release = threading.Event()
+
+    class StalledBigQuery(LocalBigQuery):
+        def insert_rows_json(self, table, rows, row_ids=None):
+            release.wait(5)
+            return super().insert_rows_json(table, rows, row_ids)
+
+    redis_client = fakeredis.FakeRedis()
+    loader = DataLoader(
+        redis_client,
+        StalledBigQuery(call_latency=0),
+        batch_size=10,
+        flush_interval=0.01,
+        max_pending=20,
+    )
+    loader.load_many(events[:20])
+    with pytest.raises(BackpressureError) as raised:
+        loader.load(events[20], timeout=0.05)
+    # Only the offline store is full; the online store took the record.
+    assert raised.value.stores == ("offline",)
+    assert loader.delivery_report()["online"]["accepted"] == 21
+
+    async def scenario():
+        waiting = asyncio.ensure_future(loader.load_to_stores(events[21]))
+        await asyncio.sleep(0.05)
+        assert redis_client.exists(f"live_data:{events[21].event_id}")
+        assert not waiting.done()
+        release.set()
+        await waiting
+
+    asyncio.run(scenario())
+    report = loader.close(timeout=5)
+    # events[20] was never retried offline; events[21] went online once.
+    assert report["offline"]["delivered"] == 21
+    assert report["online"]["accepted"] == 22
+
+
+def test_benchmark_batching_beats_per_record_writes():
+    result = run_benchmark(n_records=300, batch_size=100)
+    assert result["offline_calls"] == 3
+    assert result["speedup"] > 5
@@ -0,0 +1,101 @@
+"""
+Tests for the statistical champion/challenger comparison.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.core_engine.model_comparison import (
+    compare_models,
+    paired_bootstrap,
+    paired_permutation_test,
+)
+
+
+def test_detects_consistent_improvement():
+    """Test that a small consistent CLV gain is significant."""
+    rng = np.random.default_rng(1)
+    production = rng.normal(0.0, 0.05, 5000)
+    candidate = production + rng.normal(0.005, 0.02, 5000)
+
+    result = compare_models(production, candidate, seed=2)
+
+    assert result["significant"]
+    assert result["ci_low"] > 0
+    assert result["ci_low"] < result["mean_difference"] < result["ci_high"]
+    assert result["permutation_p_value"] < 0.05
+    assert result["n_bets"] == 5000
+
+
+def test_identical_models_not_significant():
+    """Test that equal-performing models are not declared different."""
+    rng = np.random.default_rng(3)
+    production = rng.normal(0.0, 0.05, 5000)
+    candidate = production + rng.normal(0.0, 0.02, 5000)
+
+    result = compare_models(production, candidate, seed=4)
+
+    assert not result["significant"]
+    assert result["ci_low"] < 0 < result["ci_high"]
+
+
+def test_min_improvement_required():
+    """Test that a significant gain below min_improvement is rejected."""
+    rng = np.random.default_rng(5)
+    production = rng.normal(0.0, 0.05, 5000)
+    candidate = production + 0.005
+
+    assert compare_models(production, candidate, seed=6)["significant"]
+    assert not compare_models(production, candidate, min_improvement=0.01, seed=6)[
+        "significant"
+    ]
+
+
+def test_bootstrap_matches_standard_error():
+    """Test that the bootstrap spread matches the analytic standard error."""
+    rng = np.random.default_rng(7)
+    diff = rng.normal(0.01, 0.1, 10_000)
+
+    means = paired_bootstrap(diff, n_resamples=2000, seed=8)
+
+    standard_error = diff.std() / np.sqrt(len(diff))
+    assert means.mean() == pytest.approx(diff.mean(), abs=standard_error / 5)
+    assert means.std() == pytest.approx(standard_error, rel=0.1)
+
+
+def test_permutation_null_rejection_rate():
+    """Test that the sign-flip test holds its level under the null."""
+    rng = np.random.default_rng(9)
+    p_values = [
+        paired_permutation_test(rng.normal(0.0, 1.0, 200), n_resamples=200, seed=i)
+        for i in range(200)
+    ]
+    assert 0.01 < np.mean(np.array(p_values) < 0.05) < 0.1
+
+
+def test_invalid_inputs():
+    """Test input validation."""
+    with pytest.raises(ValueError):
+        compare_models([0.1, 0.2], [0.1, 0.2, 0.3])
+    with pytest.raises(ValueError):
+        compare_models([0.1], [0.2])
+    with pytest.raises(ValueError):
+        compare_models([0.1, np.nan], [0.2, 0.3])
+    with pytest.raises(ValueError):
+        compare_models([0.1, 0.2], [0.2, 0.3], alpha=0.5)
+
+
+def test_million_bets_performance():
+    """Test that a million paired bets are compared in seconds."""
+    rng = np.random.default_rng(10)
+    production = rng.normal(0.0, 0.05, 1_000_000)
+    candidate = production + rng.normal(0.0005, 0.02, 1_000_000)
+
+    start = time.perf_counter()
+    result = compare_models(production, candidate, n_resamples=500, seed=11)
+    elapsed = time.perf_counter() - start
+
+    assert result["significant"]
+    assert elapsed < 30
@@ -0,0 +1,144 @@
+"""
+Tests for the CPU-tuned LSTM player form model.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from src.core_engine.base_model import BasePredictiveModel
+from src.models.player_disposals_lstm_model import (
+    MIN_STD,
+    PlayerDisposalsLSTMModel,
+    benchmark_cpu_throughput,
+    bucket_by_length,
+)
+
+tf = pytest.importorskip("tensorflow")
+
+FEATURES = ["time_on_ground", "contested_possessions", "opponent_rating"]
+
+
+@pytest.fixture(scope="module")
+def player_histories():
+    """Synthetic per-player histories whose target depends on running form."""
+    rng = np.random.default_rng(3)
+    histories, targets = {}, {}
+    for player in range(120):
+        games = int(rng.integers(4, 16))
+        x = rng.normal(size=(games, len(FEATURES))).astype(np.float32)
+        form = np.cumsum(x[:, 0]) * 0.3
+        histories[f"P{player:03d}"] = x
+        targets[f"P{player:03d}"] = 20 + 3 * form + x[:, 1] + rng.normal(size=games)
+    return histories, targets
+
+
+@pytest.fixture(scope="module")
+def fitted_model(player_histories):
+    histories, targets = player_histories
+    model = PlayerDisposalsLSTMModel(
+        FEATURES, units=8, epochs=5, batch_size=32, model_version="lstm_test"
+    )
+    return model.fit(histories, targets)
+
+
+def test_bucket_by_length_has_no_padding():
+    lengths = [3, 5, 3, 3, 5, 0, 7]
+
+    batches = bucket_by_length(lengths, batch_size=2)
+
+    covered = sorted(int(i) for batch in batches for i in batch)
+    assert covered == [0, 1, 2, 3, 4, 6]  # empty sequence skipped
+    for batch in batches:
+        assert len(batch) <= 2
+        assert len({lengths[i] for i in batch}) == 1
+
+
+def test_is_pluggable_model():
+    assert issubclass(PlayerDisposalsLSTMModel, BasePredictiveModel)
+
+
+def test_predict_before_fit():
+    with pytest.raises(RuntimeError):
+        PlayerDisposalsLSTMModel(FEATURES).predict_sequences({})
+
+
+def test_incremental_matches_full_replay(fitted_model, player_histories):
+    histories, _ = player_histories
+    history = histories["P001"]
+
+    fitted_model.reset_state_cache()
+    fitted_model.predict_sequences({"P001": history[:-1]})
+    incremental = fitted_model.update(["P001"], history[-1:])
+    full = fitted_model.predict_sequences({"P001": history})
+
+    np.testing.assert_allclose(incremental["mean"], full["mean"], rtol=1e-5)
+    np.testing.assert_allclose(incremental["std"], full["std"], rtol=1e-5)
+
+
+def test_std_matches_training_parameterisation(fitted_model):
+    """Test that served std is the training-time std rescaled to the target."""
+    raw = np.array([[0.0, -50.0], [0.0, 0.0], [0.0, 2.0]], dtype=np.float32)
+    _, std = fitted_model._to_distribution(raw)
+
+    trained = tf.nn.softplus(raw[:, 1]).numpy() + MIN_STD
+    np.testing.assert_allclose(std, trained * fitted_model.target_std, rtol=1e-6)
+    assert std[0] == pytest.approx(MIN_STD * fitted_model.target_std)
+
+
+def test_update_rejects_duplicate_players(fitted_model):
+    with pytest.raises(ValueError):
+        fitted_model.update(["P001", "P001"], np.zeros((2, len(FEATURES))))
+
+
+def test_predict_returns_standard_prediction_object(fitted_model, player_histories):
+    histories, _ = player_histories
+
+    prediction = fitted_model.predict({
+        "player_id": "P002",
+        "prop_line": 20.5,
+        "history": histories["P002"],
+    })
+
+    assert 0.0 <= prediction["prediction_probability"] <= 1.0
+    assert 0.0 < prediction["confidence_score"] <= 1.0
+    assert prediction["value_score"] is None
+    assert prediction["model_version"] == "lstm_test"
+    assert set(prediction["explanation"]["feature_contributions"]) == set(FEATURES)
+
+    cached = fitted_model.predict({
+        "player_id": "P002",
+        "prop_line": 20.5,
+        "side": "under",
+        "price": 2.0,
+    })
+    assert cached["prediction_probability"] == pytest.approx(
+        1 - prediction["prediction_probability"]
+    )
+
+
+def test_export_frozen_graph(fitted_model, tmp_path):
+    paths = fitted_model.export_frozen_graph(str(tmp_path))
+
+    graph_def = tf.compat.v1.GraphDef()
+    graph_def.ParseFromString(open(paths["step"], "rb").read())
+    assert not any(node.op.startswith("VarHandle") for node in graph_def.node)
+
+    runtime_config = json.loads(open(paths["runtime_config"]).read())
+    assert runtime_config["feature_names"] == FEATURES
+    assert set(runtime_config["threading"]) == {
+        "intra_op_parallelism_threads",
+        "inter_op_parallelism_threads",
+    }
+
+
+def test_cpu_benchmark_reports_both_modes(fitted_model, player_histories):
+    histories, _ = player_histories
+    next_games = np.zeros((len(histories), len(FEATURES)), dtype=np.float32)
+
+    result = benchmark_cpu_throughput(fitted_model, histories, next_games, repeats=1)
+
+    assert result["players"] == len(histories)
+    assert result["full_predictions_per_second"] > 0
+    assert result["incremental_speedup"] > 1
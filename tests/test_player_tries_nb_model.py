@@ -0,0 +1,180 @@
+"""
+Tests for the batch-fitted Negative Binomial player props model.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from src.core_engine.base_model import BasePredictiveModel
+from src.models.player_tries_nb_model import (
+    PlayerTriesNBModel,
+    negative_binomial_over_under,
+)
+
+FEATURES = ["minutes", "opponent_rating", "home"]
+
+
+def nb_pmf(k, mean, alpha):
+    """Reference NB2 pmf computed with log-gamma."""
+    r = 1.0 / alpha
+    return math.exp(
+        math.lgamma(k + r)
+        - math.lgamma(r)
+        - math.lgamma(k + 1)
+        + r * math.log(r / (r + mean))
+        + k * math.log(mean / (r + mean))
+    )
+
+
+@pytest.fixture(scope="module")
+def simulated_season():
+    """Simulate NB2 try counts for many players with known coefficients."""
+    rng = np.random.default_rng(7)
+    players, games = 1500, 60
+    player_ids = np.repeat([f"P{i:04d}" for i in range(players)], games)
+    X = rng.normal(size=(players * games, len(FEATURES)))
+    intercepts = rng.normal(-0.4, 0.3, size=players)
+    slopes = np.array([0.3, -0.2, 0.1])
+    mean = np.exp(np.repeat(intercepts, games) + X @ slopes)
+    r = 1.0 / 0.4
+    y = rng.negative_binomial(r, r / (r + mean))
+    return {"player_ids": player_ids, "X": X, "y": y, "slopes": slopes}
+
+
+class TestNegativeBinomialOverUnder:
+    """Test cases for closed-form prop probabilities."""
+
+    def test_half_lines_match_reference_pmf(self):
+        result = negative_binomial_over_under([1.3, 0.6], [0.5, 0.2], [2.5, 0.5])
+
+        expected_under = sum(nb_pmf(k, 1.3, 0.5) for k in range(3))
+        assert result["under"][0] == pytest.approx(expected_under)
+        assert result["over"][0] == pytest.approx(1 - expected_under)
+        assert result["under"][1] == pytest.approx(nb_pmf(0, 0.6, 0.2))
+        assert np.all(result["push"] == 0)
+
+    def test_integer_line_has_push(self):
+        result = negative_binomial_over_under([1.3], [0.5], [2])
+
+        assert result["push"][0] == pytest.approx(nb_pmf(2, 1.3, 0.5))
+        total = result["over"] + result["under"] + result["push"]
+        assert total[0] == pytest.approx(1.0)
+
+    def test_zero_dispersion_is_poisson(self):
+        result = negative_binomial_over_under([0.4], [0.0], [0.5])
+
+        assert result["over"][0] == pytest.approx(1 - math.exp(-0.4))
+
+    def test_negative_line_rejected(self):
+        with pytest.raises(ValueError):
+            negative_binomial_over_under([1.0], [0.1], [-0.5])
+
+
+class TestPlayerTriesNBModel:
+    """Test cases for batched fitting and slate prediction."""
+
+    def test_is_pluggable_model(self):
+        assert issubclass(PlayerTriesNBModel, BasePredictiveModel)
+
+    def test_invalid_dispersion_mode(self):
+        with pytest.raises(ValueError):
+            PlayerTriesNBModel(FEATURES, dispersion="per_team")
+
+    def test_predict_before_fit(self):
+        with pytest.raises(RuntimeError):
+            PlayerTriesNBModel(FEATURES).predict_mean(["P0001"], [[0.0, 0.0, 0.0]])
+
+    def test_batch_fit_recovers_parameters(self, simulated_season):
+        model = PlayerTriesNBModel(FEATURES).fit(
+            simulated_season["player_ids"],
+            simulated_season["X"],
+            simulated_season["y"],
+        )
+
+        assert model.coefficients.shape == (1500, 4)
+        np.testing.assert_allclose(
+            model.coefficients[:, 1:].mean(axis=0),
+            simulated_season["slopes"],
+            atol=0.05,
+        )
+        assert 0.3 < model.shared_alpha < 0.5
+
+    def test_per_player_dispersion(self, simulated_season):
+        model = PlayerTriesNBModel(FEATURES, dispersion="per_player").fit(
+            simulated_season["player_ids"],
+            simulated_season["X"],
+            simulated_season["y"],
+        )
+
+        assert model.alpha.shape == (1500,)
+        assert np.all(model.alpha >= 0)
+        assert model.alpha.std() > 0
+
+    def test_predict_slate(self, simulated_season):
+        model = PlayerTriesNBModel(FEATURES).fit(
+            simulated_season["player_ids"],
+            simulated_season["X"],
+            simulated_season["y"],
+        )
+
+        slate = model.predict_slate(
+            ["P0001", "P0002", "unknown"],
+            np.zeros((3, 3)),
+            [0.5, 1.5, 0.5],
+            prices=[2.0, 4.0, 2.0],
+        )
+
+        assert slate["over"].shape == (3,)
+        np.testing.assert_allclose(slate["over"] + slate["under"], 1.0)
+        assert slate["confidence_score"][2] == 0.0
+        np.testing.assert_allclose(
+            slate["value_score"], slate["over"] * np.array([2.0, 4.0, 2.0]) - 1
+        )
+
+    def test_unknown_player_uses_pooled_fit(self, simulated_season):
+        model = PlayerTriesNBModel(FEATURES).fit(
+            simulated_season["player_ids"],
+            simulated_season["X"],
+            simulated_season["y"],
+        )
+
+        mean = model.predict_mean(["unknown"], [[0.0, 0.0, 0.0]])
+
+        assert mean[0] == pytest.approx(math.exp(model.pooled_coefficients[0]))
+
+    def test_predict_returns_standard_prediction_object(self, simulated_season):
+        model = PlayerTriesNBModel(FEATURES, model_version="nb_test").fit(
+            simulated_season["player_ids"],
+            simulated_season["X"],
+            simulated_season["y"],
+        )
+        features = {
+            "player_id": "P0001",
+            "minutes": 1.0,
+            "opponent_rating": -0.5,
+            "home": 0.0,
+            "prop_line": 0.5,
+            "side": "under",
+            "price": 1.8,
+        }
+
+        prediction = model.predict(features)
+
+        for field in (
+            "prediction_probability",
+            "value_score",
+            "confidence_score",
+            "explanation",
+            "model_version",
+        ):
+            assert field in prediction
+        assert prediction["model_version"] == "nb_test"
+        assert prediction["prediction_probability"] == pytest.approx(
+            prediction["raw_prediction"]["under"]
+        )
+        assert prediction["value_score"] == pytest.approx(
+            prediction["prediction_probability"] * 1.8 - 1
+        )
+        assert set(prediction["explanation"]["feature_contributions"]) == set(FEATURES)
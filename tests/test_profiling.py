@@ -0,0 +1,105 @@
+"""Tests for the opt-in per-stage profiler."""
+
+import logging
+import pstats
+
+import pytest
+
+from config.app_config import Config
+from src.core_engine.profiling import Profiler, parse_profile_mode, profiled
+
+
+def busy(n=20_000):
+    return sum(i * i for i in range(n))
+
+
+def test_disabled_is_a_no_op(tmp_path, monkeypatch):
+    profiler = Profiler(mode=None, directory=tmp_path)
+    assert not profiler.enabled
+    assert profiler.stage("train") is profiler.stage("score")
+    assert profiler.wrap("train", busy) is busy
+
+    monkeypatch.delenv("MULTIBET_PROFILE", raising=False)
+    assert profiled("predict")(busy) is busy
+    with profiler.stage("train"):
+        busy()
+    assert not any(tmp_path.iterdir())
+
+
+def test_cprofile_writes_stage_stats_and_hotspots(tmp_path, caplog):
+    profiler = Profiler(mode="cprofile", directory=tmp_path, top_n=5)
+    with caplog.at_level(logging.INFO, logger="src.core_engine.profiling"):
+        with profiler.stage("train"):
+            busy()
+            with profiler.stage("nested"):  # folded into "train"
+                busy()
+        profiler.wrap("score[0]", busy)()
+        assert not profiler.directory.exists()
+        profiler.flush()
+
+    files = sorted(path.name for path in profiler.directory.iterdir())
+    assert files == ["score[0].prof", "train.prof"]
+    stats = pstats.Stats(str(profiler.directory / "train.prof"))
+    assert any(func[2] == "busy" for func in stats.stats)
+    assert "Profile of stage train over 1 calls" in caplog.text
+    assert "busy" in caplog.text
+
+
+def test_tracemalloc_reports_peak_memory_per_stage(tmp_path, caplog):
+    profiler = Profiler(mode="tracemalloc", directory=tmp_path, top_n=3)
+    with caplog.at_level(logging.INFO, logger="src.core_engine.profiling"):
+        with profiler.stage("allocate"):
+            blob = bytearray(8 * 2**20)
+            del blob
+        with profiler.stage("small"):
+            busy(100)
+        profiler.flush()
+
+    assert profiler.peaks["allocate"] >= 8.0
+    assert profiler.peaks["small"] < 1.0
+    assert (profiler.directory / "allocate.mem.txt").read_text()
+    assert "Stage allocate peak memory" in caplog.text
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "tracemalloc"])
+def test_repeated_stage_is_aggregated_across_calls(tmp_path, caplog, mode):
+    profiler = Profiler(mode=mode, directory=tmp_path, top_n=3)
+    predict = profiler.wrap("predict", busy)
+    with caplog.at_level(logging.INFO, logger="src.core_engine.profiling"):
+        for _ in range(200):
+            predict(100)
+        profiler.flush()
+        profiler.flush()  # nothing new since the last flush
+
+    assert len(list(profiler.directory.iterdir())) == 1
+    assert caplog.text.count("over 200 calls") == 1
+    if mode == "cprofile":
+        stats = pstats.Stats(str(profiler.directory / "predict.prof"))
+        [calls] = [s[1] for f, s in stats.stats.items() if f[2] == "busy"]
+        assert calls == 200
+
+
+def test_stages_are_flushed_on_an_interval(tmp_path):
+    profiler = Profiler(mode="cprofile", directory=tmp_path, flush_interval=0)
+    profiler.wrap("predict", busy)(100)
+
+    assert (profiler.directory / "predict.prof").exists()
+
+
+def test_profile_mode_from_environment(monkeypatch):
+    monkeypatch.setenv("MULTIBET_PROFILE", "tracemalloc")
+    monkeypatch.setenv("MULTIBET_PROFILE_TOP_N", "7")
+    app_config = Config()
+    profiler = Profiler.from_config(app_config)
+    assert profiler.mode == "tracemalloc"
+    assert profiler.top_n == 7
+    assert app_config.validate_configuration()
+
+    assert profiled("predict")(busy) is not busy
+
+    app_config.set("PROFILE_MODE", "sampling")
+    with pytest.raises(ValueError, match="PROFILE_MODE"):
+        app_config.validate_configuration()
+    assert parse_profile_mode("OFF") is None
+    with pytest.raises(ValueError):
+        parse_profile_mode("sampling")
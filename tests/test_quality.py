@@ -0,0 +1,176 @@
+"""Tests for vectorized batch quality scoring and drift sketches."""
+
+import time
+
+import numpy as np
+import pytest
+
+from src.data_pipelines.quality import (
+    GREEN,
+    RED,
+    YELLOW,
+    QualityEngine,
+    QuantileSketch,
+    columns_from_records,
+    population_stability_index,
+)
+from src.data_pipelines.schemas import UnifiedRacingData
+from src.data_pipelines.synthetic import SyntheticDataGenerator
+
+START = 1_800_000_000.0
+
+
+def batch(odds, sizes, start=START, received=START - 60, **columns):
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    n = len(sizes)
+    return {
+        "odds": np.asarray(odds, dtype=float),
+        "offsets": offsets,
+        "event_start_time": np.full(n, start, dtype=float),
+        "received_at": np.full(n, received, dtype=float),
+        **columns,
+    }
+
+
+def test_clean_batch_scores_green():
+    report = QualityEngine().score(batch([1.9, 1.9, 2.8, 3.4, 2.6], [2, 3]))
+
+    assert report.overall == 1.0 and report.passed
+    assert report.flag_counts == {"green": 2, "yellow": 0, "red": 0}
+
+
+def test_each_dimension_flags_its_markets():
+    engine = QualityEngine()
+    data = batch(
+        # fine | out of range | overround 0.95 - 1 < 0 | null odds | stale
+        [1.9, 1.9, 1.9, 0.5, 2.1, 2.1, 1.9, np.nan, 1.9, 1.9],
+        [2, 2, 2, 2, 2],
+    )
+    data["received_at"][4] = START + 1
+
+    report = engine.score(data)
+
+    assert report.flags.tolist() == [GREEN, YELLOW, YELLOW, RED, YELLOW]
+    assert report.completeness == pytest.approx(14 / 15)
+    assert report.accuracy == pytest.approx(8 / 9)
+    assert report.consistency == pytest.approx(2 / 3)
+    assert report.timeliness == pytest.approx(4 / 5)
+
+
+def test_stale_odds_and_missing_start_times():
+    data = batch([1.9] * 6, [2, 2, 2], odds_updated_at=np.full(3, START - 60))
+    data["odds_updated_at"][1] = START - 60 - 301
+    data["event_start_time"][2] = np.nan
+
+    report = QualityEngine(max_odds_age=300).score(data)
+
+    assert report.flags.tolist() == [GREEN, YELLOW, RED]
+    assert report.timeliness == pytest.approx(1 / 3)
+
+
+def test_low_quality_batch_fails_threshold():
+    data = batch([0.5, np.nan, 1.9, 1.9], [2, 2], received=START + 10)
+
+    report = QualityEngine().score(data)
+
+    assert not report.passed
+    assert report.to_dict()["passed"] is False
+
+
+def test_columns_from_records_matches_synthetic_markets():
+    generator = SyntheticDataGenerator(seed=3)
+    events = list(generator.sports_events(20))
+    races = [race.model_dump(mode="json") for race in generator.racing_events(20)]
+    del races[0]["race_start_time"]
+    races[1]["runners"][0]["win_odds"] = None
+
+    columns = columns_from_records(events + races, received_at=0.0)
+    report = QualityEngine().score(columns, "synthetic")
+
+    assert len(columns["offsets"]) - 1 == 20 * 2 + 20
+    # Props are not exhaustive, so only h2h and race markets are checked.
+    assert columns["exhaustive"].sum() == 40
+    assert report.accuracy == 1.0 and report.consistency == 1.0
+    assert report.flag_counts["red"] == 2 and report.flag_counts["yellow"] == 0
+
+
+def test_quantile_sketch_relative_error_and_merge():
+    values = np.random.default_rng(0).lognormal(1.0, 0.8, 50_000)
+    left, right = QuantileSketch(0.01), QuantileSketch(0.01)
+    left.add(values[:20_000])
+    right.add(values[20_000:])
+    left.merge(right)
+
+    qs = [0.01, 0.25, 0.5, 0.75, 0.99]
+    estimates = left.quantiles(qs)
+    exact = np.quantile(values, qs)
+
+    assert left.total == len(values)
+    np.testing.assert_allclose(estimates, exact, rtol=0.02)
+
+
+def test_drift_against_reference_per_source():
+    engine = QualityEngine(reference_size=200)
+    rng = np.random.default_rng(1)
+
+    def two_way(n, margin):
+        p = rng.uniform(0.2, 0.8, n)
+        odds = np.column_stack([p, 1 - p]).ravel()
+        return batch(1 / (odds * (1 + margin)), [2] * n)
+
+    engine.score(two_way(200, 0.05), "steady")
+    engine.score(two_way(200, 0.05), "steady")
+    engine.score(two_way(200, 0.05), "shifting")
+    engine.score(two_way(200, 0.25), "shifting")
+    drift = engine.drift()
+
+    assert drift["steady"]["booksum"]["psi"] < 0.1
+    assert drift["shifting"]["booksum"]["psi"] > 0.25
+    assert drift["shifting"]["booksum"]["current"][1] == pytest.approx(1.25, rel=0.02)
+
+    engine.rotate("shifting")
+    assert np.isnan(engine.drift()["shifting"]["booksum"]["current"][1])
+
+
+def test_psi_with_concentrated_reference():
+    # Every reference market priced at a 10% overround: all deciles share
+    # one bucket.
+    reference, steady, shifted = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    reference.add(np.full(1000, 1.10))
+    steady.add(np.r_[np.full(950, 1.10), np.full(50, 1.12)])
+    shifted.add(np.r_[np.full(900, 1.10), np.full(100, 1.30)])
+
+    assert population_stability_index(reference, reference) == 0.0
+    assert population_stability_index(reference, steady) < 0.5
+    assert population_stability_index(reference, shifted) > 0.25
+    assert population_stability_index(reference, shifted) > (
+        population_stability_index(reference, steady)
+    )
+
+
+def test_scoring_is_cheap_next_to_validation():
+    raw = [
+        race.model_dump(mode="json")
+        for race in SyntheticDataGenerator(seed=0).racing_events(2000)
+    ]
+    engine = QualityEngine()
+    engine.score(columns_from_records(raw, received_at=0.0))
+
+    def best_of_three(step):
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            step()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    validation = best_of_three(
+        lambda: [UnifiedRacingData.model_validate(record) for record in raw]
+    )
+    # Scoring includes building the columns from the same raw records.
+    scoring = best_of_three(
+        lambda: engine.score(columns_from_records(raw, received_at=0.0))
+    )
+
+    assert scoring < 0.25 * validation
@@ -0,0 +1,157 @@
+"""Tests for the quarantine store and revalidation workers."""
+
+import json
+import threading
+import time
+
+from src.core_engine.instrumentation import Instrumentation
+from src.data_pipelines.quarantine import IngestGate, Quarantine, QuarantineStore
+from src.data_pipelines.schemas import UnifiedRacingData
+from src.data_pipelines.synthetic import SyntheticDataGenerator
+
+
+def races(n, seed=0):
+    return [
+        race.model_dump(mode="json")
+        for race in SyntheticDataGenerator(seed=seed).racing_events(n)
+    ]
+
+
+def make_gate(tmp_path, accepted, **options):
+    options.setdefault("retry_interval", 0.01)
+    return IngestGate(
+        UnifiedRacingData,
+        accepted.append,
+        tmp_path / "quarantine",
+        instrumentation=Instrumentation(),
+        **options,
+    )
+
+
+def test_routes_valid_quarantined_and_rejected_records(tmp_path):
+    accepted = []
+    gate = make_gate(tmp_path, accepted, max_attempts=1)
+    good, missing, bad_odds = races(3)
+    del missing["venue"]
+    bad_odds["runners"][0]["win_odds"] = 5000.0
+
+    assert gate.submit(json.dumps(good), source="tab") is not None
+    assert gate.submit(good, source="tab") is None  # duplicate
+    assert gate.submit(b'{"event_id": ', source="tab") is None  # corrupted
+    assert gate.submit(missing, source="tab") is None
+    assert gate.submit(bad_odds, source="racing_api") is None
+    assert gate.quarantine.drain(timeout=5)
+
+    assert [race.event_id for race in accepted] == [good["event_id"]]
+    stats = gate.stats()
+    assert stats["ingested"] == 5
+    assert stats["quarantine_rate"] == 2 / 5
+    assert stats["rejection_rate"] == 2 / 5
+    assert stats["by_reason"] == {
+        "rejected:duplicate": 1,
+        "rejected:corrupted": 1,
+        "quarantined:schema": 1,
+        "quarantined:business_rule": 1,
+    }
+    assert stats["ingest_latency_ns"]["count"] == 1
+    assert gate.instrumentation.histograms()["validation"].total == 3
+    gate.close(timeout=5)
+
+    entries = list(gate.quarantine.store.entries())
+    assert [entry["reason"] for entry in entries] == ["schema", "business_rule"]
+    assert entries[1]["source"] == "racing_api"
+    assert "5000.0" in entries[1]["detail"]
+    assert set(gate.quarantine.store.statuses().values()) == {"review"}
+
+
+def test_concurrent_submits_are_all_counted(tmp_path):
+    gate = make_gate(tmp_path, [])
+    threads = [
+        threading.Thread(
+            target=lambda: [gate.submit(b"{", source="tab") for _ in range(500)]
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert gate.stats()["ingested"] == 4000
+    gate.close(timeout=5)
+
+
+def test_workers_revalidate_enrich_and_reinject(tmp_path):
+    accepted = []
+
+    def enrich(record, reason):
+        if reason == "schema" and "venue" not in record:
+            record = {**record, "venue": "Unknown"}
+        return record
+
+    gate = make_gate(tmp_path, accepted, enrich=enrich, max_attempts=2, batch_size=8)
+    records = races(40, seed=1)
+    for record in records[:20]:
+        del record["venue"]  # recoverable
+    for record in records[20:30]:
+        record["runners"] = record["runners"][:1]  # never valid
+    for record in records:
+        gate.submit(record)
+
+    deadline = time.monotonic() + 10
+    while gate.stats()["review"] < 10 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    gate.close(timeout=5)
+
+    stats = gate.stats()
+    assert stats["released"] == 20
+    assert stats["review"] == 10
+    assert len(accepted) == 30
+    assert sum(race.venue == "Unknown" for race in accepted) == 20
+    assert not gate.quarantine.store.open_entries(include_review=False)
+    assert len(gate.quarantine.store.open_entries()) == 10
+
+
+def test_open_entries_resume_after_restart(tmp_path):
+    store = QuarantineStore(tmp_path)
+    store.append([{"reason": "schema", "record": {"n": n}} for n in range(3)])
+    store.resolve([0], "discarded", "bad source")
+
+    recovered = []
+    quarantine = Quarantine(
+        tmp_path,
+        revalidate=lambda entries: [entry["record"] for entry in entries],
+        reinject=recovered.extend,
+    )
+    assert quarantine.drain(timeout=5)
+    quarantine.close(timeout=5)
+    assert recovered == [{"n": 1}, {"n": 2}]
+
+    store.append([{"reason": "schema", "record": {"n": 3}}])
+    assert [entry["id"] for entry in QuarantineStore(tmp_path).entries()] == [
+        0,
+        1,
+        2,
+        3,
+    ]
+
+
+def test_diverting_does_not_wait_for_the_store(tmp_path):
+    release = threading.Event()
+    gate = make_gate(tmp_path, [], max_attempts=1)
+    append = gate.quarantine.store.append
+    gate.quarantine.store.append = lambda entries: release.wait(5) and append(entries)
+
+    bad = races(2000, seed=2)
+    for record in bad:
+        record["runners"] = []
+    start = time.perf_counter()
+    for record in bad:
+        gate.submit(record)
+    elapsed = time.perf_counter() - start
+
+    release.set()
+    gate.close(timeout=10)
+    assert elapsed < 5
+    assert gate.stats()["quarantined"] == 2000
+    assert len(list(gate.quarantine.store.entries())) == 2000
@@ -0,0 +1,245 @@
+"""Tests for retries, circuit breakers and hedging against a flaky local server."""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import redis
+import requests
+
+from config.app_config import Config
+from src.core_engine.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Resilience,
+    RetryBudget,
+    RetryPolicy,
+    TransientHTTPError,
+    check_response,
+    is_transient,
+)
+
+FAST = RetryPolicy(max_attempts=4, initial_delay=0.01, max_delay=0.05, timeout=5)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Scripted endpoints:
+
+    /flaky   503 (Retry-After: 0) for the first `failures` requests, then 200
+    /down    always 500
+    /missing always 404
+    /slow    every other request takes `slow_seconds`
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = hits = server.hits.get(self.path, 0) + 1
+        if self.path == "/flaky" and hits <= server.failures:
+            self.reply(503, {"Retry-After": "0"})
+        elif self.path == "/down":
+            self.reply(500)
+        elif self.path == "/missing":
+            self.reply(404)
+        else:
+            if self.path == "/slow" and hits % 2 == 1:
+                time.sleep(server.slow_seconds)
+            self.reply(200, body=f"{self.path} {hits}".encode())
+
+    def reply(self, status, headers=None, body=b""):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.hits = {}
+    server.failures = 2
+    server.slow_seconds = 1.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    return check_response(requests.get(url, timeout=5))
+
+
+def test_retries_transient_failures_until_success(stub_server):
+    sleeps = []
+    resilience = Resilience(policy=FAST, sleep=sleeps.append, seed=0)
+
+    response = resilience.call("odds_api", get, f"{stub_server.url}/flaky")
+
+    assert response.text == "/flaky 3"
+    assert len(sleeps) == 2
+    assert sleeps[1] > sleeps[0] * 1.2  # exponential, within jitter
+
+    with pytest.raises(requests.HTTPError):
+        resilience.call(
+            "odds_api",
+            lambda url: get(url).raise_for_status(),
+            f"{stub_server.url}/missing",
+        )
+    assert stub_server.hits["/missing"] == 1  # permanent: not retried
+    assert resilience.breaker("odds_api").state == CircuitBreaker.CLOSED
+
+
+def test_circuit_opens_fails_fast_and_recovers(stub_server):
+    clock = FakeClock()
+    resilience = Resilience(
+        policy=RetryPolicy(max_attempts=1),
+        failure_threshold=3,
+        recovery_timeout=60,
+        clock=clock,
+    )
+    for _ in range(3):
+        with pytest.raises(TransientHTTPError):
+            resilience.call("odds_api", get, f"{stub_server.url}/down")
+    assert resilience.breaker("odds_api").state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError) as raised:
+        resilience.call("odds_api", get, f"{stub_server.url}/down")
+    assert raised.value.retry_in == pytest.approx(60)
+    assert stub_server.hits["/down"] == 3
+    # Other endpoints are unaffected.
+    assert resilience.call("bigquery", get, f"{stub_server.url}/ok").ok
+
+    clock.now += 61
+    with pytest.raises(TransientHTTPError):  # failed probe reopens
+        resilience.call("odds_api", get, f"{stub_server.url}/down")
+    assert resilience.breaker("odds_api").state == CircuitBreaker.OPEN
+
+    clock.now += 61
+    assert resilience.call("odds_api", get, f"{stub_server.url}/ok").ok
+    assert resilience.breaker("odds_api").state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_probe_frees_the_half_open_circuit():
+    clock = FakeClock()
+    resilience = Resilience(
+        policy=RetryPolicy(max_attempts=1, timeout=5),
+        failure_threshold=1,
+        recovery_timeout=10,
+        clock=clock,
+    )
+
+    async def fail():
+        raise TimeoutError()
+
+    async def hang():
+        await asyncio.sleep(60)
+
+    async def ok():
+        return "ok"
+
+    async def scenario():
+        with pytest.raises(TimeoutError):
+            await resilience.acall("odds_api", fail)
+        clock.now += 11
+        probe = asyncio.ensure_future(resilience.acall("odds_api", hang))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await resilience.acall("odds_api", ok)
+
+    assert asyncio.run(scenario()) == "ok"
+    assert resilience.breaker("odds_api").state == CircuitBreaker.CLOSED
+
+    # Same for a synchronous probe interrupted by KeyboardInterrupt.
+    def interrupted():
+        raise KeyboardInterrupt
+
+    resilience.breaker("odds_api").record_failure()
+    clock.now += 11
+    with pytest.raises(KeyboardInterrupt):
+        resilience.call("odds_api", interrupted)
+    assert resilience.call("odds_api", lambda: "ok") == "ok"
+
+
+def test_retry_budget_caps_retry_traffic_during_an_outage(stub_server):
+    resilience = Resilience(
+        policy=RetryPolicy(max_attempts=4, initial_delay=0),
+        failure_threshold=10_000,
+        budget_ratio=0.1,
+        min_retries_per_second=0.2,
+        clock=FakeClock(),
+        sleep=lambda delay: None,
+    )
+    for _ in range(100):
+        with pytest.raises(TransientHTTPError):
+            resilience.call("odds_api", get, f"{stub_server.url}/down")
+
+    # Without a budget this would be 400 requests.
+    assert stub_server.hits["/down"] <= 100 * 1.1 + 2
+
+    budget = RetryBudget(ratio=0.5, window=10, min_per_second=0, clock=FakeClock())
+    for _ in range(4):
+        budget.record_request()
+    assert [budget.try_retry() for _ in range(3)] == [True, True, False]
+
+
+def test_hedged_reads_beat_a_slow_first_attempt(stub_server):
+    resilience = Resilience(policy=FAST)
+    start = time.perf_counter()
+    response = resilience.hedged("odds_api", get, f"{stub_server.url}/slow", delay=0.1)
+    elapsed = time.perf_counter() - start
+    resilience.close()
+
+    assert response.text == "/slow 2"
+    assert elapsed < stub_server.slow_seconds
+
+
+def test_async_calls_retry_and_hedge(stub_server):
+    async def fetch(path):
+        return await asyncio.to_thread(get, f"{stub_server.url}{path}")
+
+    async def scenario():
+        resilience = Resilience(policy=FAST)
+        flaky = await resilience.acall("odds_api", fetch, "/flaky")
+        slow = await resilience.ahedged("odds_api", fetch, "/slow", delay=0.1)
+        return flaky.text, slow.text
+
+    assert asyncio.run(scenario()) == ("/flaky 3", "/slow 2")
+
+
+def test_transient_classification_and_config():
+    assert is_transient(redis.ConnectionError("reset"))
+    assert is_transient(redis.TimeoutError())
+    assert is_transient(requests.ConnectTimeout())
+    assert is_transient(TimeoutError())
+    assert not is_transient(redis.ResponseError("WRONGTYPE"))
+    assert not is_transient(ValueError("bad odds"))
+
+    app_config = Config()
+    app_config.set("RETRY_MAX_ATTEMPTS", 5)
+    app_config.set("API_TIMEOUT", 10)
+    resilience = Resilience.from_config(app_config)
+    assert resilience.policy.max_attempts == 5
+    assert resilience.policy.timeout == 10.0
+    assert resilience.budget_ratio == 0.1
@@ -5,6 +5,7 @@ Tests for the automated model retraining pipeline.
 from datetime import datetime
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 
 import retrain_models
@@ -185,6 +186,133 @@ class TestRetrainingPipeline:
         deployed = retrain_models.compare_and_deploy(model_info, clv_metrics)
         assert deployed is False
 
+    def test_train_new_model_selects_best_candidate(self):
+        """Test multi-candidate training records every trial."""
+        candidates = [{"depth": 4}, {"depth": 6}, {"depth": 8}]
+
+        with patch(
+            "retrain_models.train_candidate",
+            side_effect=lambda data, params, iterations, threads: (
+                {"model": params["depth"]},
+                -abs(params["depth"] - 6),
+            ),
+        ):
+            model_info = retrain_models.train_new_model(
+                {"features": [], "targets": []}, candidates=candidates, max_workers=1
+            )
+
+        assert model_info["params"] == {"depth": 6}
+        assert model_info["model"] == 6
+        assert model_info["metrics"]["validation_clv"] == 0
+        assert len(model_info["trials"]) == 4  # 3 at the first rung, 1 at full budget
+        for trial in model_info["trials"]:
+            assert trial["wall_seconds"] >= 0
+            assert trial["cpu_seconds"] >= 0
+            assert "output" not in trial
+
+    def test_dry_run_never_deploys(self):
+        """Test that dry-run evaluates but skips deployment."""
+        deployed = retrain_models.compare_and_deploy(
+            {"model_version": "test"}, {"average_clv": 0.05}, dry_run=True
+        )
+        assert deployed is False
+
+    def test_compare_and_deploy_uses_bet_level_comparison(self):
+        """Test that paired bet-level CLV overrides the average threshold."""
+        rng = np.random.default_rng(0)
+        production = rng.normal(0.0, 0.05, 2000)
+
+        # Small but consistent gain on every bet: below the 2% threshold
+        better = {"average_clv": 0.01, "bet_clv": production + 0.01}
+        assert retrain_models.compare_and_deploy(
+            {"model_version": "test"},
+            better,
+            production_clv_metrics={"bet_clv": production},
+        )
+
+        # Above the threshold on average, but no better than production
+        same = {"average_clv": 0.05, "bet_clv": production}
+        assert not retrain_models.compare_and_deploy(
+            {"model_version": "test"},
+            same,
+            production_clv_metrics={"bet_clv": production},
+        )
+
+    @patch("retrain_models.compare_and_deploy")
+    def test_main_dry_run_flag(self, mock_deploy):
+        """Test that --dry-run is passed through to deployment."""
+        mock_deploy.return_value = False
+
+        with pytest.raises(SystemExit) as exc_info:
+            retrain_models.main(["--dry-run"])
+
+        assert exc_info.value.code == 0
+        assert mock_deploy.call_args.kwargs["dry_run"] is True
+
+    def test_main_validate_config(self, tmp_path):
+        """Test that --validate-config exits without running the pipeline."""
+        config_file = tmp_path / "config.json"
+        config_file.write_text('{"MIN_ODDS": 5.0, "MAX_ODDS": 2.0}')
+
+        with patch("retrain_models.get_latest_training_data") as mock_data:
+            with pytest.raises(SystemExit) as exc_info:
+                retrain_models.main(["--validate-config"])
+            assert exc_info.value.code == 0
+
+            with pytest.raises(SystemExit) as exc_info:
+                retrain_models.main(["--validate-config", "--config", str(config_file)])
+            assert exc_info.value.code == 1
+
+        mock_data.assert_not_called()
+
+    def test_resume_skips_completed_stages(self, tmp_path):
+        """Test that --resume continues after a failed backtest."""
+        artifact_args = ["--artifact-dir", str(tmp_path / "artifacts")]
+
+        with patch(
+            "retrain_models.backtest_model_clv", side_effect=RuntimeError("crash")
+        ):
+            with pytest.raises(SystemExit) as exc_info:
+                retrain_models.main(artifact_args)
+            assert exc_info.value.code == 1
+
+        with (
+            patch(
+                "retrain_models.get_latest_training_data",
+                autospec=True,
+                side_effect=retrain_models.get_latest_training_data,
+            ) as mock_data,
+            patch(
+                "retrain_models.train_new_model",
+                autospec=True,
+                side_effect=retrain_models.train_new_model,
+            ) as mock_train,
+        ):
+            with pytest.raises(SystemExit) as exc_info:
+                retrain_models.main(artifact_args + ["--resume"])
+            assert exc_info.value.code == 0
+
+        mock_data.assert_not_called()
+        mock_train.assert_not_called()
+
+        # The resumed run finished, so resuming again starts from scratch
+        with patch(
+            "retrain_models.get_latest_training_data",
+            autospec=True,
+            side_effect=retrain_models.get_latest_training_data,
+        ) as mock_data:
+            with pytest.raises(SystemExit) as exc_info:
+                retrain_models.main(artifact_args + ["--resume"])
+            assert exc_info.value.code == 0
+
+        mock_data.assert_called_once()
+
+    def test_resume_requires_artifact_dir(self):
+        """Test that --resume without an artifact store fails."""
+        with pytest.raises(SystemExit) as exc_info:
+            retrain_models.main(["--resume"])
+        assert exc_info.value.code == 1
+
 
 def test_script_can_be_imported():
     """Test that the script can be imported without errors."""
@@ -0,0 +1,195 @@
+"""
+Tests for the real-time risk tracker.
+"""
+
+import json
+import random
+import threading
+import time
+
+import pytest
+
+from config.app_config import Config
+from src.core_engine.risk import RedisRiskTracker, RiskTracker
+
+DAY = 86400.0
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def app_config():
+    config = Config()
+    config.set("MAX_DAILY_STAKE", 500.0)
+    config.set("MAX_EXPOSURE_PER_MATCH", 200.0)
+    config.set("STOP_LOSS_THRESHOLD", -0.1)
+    return config
+
+
+@pytest.fixture(params=["memory", "redis"])
+def make_tracker(request, app_config):
+    def make(bankroll=1000.0, clock=None):
+        clock = clock or FakeClock()
+        if request.param == "memory":
+            return RiskTracker(bankroll, app_config, shards=4, clock=clock)
+        fakeredis = pytest.importorskip("fakeredis")
+        return RedisRiskTracker(
+            fakeredis.FakeRedis(), bankroll, app_config, clock=clock
+        )
+
+    return make
+
+
+def test_match_and_daily_limits(make_tracker):
+    """Test that per-match and per-day limits reject excess stakes."""
+    tracker = make_tracker()
+    assert tracker.reserve("m1", 150.0) is not None
+    assert tracker.reserve("m1", 60.0) is None
+    assert tracker.reserve("m1", 50.0) is not None
+    assert tracker.exposure("m1") == pytest.approx(200.0)
+
+    assert tracker.reserve("m2", 200.0) is not None
+    assert tracker.reserve("m3", 150.0) is None  # 550 > MAX_DAILY_STAKE
+    assert tracker.reserve("m3", 100.0) is not None
+
+
+def test_reloaded_limits_apply_to_existing_trackers(make_tracker, app_config, tmp_path):
+    """Test that a hot reload of the limits reaches a running tracker."""
+    config_file = tmp_path / "config.json"
+    config_file.write_text(
+        json.dumps({"MAX_DAILY_STAKE": 300.0, "MAX_EXPOSURE_PER_MATCH": 100.0})
+    )
+    app_config.config_file = str(config_file)
+    app_config.clear_override("MAX_DAILY_STAKE")
+    app_config.clear_override("MAX_EXPOSURE_PER_MATCH")
+    tracker = make_tracker()
+    assert tracker.reserve("m1", 150.0) is not None
+    assert tracker.reserve("m2", 100.0) is not None
+
+    app_config.reload()
+
+    assert tracker.reserve("m1", 1.0) is None  # 151 > 100 per match
+    assert tracker.reserve("m3", 60.0) is None  # 310 > 300 per day
+    assert tracker.reserve("m3", 50.0) is not None
+
+
+def test_release_returns_exposure(make_tracker):
+    tracker = make_tracker()
+    reservation = tracker.reserve("m1", 200.0)
+    tracker.release(reservation)
+    assert tracker.exposure("m1") == pytest.approx(0.0)
+    assert tracker.reserve("m1", 200.0) is not None
+    with pytest.raises(ValueError):
+        tracker.commit(reservation)
+
+
+def test_daily_limit_rolls_over(make_tracker):
+    clock = FakeClock()
+    tracker = make_tracker(clock=clock)
+    for match in ("m1", "m2", "m3"):
+        tracker.commit(tracker.reserve(match, 150.0))
+    assert tracker.reserve("m4", 100.0) is None
+
+    clock.now += DAY
+    assert tracker.reserve("m4", 100.0) is not None
+
+
+def test_funds_and_stop_loss(make_tracker):
+    """Test that open exposure is capped by funds and losses halt staking."""
+    tracker = make_tracker(bankroll=300.0)
+    first = tracker.reserve("m1", 150.0)
+    second = tracker.reserve("m2", 150.0)
+    assert tracker.reserve("m3", 10.0) is None  # bankroll fully exposed
+
+    tracker.commit(first)
+    tracker.commit(second)
+    tracker.settle(first, 150.0)  # won: funds now 450, exposure 150
+    assert tracker.reserve("m3", 100.0) is not None
+    assert not tracker.halted
+
+    tracker.settle(second, -150.0)  # realized 0.0
+    assert not tracker.halted
+    third = tracker.reserve("m4", 50.0)
+    tracker.commit(third)
+    tracker.settle(third, -50.0)  # realized -50 > -30: halt
+    assert tracker.halted
+    assert tracker.reserve("m5", 1.0) is None
+
+    tracker.resume()
+    assert tracker.reserve("m5", 1.0) is not None
+
+
+def test_settle_validation(make_tracker):
+    tracker = make_tracker()
+    reservation = tracker.reserve("m1", 10.0)
+    with pytest.raises(ValueError):
+        tracker.settle(reservation, 5.0)  # not committed
+    tracker.commit(reservation)
+    with pytest.raises(ValueError):
+        tracker.settle(reservation, -11.0)
+
+
+def test_concurrent_reservations_never_exceed_limits(app_config):
+    """Test that racing workers never overshoot any limit."""
+    app_config.set("MAX_DAILY_STAKE", 5000.0)
+    tracker = RiskTracker(4000.0, app_config, shards=8, clock=FakeClock())
+    granted = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(2000):
+            match = f"m{rng.randrange(30)}"
+            reservation = tracker.reserve(match, rng.choice([1.0, 5.0, 20.0]))
+            if reservation is None:
+                continue
+            if rng.random() < 0.3:
+                tracker.release(reservation)
+            else:
+                tracker.commit(reservation)
+                with lock:
+                    granted.append(reservation)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    per_match = {}
+    for reservation in granted:
+        per_match[reservation.match_id] = (
+            per_match.get(reservation.match_id, 0.0) + reservation.stake
+        )
+    total = sum(per_match.values())
+    snapshot = tracker.snapshot()
+    assert max(per_match.values()) <= 200.0
+    assert total <= 4000.0
+    assert snapshot["open_exposure"] == pytest.approx(total)
+    assert snapshot["available_funds"] == pytest.approx(4000.0 - total)
+    for match, stake in per_match.items():
+        assert tracker.exposure(match) == pytest.approx(stake)
+
+
+def test_reserve_commit_latency(app_config):
+    """Test that reserve + commit stays on the single-lock fast path."""
+    app_config.set("MAX_DAILY_STAKE", 1e12)
+    app_config.set("MAX_EXPOSURE_PER_MATCH", 1e12)
+    tracker = RiskTracker(1e12, app_config)
+    reserve, commit = tracker.reserve, tracker.commit
+    n = 100_000
+
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for i in range(n):
+            commit(reserve(i & 63, 1.0))
+        best = min(best, (time.perf_counter() - start) / n)
+
+    assert best < 5e-6
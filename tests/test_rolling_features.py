@@ -0,0 +1,152 @@
+"""
+Tests for the incremental rolling-feature engine.
+
+Every feature is checked against a batch pandas recomputation over each
+entity's full history.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_pipelines.rolling_features import RollingFeatureEngine
+
+WINDOW = 5
+ALPHA = 0.3
+
+
+@pytest.fixture
+def season_results():
+    """Interleaved results for teams, runners and players."""
+    rng = np.random.default_rng(11)
+    n = 5000
+    entity_types = rng.choice(["team", "runner", "player"], size=n)
+    entity_ids = rng.integers(0, 60, size=n)
+    return pd.DataFrame({
+        "entity": list(zip(entity_types, entity_ids.tolist())),
+        "value": rng.normal(80, 15, size=n),
+        "margin": rng.normal(0, 30, size=n),
+    })
+
+
+def pandas_features(frame, column):
+    grouped = frame.groupby("entity")[column]
+    return {
+        "rolling_mean": grouped.transform(
+            lambda s: s.rolling(WINDOW, min_periods=1).mean()
+        ),
+        "rolling_var": grouped.transform(
+            lambda s: s.rolling(WINDOW, min_periods=1).var()
+        ),
+        "rolling_count": grouped.transform(
+            lambda s: s.rolling(WINDOW, min_periods=1).count()
+        ),
+        "ewma": grouped.transform(lambda s: s.ewm(alpha=ALPHA, adjust=True).mean()),
+        "count": grouped.cumcount() + 1,
+    }
+
+
+def assert_matches_pandas(features, expected):
+    for name, values in expected.items():
+        np.testing.assert_allclose(
+            features[name], values.to_numpy(dtype=float), rtol=1e-9, atol=1e-9
+        )
+
+
+def test_batch_update_matches_pandas(season_results):
+    engine = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA)
+
+    features = engine.update_batch(
+        season_results["entity"].tolist(), season_results["value"]
+    )
+
+    assert_matches_pandas(features, pandas_features(season_results, "value"))
+
+
+def test_single_updates_match_pandas(season_results):
+    engine = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA)
+    frame = season_results.head(600)
+
+    rows = [engine.update(e, v) for e, v in zip(frame["entity"], frame["value"])]
+
+    features = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+    assert_matches_pandas(features, pandas_features(frame, "value"))
+
+
+def test_multiple_metrics(season_results):
+    engine = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA, n_metrics=2)
+
+    features = engine.update_batch(
+        season_results["entity"].tolist(), season_results[["value", "margin"]]
+    )
+
+    for column, name in enumerate(["value", "margin"]):
+        expected = pandas_features(season_results, name)
+        assert_matches_pandas(
+            {key: array[:, column] for key, array in features.items()}, expected
+        )
+
+
+def test_split_batches_equal_single_batch(season_results):
+    entities = season_results["entity"].tolist()
+    values = season_results["value"].to_numpy()
+    whole = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA)
+    split = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA)
+
+    expected = whole.update_batch(entities, values)
+    split.update_batch(entities[:1234], values[:1234])
+    tail = split.update_batch(entities[1234:], values[1234:])
+
+    np.testing.assert_allclose(tail["rolling_var"], expected["rolling_var"][1234:])
+    np.testing.assert_allclose(tail["ewma"], expected["ewma"][1234:])
+
+
+def test_checkpoint_and_restore(season_results, tmp_path):
+    entities = season_results["entity"].tolist()
+    values = season_results["value"].to_numpy()
+    engine = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA)
+    expected = RollingFeatureEngine(window=WINDOW, ewma_alpha=ALPHA).update_batch(
+        entities, values
+    )
+
+    engine.update_batch(entities[:2500], values[:2500])
+    engine.checkpoint(str(tmp_path / "rolling.npz"))
+    restored = RollingFeatureEngine.restore(str(tmp_path / "rolling.npz"))
+    resumed = restored.update_batch(entities[2500:], values[2500:])
+
+    assert restored.entities == engine.entities
+    np.testing.assert_allclose(resumed["rolling_mean"], expected["rolling_mean"][2500:])
+    np.testing.assert_allclose(resumed["ewma"], expected["ewma"][2500:])
+
+
+def test_features_for_unseen_entity():
+    engine = RollingFeatureEngine()
+
+    with pytest.raises(KeyError):
+        engine.features(("team", "unknown"))
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        RollingFeatureEngine(window=0)
+    with pytest.raises(ValueError):
+        RollingFeatureEngine(ewma_alpha=0)
+    with pytest.raises(ValueError):
+        RollingFeatureEngine(n_metrics=2).update("team", 1.0)
+
+
+def test_season_replay_throughput():
+    """A one-million-result replay should sustain a high update rate."""
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    entities = rng.integers(0, 20000, size=n).tolist()
+    values = rng.normal(size=n)
+    engine = RollingFeatureEngine(window=WINDOW)
+
+    start = time.perf_counter()
+    engine.update_batch(entities, values, return_features=False)
+    rate = n / (time.perf_counter() - start)
+
+    assert rate > 250_000
@@ -0,0 +1,132 @@
+"""Tests for the event-time-aware poll and rescore scheduler."""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from config.app_config import Config
+from src.data_pipelines.scheduler import (
+    POLL_TIERS,
+    EventScheduler,
+    RateBudget,
+    interval_for,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1_800_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def polls(tasks):
+    return [task.event_id for task in tasks if task.kind == "poll"]
+
+
+def test_interval_tightens_towards_the_jump():
+    intervals = [
+        interval_for(t, POLL_TIERS) for t in (2 * 86400, 3600, 600, 120, 30, -10)
+    ]
+
+    assert intervals == sorted(intervals, reverse=True)
+    assert intervals[0] == 3600 and intervals[-1] == 5
+
+
+def test_polls_follow_tiers_and_stop_after_grace():
+    clock = FakeClock()
+    scheduler = EventScheduler(grace=60, clock=clock)
+    scheduler.add("R1", "racing", clock.now + 400)
+
+    times = []
+    while len(scheduler):
+        if polls(scheduler.due()):
+            times.append(clock.now)
+        clock.now = scheduler.next_due() or clock.now + 1
+
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert gaps[0] == 30  # 400s out
+    assert gaps[-1] == 5  # inside the last minute
+    assert gaps == sorted(gaps, reverse=True)
+    assert times[-1] <= clock.now and times[-1] - times[0] <= 400 + 60
+
+
+def test_updated_start_time_reschedules():
+    clock = FakeClock()
+    scheduler = EventScheduler(clock=clock)
+    start = datetime.fromtimestamp(clock.now) + timedelta(days=2)
+    scheduler.add("E1", "odds_api", start)
+    scheduler.due()
+    assert scheduler.next_due() == clock.now + 1800  # next rescore
+
+    scheduler.add("E1", "odds_api", (start - timedelta(days=2, minutes=-2)).isoformat())
+
+    assert scheduler.next_due() == clock.now
+    assert polls(scheduler.due()) == ["E1"]
+
+
+def test_short_budget_goes_to_events_nearest_the_jump():
+    clock = FakeClock()
+    budget = RateBudget(10, 100, clock)  # one request per 10s
+    scheduler = EventScheduler(
+        {"odds_api": budget}, priority_horizon=7200, reserve=0.5, clock=clock
+    )
+    for i in range(8):
+        scheduler.add(f"near{i}", "odds_api", clock.now + 3600 + i)
+    scheduler.add("far", "odds_api", clock.now + 86400 * 2)
+
+    first = polls(scheduler.due())
+
+    assert first == [f"near{i}" for i in range(8)]
+    assert scheduler.deferred == 1  # "far" would dip into the reserve
+    assert budget.tokens == pytest.approx(2)
+
+    # 5 more tokens: "late" takes one and "far" can have one above the
+    # reserve of 5.
+    clock.now += 50
+    scheduler.add("late", "odds_api", clock.now + 30)
+    assert polls(scheduler.due()) == ["late", "far"]
+
+
+def test_rescores_are_not_throttled():
+    clock = FakeClock()
+    scheduler = EventScheduler({"odds_api": RateBudget(1, 3600, clock)}, clock=clock)
+    for i in range(3):
+        scheduler.add(f"E{i}", "odds_api", clock.now + 100)
+
+    tasks = scheduler.due()
+
+    assert len(polls(tasks)) == 1
+    assert sum(task.kind == "rescore" for task in tasks) == 3
+
+
+def test_run_dispatches_by_kind():
+    scheduler = EventScheduler()
+    scheduler.add("E1", "odds_api", datetime.now() + timedelta(minutes=10))
+    seen = {"poll": [], "rescore": []}
+    stop = threading.Event()
+
+    def handle(kind):
+        def handler(tasks):
+            seen[kind].extend(tasks)
+            if seen["poll"] and seen["rescore"]:
+                stop.set()
+
+        return handler
+
+    scheduler.run({kind: handle(kind) for kind in seen}, stop, max_sleep=0.01)
+
+    assert [t.event_id for t in seen["poll"]] == ["E1"]
+    assert [t.event_id for t in seen["rescore"]] == ["E1"]
+
+
+def test_from_config_uses_rate_limits():
+    app_config = Config()
+    app_config.set("RATE_LIMIT_REQUESTS", 500)
+    app_config.set("RATE_LIMIT_WINDOW", 60)
+
+    budget = EventScheduler.from_config(app_config).budget("odds_api")
+
+    assert budget.capacity == 500 and budget.rate == pytest.approx(500 / 60)
@@ -0,0 +1,129 @@
+"""
+Tests for ragged-array sectional-time features.
+
+Each feature is compared with a straightforward per-runner Python
+computation.
+"""
+
+import math
+import time
+
+import numpy as np
+import pytest
+
+from src.data_pipelines.sectional_features import (
+    SECTIONAL_FEATURE_NAMES,
+    SectionalArray,
+    sectional_features,
+)
+
+
+def reference_features(splits, last_n=3, segment_distance=200.0):
+    """Per-run Python reference implementation."""
+    valid = [(i, x) for i, x in enumerate(splits) if x is not None and x > 0]
+    times = [x for _, x in valid]
+    n = len(splits)
+    nan = float("nan")
+    result = {
+        "n_splits": n,
+        "n_missing": n - len(times),
+        "total_time": sum(times) if times and len(times) == n else nan,
+    }
+    if not times:
+        return {
+            **result,
+            **{k: nan for k in SECTIONAL_FEATURE_NAMES if k not in result},
+        }
+
+    mean = sum(times) / len(times)
+    early = [x for i, x in valid if i < n // 2]
+    late = [x for i, x in valid if i >= n - n // 2]
+    result.update({
+        "mean_split": mean,
+        "split_std": math.sqrt(sum((x - mean) ** 2 for x in times) / len(times)),
+        "best_split": min(times),
+        "first_split": times[0],
+        "last_split": times[-1],
+        "closing_speed": segment_distance / times[-1],
+        "finish_ratio": (
+            times[-1] / (sum(times[:-1]) / (len(times) - 1)) if len(times) > 1 else nan
+        ),
+        "early_late_ratio": (
+            (sum(early) / len(early)) / (sum(late) / len(late))
+            if early and late
+            else nan
+        ),
+        "best_last_n": min(times[-last_n:]),
+    })
+    return result
+
+
+@pytest.fixture
+def meeting_sectionals():
+    """Ragged sectionals with missing splits, empty runs and None runners."""
+    rng = np.random.default_rng(5)
+    runs = []
+    for _ in range(400):
+        length = int(rng.integers(0, 9))
+        splits = rng.normal(12.0, 0.6, size=length).round(2).tolist()
+        for i in range(length):
+            if rng.random() < 0.1:
+                splits[i] = None
+        runs.append(splits)
+    runs.extend([None, [], [None, None], [11.9]])
+    return runs
+
+
+def test_features_match_reference(meeting_sectionals):
+    features = sectional_features(SectionalArray.from_lists(meeting_sectionals))
+
+    assert set(features) == set(SECTIONAL_FEATURE_NAMES)
+    for name in SECTIONAL_FEATURE_NAMES:
+        expected = [reference_features(run or [])[name] for run in meeting_sectionals]
+        np.testing.assert_allclose(
+            features[name], expected, rtol=1e-12, equal_nan=True, err_msg=name
+        )
+
+
+def test_best_last_n_and_distance_parameters(meeting_sectionals):
+    packed = SectionalArray.from_lists(meeting_sectionals)
+
+    features = sectional_features(packed, last_n=1, segment_distance=400.0)
+
+    np.testing.assert_allclose(features["best_last_n"], features["last_split"])
+    np.testing.assert_allclose(
+        features["closing_speed"], 400.0 / features["last_split"]
+    )
+
+
+def test_from_runners_accepts_mappings_and_objects():
+    class Runner:
+        sectional_times = [12.0, 11.5]
+
+    packed = SectionalArray.from_runners([{"sectional_times": [12.2]}, Runner(), {}])
+
+    np.testing.assert_array_equal(packed.offsets, [0, 1, 3, 3])
+    np.testing.assert_array_equal(packed.lengths, [1, 2, 0])
+
+
+def test_invalid_layout():
+    with pytest.raises(ValueError):
+        SectionalArray([1.0, 2.0], [0, 1])
+    with pytest.raises(ValueError):
+        SectionalArray([1.0, 2.0], [0, 2, 1, 2])
+    with pytest.raises(ValueError):
+        sectional_features(SectionalArray.from_lists([[1.0]]), last_n=0)
+
+
+def test_meeting_history_in_milliseconds():
+    """Features for 20k historical runs should take well under a second."""
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(4, 12, size=20000)
+    offsets = np.r_[0, np.cumsum(lengths)]
+    packed = SectionalArray(rng.normal(12.0, 0.5, size=offsets[-1]), offsets)
+
+    start = time.perf_counter()
+    sectional_features(packed)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.5
@@ -0,0 +1,158 @@
+"""
+Tests for shadow-mode challenger scoring.
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.shadow_scoring import MLPModel, run_benchmark
+from src.core_engine.base_model import BasePredictiveModel
+from src.core_engine.shadow import ShadowLog, ShadowScorer, read_shadow_log
+
+
+class ConstantModel(BasePredictiveModel):
+    def __init__(self, probability, delay=0.0):
+        self.probability = probability
+        self.delay = delay
+
+    def predict(self, features):
+        if self.delay:
+            time.sleep(self.delay)
+        return {"prediction_probability": self.probability * features["x"]}
+
+    def explain(self, features):
+        return {}
+
+
+class FailingModel(ConstantModel):
+    def predict(self, features):
+        raise ValueError("broken challenger")
+
+
+BATCH = [{"x": 1.0}, {"x": 0.5}, {"x": 0.25}]
+
+
+def test_logs_every_model_for_each_batch(tmp_path):
+    """Test that production and challenger outputs land in the log."""
+    with ShadowLog(tmp_path, flush_rows=4) as log:
+        with ShadowScorer(
+            ConstantModel(0.5),
+            {"a": ConstantModel(0.6), "b": ConstantModel(0.7)},
+            log=log,
+            use_processes=False,
+            dispatch_interval=0.01,
+        ) as scorer:
+            predictions = scorer.score_batch(BATCH, keys=["s1", "s2", "s3"])
+            scorer.score_batch(BATCH, keys=["s4", "s5", "s6"])
+
+    assert [p["prediction_probability"] for p in predictions] == [0.5, 0.25, 0.125]
+    assert scorer.stats == {"batches": 2, "shadowed": 2, "dropped": 0, "errors": 0}
+
+    rows = read_shadow_log(tmp_path)
+    assert len(rows["row"]) == 18
+    assert sorted(set(rows["model"])) == ["a", "b", "production"]
+    challenger_b = (rows["model"] == "b") & (rows["batch_id"] == 1)
+    assert list(rows["key"][challenger_b]) == ["s4", "s5", "s6"]
+    np.testing.assert_allclose(rows["probability"][challenger_b], [0.7, 0.35, 0.175])
+
+
+def test_challengers_in_worker_processes(tmp_path):
+    """Test shadowing through the default low-priority process pool."""
+    with ShadowLog(tmp_path) as log:
+        with ShadowScorer(
+            MLPModel(2), {"deep": MLPModel(4, seed=1)}, log=log
+        ) as scorer:
+            for _ in range(3):
+                scorer.score_batch([{"x": 0.1}, {"x": 0.2}])
+
+    rows = read_shadow_log(tmp_path)
+    assert scorer.stats["shadowed"] == 3
+    assert np.count_nonzero(rows["model"] == "deep") == 6
+
+
+def test_drops_batches_when_challengers_fall_behind():
+    """Test that a slow challenger drops batches instead of blocking."""
+    with ShadowScorer(
+        ConstantModel(0.5),
+        {"slow": ConstantModel(0.5, delay=0.05)},
+        max_pending=2,
+        use_processes=False,
+        dispatch_interval=0.01,
+    ) as scorer:
+        start = time.perf_counter()
+        for _ in range(20):
+            scorer.score_batch(BATCH)
+        elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.2
+    assert scorer.stats["dropped"] >= 15
+    assert scorer.stats["shadowed"] + scorer.stats["dropped"] == 20
+
+
+def test_production_rows_are_logged_while_challengers_run(tmp_path):
+    """Test that a slow challenger does not hold back production rows."""
+    with ShadowLog(tmp_path) as log:
+        with ShadowScorer(
+            ConstantModel(0.5),
+            {"slow": ConstantModel(0.5, delay=0.1)},
+            log=log,
+            use_processes=False,
+            dispatch_interval=0.01,
+        ) as scorer:
+            scorer.score_batch(BATCH)
+            time.sleep(0.05)
+            log.flush()
+            models = read_shadow_log(tmp_path)["model"]
+
+            assert np.count_nonzero(models == "production") == 3
+            assert "slow" not in models
+
+
+def test_unlogged_production_rows_are_bounded(tmp_path):
+    """Test that production rows beyond max_log_pending are dropped."""
+    with ShadowLog(tmp_path) as log:
+        with ShadowScorer(
+            ConstantModel(0.5), {}, log=log, max_log_pending=3, dispatch_interval=60
+        ) as scorer:
+            for _ in range(5):
+                scorer.score_batch(BATCH)
+
+    assert scorer.stats["dropped"] == 2
+    assert len(read_shadow_log(tmp_path)["row"]) == 9
+
+
+def test_failing_challenger_does_not_affect_production(tmp_path):
+    """Test that challenger errors are counted and other models still log."""
+    with ShadowLog(tmp_path) as log:
+        with ShadowScorer(
+            ConstantModel(0.5),
+            {"broken": FailingModel(0.0), "ok": ConstantModel(0.6)},
+            log=log,
+            use_processes=False,
+        ) as scorer:
+            predictions = scorer.score_batch(BATCH)
+
+    assert predictions[0]["prediction_probability"] == 0.5
+    assert scorer.stats["errors"] == 1
+    assert sorted(set(read_shadow_log(tmp_path)["model"])) == ["ok", "production"]
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        ShadowScorer(ConstantModel(0.5), {"production": ConstantModel(0.5)})
+    with pytest.raises(ValueError):
+        ShadowScorer(ConstantModel(0.5), {}, max_pending=0)
+
+
+def test_benchmark_accounts_for_every_batch():
+    """Smoke run of the shadow benchmark; latency is compared by
+    `python -m benchmarks shadow`, not here."""
+    result = run_benchmark(n_batches=40, rounds=2, interval=0.0)
+
+    stats = result["stats"]
+    assert stats["batches"] == 60  # 20 warm-up batches
+    assert stats["shadowed"] > 0 and stats["errors"] == 0
+    assert stats["shadowed"] + stats["dropped"] == stats["batches"]
+    assert result["baseline"]["batches"] == result["shadow"]["batches"] == 40
@@ -0,0 +1,72 @@
+"""
+Tests for value scores and fractional Kelly staking.
+"""
+
+import numpy as np
+import pytest
+
+from config.app_config import Config
+from src.core_engine.instrumentation import get_instrumentation
+from src.core_engine.staking import kelly_fractions, kelly_stakes, value_scores
+
+
+def test_value_scores():
+    np.testing.assert_allclose(
+        value_scores([0.5, 0.4, 0.5], [2.5, 1.5, 2.0]), [0.25, -0.4, 0.0]
+    )
+
+
+def test_kelly_fractions():
+    """Test full Kelly against f* = (p * o - 1) / (o - 1)."""
+    np.testing.assert_allclose(
+        kelly_fractions([0.5, 0.4, 0.6], [2.5, 1.5, 2.0]), [0.25 / 1.5, 0.0, 0.2]
+    )
+    with pytest.raises(ValueError):
+        kelly_fractions([0.5], [1.0])
+
+
+def test_kelly_stakes_apply_limits():
+    """Test fraction, bankroll cap, minimum stake and odds range."""
+    config = Config()
+    config.set("KELLY_FRACTION", 0.25)
+    config.set("MAX_STAKE_PERCENTAGE", 0.02)
+    config.set("MIN_STAKE", 10.0)
+    config.set("MAX_STAKE", 1000.0)
+    config.set("MIN_ODDS", 1.1)
+    config.set("MAX_ODDS", 10.0)
+
+    stakes = kelly_stakes(
+        [0.55, 0.9, 0.505, 0.2, 0.5],
+        [2.0, 2.0, 2.0, 12.0, 1.9],
+        bankroll=10_000.0,
+        app_config=config,
+    )
+    # 0.25 * 0.1 * 10000 = 250 -> capped at 2% of bankroll (200)
+    assert stakes[0] == pytest.approx(200.0)
+    assert stakes[1] == pytest.approx(200.0)
+    assert stakes[2] == pytest.approx(25.0)
+    assert stakes[3] == 0.0  # odds above MAX_ODDS
+    assert stakes[4] == 0.0  # no edge
+
+
+def test_kelly_stakes_read_one_snapshot():
+    """Test that a snapshot taken before a change keeps its limits."""
+    config = Config()
+    config.set("KELLY_FRACTION", 0.25)
+    config.set("MAX_STAKE_PERCENTAGE", 0.5)
+    snapshot = config.snapshot()
+    config.set("KELLY_FRACTION", 0.5)
+
+    before = kelly_stakes([0.55], [2.0], bankroll=1000.0, app_config=snapshot)
+    after = kelly_stakes([0.55], [2.0], bankroll=1000.0, app_config=config)
+
+    assert after[0] == pytest.approx(2 * before[0])
+
+
+def test_kelly_stakes_are_timed():
+    histograms = get_instrumentation().histograms()
+    before = histograms["stake"].total if "stake" in histograms else 0
+
+    kelly_stakes([0.6, 0.3], [2.0, 3.0], 1000.0, Config())
+
+    assert get_instrumentation().histograms()["stake"].total == before + 1
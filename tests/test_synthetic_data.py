@@ -0,0 +1,127 @@
+"""Tests for the synthetic data generator and the unified schemas."""
+
+import json
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from src.data_pipelines.schemas import UnifiedRacingData, UnifiedSportsData
+from src.data_pipelines.synthetic import (
+    MATCH_OUTCOMES,
+    SyntheticDataGenerator,
+    main,
+    read_columnar,
+    write_columnar,
+    write_jsonl,
+)
+
+
+def test_matches_follow_the_sample_shape_and_are_seeded():
+    with open("tests/test_data/sample_matches.json") as f:
+        sample = json.load(f)[0]
+
+    first = list(SyntheticDataGenerator(seed=3, chunk_size=7).matches(20))
+    again = list(SyntheticDataGenerator(seed=3, chunk_size=7).matches(20))
+    other = list(SyntheticDataGenerator(seed=4, chunk_size=7).matches(20))
+
+    assert first == again
+    assert first != other
+    assert len({match["match_id"] for match in first}) == 20
+    for match in first:
+        assert match.keys() == sample.keys()
+        for key in ("closing_odds", "opening_odds", "model_predictions"):
+            assert match[key].keys() == sample[key].keys()
+        assert match["home_team"] != match["away_team"]
+        assert sum(match["model_predictions"].values()) == pytest.approx(1, abs=0.01)
+
+
+def test_results_are_consistent_with_implied_probabilities():
+    generator = SyntheticDataGenerator(seed=0, margin=0.05)
+    chunk = next(generator.match_chunks(200_000))
+
+    implied = 1.0 / chunk["closing_odds"]
+    assert implied.sum(axis=1).mean() == pytest.approx(1.05, abs=0.005)
+    fair = implied / implied.sum(axis=1, keepdims=True)
+
+    frequencies = np.bincount(chunk["result"], minlength=3) / len(chunk["result"])
+    np.testing.assert_allclose(frequencies, fair.mean(axis=0), atol=0.005)
+
+    # Closing prices are closer to the truth than opening prices.
+    opening = 1.0 / chunk["opening_odds"]
+    opening /= opening.sum(axis=1, keepdims=True)
+    truth = chunk["true_probabilities"]
+    assert np.abs(fair - truth).mean() < np.abs(opening - truth).mean()
+
+
+def test_odds_series_drift_from_opening_to_closing(tmp_path):
+    generator = SyntheticDataGenerator(seed=1, chunk_size=50)
+    series = list(generator.odds_series(120, n_steps=24))
+    matches = list(generator.match_chunks(120))
+
+    assert [len(chunk["index"]) for chunk in series] == [50, 50, 20]
+    for chunk, match in zip(series, matches):
+        assert chunk["odds"].shape == (len(match["index"]), 24, 3)
+        np.testing.assert_array_equal(chunk["odds"][:, 0], match["opening_odds"])
+        np.testing.assert_array_equal(chunk["odds"][:, -1], match["closing_odds"])
+        assert np.all(chunk["odds"] > 1.0)
+
+    assert write_columnar(series, tmp_path / "odds") == 120
+    loaded = read_columnar(tmp_path / "odds")
+    assert loaded["odds"].shape == (120, 24, 3)
+    np.testing.assert_array_equal(loaded["steps_to_start"], np.arange(23, -1, -1))
+
+
+def test_unified_records_validate_and_stream_to_jsonl(tmp_path):
+    generator = SyntheticDataGenerator(seed=2)
+
+    path = tmp_path / "races.jsonl"
+    assert write_jsonl(generator.racing_events(25), path) == 25
+    with open(path) as f:
+        races = [UnifiedRacingData.model_validate_json(line) for line in f]
+    assert all(6 <= len(race.runners) <= 16 for race in races)
+    for race in races:
+        overround = sum(1.0 / runner.win_odds for runner in race.runners)
+        assert overround == pytest.approx(1.15, abs=0.02)
+
+    assert main(["sports", "--count", "10", "--output", str(tmp_path / "s.jsonl")]) == 0
+    with open(tmp_path / "s.jsonl") as f:
+        games = [UnifiedSportsData.model_validate_json(line) for line in f]
+    assert [market.market_key for market in games[0].markets] == ["h2h", "player_tries"]
+
+    with pytest.raises(ValidationError):
+        UnifiedRacingData(**{**races[0].model_dump(), "runners": races[0].runners[:1]})
+
+
+def test_clv_metrics_follow_the_sample_convention():
+    with open("tests/test_data/sample_matches.json") as f:
+        sample = json.load(f)
+
+    for match in sample + list(SyntheticDataGenerator(seed=5).matches(50)):
+        for outcome, name in zip(("home", "draw", "away"), MATCH_OUTCOMES):
+            opening = match["opening_odds"][name]
+            closing = match["closing_odds"][name]
+            assert match["clv_metrics"][f"{outcome}_clv"] == pytest.approx(
+                closing / opening - 1, abs=5e-4
+            )
+
+
+def test_event_winners_follow_implied_probabilities():
+    generator = SyntheticDataGenerator(seed=6)
+    games = list(generator.sports_events(4000))
+    races = list(generator.racing_events(4000))
+
+    home_wins = np.mean([game.winner == game.home_team for game in games])
+    implied = np.array([
+        [1 / o.price for o in game.markets[0].outcomes] for game in games
+    ])
+    assert home_wins == pytest.approx((implied[:, 0] / implied.sum(1)).mean(), abs=0.03)
+
+    favourite_wins, favourite_chance = [], []
+    for race in races:
+        odds = np.array([runner.win_odds for runner in race.runners])
+        favourite = int(odds.argmin())
+        assert race.winner in {runner.runner_id for runner in race.runners}
+        favourite_wins.append(race.winner == race.runners[favourite].runner_id)
+        favourite_chance.append((1 / odds[favourite]) / (1 / odds).sum())
+    assert np.mean(favourite_wins) == pytest.approx(np.mean(favourite_chance), abs=0.03)